@@ -0,0 +1,433 @@
+"""Admission control for the FinalSpec and LinkerList mutations.
+
+A combinatorial derivation describes the product of the variants of its
+variable components, so a short SBOL document can describe billions of
+constructs, and the parser enumerates every one of them before sampling.
+Before a request does any work the number of constructs and the enumeration
+time are estimated from the document's derivations, without enumerating and
+without building the sbol2 document: scan_design streams the RDF/XML and
+keeps only the references between definitions, derivations and collections.
+
+- designs over ADMISSION_MAX_CONSTRUCTS constructs or ADMISSION_MAX_COST_S
+  seconds are rejected,
+- FinalSpec jobs over ADMISSION_DEFER_COST_S seconds are deferred: workers
+  claim them after every cheaper job and run at most
+  ADMISSION_MAX_DEFERRED_RUNNING of them at a time,
+- a client (see client_id) has at most ADMISSION_MAX_CLIENT_JOBS queued or
+  running FinalSpec jobs or BatchFinalSpec batches (a batch counts once)
+  and ADMISSION_MAX_CLIENT_REQUESTS LinkerList requests in progress in each
+  web process,
+- a batch has at most ADMISSION_MAX_BATCH_DESIGNS designs.
+
+Rejections raise AdmissionError, returned by the mutations as GraphQL errors
+whose extensions carry the code, the estimate and the exceeded limit.
+"""
+import io
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Union
+from xml.etree import ElementTree
+
+from django.conf import settings
+
+from assembly_methods.models import AssemblyJob
+
+# Error codes, in the extensions of the GraphQL errors
+DESIGN_TOO_LARGE = 'DESIGN_TOO_LARGE'
+DESIGN_TOO_EXPENSIVE = 'DESIGN_TOO_EXPENSIVE'
+DESIGN_CYCLIC = 'DESIGN_CYCLIC'
+TOO_MANY_JOBS = 'TOO_MANY_JOBS'
+TOO_MANY_REQUESTS = 'TOO_MANY_REQUESTS'
+TOO_MANY_DESIGNS = 'TOO_MANY_DESIGNS'
+
+# Enumeration time model, fitted on the example documents (1795 component
+# definitions created from 45 in 37 s): each created definition is copied
+# from its parent and compared with every definition of the document
+SECONDS_PER_DEFINITION = 3e-3
+SECONDS_PER_LOOKUP = 8e-6
+
+_client_requests = {}
+_client_requests_lock = threading.Lock()
+
+_SBOL = '{http://sbols.org/v2#}'
+_RDF = '{http://www.w3.org/1999/02/22-rdf-syntax-ns#}'
+
+
+class AdmissionError(Exception):
+    """A request refused by admission control.
+
+    Args:
+        message (str): Description of the refusal.
+        code (str): One of the error codes of this module.
+        estimate (Dict[str, Any]): See estimate_design, or the client's
+            current usage.
+        limit (Dict[str, Any]): The exceeded setting and its value.
+    """
+
+    def __init__(self, message: str, code: str,
+                 estimate: Dict[str, Any] = None,
+                 limit: Dict[str, Any] = None):
+        super().__init__(message)
+        self.code = code
+        self.estimate = estimate
+        self.limit = limit
+
+    @property
+    def extensions(self) -> Dict[str, Any]:
+        """Extensions of the GraphQL error."""
+        return {'code': self.code, 'estimate': self.estimate,
+                'limit': self.limit}
+
+
+def scan_design(source: Union[bytes, str]) -> Dict[str, Any]:
+    """Reads the outline of a design from its RDF/XML, without building the
+    sbol2 document.
+
+    Args:
+        source (Union[bytes, str]): The document, or the path of its file.
+
+    Returns:
+        Dict[str, Any]: definitions (URI of each component definition to the
+        definitions of its components), derivations (URI of each
+        combinatorial derivation to its template and variable components,
+        each with its variants, variant_collections and
+        variant_derivations) and collections (URI to members).
+
+    Raises:
+        ValueError: If the document is not well formed XML.
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    definitions = {}
+    derivations = {}
+    collections = {}
+    definition = derivation = variable_component = collection = None
+    references = {
+        _SBOL + 'variant': 'variants',
+        _SBOL + 'variantCollection': 'variant_collections',
+        _SBOL + 'variantDerivation': 'variant_derivations',
+    }
+    depth = 0
+    root = None
+    try:
+        for event, element in ElementTree.iterparse(
+                source, events=('start', 'end')):
+            tag = element.tag
+            if event == 'end':
+                depth -= 1
+                if tag == _SBOL + 'ComponentDefinition':
+                    definition = None
+                elif tag == _SBOL + 'CombinatorialDerivation':
+                    derivation = None
+                elif tag == _SBOL + 'VariableComponent':
+                    variable_component = None
+                elif tag == _SBOL + 'Collection':
+                    collection = None
+                if depth == 1:
+                    # Drops each top level object once it has been read
+                    root.clear()
+                continue
+            if root is None:
+                root = element
+            depth += 1
+            resource = element.get(_RDF + 'resource')
+            if tag == _SBOL + 'ComponentDefinition':
+                definition = definitions.setdefault(
+                    element.get(_RDF + 'about'), [])
+            elif tag == _SBOL + 'CombinatorialDerivation':
+                derivation = derivations.setdefault(
+                    element.get(_RDF + 'about'),
+                    {'template': None, 'variable_components': []})
+            elif tag == _SBOL + 'VariableComponent' and \
+                    derivation is not None:
+                variable_component = {key: []
+                                      for key in references.values()}
+                derivation['variable_components'].append(variable_component)
+            elif tag == _SBOL + 'Collection':
+                collection = collections.setdefault(
+                    element.get(_RDF + 'about'), [])
+            elif resource is None:
+                continue
+            elif tag in references and variable_component is not None:
+                variable_component[references[tag]].append(resource)
+            elif tag == _SBOL + 'template' and derivation is not None:
+                derivation['template'] = resource
+            elif tag == _SBOL + 'definition' and definition is not None:
+                definition.append(resource)
+            elif tag == _SBOL + 'member' and collection is not None:
+                collection.append(resource)
+    except ElementTree.ParseError as error:
+        raise ValueError('The SBOL document is not valid XML: {}'.format(
+            error))
+    return {'definitions': definitions, 'derivations': derivations,
+            'collections': collections}
+
+
+def _count_derivation(
+    outline: Dict[str, Any],
+    uri: str,
+    stack: tuple,
+    counts: Dict[str, Dict[str, int]]
+) -> Dict[str, int]:
+    # Counts of one derivation, from the sizes of its variable components
+    if uri in stack:
+        raise AdmissionError(
+            'Combinatorial derivation {} derives from itself'.format(uri),
+            DESIGN_CYCLIC)
+    if uri in counts:
+        return counts[uri]
+    derivation = outline['derivations'].get(
+        uri, {'variable_components': []})
+    constructs = 1
+    # definitions created by this derivation (shared children create theirs
+    # once), and created or revisited on every enumeration
+    created = 0
+    visits = 0
+    depth = 0
+    variable_components = 0
+    max_variants = 0
+    for vc in derivation['variable_components']:
+        variants = len(vc['variants'])
+        for collection_uri in vc['variant_collections']:
+            variants += sum(
+                member in outline['definitions']
+                for member in outline['collections'].get(collection_uri, []))
+        for child_uri in vc['variant_derivations']:
+            child = _count_derivation(outline, child_uri, stack + (uri,),
+                                      counts)
+            variants += child['constructs']
+            # the parser enumerates the child again for each parent
+            visits += constructs * child['visits']
+            depth = max(depth, child['nesting_depth'] + 1)
+            variable_components += child['variable_components']
+            max_variants = max(max_variants, child['max_variants'])
+        constructs *= variants
+        created += constructs
+        visits += constructs
+        variable_components += 1
+        max_variants = max(max_variants, variants)
+    counts[uri] = {'constructs': constructs, 'definitions': created,
+                   'visits': visits, 'nesting_depth': depth,
+                   'variable_components': variable_components,
+                   'max_variants': max_variants}
+    return counts[uri]
+
+
+def estimate_design(outline: Dict[str, Any]) -> Dict[str, Any]:
+    """Estimates the size and enumeration time of a design.
+
+    The roots are chosen as ParserSBOL.get_root_compdefs and
+    get_root_combderivs choose them. Variable components are taken in
+    document order, where sbol2 may list them in another, so definitions and
+    cost_s can differ by a few percent from what the parser then creates.
+
+    Args:
+        outline (Dict[str, Any]): See scan_design.
+
+    Returns:
+        Dict[str, Any]: constructs (enumerated by the parser), definitions
+        (component definitions the enumeration creates), derivations,
+        variable_components, max_variants (of one variable component),
+        nesting_depth (of variant derivations) and cost_s (estimated
+        enumeration time in seconds).
+
+    Raises:
+        AdmissionError: If a derivation derives from itself.
+    """
+    derivations = outline['derivations']
+    children = {uri for derivation in derivations.values()
+                for vc in derivation['variable_components']
+                for uri in vc['variant_derivations']}
+    root_definitions = set(outline['definitions'])
+    for components in outline['definitions'].values():
+        root_definitions.difference_update(components)
+    for derivation in derivations.values():
+        root_definitions.discard(derivation['template'])
+        for vc in derivation['variable_components']:
+            root_definitions.difference_update(vc['variants'])
+
+    counts = {}
+    roots = [_count_derivation(outline, uri, (), counts)
+             for uri in derivations if uri not in children]
+    constructs = len(root_definitions) + sum(
+        root['constructs'] for root in roots)
+    definitions = sum(count['definitions'] for count in counts.values())
+    visits = sum(root['visits'] for root in roots)
+    document_definitions = len(outline['definitions'])
+    cost = visits * (SECONDS_PER_DEFINITION + SECONDS_PER_LOOKUP * (
+        document_definitions + definitions / 2))
+    return {
+        'constructs': constructs,
+        'definitions': definitions,
+        'derivations': len(counts),
+        'variable_components': sum(
+            root['variable_components'] for root in roots),
+        'max_variants': max(
+            [root['max_variants'] for root in roots], default=0),
+        'nesting_depth': max(
+            [root['nesting_depth'] for root in roots], default=0),
+        'cost_s': round(cost, 3),
+    }
+
+
+def check_design(estimate: Dict[str, Any]) -> bool:
+    """Checks an estimate against the admission limits.
+
+    Args:
+        estimate (Dict[str, Any]): See estimate_design.
+
+    Returns:
+        bool: Whether a job of the design should be deferred.
+
+    Raises:
+        AdmissionError: If the design is over ADMISSION_MAX_CONSTRUCTS
+            constructs or ADMISSION_MAX_COST_S seconds.
+    """
+    if estimate['constructs'] > settings.ADMISSION_MAX_CONSTRUCTS:
+        raise AdmissionError(
+            'The design has {} constructs, more than the {} accepted'.format(
+                estimate['constructs'], settings.ADMISSION_MAX_CONSTRUCTS),
+            DESIGN_TOO_LARGE, estimate,
+            {'ADMISSION_MAX_CONSTRUCTS': settings.ADMISSION_MAX_CONSTRUCTS})
+    if estimate['cost_s'] > settings.ADMISSION_MAX_COST_S:
+        raise AdmissionError(
+            'The design would take about {:.0f} s to enumerate, more than '
+            'the {} s accepted'.format(estimate['cost_s'],
+                                       settings.ADMISSION_MAX_COST_S),
+            DESIGN_TOO_EXPENSIVE, estimate,
+            {'ADMISSION_MAX_COST_S': settings.ADMISSION_MAX_COST_S})
+    return estimate['cost_s'] > settings.ADMISSION_DEFER_COST_S
+
+
+def client_id(request) -> str:
+    """Returns the client of a request.
+
+    That is the ADMISSION_CLIENT_HEADER header when it is set (by an
+    authenticating proxy), otherwise the address ADMISSION_TRUSTED_PROXIES
+    hops back in X-Forwarded-For, otherwise the remote address. Behind a
+    reverse proxy the remote address is the proxy's, shared by every user.
+    """
+    if request is None:
+        return ''
+    if settings.ADMISSION_CLIENT_HEADER:
+        header = 'HTTP_' + settings.ADMISSION_CLIENT_HEADER.upper().replace(
+            '-', '_')
+        client = request.META.get(header, '').strip()
+        if client:
+            return client[:100]
+    if settings.ADMISSION_TRUSTED_PROXIES:
+        # Each proxy appends the address it was reached from, the entries
+        # before those of the trusted proxies are set by the client
+        forwarded = [address.strip() for address in request.META.get(
+            'HTTP_X_FORWARDED_FOR', '').split(',') if address.strip()]
+        if forwarded:
+            hop = min(settings.ADMISSION_TRUSTED_PROXIES, len(forwarded))
+            return forwarded[-hop][:100]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def check_client_jobs(client: str):
+    """Checks that a client has not reached ADMISSION_MAX_CLIENT_JOBS.
+
+    The jobs of a batch count as one.
+
+    Args:
+        client (str): See client_id.
+
+    Raises:
+        AdmissionError: If the client has as many queued or running jobs
+            as allowed.
+    """
+    if not client:
+        return
+    active_jobs = AssemblyJob.objects.filter(
+        client=client,
+        status__in=[AssemblyJob.QUEUED, AssemblyJob.RUNNING])
+    active = active_jobs.filter(batch=None).count() + active_jobs.exclude(
+        batch=None).values('batch').distinct().count()
+    if active >= settings.ADMISSION_MAX_CLIENT_JOBS:
+        raise AdmissionError(
+            '{} jobs of this client are queued or running, wait for one to '
+            'finish'.format(active),
+            TOO_MANY_JOBS, {'active_jobs': active},
+            {'ADMISSION_MAX_CLIENT_JOBS': settings.ADMISSION_MAX_CLIENT_JOBS})
+
+
+def admit_job(
+    outline: Optional[Dict[str, Any]],
+    client: str
+) -> Dict[str, Any]:
+    """Admits a FinalSpec job.
+
+    Args:
+        outline (Optional[Dict[str, Any]]): See scan_design, None if the
+            document could not be read (the job then fails when it runs).
+        client (str): See client_id.
+
+    Returns:
+        Dict[str, Any]: 'estimate' (see estimate_design, None without an
+        outline) and 'deferred'.
+
+    Raises:
+        AdmissionError: If the job is refused.
+    """
+    check_client_jobs(client)
+    return admit_design(outline)
+
+
+def admit_design(outline: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Admits the job of a design of an admitted batch, see admit_job."""
+    if outline is None:
+        return {'estimate': None, 'deferred': False}
+    estimate = estimate_design(outline)
+    return {'estimate': estimate, 'deferred': check_design(estimate)}
+
+
+def admit_batch(designs: int, client: str):
+    """Admits a batch, before admitting each of its designs.
+
+    Args:
+        designs (int): Number of designs of the batch.
+        client (str): See client_id.
+
+    Raises:
+        AdmissionError: If the batch has more than
+            ADMISSION_MAX_BATCH_DESIGNS designs or the client has reached
+            ADMISSION_MAX_CLIENT_JOBS.
+    """
+    if designs > settings.ADMISSION_MAX_BATCH_DESIGNS:
+        raise AdmissionError(
+            'The batch has {} designs, more than the {} accepted'.format(
+                designs, settings.ADMISSION_MAX_BATCH_DESIGNS),
+            TOO_MANY_DESIGNS, {'designs': designs},
+            {'ADMISSION_MAX_BATCH_DESIGNS':
+                settings.ADMISSION_MAX_BATCH_DESIGNS})
+    check_client_jobs(client)
+
+
+@contextmanager
+def client_slot(client: str) -> Iterator[None]:
+    """Holds one of the client's ADMISSION_MAX_CLIENT_REQUESTS slots.
+
+    Args:
+        client (str): See client_id.
+
+    Raises:
+        AdmissionError: If the client has no free slot in this process.
+    """
+    with _client_requests_lock:
+        active = _client_requests.get(client, 0)
+        if client and active >= settings.ADMISSION_MAX_CLIENT_REQUESTS:
+            raise AdmissionError(
+                '{} requests of this client are in progress'.format(active),
+                TOO_MANY_REQUESTS, {'active_requests': active},
+                {'ADMISSION_MAX_CLIENT_REQUESTS':
+                    settings.ADMISSION_MAX_CLIENT_REQUESTS})
+        _client_requests[client] = active + 1
+    try:
+        yield
+    finally:
+        with _client_requests_lock:
+            _client_requests[client] -= 1
+            if not _client_requests[client]:
+                del _client_requests[client]
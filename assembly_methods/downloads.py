@@ -0,0 +1,101 @@
+"""Zip bundles of a job's generated files.
+
+The archive is written chunk by chunk into the HTTP response, so nothing is
+staged on disk and only one chunk of it is held in memory. The ETag of a
+bundle is the hash of the files it contains.
+"""
+import hashlib
+import io
+import os
+import zipfile
+from typing import Iterator, List, Tuple
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _ZipStream(io.RawIOBase):
+    # Unseekable sink, so zipfile writes data descriptors after each member
+    # instead of seeking back to patch the headers
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def bundle_files(
+    output_folder: str,
+    output_links: List[str]
+) -> List[Tuple[str, str]]:
+    """Returns the files of a bundle and their names in the archive.
+
+    Args:
+        output_folder (str): Folder the job wrote to, names in the archive
+            are relative to it (e.g. run_1/bb_assembly_protocol.py).
+        output_links (List[str]): Paths of the generated files.
+
+    Returns:
+        List[Tuple[str, str]]: (name in archive, path) of each existing
+        file, sorted by name.
+    """
+    files = {}
+    for path in output_links:
+        if not os.path.isfile(path):
+            continue
+        arcname = os.path.relpath(path, output_folder)
+        if arcname.startswith(os.pardir):
+            arcname = os.path.basename(path)
+        files[arcname.replace(os.sep, '/')] = path
+    return sorted(files.items())
+
+
+def content_hash(files: List[Tuple[str, str]]) -> str:
+    """Returns the sha256 hex digest of the names and contents of files.
+
+    Args:
+        files (List[Tuple[str, str]]): See bundle_files.
+    """
+    digest = hashlib.sha256()
+    for arcname, path in files:
+        file_digest = hashlib.sha256()
+        with open(path, 'rb') as source:
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                file_digest.update(chunk)
+        digest.update('{}\0{}\n'.format(
+            arcname, file_digest.hexdigest()).encode())
+    return digest.hexdigest()
+
+
+def iter_zip(files: List[Tuple[str, str]]) -> Iterator[bytes]:
+    """Yields a deflated zip archive of files in chunks.
+
+    Args:
+        files (List[Tuple[str, str]]): See bundle_files.
+
+    Yields:
+        bytes: The next part of the archive.
+    """
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for arcname, path in files:
+            info = zipfile.ZipInfo.from_file(path, arcname)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with open(path, 'rb') as source, archive.open(info, 'w') as dest:
+                for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                    dest.write(chunk)
+                    data = stream.pop()
+                    if data:
+                        yield data
+            yield stream.pop()
+    yield stream.pop()
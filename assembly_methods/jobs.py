@@ -0,0 +1,612 @@
+"""Background jobs for the FinalSpec and BatchFinalSpec mutations.
+
+Parsing a large combinatorial design and generating its scripts can take
+minutes, so FinalSpec only stores an AssemblyJob and returns its id. Queued
+jobs are claimed with an atomic update of the job table, so any number of
+worker processes (see assembly_methods.workers) can share the sqlite queue
+without a broker. With the ASSEMBLY_JOBS_SYNC setting the job is run inside
+the request instead.
+
+The SBOL parser and the generators are imported when a job first needs them,
+see assembly_methods.preload.
+"""
+import base64
+import json
+import os
+import socket
+import traceback
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+
+from assembly_methods import (admission, downloads, metrics, result_cache,
+                              retention, run_estimator, uploads)
+from assembly_methods.models import AssemblyBatch, AssemblyJob, OutputFolder
+
+# Values of AssemblyJob.stage while a job runs
+STAGE_PARSING = 'parsing sbol'
+STAGE_GENERATING = 'generating scripts'
+# The generators catch their exceptions and write them to
+# <assembly>_error.txt instead of the scripts
+ERROR_FILE_SUFFIX = '_error.txt'
+
+
+class GeneratorError(Exception):
+    """A generator wrote an error file instead of its scripts.
+
+    Attributes:
+        links (List[str]): The files the generator returned.
+    """
+
+    def __init__(self, message: str, links: List[str]):
+        super().__init__(message)
+        self.links = links
+
+
+def worker_name() -> str:
+    """Returns the host and process id recorded on claimed jobs."""
+    return '{}:{}'.format(socket.gethostname(), os.getpid())
+
+
+def submit_job(
+    assembly_type: str,
+    sbol_file_string: str,
+    linker_types: List[Dict[str, Any]],
+    specifications: Dict[str, Any],
+    client: str = '',
+    sbol_upload_id: str = None
+) -> AssemblyJob:
+    """Queues a FinalSpec request.
+
+    Args:
+        assembly_type (str): "basic", "bio_bricks" or "moclo".
+        sbol_file_string (str): Base64 encoded SBOL document.
+        linker_types (List[Dict[str, Any]]): LinkerInType inputs.
+        specifications (Dict[str, Any]): The specifications_basic,
+            specifications_bio_bricks and specifications_mo_clo inputs.
+        client (str): Submitting client, see admission.client_id.
+        sbol_upload_id (str): Handle of an uploaded SBOL document, in place
+            of sbol_file_string (see assembly_methods.uploads).
+
+    Returns:
+        AssemblyJob: The job, already finished if ASSEMBLY_JOBS_SYNC is set
+        or the result was cached (see assembly_methods.result_cache).
+
+    Raises:
+        ValueError: See check_sbol_source.
+        admission.AdmissionError: If the design or client is over the
+            admission limits (see assembly_methods.admission).
+    """
+    check_sbol_source(sbol_file_string, sbol_upload_id)
+    job = create_job(assembly_type, sbol_file_string,
+                     shared_arguments(linker_types, specifications), client,
+                     sbol_upload_id=sbol_upload_id)
+    if job.status == AssemblyJob.QUEUED:
+        start_jobs([job.pk])
+        job.refresh_from_db()
+    return job
+
+
+def submit_batch(
+    assembly_type: str,
+    designs: List[Dict[str, str]],
+    linker_types: List[Dict[str, Any]],
+    specifications: Dict[str, Any],
+    client: str = ''
+) -> AssemblyBatch:
+    """Queues a BatchFinalSpec request, a job for each design.
+
+    The linker types and specifications are converted once for the whole
+    batch, and the jobs are queued together so the worker pool runs them in
+    parallel. Designs refused by admission control are recorded in the
+    batch's rejected list instead of failing the batch.
+
+    Args:
+        assembly_type (str): "basic", "bio_bricks" or "moclo".
+        designs (List[Dict[str, str]]): The sbol_file_string (base64 encoded
+            SBOL document) or sbol_upload_id (see assembly_methods.uploads)
+            and optional name of each design.
+        linker_types (List[Dict[str, Any]]): LinkerInType inputs shared by
+            the designs.
+        specifications (Dict[str, Any]): Specifications shared by the
+            designs, see submit_job.
+        client (str): Submitting client, see admission.client_id.
+
+    Returns:
+        AssemblyBatch: The batch, its jobs already finished if
+        ASSEMBLY_JOBS_SYNC is set.
+
+    Raises:
+        ValueError: If there are no designs, two designs have the same name
+            or a design has no valid SBOL source (see check_sbol_source).
+        admission.AdmissionError: If the batch or client is over the
+            admission limits.
+    """
+    if not designs:
+        raise ValueError('A batch needs at least one design')
+    names = [design.get('name') or 'design_{}'.format(index + 1)
+             for index, design in enumerate(designs)]
+    if len(set(names)) != len(names):
+        raise ValueError('The names of the designs of a batch must be unique')
+    for design in designs:
+        check_sbol_source(design.get('sbol_file_string'),
+                          design.get('sbol_upload_id'))
+    if settings.ADMISSION_ENABLED:
+        admission.admit_batch(len(designs), client)
+
+    shared = shared_arguments(linker_types, specifications)
+    batch = AssemblyBatch.objects.create(assembly_type=assembly_type,
+                                         client=client)
+    job_ids = []
+    for name, design in zip(names, designs):
+        try:
+            job = create_job(assembly_type,
+                             design.get('sbol_file_string') or '', shared,
+                             client, batch=batch, design_name=name,
+                             sbol_upload_id=design.get('sbol_upload_id'))
+        except admission.AdmissionError as error:
+            batch.rejected.append(
+                dict(error.extensions, name=name, error=str(error)))
+            continue
+        if job.status == AssemblyJob.QUEUED:
+            job_ids.append(job.pk)
+    batch.save(update_fields=['rejected'])
+    start_jobs(job_ids)
+    return batch
+
+
+def shared_arguments(
+    linker_types: List[Dict[str, Any]],
+    specifications: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Returns the arguments of a job other than its SBOL document,
+    including the part info the parser reads, converted once per
+    submission rather than in every job of a batch.
+
+    Round trip through JSON so the pipeline sees the same plain values
+    whether it runs here or in a worker (decimals become strings).
+    """
+    arguments = json.loads(json.dumps({
+        'linker_types': linker_types or [],
+        'specifications': specifications,
+        'sampling_seed': settings.SBOL_SAMPLING_SEED}, default=str))
+    arguments['part_info'] = convert_part_info(arguments['linker_types'])
+    return arguments
+
+
+def check_sbol_source(sbol_file_string: str, sbol_upload_id: str):
+    """Checks that a design is either a base64 string or an upload.
+
+    Raises:
+        ValueError: If both are given or the upload does not exist.
+    """
+    if not sbol_upload_id:
+        return
+    if sbol_file_string:
+        raise ValueError(
+            'Give either sbolFileString or sbolUploadId, not both')
+    uploads.get_upload(sbol_upload_id)
+
+
+def create_job(
+    assembly_type: str,
+    sbol_file_string: str,
+    shared: Dict[str, Any],
+    client: str = '',
+    batch: AssemblyBatch = None,
+    design_name: str = '',
+    sbol_upload_id: str = None
+) -> AssemblyJob:
+    """Creates the job of a design, see start_jobs to run it.
+
+    Args:
+        assembly_type (str): "basic", "bio_bricks" or "moclo".
+        sbol_file_string (str): Base64 encoded SBOL document.
+        shared (Dict[str, Any]): See shared_arguments.
+        client (str): Submitting client, see admission.client_id.
+        batch (AssemblyBatch): Batch of the design, already admitted against
+            the client's limit.
+        design_name (str): Name of the design in its batch.
+        sbol_upload_id (str): Handle of an uploaded SBOL document, in place
+            of sbol_file_string.
+
+    Returns:
+        AssemblyJob: The queued job, or a succeeded one if the result was
+        cached.
+
+    Raises:
+        admission.AdmissionError: If the design or client is over the
+            admission limits.
+    """
+    arguments = dict(shared, sbol_file_string=sbol_file_string,
+                     sbol_upload_id=sbol_upload_id)
+    key = ''
+    if settings.RESULT_CACHE_ENABLED:
+        key = result_cache.cache_key(assembly_type, arguments)
+        cached = result_cache.lookup(key)
+        if cached is not None:
+            now = timezone.now()
+            return AssemblyJob.objects.create(
+                assembly_type=assembly_type, arguments=arguments,
+                cache_key=key, cache_hit=True, client=client, batch=batch,
+                design_name=design_name, status=AssemblyJob.SUCCEEDED,
+                output_folder=cached.output_folder,
+                output_links=cached.output_links,
+                run_estimate=cached.run_estimate, started=now, finished=now)
+
+    admitted = {'estimate': None, 'deferred': False}
+    if settings.ADMISSION_ENABLED:
+        outline = read_design_outline(sbol_file_string, sbol_upload_id)
+        if batch is None:
+            admitted = admission.admit_job(outline, client)
+        else:
+            admitted = admission.admit_design(outline)
+
+    job = AssemblyJob.objects.create(
+        assembly_type=assembly_type, arguments=arguments, cache_key=key,
+        client=client, batch=batch, design_name=design_name,
+        design_estimate=admitted['estimate'],
+        deferred=admitted['deferred'])
+    job.output_folder = os.path.join(
+        settings.MEDIA_ROOT,
+        '{:%Y%m%d_%H_%M_%S}_{}'.format(datetime.now(), job.pk))
+    job.save(update_fields=['output_folder'])
+    return job
+
+
+def start_jobs(job_ids: List[int]):
+    """Runs the queued jobs of job_ids if ASSEMBLY_JOBS_SYNC is set,
+    otherwise leaves them to the worker pool of the host (see
+    assembly_methods/workers.py)."""
+    if not settings.ASSEMBLY_JOBS_SYNC:
+        return
+    for job_id in job_ids:
+        if claim_job(job_id):
+            run_job(job_id)
+
+
+def batch_manifest(batch: AssemblyBatch) -> Dict[str, Any]:
+    """Returns the combined manifest of a batch.
+
+    Args:
+        batch (AssemblyBatch): The batch.
+
+    Returns:
+        Dict[str, Any]: The batch id, assembly type and status, the status,
+        output links, run estimate and download path of each design (the
+        rejected designs last) and the total estimated run time of the
+        succeeded designs.
+    """
+    designs = []
+    total_run_time_s = 0
+    for job in batch.jobs.order_by('pk'):
+        succeeded = job.status == AssemblyJob.SUCCEEDED
+        designs.append({
+            'name': job.design_name,
+            'job_id': job.pk,
+            'status': job.status,
+            'cache_hit': job.cache_hit,
+            'deferred': job.deferred,
+            'output_links': job.output_links,
+            'run_estimate': job.run_estimate,
+            'download_path': (reverse('job-download', args=[job.pk])
+                              if succeeded else None),
+            'error': job.error or None,
+        })
+        if succeeded and job.run_estimate:
+            total_run_time_s += job.run_estimate.get('total_run_time_s', 0)
+    for rejected in batch.rejected:
+        designs.append({'name': rejected['name'], 'job_id': None,
+                        'status': 'rejected', 'error': rejected['error'],
+                        'code': rejected['code']})
+    return {'batch_id': batch.pk, 'assembly_type': batch.assembly_type,
+            'status': batch.status, 'designs': designs,
+            'total_run_time_s': total_run_time_s}
+
+
+def claim_job(job_id: int, worker: str = None) -> bool:
+    """Marks a queued job as running.
+
+    The status check and update are a single UPDATE statement, so only one
+    of several competing workers can claim a job.
+
+    Args:
+        job_id (int): Primary key of the job.
+        worker (str): Name recorded on the job, see worker_name.
+
+    Returns:
+        bool: True if this call claimed the job.
+    """
+    claimed = AssemblyJob.objects.filter(
+        pk=job_id, status=AssemblyJob.QUEUED).update(
+            status=AssemblyJob.RUNNING, started=timezone.now(),
+            worker=worker or worker_name())
+    return claimed == 1
+
+
+def claim_next_job(worker: str = None) -> Optional[int]:
+    """Claims the oldest queued job.
+
+    Deferred jobs are claimed after every other queued job, and only while
+    fewer than ADMISSION_MAX_DEFERRED_RUNNING of them are running.
+
+    Args:
+        worker (str): Name recorded on the job, see worker_name.
+
+    Returns:
+        Optional[int]: Primary key of the claimed job, None if the queue is
+        empty.
+    """
+    queued = AssemblyJob.objects.filter(
+        status=AssemblyJob.QUEUED).order_by('deferred', 'created', 'pk')
+    running_deferred = AssemblyJob.objects.filter(
+        status=AssemblyJob.RUNNING, deferred=True).count()
+    if running_deferred >= settings.ADMISSION_MAX_DEFERRED_RUNNING:
+        queued = queued.filter(deferred=False)
+    for job_id in queued.values_list('pk', flat=True)[:10]:
+        if claim_job(job_id, worker):
+            return job_id
+    return None
+
+
+def requeue_orphaned_jobs() -> int:
+    """Queues again the running jobs of dead worker processes on this host.
+
+    Returns:
+        int: Number of jobs queued again.
+    """
+    host = socket.gethostname()
+    orphaned = []
+    running = AssemblyJob.objects.filter(status=AssemblyJob.RUNNING)
+    for job_id, worker in running.values_list('pk', 'worker'):
+        worker_host, _, pid = worker.rpartition(':')
+        if worker_host != host or not pid.isdigit():
+            continue
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            orphaned.append(job_id)
+        except PermissionError:
+            pass
+    return AssemblyJob.objects.filter(
+        pk__in=orphaned, status=AssemblyJob.RUNNING).update(
+            status=AssemblyJob.QUEUED, stage='', worker='', started=None)
+
+
+def run_job(job_id: int) -> AssemblyJob:
+    """Runs a claimed job and records its outputs or error.
+
+    Args:
+        job_id (int): Primary key of a running job.
+
+    Returns:
+        AssemblyJob: The finished job.
+    """
+    job = AssemblyJob.objects.get(pk=job_id)
+
+    def progress(stage):
+        AssemblyJob.objects.filter(pk=job_id).update(stage=stage)
+
+    arguments = job.arguments
+    try:
+        os.makedirs(job.output_folder, exist_ok=True)
+        links, estimate = run_pipeline(
+            job.assembly_type, arguments['sbol_file_string'],
+            arguments['linker_types'], arguments['specifications'],
+            job.output_folder, progress, arguments.get('sampling_seed'),
+            arguments.get('sbol_upload_id'), arguments.get('part_info'))
+        job.status = AssemblyJob.SUCCEEDED
+        job.output_links = links
+        job.run_estimate = estimate
+        job.content_hash = downloads.content_hash(
+            downloads.bundle_files(job.output_folder, links))
+    except GeneratorError as error:
+        job.status = AssemblyJob.FAILED
+        job.output_links = error.links
+        job.error = str(error)
+    except Exception:
+        job.status = AssemblyJob.FAILED
+        job.error = traceback.format_exc()
+    job.stage = ''
+    job.finished = timezone.now()
+    job.save(update_fields=['status', 'stage', 'output_links',
+                            'run_estimate', 'error', 'finished',
+                            'content_hash'])
+    if os.path.isdir(job.output_folder):
+        retention.track(job.output_folder, OutputFolder.JOB)
+    if result_cache.store(job) is not None:
+        result_cache.evict()
+    return job
+
+
+def get_sbol_document(sbol_string, sbol_upload_id=None):
+    from sbol2 import Document
+
+    if sbol_upload_id:
+        return uploads.read_document(sbol_upload_id)
+    sbol_string_decoded = base64.b64decode(sbol_string)
+    doc = Document()
+    doc.appendString(sbol_str=sbol_string_decoded, overwrite=True)
+    return doc
+
+
+def read_design_outline(
+    sbol_string: str,
+    sbol_upload_id: str = None
+) -> Optional[Dict[str, Any]]:
+    """Returns the outline of a submitted document (see
+    admission.scan_design), None if it cannot be read.
+
+    Only the job builds the sbol2 document. Unreadable documents are left
+    for the job to report as its error.
+    """
+    try:
+        if sbol_upload_id:
+            return admission.scan_design(
+                uploads.get_upload(sbol_upload_id).path)
+        return admission.scan_design(base64.b64decode(sbol_string))
+    except (OSError, ValueError):
+        return None
+
+
+def convert_part_info(part_types_list):
+    return {
+        part_type['linker_id']: {
+            "concentration": part_type['concentration'],
+            "plate": part_type['plate_number'],
+            "well": part_type['well']
+        } for part_type in part_types_list}
+
+
+def run_pipeline(
+    assembly_type: str,
+    sbol_file_string: str,
+    linker_types: List[Dict[str, Any]],
+    specifications: Dict[str, Any],
+    output_folder: str,
+    progress: Callable[[str], None] = None,
+    sampling_seed: int = None,
+    sbol_upload_id: str = None,
+    part_info: Dict[str, Dict[str, Any]] = None
+) -> Tuple[List[str], Optional[Dict[str, Any]]]:
+    """Parses the SBOL document and generates the OT-2 scripts.
+
+    The parser's construct and part tables are handed to the generators in
+    memory, only the generated files are written to output_folder.
+
+    Args:
+        assembly_type (str): "basic", "bio_bricks" or "moclo".
+        sbol_file_string (str): Base64 encoded SBOL document.
+        linker_types (List[Dict[str, Any]]): LinkerInType inputs as dicts.
+        specifications (Dict[str, Any]): The specifications_basic,
+            specifications_bio_bricks and specifications_mo_clo inputs as
+            dicts.
+        output_folder (str): Existing folder the files are written to.
+        progress (Callable[[str], None]): Called with the name of each stage
+            as it starts.
+        sampling_seed (int): Seed of the parser's construct sampling.
+        sbol_upload_id (str): Handle of an uploaded SBOL document, read
+            instead of sbol_file_string.
+        part_info (Dict[str, Dict[str, Any]]): linker_types converted by
+            convert_part_info, converted here if not given.
+
+    Returns:
+        Tuple[List[str], Optional[Dict[str, Any]]]: Paths of the generated
+        files and the run estimate.
+
+    Raises:
+        GeneratorError: If the generator wrote an error file.
+    """
+    from basic_assembly.dna_bot import dnabot_app
+    from biobricks_assembly.biobricks10 import bbinput
+    from moclo_assembly.moclo_transformation import moclo_transform_generator
+    from sbol_parser_api.sbol_parser_api import ParserSBOL
+
+    progress = progress or (lambda stage: None)
+    progress(STAGE_PARSING)
+    with metrics.stage(metrics.STAGE_PARSE, assembly_type):
+        sbol_document = get_sbol_document(sbol_file_string, sbol_upload_id)
+    part_types_dictionary = part_info
+    if part_types_dictionary is None:
+        part_types_dictionary = convert_part_info(linker_types)
+    parser = ParserSBOL(sbol_document=sbol_document, outdir=output_folder)
+    if assembly_type == "basic":
+        specifications_basic = specifications['specifications_basic']
+        tables = parser.generate_tables(
+            assembly=assembly_type, part_info=part_types_dictionary,
+            seed=sampling_seed)
+        labware_dict = specifications_basic['labware_dict']
+        common_labware = labware_dict['common_labware']
+        progress(STAGE_GENERATING)
+        links = dnabot_app.dnabot_from_tables(
+            output_folder=output_folder,
+            ethanol_well_for_stage_2=specifications_basic[
+                'ethanol_well_for_stage_2'],
+            deep_well_plate_stage_4=specifications_basic[
+                'deep_well_plate_stage_4'],
+            construct_table=tables['construct'][0],
+            part_tables=tables['part'],
+            p10_mount=common_labware['p10_mount'],
+            p300_mount=common_labware['p300_mount'],
+            p10_type=common_labware['p10_type'],
+            p300_type=common_labware['p300_type'],
+            well_plate=common_labware['well_plate'],
+            reagent_plate=labware_dict['reagent_plate'],
+            mag_plate=labware_dict['mag_plate'],
+            tube_rack=labware_dict['tube_rack'],
+            aluminum_block=labware_dict['aluminum_block'],
+            bead_container=labware_dict['bead_container'],
+            soc_plate=labware_dict['soc_plate'],
+            agar_plate=labware_dict['agar_plate'],
+            layout=specifications_basic['layout'],
+            tip_policy=specifications_basic['tip_policy'])
+    elif assembly_type == "bio_bricks":
+        specifications_bio_bricks = specifications[
+            'specifications_bio_bricks']
+        labware_dict = specifications_bio_bricks['labware_dict']
+        common_labware = labware_dict['common_labware']
+        tables = parser.generate_tables(
+            assembly=assembly_type, part_info=part_types_dictionary,
+            seed=sampling_seed)
+        progress(STAGE_GENERATING)
+        links = bbinput.biobricks_from_tables(
+            output_folder=output_folder,
+            construct_table=tables['construct'][0],
+            part_tables=tables['part'],
+            thermocycle=specifications_bio_bricks['thermocycle'],
+            p10_mount=common_labware['p10_mount'],
+            p300_mount=common_labware['p300_mount'],
+            p10_type=common_labware['p10_type'],
+            p300_type=common_labware['p300_type'],
+            well_plate=common_labware['well_plate'],
+            tube_rack=labware_dict['tube_rack'],
+            soc_plate=labware_dict['soc_plate'],
+            transformation_plate=labware_dict['transformation_plate'])
+    elif assembly_type == "moclo":
+        specifications_mo_clo = specifications['specifications_mo_clo']
+        labware_dict = specifications_mo_clo['labware_dict']
+        common_labware = labware_dict['common_labware']
+        tables = parser.generate_tables(
+            assembly=assembly_type, part_info=part_types_dictionary,
+            seed=sampling_seed)
+        progress(STAGE_GENERATING)
+        links = moclo_transform_generator.moclo_function_from_tables(
+            output_folder=output_folder,
+            construct_table=tables['construct'][0],
+            part_tables=tables['part'],
+            thermocycle=specifications_mo_clo['thermocycle'],
+            p10_mount=common_labware['p10_mount'],
+            p300_mount=common_labware['p300_mount'],
+            p10_type=common_labware['p10_type'],
+            p300_type=common_labware['p300_type'],
+            well_plate=common_labware['well_plate'],
+            trough=labware_dict['trough'],
+            reagent_plate=labware_dict['reagent_plate'],
+            agar_plate=labware_dict['agar_plate'],
+            replicates=specifications_mo_clo['replicates'])
+    else:
+        links = []
+    check_generator_output(links)
+    return links, run_estimator.load_estimate(links)
+
+
+def check_generator_output(links: List[str]):
+    """Raises the contents of the error files among links.
+
+    Raises:
+        GeneratorError: If a generator wrote an error file.
+    """
+    messages = []
+    for path in links:
+        if not path.endswith(ERROR_FILE_SUFFIX):
+            continue
+        try:
+            with open(path) as error_file:
+                messages.append(error_file.read().strip())
+        except OSError:
+            messages.append('{} could not be read'.format(path))
+    if messages:
+        raise GeneratorError('\n'.join(messages), links)
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from assembly_methods import workers
+
+
+class Command(BaseCommand):
+    help = ('Runs the AssemblyJob workers of this host in the foreground, '
+            'for deployments without gunicorn or that set '
+            'ASSEMBLY_JOB_WORKERS=0 on the web server.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help='number of worker processes, defaults to '
+                                 'ASSEMBLY_JOB_WORKERS')
+
+    def handle(self, *args, **options):
+        workers.supervise(
+            options['workers'] or settings.ASSEMBLY_JOB_WORKERS,
+            settings.ASSEMBLY_JOB_POLL_INTERVAL,
+            settings.ASSEMBLY_JOB_REQUEUE_INTERVAL)
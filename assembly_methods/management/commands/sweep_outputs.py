@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from assembly_methods import metrics, retention
+
+
+class Command(BaseCommand):
+    help = ('Removes the output folders beyond the retention limits and '
+            'the expired SBOL uploads, for '
+            'deployments that sweep from cron or set '
+            'OUTPUT_RETENTION_ENABLED=FALSE on the workers.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age-days', type=float, default=None,
+                            help='days since the last access, defaults to '
+                                 'OUTPUT_RETENTION_MAX_AGE_DAYS')
+        parser.add_argument('--max-bytes', type=int, default=None,
+                            help='total size kept, defaults to '
+                                 'OUTPUT_RETENTION_MAX_BYTES')
+        parser.add_argument('--upload-max-age-days', type=float,
+                            default=None,
+                            help='days since an upload was last used, '
+                                 'defaults to SBOL_UPLOAD_MAX_AGE_DAYS')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='list the folders without removing them')
+
+    def handle(self, *args, **options):
+        removed = retention.sweep(options['max_age_days'],
+                                  options['max_bytes'], options['dry_run'],
+                                  options['upload_max_age_days'])
+        for folder, reason in removed:
+            self.stdout.write('{} {} ({} bytes, {})'.format(
+                'Would remove' if options['dry_run'] else 'Removed',
+                folder.path, folder.size_bytes, reason))
+        self.stdout.write('{} folders and uploads, {} bytes {}'.format(
+            len(removed), sum(folder.size_bytes for folder, _ in removed),
+            'to reclaim' if options['dry_run'] else 'reclaimed'))
+        if not options['dry_run']:
+            metrics.flush()
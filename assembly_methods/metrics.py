@@ -0,0 +1,388 @@
+"""Operational metrics, served by /metrics in the Prometheus text format.
+
+Counters and histograms are kept in the memory of each process. Jobs run in
+separate worker processes (and gunicorn may run several web workers), so
+each process writes a snapshot of its samples to METRICS_DIR: the workers
+after every job, the web processes at most every METRICS_FLUSH_INTERVAL
+seconds after a request. /metrics adds up the snapshots of the other
+processes and the live samples of its own. A snapshot is named after the
+host and process id, and is overwritten by a later process with the same
+id, which Prometheus sees as a counter reset.
+
+The figures come from the mutations (requests), ParserSBOL (construct
+enumeration, filtering, plating and tables), the three generators (scripts
+and output bytes), the job pipeline (SBOL parsing), the result cache and the
+retention of the output folders.
+"""
+import functools
+import json
+import math
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+# Upper bounds in seconds, from sub-second requests to long generations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+# Values of the stage label of STAGE_SECONDS
+STAGE_PARSE = 'parse'
+STAGE_ENUMERATE = 'enumerate'
+STAGE_FILTER = 'filter'
+STAGE_PLATE = 'plate'
+STAGE_CSV = 'csv'
+STAGE_SCRIPTS = 'scripts'
+
+
+def _escape(value: str) -> str:
+    return (str(value).replace('\\', r'\\').replace('\n', r'\n')
+            .replace('"', r'\"'))
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value))
+
+
+def _copy(value):
+    return list(value) if isinstance(value, list) else value
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    """Returns {name="value",...}, or an empty string without labels."""
+    if not labels:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(name, _escape(value))
+                          for name, value in labels.items()) + '}'
+
+
+class Metric:
+    """A counter or histogram, with a value for each set of label values.
+
+    Args:
+        name (str): Metric name, counters end in _total.
+        documentation (str): HELP text.
+        labelnames (Tuple[str, ...]): Names of the labels.
+    """
+    kind = ''
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError('{} takes the labels {}, not {}'.format(
+                self.name, self.labelnames, tuple(labels)))
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the values by the JSON list of their label values."""
+        with self._lock:
+            return {json.dumps(key): _copy(value)
+                    for key, value in self._values.items()}
+
+    def samples(self, values: Dict[str, Any]) -> List[str]:
+        """Returns the exposition lines of values, see snapshot."""
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """A count that only goes up."""
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        """Adds amount to the count of labels."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self, values: Dict[str, Any]) -> List[str]:
+        lines = []
+        for key, value in sorted(values.items()):
+            labels = dict(zip(self.labelnames, json.loads(key)))
+            lines.append('{}{} {}'.format(
+                self.name, format_labels(labels), _format_value(value)))
+        return lines
+
+
+class Histogram(Metric):
+    """Observations counted in buckets of upper bounds, with their sum.
+
+    A value is stored as the count of each bucket (not cumulative), the
+    count above the last bound, the sum and the total count.
+
+    Args:
+        buckets (Tuple[float, ...]): Increasing upper bounds.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        """Counts value in its bucket."""
+        key = self._key(labels)
+        index = len(self.buckets)
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = position
+                break
+        with self._lock:
+            counts = self._values.setdefault(
+                key, [0] * (len(self.buckets) + 3))
+            counts[index] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observes the seconds the with block takes, even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self, values: Dict[str, Any]) -> List[str]:
+        lines = []
+        for key, counts in sorted(values.items()):
+            labels = dict(zip(self.labelnames, json.loads(key)))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                lines.append('{}_bucket{} {}'.format(
+                    self.name,
+                    format_labels(dict(labels, le=_format_value(bound))),
+                    _format_value(cumulative)))
+            lines.append('{}_sum{} {}'.format(
+                self.name, format_labels(labels), _format_value(counts[-2])))
+            lines.append('{}_count{} {}'.format(
+                self.name, format_labels(labels), _format_value(counts[-1])))
+        return lines
+
+
+class Registry:
+    """The metrics of a process, see the module docstring."""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric: Metric) -> Metric:
+        """Adds metric and returns it."""
+        if metric.name in self.metrics:
+            raise ValueError('{} is already registered'.format(metric.name))
+        self.metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the values of every metric, see Metric.snapshot."""
+        return {name: metric.snapshot()
+                for name, metric in self.metrics.items()}
+
+    def merge(
+        self,
+        snapshots: List[Dict[str, Dict[str, Any]]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Adds up snapshots of the same metrics, ignoring unknown ones."""
+        merged = {name: {} for name in self.metrics}
+        for snapshot in snapshots:
+            for name, values in snapshot.items():
+                if name not in merged:
+                    continue
+                for key, value in values.items():
+                    total = merged[name].get(key)
+                    if total is None:
+                        merged[name][key] = _copy(value)
+                    elif isinstance(total, list):
+                        if len(total) == len(value):
+                            merged[name][key] = [
+                                a + b for a, b in zip(total, value)]
+                    else:
+                        merged[name][key] = total + value
+        return merged
+
+    def exposition(self, snapshot: Dict[str, Dict[str, Any]]) -> str:
+        """Returns snapshot in the Prometheus text format."""
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append('# HELP {} {}'.format(name, metric.documentation))
+            lines.append('# TYPE {} {}'.format(name, metric.kind))
+            lines.extend(metric.samples(snapshot.get(name, {})))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+# time.monotonic() of the last flush of this process
+_last_flush = 0.0
+
+REQUESTS = REGISTRY.register(Counter(
+    'assembly_requests_total', 'GraphQL mutations by outcome.',
+    ('mutation', 'assembly_type', 'outcome')))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'assembly_request_seconds', 'Time taken by the GraphQL mutations.',
+    ('mutation', 'assembly_type')))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'assembly_stage_seconds',
+    'Time taken by each stage of the script generation.',
+    ('assembly_type', 'stage')))
+CONSTRUCTS_ENUMERATED = REGISTRY.register(Counter(
+    'assembly_constructs_enumerated_total',
+    'Constructs enumerated from the SBOL documents.', ('assembly_type',)))
+CONSTRUCTS_PLATED = REGISTRY.register(Counter(
+    'assembly_constructs_plated_total',
+    'Constructs placed on construct plates.', ('assembly_type',)))
+GENERATOR_RUNS = REGISTRY.register(Counter(
+    'assembly_generator_runs_total',
+    'Generator calls, error if they only wrote an error file.',
+    ('assembly_type', 'outcome')))
+OUTPUT_BYTES = REGISTRY.register(Counter(
+    'assembly_output_bytes_total', 'Bytes of the files the generators wrote.',
+    ('assembly_type',)))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    'assembly_result_cache_lookups_total', 'Result cache lookups.',
+    ('result',)))
+RETENTION_FOLDERS_REMOVED = REGISTRY.register(Counter(
+    'assembly_retention_folders_removed_total',
+    'Output folders and SBOL uploads removed by the retention sweep.',
+    ('kind', 'reason')))
+RETENTION_BYTES_RECLAIMED = REGISTRY.register(Counter(
+    'assembly_retention_bytes_reclaimed_total',
+    'Bytes of the output folders and SBOL uploads removed by the retention '
+    'sweep.',
+    ('kind', 'reason')))
+
+
+@contextmanager
+def stage(name: str, assembly_type: str) -> Iterator[None]:
+    """Observes the duration of a stage of the generation, see STAGE_*."""
+    with STAGE_SECONDS.time(assembly_type=assembly_type, stage=name):
+        yield
+
+
+def instrument_mutation(mutation: str) -> Callable:
+    """Decorates a mutate method to count and time its requests.
+
+    Args:
+        mutation (str): Value of the mutation label.
+    """
+    def decorator(mutate):
+        @functools.wraps(mutate)
+        def wrapper(root, info, **kwargs):
+            assembly_type = kwargs.get('assembly_type') or ''
+            outcome = 'error'
+            try:
+                with REQUEST_SECONDS.time(mutation=mutation,
+                                          assembly_type=assembly_type):
+                    result = mutate(root, info, **kwargs)
+                outcome = 'ok'
+                return result
+            finally:
+                REQUESTS.inc(mutation=mutation, assembly_type=assembly_type,
+                             outcome=outcome)
+                maybe_flush()
+        return wrapper
+    return decorator
+
+
+def instrument_generator(assembly_type: str) -> Callable:
+    """Decorates a generator returning the paths of the files it wrote, to
+    time it and count the bytes written.
+
+    Args:
+        assembly_type (str): Value of the assembly_type label.
+    """
+    def decorator(generator):
+        @functools.wraps(generator)
+        def wrapper(*args, **kwargs):
+            with stage(STAGE_SCRIPTS, assembly_type):
+                output_paths = generator(*args, **kwargs)
+            failed = any(path.endswith('_error.txt') for path in output_paths)
+            GENERATOR_RUNS.inc(assembly_type=assembly_type,
+                               outcome='error' if failed else 'ok')
+            OUTPUT_BYTES.inc(
+                sum(os.path.getsize(path) for path in set(output_paths)
+                    if os.path.isfile(path)),
+                assembly_type=assembly_type)
+            return output_paths
+        return wrapper
+    return decorator
+
+
+def _snapshot_path(directory: str) -> str:
+    return os.path.join(directory, '{}_{}.json'.format(
+        socket.gethostname(), os.getpid()))
+
+
+def flush():
+    """Writes the snapshot of this process to METRICS_DIR."""
+    from django.conf import settings
+
+    global _last_flush
+
+    if not settings.METRICS_DIR:
+        return
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    path = _snapshot_path(settings.METRICS_DIR)
+    # Written aside and renamed, so readers never see a partial snapshot
+    with open(path + '.tmp', 'w') as out:
+        json.dump(REGISTRY.snapshot(), out)
+    os.replace(path + '.tmp', path)
+    _last_flush = time.monotonic()
+
+
+def maybe_flush():
+    """Flushes if METRICS_FLUSH_INTERVAL seconds have passed since the last
+    flush of this process."""
+    from django.conf import settings
+
+    if time.monotonic() - _last_flush >= settings.METRICS_FLUSH_INTERVAL:
+        flush()
+
+
+def collect() -> Dict[str, Dict[str, Any]]:
+    """Returns the samples of every process, see the module docstring."""
+    from django.conf import settings
+
+    snapshots = [REGISTRY.snapshot()]
+    if settings.METRICS_DIR and os.path.isdir(settings.METRICS_DIR):
+        own = _snapshot_path(settings.METRICS_DIR)
+        for name in sorted(os.listdir(settings.METRICS_DIR)):
+            path = os.path.join(settings.METRICS_DIR, name)
+            if not name.endswith('.json') or path == own:
+                continue
+            try:
+                with open(path) as snapshot:
+                    snapshots.append(json.load(snapshot))
+            except (OSError, ValueError):
+                continue
+    return REGISTRY.merge(snapshots)
+
+
+def gauge(name: str, documentation: str,
+          samples: List[Tuple[Dict[str, str], float]]) -> str:
+    """Returns a gauge read when scraped in the Prometheus text format.
+
+    Args:
+        name (str): Metric name.
+        documentation (str): HELP text.
+        samples (List[Tuple[Dict[str, str], float]]): Labels and value of
+            each sample.
+    """
+    lines = ['# HELP {} {}'.format(name, documentation),
+             '# TYPE {} gauge'.format(name)]
+    lines.extend('{}{} {}'.format(name, format_labels(labels),
+                                  _format_value(value))
+                 for labels, value in samples)
+    return '\n'.join(lines) + '\n'
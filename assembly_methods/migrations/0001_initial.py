@@ -0,0 +1,35 @@
+# Generated by Django 3.1 on 2026-10-19 17:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssemblyJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('assembly_type', models.CharField(max_length=20)),
+                ('arguments', models.JSONField()),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], db_index=True, default='queued', max_length=10)),
+                ('stage', models.CharField(blank=True, max_length=50)),
+                ('worker', models.CharField(blank=True, max_length=100)),
+                ('output_folder', models.CharField(blank=True, max_length=255)),
+                ('output_links', models.JSONField(default=list)),
+                ('run_estimate', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('started', models.DateTimeField(blank=True, null=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['created'],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.1 on 2026-10-19 17:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assembly_methods', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CachedResult',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('output_folder', models.CharField(max_length=255)),
+                ('output_links', models.JSONField(default=list)),
+                ('run_estimate', models.JSONField(blank=True, null=True)),
+                ('size_bytes', models.BigIntegerField(default=0)),
+                ('hits', models.IntegerField(default=0)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('last_used', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'ordering': ['last_used'],
+            },
+        ),
+        migrations.AddField(
+            model_name='assemblyjob',
+            name='cache_hit',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='assemblyjob',
+            name='cache_key',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1 on 2026-10-19 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assembly_methods', '0002_result_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assemblyjob',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.1 on 2026-10-19 17:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assembly_methods', '0003_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assemblyjob',
+            name='client',
+            field=models.CharField(blank=True, db_index=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='assemblyjob',
+            name='deferred',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='assemblyjob',
+            name='design_estimate',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
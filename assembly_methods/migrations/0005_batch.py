@@ -0,0 +1,37 @@
+# Generated by Django 3.1 on 2026-10-19 17:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assembly_methods', '0004_admission'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssemblyBatch',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('assembly_type', models.CharField(max_length=20)),
+                ('client', models.CharField(blank=True, max_length=100)),
+                ('rejected', models.JSONField(default=list)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['created'],
+            },
+        ),
+        migrations.AddField(
+            model_name='assemblyjob',
+            name='design_name',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='assemblyjob',
+            name='batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to='assembly_methods.assemblybatch'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.1 on 2026-10-19 18:03
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assembly_methods', '0005_batch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SbolUpload',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('handle', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('path', models.CharField(max_length=255)),
+                ('size_bytes', models.BigIntegerField()),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('client', models.CharField(blank=True, max_length=100)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('last_used', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['created'],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.1 on 2026-10-19 18:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assembly_methods', '0006_sbol_upload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutputFolder',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=255, unique=True)),
+                ('kind', models.CharField(choices=[('job', 'AssemblyJob output'), ('moclo', 'MocloView output')], max_length=10)),
+                ('size_bytes', models.BigIntegerField(default=0)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('last_accessed', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'ordering': ['last_accessed'],
+            },
+        ),
+    ]
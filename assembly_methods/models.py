@@ -0,0 +1,157 @@
+import uuid
+
+from django.db import models
+
+
+class AssemblyBatch(models.Model):
+    """A BatchFinalSpec request, an AssemblyJob for each admitted design.
+
+    The designs refused by admission control are recorded in rejected with
+    their name, error and the extensions of the GraphQL error.
+    """
+    assembly_type = models.CharField(max_length=20)
+    client = models.CharField(max_length=100, blank=True)
+    rejected = models.JSONField(default=list)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created']
+
+    @property
+    def status(self):
+        """'queued' or 'running' until every job has finished, then
+        'succeeded', 'failed' or 'partial' if only some designs
+        succeeded."""
+        statuses = list(self.jobs.values_list('status', flat=True))
+        if statuses and all(status == AssemblyJob.QUEUED
+                            for status in statuses):
+            return AssemblyJob.QUEUED
+        if AssemblyJob.QUEUED in statuses or AssemblyJob.RUNNING in statuses:
+            return AssemblyJob.RUNNING
+        succeeded = statuses.count(AssemblyJob.SUCCEEDED)
+        if succeeded == len(statuses) and not self.rejected:
+            return AssemblyJob.SUCCEEDED
+        if not succeeded:
+            return AssemblyJob.FAILED
+        return 'partial'
+
+
+class AssemblyJob(models.Model):
+    """A FinalSpec request, run in the background by assembly_methods.jobs.
+
+    The mutation arguments are stored as JSON so that any worker process can
+    run the job, and the generated files are recorded in output_links once
+    it has finished.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    assembly_type = models.CharField(max_length=20)
+    arguments = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES,
+                              default=QUEUED, db_index=True)
+    stage = models.CharField(max_length=50, blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    output_folder = models.CharField(max_length=255, blank=True)
+    output_links = models.JSONField(default=list)
+    run_estimate = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    # hash of the inputs, see assembly_methods.result_cache
+    cache_key = models.CharField(max_length=64, blank=True, db_index=True)
+    cache_hit = models.BooleanField(default=False)
+    # hash of the generated files, the ETag of the zip download
+    content_hash = models.CharField(max_length=64, blank=True)
+    # see assembly_methods.admission
+    client = models.CharField(max_length=100, blank=True, db_index=True)
+    design_estimate = models.JSONField(null=True, blank=True)
+    deferred = models.BooleanField(default=False)
+    batch = models.ForeignKey(AssemblyBatch, null=True, blank=True,
+                              on_delete=models.CASCADE, related_name='jobs')
+    design_name = models.CharField(max_length=100, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created']
+
+    @property
+    def queued_seconds(self):
+        """Seconds between submitting and starting the job, or None."""
+        if self.started is None:
+            return None
+        return (self.started - self.created).total_seconds()
+
+    @property
+    def run_seconds(self):
+        """Seconds the pipeline ran for, or None if it has not finished."""
+        if self.started is None or self.finished is None:
+            return None
+        return (self.finished - self.started).total_seconds()
+
+
+class CachedResult(models.Model):
+    """Output folder of a finished job, reused by identical submissions.
+
+    Entries are evicted least recently used first, see
+    assembly_methods.result_cache.evict.
+    """
+    key = models.CharField(max_length=64, unique=True)
+    output_folder = models.CharField(max_length=255)
+    output_links = models.JSONField(default=list)
+    run_estimate = models.JSONField(null=True, blank=True)
+    size_bytes = models.BigIntegerField(default=0)
+    hits = models.IntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+    last_used = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ['last_used']
+
+
+class SbolUpload(models.Model):
+    """An SBOL file uploaded by assembly_methods.uploads, referenced by the
+    mutations through its handle instead of a base64 string.
+
+    Identical files share one upload, found by their sha256.
+    """
+    handle = models.UUIDField(default=uuid.uuid4, unique=True,
+                              editable=False)
+    path = models.CharField(max_length=255)
+    size_bytes = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64, db_index=True)
+    client = models.CharField(max_length=100, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    last_used = models.DateTimeField()
+
+    class Meta:
+        ordering = ['created']
+
+
+class OutputFolder(models.Model):
+    """A folder of generated files, removed by assembly_methods.retention
+    once it is too old or the folders take too much space, least recently
+    accessed first."""
+    JOB = 'job'
+    MOCLO = 'moclo'
+    KIND_CHOICES = [
+        (JOB, 'AssemblyJob output'),
+        (MOCLO, 'MocloView output'),
+    ]
+
+    path = models.CharField(max_length=255, unique=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    size_bytes = models.BigIntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+    last_accessed = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ['last_accessed']
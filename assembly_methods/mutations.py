@@ -1,14 +1,11 @@
-import os
-
 import graphene
-from assembly_methods.settings import MEDIA_ROOT
-from datetime import datetime
-from sbol_parser_api.sbol_parser_api import ParserSBOL
-import base64
-from sbol2 import Document
-from basic_assembly.dna_bot import dnabot_app
-from biobricks_assembly.biobricks10 import bbinput
-from moclo_assembly.moclo_transformation import moclo_transform_generator
+from django.conf import settings
+from django.urls import reverse
+from graphene_django import DjangoObjectType
+from graphql import GraphQLError
+from assembly_methods import admission, jobs, metrics
+from assembly_methods.jobs import get_sbol_document
+from assembly_methods.models import AssemblyBatch, AssemblyJob
 
 
 class CommonLabware(graphene.InputObjectType):
@@ -42,6 +39,8 @@ class InputSpecsBASIC(graphene.InputObjectType):
     ethanol_well_for_stage_2 = graphene.String()
     deep_well_plate_stage_4 = graphene.String()
     labware_dict = graphene.Argument(LabwareDictBASIC)
+    layout = graphene.String(default_value='input')   # "input" or "column"
+    tip_policy = graphene.String(default_value='always')   # or "per_source"
 
 
 class LabwareDictMoClo(graphene.InputObjectType):
@@ -54,6 +53,7 @@ class LabwareDictMoClo(graphene.InputObjectType):
 class InputSpecsMoClo(graphene.InputObjectType):
     thermocycle = graphene.Boolean()
     labware_dict = graphene.Argument(LabwareDictMoClo)
+    replicates = graphene.Int(default_value=1)   # agar plate spots per construct
 
 
 class LabwareDictBioBricks(graphene.InputObjectType):
@@ -78,127 +78,172 @@ class LinkerInType(graphene.InputObjectType):
 class LinkerList(graphene.Mutation):
     class Arguments:
         sbol_file_string = graphene.String()
+        # handle returned by POST /uploads/sbol, in place of sbol_file_string
+        sbol_upload_id = graphene.ID()
         # specifications = graphene.Argument(SpecificationsType)
 
     linker_list = graphene.List(graphene.String)
 
-    def mutate(self, info, sbol_file_string):
-        sbol_document = get_sbol_document(sbol_file_string)
-        parser = ParserSBOL(sbol_document=sbol_document)
-        list_of_parts = parser.display_parts()
+    @metrics.instrument_mutation('linker_list')
+    def mutate(self, info, sbol_file_string=None, sbol_upload_id=None):
+        # Imported on first use, see assembly_methods.preload
+        from sbol_parser_api.sbol_parser_api import ParserSBOL
+
+        jobs.check_sbol_source(sbol_file_string, sbol_upload_id)
+        if not settings.ADMISSION_ENABLED:
+            parser = ParserSBOL(sbol_document=get_sbol_document(
+                sbol_file_string, sbol_upload_id))
+            return LinkerList(linker_list=parser.display_parts())
+        try:
+            # Runs inside the request, so it is never deferred
+            outline = jobs.read_design_outline(sbol_file_string,
+                                               sbol_upload_id)
+            if outline is not None:
+                admission.check_design(admission.estimate_design(outline))
+            with admission.client_slot(admission.client_id(info.context)):
+                parser = ParserSBOL(sbol_document=get_sbol_document(
+                    sbol_file_string, sbol_upload_id))
+                list_of_parts = parser.display_parts()
+        except admission.AdmissionError as error:
+            raise GraphQLError(str(error), extensions=error.extensions)
         return LinkerList(linker_list=list_of_parts)
 
 
+class AssemblyJobType(DjangoObjectType):
+    class Meta:
+        model = AssemblyJob
+        fields = ('id', 'assembly_type', 'status', 'stage', 'error',
+                  'cache_hit', 'deferred', 'design_name', 'created', 'started',
+                  'finished')
+        convert_choices_to_enum = False
+
+    output_links = graphene.List(graphene.String)
+    run_estimate = graphene.JSONString()
+    design_estimate = graphene.JSONString()
+    queued_seconds = graphene.Float()
+    run_seconds = graphene.Float()
+    # Path of the zip of the outputs, once the job has succeeded
+    download_path = graphene.String()
+
+    def resolve_download_path(self, info):
+        if self.status != AssemblyJob.SUCCEEDED:
+            return None
+        return reverse('job-download', args=[self.pk])
+
+
 class FinalSpec(graphene.Mutation):
     class Arguments:
         # Input args
         linker_types = graphene.List(LinkerInType)
         assembly_type = graphene.String()   # "basic", "bio_bricks", or "moclo"
         sbol_file_string = graphene.String()
+        # handle returned by POST /uploads/sbol, in place of sbol_file_string
+        sbol_upload_id = graphene.ID()
         specifications_basic = graphene.Argument(InputSpecsBASIC)
         specifications_bio_bricks = graphene.Argument(InputSpecsBioBricks)
         specifications_mo_clo = graphene.Argument(InputSpecsMoClo)
 
     # output
+    job_id = graphene.ID()
+    job = graphene.Field(AssemblyJobType)
+    # only set when the job ran inside the request (ASSEMBLY_JOBS_SYNC),
+    # otherwise poll the job query until it has finished
     output_links = graphene.List(graphene.String)
+    run_estimate = graphene.JSONString()
+
+    # Queues the job that parses the SBOL and generates the scripts
+    @metrics.instrument_mutation('final_spec')
+    def mutate(self, info, linker_types, assembly_type, sbol_file_string=None,
+               specifications_basic=None, specifications_bio_bricks=None,
+               specifications_mo_clo=None, sbol_upload_id=None):
+        try:
+            job = jobs.submit_job(
+                assembly_type, sbol_file_string or '', linker_types,
+                {'specifications_basic': specifications_basic,
+                 'specifications_bio_bricks': specifications_bio_bricks,
+                 'specifications_mo_clo': specifications_mo_clo},
+                client=admission.client_id(info.context),
+                sbol_upload_id=sbol_upload_id)
+        except admission.AdmissionError as error:
+            raise GraphQLError(str(error), extensions=error.extensions)
+        return FinalSpec(job_id=job.pk, job=job,
+                         output_links=job.output_links,
+                         run_estimate=job.run_estimate)
+
+
+class BatchDesignInput(graphene.InputObjectType):
+    # defaults to design_<position in the batch>
+    name = graphene.String()
+    # either a base64 encoded document or an upload handle
+    sbol_file_string = graphene.String()
+    sbol_upload_id = graphene.ID()
+
+
+class BatchDesignResult(graphene.ObjectType):
+    name = graphene.String()
+    job_id = graphene.ID()
+    job = graphene.Field(AssemblyJobType)
+    # set for the designs refused by admission control
+    error = graphene.String()
+    error_extensions = graphene.JSONString()
+
+
+class AssemblyBatchType(DjangoObjectType):
+    class Meta:
+        model = AssemblyBatch
+        fields = ('id', 'assembly_type', 'created')
+
+    status = graphene.String()
+    designs = graphene.List(BatchDesignResult)
+    manifest = graphene.JSONString()
+
+    def resolve_designs(self, info):
+        designs = [BatchDesignResult(name=job.design_name, job_id=job.pk,
+                                     job=job)
+                   for job in self.jobs.order_by('pk')]
+        for rejected in self.rejected:
+            extensions = {key: rejected[key]
+                          for key in ('code', 'estimate', 'limit')}
+            designs.append(BatchDesignResult(
+                name=rejected['name'], error=rejected['error'],
+                error_extensions=extensions))
+        return designs
+
+    def resolve_manifest(self, info):
+        return jobs.batch_manifest(self)
+
+
+class BatchFinalSpec(graphene.Mutation):
+    class Arguments:
+        designs = graphene.List(BatchDesignInput, required=True)
+        # shared by every design
+        linker_types = graphene.List(LinkerInType)
+        assembly_type = graphene.String()
+        specifications_basic = graphene.Argument(InputSpecsBASIC)
+        specifications_bio_bricks = graphene.Argument(InputSpecsBioBricks)
+        specifications_mo_clo = graphene.Argument(InputSpecsMoClo)
 
-    # Function that is run: call other functions from here
-    def mutate(self, info, linker_types, assembly_type, sbol_file_string, specifications_basic,
-               specifications_bio_bricks, specifications_mo_clo):
-
-        def convert_part_info(part_types_list):
-            return {part_type.linker_id: {
-                    "concentration": part_type.concentration,
-                    "plate": part_type.plate_number,
-                    "well": part_type.well
-                } for part_type in part_types_list}
-        
-        sbol_document = get_sbol_document(sbol_file_string)
-        date_time = "{:%Y%m%d_%H_%M_%S}".format(datetime.now())
-        output_folder = os.path.join(MEDIA_ROOT, date_time)
-        os.makedirs(output_folder)
-        part_types_dictionary = convert_part_info(linker_types)
-        print('part_types_dictionary=', part_types_dictionary)
-        parser = ParserSBOL(sbol_document=sbol_document, outdir=output_folder)
-        if assembly_type == "basic":
-            csv_links = parser.generate_csv(assembly=assembly_type, part_info=part_types_dictionary)
-            labware_dict = specifications_basic.labware_dict
-            common_labware = labware_dict.common_labware
-            links = dnabot_app.dnabot(output_folder=output_folder,
-                                      ethanol_well_for_stage_2=specifications_basic.ethanol_well_for_stage_2,
-                                      deep_well_plate_stage_4=specifications_basic.deep_well_plate_stage_4,
-                                      input_construct_path=csv_links['construct_path'],
-                                      output_sources_paths=csv_links['part_path'],
-                                      p10_mount=common_labware.p10_mount,
-                                      p300_mount=common_labware.p300_mount,
-                                      p10_type=common_labware.p10_type,
-                                      p300_type=common_labware.p300_type,
-                                      well_plate=common_labware.well_plate,
-                                      reagent_plate=labware_dict.reagent_plate,
-                                      mag_plate=labware_dict.mag_plate,
-                                      tube_rack=labware_dict.tube_rack,
-                                      aluminum_block=labware_dict.aluminum_block,
-                                      bead_container=labware_dict.bead_container,
-                                      soc_plate=labware_dict.soc_plate,
-                                      agar_plate=labware_dict.agar_plate
-                                      )
-        elif assembly_type == "bio_bricks":
-            labware_dict = specifications_bio_bricks.labware_dict
-            common_labware = labware_dict.common_labware
-            csv_links = parser.generate_csv(assembly=assembly_type, part_info=part_types_dictionary)
-            links = bbinput.biobricks(output_folder=output_folder,
-                                      construct_path=csv_links["construct_path"],
-                                      part_path=csv_links["part_path"],
-                                      thermocycle=specifications_bio_bricks.thermocycle,
-                                      p10_mount=common_labware.p10_mount,
-                                      p300_mount=common_labware.p300_mount,
-                                      p10_type=common_labware.p10_type,
-                                      p300_type=common_labware.p300_type,
-                                      well_plate=common_labware.well_plate,
-                                      tube_rack=labware_dict.tube_rack,
-                                      soc_plate=labware_dict.soc_plate,
-                                      transformation_plate=labware_dict.transformation_plate
-                                      )
-        elif assembly_type == "moclo":
-            labware_dict = specifications_mo_clo.labware_dict
-            common_labware = labware_dict.common_labware
-            csv_links = parser.generate_csv(assembly=assembly_type, part_info=part_types_dictionary)
-            links = moclo_transform_generator.moclo_function(
-                output_folder=output_folder,
-                construct_path=csv_links["construct_path"],
-                part_path=csv_links["part_path"],
-                thermocycle=specifications_mo_clo.thermocycle,
-                p10_mount=common_labware.p10_mount,
-                p300_mount=common_labware.p300_mount,
-                p10_type=common_labware.p10_type,
-                p300_type=common_labware.p300_type,
-                well_plate=common_labware.well_plate,
-                trough=labware_dict.trough,
-                reagent_plate=labware_dict.reagent_plate,
-                agar_plate=labware_dict.agar_plate
-            )
-        else:
-            links = []
-        # return classes with outputs
-        return FinalSpec(output_links=links)
+    batch_id = graphene.ID()
+    batch = graphene.Field(AssemblyBatchType)
+
+    # Queues a job for each design, poll the batch query for the results
+    @metrics.instrument_mutation('batch_final_spec')
+    def mutate(self, info, designs, linker_types, assembly_type,
+               specifications_basic=None, specifications_bio_bricks=None,
+               specifications_mo_clo=None):
+        try:
+            batch = jobs.submit_batch(
+                assembly_type, designs, linker_types,
+                {'specifications_basic': specifications_basic,
+                 'specifications_bio_bricks': specifications_bio_bricks,
+                 'specifications_mo_clo': specifications_mo_clo},
+                client=admission.client_id(info.context))
+        except admission.AdmissionError as error:
+            raise GraphQLError(str(error), extensions=error.extensions)
+        return BatchFinalSpec(batch_id=batch.pk, batch=batch)
 
 
 class Mutation(graphene.ObjectType):
     linker_list = LinkerList.Field()
     final_spec = FinalSpec.Field()
-
-
-def get_sbol_document(sbol_string):
-    sbol_string_decoded = base64.b64decode(sbol_string)
-    doc = Document()
-    doc.appendString(sbol_str=sbol_string_decoded, overwrite=True)
-    return doc
-
-
-def convert_part_info(part_types_list):
-    return {
-        part_type.linker_id: {
-            "concentration": part_type.concentration,
-            "plate": part_type.plate_number,
-            "well": part_type.well
-        } for part_type in part_types_list}
+    batch_final_spec = BatchFinalSpec.Field()
@@ -0,0 +1,156 @@
+"""Shared renderer for the OT-2 script templates.
+
+The DNA-BOT, MoClo and BioBricks generators all produce protocols by pasting
+a block of python globals into a template. Each template is read and split
+once per process and kept in memory (keyed by path and mtime), so rendering
+a script is a string join followed by a single write.
+"""
+import os
+import threading
+from typing import Any, Dict, Tuple
+
+# Where the injected globals are placed in the rendered script
+PREPEND = 'prepend'
+BEFORE_FIRST_DEF = 'before_first_def'
+
+_template_cache = {}
+_template_cache_lock = threading.Lock()
+
+
+def load_template(
+    template_path: str,
+    placement: str = PREPEND
+) -> Tuple[str, str]:
+    """Returns the header and body of a template.
+
+    The template is only read from disk the first time it is requested or
+    when its modification time changes.
+
+    Args:
+        template_path (str): Absolute path of the template.
+        placement (str): PREPEND to place the globals above the whole
+            template, BEFORE_FIRST_DEF to place them after the imports and
+            metadata, directly above the first top level function.
+
+    Returns:
+        Tuple[str, str]: The text written before and after the globals.
+    """
+    mtime = os.stat(template_path).st_mtime_ns
+    key = (template_path, placement)
+    cached = _template_cache.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1], cached[2]
+
+    with open(template_path) as template_file:
+        template_string = template_file.read()
+    if placement == PREPEND:
+        header, body = '', template_string
+    elif placement == BEFORE_FIRST_DEF:
+        if template_string.startswith('def'):
+            split_at = 0
+        else:
+            split_at = template_string.find('\ndef') + 1
+            if split_at == 0:
+                raise ValueError(
+                    'No top level function in template {}'.format(
+                        template_path))
+        header = template_string[:split_at]
+        body = template_string[split_at:]
+    else:
+        raise ValueError('Unknown placement: {}'.format(placement))
+
+    with _template_cache_lock:
+        _template_cache[key] = (mtime, header, body)
+    return header, body
+
+
+def clear_template_cache():
+    """Forgets all templates loaded by this process."""
+    with _template_cache_lock:
+        _template_cache.clear()
+
+
+_LITERAL_TYPES = (str, bool, int, float, type(None))
+
+
+def _to_builtin(value: Any) -> Any:
+    # numpy scalars (e.g. from a pandas sum) become python scalars, also
+    # inside containers, so that repr writes plain literals
+    if isinstance(value, _LITERAL_TYPES):
+        return value
+    if isinstance(value, dict):
+        return {_to_builtin(key): _to_builtin(item)
+                for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_to_builtin(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(_to_builtin(item) for item in value)
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(
+        'Cannot write {} into an OT-2 script'.format(type(value).__name__))
+
+
+def serialize(value: Any) -> str:
+    """Returns python source for a global injected into a template.
+
+    Values are written with repr once numpy scalars have been converted to
+    python scalars and sets to sorted lists, so dict keys, tuples, True,
+    False and None read back unchanged.
+
+    Args:
+        value: The value of the global.
+
+    Returns:
+        str: Python source evaluating to value.
+    """
+    return repr(_to_builtin(value))
+
+
+def render(
+    template_path: str,
+    injected_globals: Dict[str, Any],
+    placement: str = PREPEND
+) -> str:
+    """Returns the text of a script with the globals pasted into the
+    template.
+
+    Args:
+        template_path (str): Absolute path of the template.
+        injected_globals (Dict[str, Any]): Names and values of the globals,
+            written in insertion order.
+        placement (str): PREPEND or BEFORE_FIRST_DEF, see load_template.
+
+    Returns:
+        str: The rendered script.
+    """
+    header, body = load_template(template_path, placement)
+    lines = [header]
+    for name, value in injected_globals.items():
+        lines.append('{} = {}\n'.format(name, serialize(value)))
+    lines.append('\n\n')
+    lines.append(body)
+    return ''.join(lines)
+
+
+def write_script(
+    output_path: str,
+    template_path: str,
+    injected_globals: Dict[str, Any],
+    placement: str = PREPEND
+) -> str:
+    """Renders a template and writes it to output_path in a single write.
+
+    Args:
+        output_path (str): Absolute path of the script to create.
+        template_path (str): Absolute path of the template.
+        injected_globals (Dict[str, Any]): Names and values of the globals.
+        placement (str): PREPEND or BEFORE_FIRST_DEF, see load_template.
+
+    Returns:
+        str: output_path
+    """
+    script = render(template_path, injected_globals, placement)
+    with open(output_path, 'w') as script_file:
+        script_file.write(script)
+    return output_path
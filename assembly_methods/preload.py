@@ -0,0 +1,30 @@
+"""Heavy modules imported on first use.
+
+sbol2, pandas, numpy, plateo, the SBOL parser and the three generators take
+seconds and tens of MB to import, so the web server, the job workers and
+manage.py commands import them when a request or job first needs them
+instead of at startup. preload imports them up front, e.g. in the gunicorn
+master with preload_app (see gunicorn.conf.py) so that the forked web
+workers share their pages copy-on-write instead of each importing them.
+"""
+import importlib
+
+# In import order, the parser and generators after the libraries they use
+HEAVY_MODULES = (
+    'numpy',
+    'pandas',
+    'sbol2',
+    'plateo',
+    'sbol_parser_api.sbol_parser_api',
+    'basic_assembly.dna_bot.dnabot_app',
+    'biobricks_assembly.biobricks10.bbinput',
+    'moclo_assembly.moclo_transformation.moclo_transform_generator',
+)
+
+
+def preload():
+    """Imports HEAVY_MODULES and reads the standard linker document."""
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
+    from sbol_parser_api.sbol_parser_api import standard_linkers
+    standard_linkers()
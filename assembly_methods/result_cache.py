@@ -0,0 +1,221 @@
+"""Content addressed cache of FinalSpec results.
+
+Identical submissions (same SBOL document, linker types, assembly type and
+specifications of that assembly type) generate identical files, as the
+parser samples the constructs with a fixed seed. The inputs are hashed into
+a key and a submission whose key has a cached result gets the existing
+output links instead of a new job run. Output folders are evicted least
+recently used first once the cache holds more than RESULT_CACHE_MAX_ENTRIES
+results or RESULT_CACHE_MAX_BYTES bytes. Folders used, downloaded or written
+in the last RESULT_CACHE_EVICT_GRACE_S seconds are kept, as cache hits share
+them and a download may still be streaming them.
+
+Only succeeded jobs are stored, so a failed generation (see
+jobs.GeneratorError) is run again on resubmission.
+"""
+import base64
+import binascii
+import hashlib
+import json
+import os
+import shutil
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from assembly_methods import metrics, uploads
+from assembly_methods.models import AssemblyJob, CachedResult, OutputFolder
+
+# Bump when the generated files change for the same inputs
+CACHE_VERSION = 1
+
+# Only the specifications of the requested assembly type are used
+SPECIFICATIONS_KEYS = {
+    'basic': 'specifications_basic',
+    'bio_bricks': 'specifications_bio_bricks',
+    'moclo': 'specifications_mo_clo',
+}
+
+
+def _canonical_concentration(value: Any) -> Any:
+    # "50", "50.0" and 50 are the same concentration
+    try:
+        return str(Decimal(str(value)).normalize())
+    except (InvalidOperation, ValueError):
+        return value
+
+
+def canonical_inputs(
+    assembly_type: str,
+    arguments: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Returns the inputs that determine the generated files.
+
+    Args:
+        assembly_type (str): "basic", "bio_bricks" or "moclo".
+        arguments (Dict[str, Any]): AssemblyJob.arguments.
+
+    Returns:
+        Dict[str, Any]: JSON serialisable inputs, equal for submissions
+        that generate the same files.
+    """
+    if arguments.get('sbol_upload_id'):
+        # the same sha256 as the document sent as a base64 string
+        sbol_sha256 = uploads.get_upload(arguments['sbol_upload_id']).sha256
+    else:
+        sbol_string = arguments['sbol_file_string'] or ''
+        try:
+            sbol_bytes = base64.b64decode(sbol_string)
+        except (binascii.Error, ValueError):
+            sbol_bytes = sbol_string.encode()
+        sbol_sha256 = hashlib.sha256(sbol_bytes).hexdigest()
+    linker_types = sorted(
+        (dict(linker_type, concentration=_canonical_concentration(
+            linker_type.get('concentration')))
+         for linker_type in arguments['linker_types']),
+        key=lambda linker_type: str(linker_type.get('linker_id')))
+    specifications_key = SPECIFICATIONS_KEYS.get(assembly_type)
+    return {
+        'version': CACHE_VERSION,
+        'assembly_type': assembly_type,
+        'sbol_sha256': sbol_sha256,
+        'linker_types': linker_types,
+        'specifications': arguments['specifications'].get(
+            specifications_key),
+        'sampling_seed': arguments.get('sampling_seed'),
+    }
+
+
+def cache_key(assembly_type: str, arguments: Dict[str, Any]) -> str:
+    """Returns the sha256 hex digest of the canonical inputs."""
+    canonical = json.dumps(canonical_inputs(assembly_type, arguments),
+                           sort_keys=True, separators=(',', ':'),
+                           default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def folder_size(path: str) -> int:
+    """Returns the total size in bytes of the files under path."""
+    size = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                size += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return size
+
+
+def lookup(key: str) -> Optional[CachedResult]:
+    """Returns the cached result of key and marks it as used.
+
+    Entries whose output folder has been removed are dropped.
+
+    Args:
+        key (str): See cache_key.
+
+    Returns:
+        Optional[CachedResult]: The entry, None on a miss.
+    """
+    cached = CachedResult.objects.filter(key=key).first()
+    if cached is not None and not os.path.isdir(cached.output_folder):
+        cached.delete()
+        cached = None
+    metrics.CACHE_LOOKUPS.inc(result='miss' if cached is None else 'hit')
+    if cached is None:
+        return None
+    CachedResult.objects.filter(pk=cached.pk).update(
+        hits=F('hits') + 1, last_used=timezone.now())
+    # keeps the folder from the retention sweep, see assembly_methods.retention
+    OutputFolder.objects.filter(
+        path=os.path.abspath(cached.output_folder)).update(
+            last_accessed=timezone.now())
+    return cached
+
+
+def store(job: AssemblyJob) -> Optional[CachedResult]:
+    """Caches the outputs of a succeeded job.
+
+    Args:
+        job (AssemblyJob): Job with a cache_key.
+
+    Returns:
+        Optional[CachedResult]: The entry, None if the job is not cacheable.
+    """
+    if not job.cache_key or job.status != AssemblyJob.SUCCEEDED:
+        return None
+    cached, _ = CachedResult.objects.update_or_create(
+        key=job.cache_key, defaults={
+            'output_folder': job.output_folder,
+            'output_links': job.output_links,
+            'run_estimate': job.run_estimate,
+            'size_bytes': folder_size(job.output_folder),
+            'last_used': timezone.now()})
+    return cached
+
+
+def evict(
+    max_entries: int = None,
+    max_bytes: int = None
+) -> List[str]:
+    """Removes the least recently used results beyond the cache limits.
+
+    Args:
+        max_entries (int): Most results kept, RESULT_CACHE_MAX_ENTRIES by
+            default.
+        max_bytes (int): Most bytes kept, RESULT_CACHE_MAX_BYTES by default.
+
+    Returns:
+        List[str]: Output folders removed.
+    """
+    if max_entries is None:
+        max_entries = settings.RESULT_CACHE_MAX_ENTRIES
+    if max_bytes is None:
+        max_bytes = settings.RESULT_CACHE_MAX_BYTES
+    cutoff = timezone.now() - timedelta(
+        seconds=settings.RESULT_CACHE_EVICT_GRACE_S)
+    in_use = set(OutputFolder.objects.filter(
+        last_accessed__gte=cutoff).values_list('path', flat=True))
+    in_use.update(os.path.abspath(path) for path in AssemblyJob.objects.filter(
+        finished__gte=cutoff).values_list('output_folder', flat=True))
+    entries = CachedResult.objects.count()
+    total_bytes = CachedResult.objects.aggregate(
+        total=Sum('size_bytes'))['total'] or 0
+    removed = []
+    for cached in CachedResult.objects.order_by('last_used', 'pk'):
+        if entries <= max_entries and total_bytes <= max_bytes:
+            break
+        if cached.last_used >= cutoff or \
+                os.path.abspath(cached.output_folder) in in_use:
+            continue
+        shutil.rmtree(cached.output_folder, ignore_errors=True)
+        cached.delete()
+        OutputFolder.objects.filter(
+            path=os.path.abspath(cached.output_folder)).delete()
+        entries -= 1
+        total_bytes -= cached.size_bytes
+        removed.append(cached.output_folder)
+    return removed
+
+
+def stats() -> Dict[str, Any]:
+    """Returns the hit rate of the cache and its current size.
+
+    Hits and misses are counted over the jobs submitted with the cache
+    enabled.
+    """
+    submitted = AssemblyJob.objects.exclude(cache_key='')
+    hits = submitted.filter(cache_hit=True).count()
+    misses = submitted.filter(cache_hit=False).count()
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+        'entries': CachedResult.objects.count(),
+        'size_bytes': CachedResult.objects.aggregate(
+            total=Sum('size_bytes'))['total'] or 0,
+    }
@@ -0,0 +1,229 @@
+"""Removal of old output folders from MEDIA_ROOT and MOCLO_OUTPUT_ROOT.
+
+Every FinalSpec job and MocloView.create call writes a new folder, so the
+folders are recorded as OutputFolders with the time they were last accessed
+(written, served from the result cache or downloaded). A sweep removes the
+folders not accessed for OUTPUT_RETENTION_MAX_AGE_DAYS, then the least
+recently accessed ones until the rest fit in OUTPUT_RETENTION_MAX_BYTES.
+Folders of queued and running jobs are kept. Each sweep also removes the
+SBOL uploads not used for SBOL_UPLOAD_MAX_AGE_DAYS, except the ones queued
+or running jobs read.
+
+The workers sweep after a job, and the supervisor of the worker pool while
+idle, at most every OUTPUT_RETENTION_SWEEP_INTERVAL seconds, so no web
+request waits for a sweep. `manage.py sweep_outputs` sweeps on demand.
+Folders written before they were recorded are found by each sweep and dated
+by their modification time. The bytes reclaimed are counted in
+assembly_methods.metrics.
+"""
+import os
+import shutil
+import time
+from datetime import datetime, timedelta
+from typing import List, Tuple, Union
+
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+
+from assembly_methods import metrics, result_cache
+from assembly_methods.models import (AssemblyJob, CachedResult, OutputFolder,
+                                     SbolUpload)
+
+REASON_AGE = 'age'
+REASON_SIZE = 'size'
+# Metrics kind of removed uploads, next to the OutputFolder kinds
+UPLOAD = 'upload'
+
+# time.monotonic() of the last sweep of this process
+_last_sweep = None
+
+
+def track(path: str, kind: str) -> OutputFolder:
+    """Records a folder that has just been written.
+
+    Args:
+        path (str): The folder.
+        kind (str): OutputFolder.JOB or OutputFolder.MOCLO.
+
+    Returns:
+        OutputFolder: The record, with the current size of the folder.
+    """
+    folder, _ = OutputFolder.objects.update_or_create(
+        path=os.path.abspath(path), defaults={
+            'kind': kind,
+            'size_bytes': result_cache.folder_size(path),
+            'last_accessed': timezone.now()})
+    return folder
+
+
+def touch(path: str):
+    """Marks a folder as accessed, moving it to the back of the eviction
+    order."""
+    OutputFolder.objects.filter(path=os.path.abspath(path)).update(
+        last_accessed=timezone.now())
+
+
+def discover() -> int:
+    """Records the untracked folders under the output roots and forgets the
+    folders that have been removed by other means.
+
+    Returns:
+        int: Number of folders recorded.
+    """
+    tracked = dict(OutputFolder.objects.values_list('path', 'pk'))
+    gone = [pk for path, pk in tracked.items() if not os.path.isdir(path)]
+    OutputFolder.objects.filter(pk__in=gone).delete()
+
+    found = []
+    for root, kind in ((settings.MEDIA_ROOT, OutputFolder.JOB),
+                       (settings.MOCLO_OUTPUT_ROOT, OutputFolder.MOCLO)):
+        root = os.path.abspath(root)
+        if not os.path.isdir(root):
+            continue
+        for entry in os.scandir(root):
+            if not entry.is_dir() or entry.path in tracked:
+                continue
+            found.append(OutputFolder(
+                path=entry.path, kind=kind,
+                size_bytes=result_cache.folder_size(entry.path),
+                last_accessed=datetime.fromtimestamp(
+                    entry.stat().st_mtime, timezone.utc)))
+    OutputFolder.objects.bulk_create(found, ignore_conflicts=True)
+    return len(found)
+
+
+def _remove(folder: OutputFolder, reason: str, dry_run: bool) -> bool:
+    if dry_run:
+        return True
+    # The delete claims the folder, so concurrent sweeps count it once
+    deleted, _ = OutputFolder.objects.filter(pk=folder.pk).delete()
+    if not deleted:
+        return False
+    CachedResult.objects.filter(output_folder=folder.path).delete()
+    shutil.rmtree(folder.path, ignore_errors=True)
+    metrics.RETENTION_FOLDERS_REMOVED.inc(kind=folder.kind, reason=reason)
+    metrics.RETENTION_BYTES_RECLAIMED.inc(folder.size_bytes,
+                                          kind=folder.kind, reason=reason)
+    return True
+
+
+def expire_uploads(
+    max_age_days: float,
+    dry_run: bool = False
+) -> List[SbolUpload]:
+    """Removes the SBOL uploads not used for max_age_days, except the ones
+    of queued and running jobs.
+
+    Args:
+        max_age_days (float): Days since the last use. 0 keeps every upload.
+        dry_run (bool): Only return the uploads that would be removed.
+
+    Returns:
+        List[SbolUpload]: The uploads removed.
+    """
+    if not max_age_days:
+        return []
+    active = set()
+    for arguments in AssemblyJob.objects.filter(
+            status__in=[AssemblyJob.QUEUED, AssemblyJob.RUNNING]) \
+            .values_list('arguments', flat=True):
+        if arguments.get('sbol_upload_id'):
+            active.add(arguments['sbol_upload_id'])
+    cutoff = timezone.now() - timedelta(days=max_age_days)
+    removed = []
+    for upload in SbolUpload.objects.filter(
+            last_used__lt=cutoff).order_by('last_used', 'pk'):
+        if str(upload.handle) in active:
+            continue
+        if not dry_run:
+            # The delete claims the upload, as in _remove
+            deleted, _ = SbolUpload.objects.filter(
+                pk=upload.pk, last_used__lt=cutoff).delete()
+            if not deleted:
+                continue
+            try:
+                os.remove(upload.path)
+            except FileNotFoundError:
+                pass
+            metrics.RETENTION_FOLDERS_REMOVED.inc(kind=UPLOAD,
+                                                  reason=REASON_AGE)
+            metrics.RETENTION_BYTES_RECLAIMED.inc(
+                upload.size_bytes, kind=UPLOAD, reason=REASON_AGE)
+        removed.append(upload)
+    return removed
+
+
+def sweep(
+    max_age_days: float = None,
+    max_bytes: int = None,
+    dry_run: bool = False,
+    upload_max_age_days: float = None
+) -> List[Tuple[Union[OutputFolder, SbolUpload], str]]:
+    """Removes the folders beyond the retention limits and the expired
+    uploads.
+
+    Args:
+        max_age_days (float): Days since the last access after which a
+            folder is removed, OUTPUT_RETENTION_MAX_AGE_DAYS by default.
+            0 keeps folders of any age.
+        max_bytes (int): Most bytes kept in total,
+            OUTPUT_RETENTION_MAX_BYTES by default. 0 keeps any size.
+        dry_run (bool): Only return the folders that would be removed.
+        upload_max_age_days (float): See expire_uploads,
+            SBOL_UPLOAD_MAX_AGE_DAYS by default.
+
+    Returns:
+        List[Tuple[Union[OutputFolder, SbolUpload], str]]: The folders and
+        uploads removed, with REASON_AGE or REASON_SIZE.
+    """
+    if max_age_days is None:
+        max_age_days = settings.OUTPUT_RETENTION_MAX_AGE_DAYS
+    if max_bytes is None:
+        max_bytes = settings.OUTPUT_RETENTION_MAX_BYTES
+    if upload_max_age_days is None:
+        upload_max_age_days = settings.SBOL_UPLOAD_MAX_AGE_DAYS
+    discover()
+    active = {os.path.abspath(path) for path in AssemblyJob.objects.filter(
+        status__in=[AssemblyJob.QUEUED, AssemblyJob.RUNNING])
+        .exclude(output_folder='').values_list('output_folder', flat=True)}
+    removed = [(upload, REASON_AGE) for upload in expire_uploads(
+        upload_max_age_days, dry_run)]
+
+    if max_age_days:
+        cutoff = timezone.now() - timedelta(days=max_age_days)
+        for folder in OutputFolder.objects.filter(
+                last_accessed__lt=cutoff).order_by('last_accessed', 'pk'):
+            if folder.path not in active and \
+                    _remove(folder, REASON_AGE, dry_run):
+                removed.append((folder, REASON_AGE))
+
+    if max_bytes:
+        removed_pks = [folder.pk for folder, _ in removed
+                       if isinstance(folder, OutputFolder)]
+        remaining = OutputFolder.objects.exclude(pk__in=removed_pks)
+        total_bytes = remaining.aggregate(
+            total=Sum('size_bytes'))['total'] or 0
+        for folder in remaining.order_by('last_accessed', 'pk'):
+            if total_bytes <= max_bytes:
+                break
+            if folder.path not in active and \
+                    _remove(folder, REASON_SIZE, dry_run):
+                removed.append((folder, REASON_SIZE))
+                total_bytes -= folder.size_bytes
+    return removed
+
+
+def maybe_sweep() -> List[Tuple[OutputFolder, str]]:
+    """Sweeps if OUTPUT_RETENTION_ENABLED is set and this process has not
+    swept for OUTPUT_RETENTION_SWEEP_INTERVAL seconds."""
+    global _last_sweep
+
+    if not settings.OUTPUT_RETENTION_ENABLED:
+        return []
+    now = time.monotonic()
+    if _last_sweep is not None and \
+            now - _last_sweep < settings.OUTPUT_RETENTION_SWEEP_INTERVAL:
+        return []
+    _last_sweep = now
+    return sweep()
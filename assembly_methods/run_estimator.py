@@ -0,0 +1,662 @@
+"""Run-time and consumables estimator for the generated OT-2 scripts.
+
+Predicts how long each script will take, how many tips it uses and how much
+of each reagent it consumes, straight from the dictionaries the DNA-BOT,
+MoClo and BioBricks generators inject into their templates. The estimate
+mirrors the liquid handling of the templates operation by operation, priced
+with the per-operation cost model below, so no opentrons simulation is
+needed.
+"""
+import json
+import math
+import os
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+ESTIMATE_FNAME = 'run_estimate.json'
+
+P10_TIPRACK = 'opentrons_96_tiprack_10ul'
+P300_TIPRACK = 'opentrons_96_tiprack_300ul'
+TIPS_PER_RACK = 96
+
+# Nominal seconds per robot operation (API 2.2, default flow rates and head
+# speeds), worked out from the pipette and gantry settings rather than
+# measured on a robot, so treat run times as rough. A mix cycle is one
+# aspirate/dispense pair; slow_move is a z move at the reduced speed used
+# over source wells.
+OPERATION_SECONDS = {
+    'pick_up_tip': 5.5,
+    'drop_tip': 4.5,
+    'aspirate': 2.5,
+    'dispense': 2.0,
+    'mix_cycle': 1.6,
+    'touch_tip': 2.2,
+    'blow_out': 1.2,
+    'slow_move': 3.0,
+    'spot': 9.0,
+}
+
+# Seconds for module actions, on top of any hold times and delays
+MODULE_SECONDS = {
+    'temperature_module_set': 240,
+    'thermocycler_lid': 20,
+    'thermocycler_step_ramp': 25,
+}
+
+P10_MAX_VOL = 10
+P300_MAX_VOL = 300
+
+
+class _Tally:
+    """Accumulates operations, tips and volumes for one script."""
+
+    def __init__(self, script: str):
+        self.script = script
+        self.operations = Counter()
+        self.tips = Counter()
+        self.reagent_volumes = Counter()
+        self.delay_seconds = 0
+
+    def op(self, name: str, count: int = 1):
+        self.operations[name] += count
+
+    def tip(self, tiprack: str = P10_TIPRACK, count: int = 1,
+            channels: int = 1):
+        # a multi-channel pipette picks up a column of tips at once
+        self.tips[tiprack] += count * channels
+        self.operations['pick_up_tip'] += count
+        self.operations['drop_tip'] += count
+
+    def transfer(self, volume: float, max_volume: float = P10_MAX_VOL,
+                 count: int = 1):
+        # volumes above the pipette maximum are split into equal shots
+        shots = max(1, math.ceil(volume / max_volume)) * count
+        self.operations['aspirate'] += shots
+        self.operations['dispense'] += shots
+
+    def mix(self, repetitions: int, count: int = 1):
+        self.operations['mix_cycle'] += repetitions * count
+
+    def use(self, reagent: str, volume: float):
+        self.reagent_volumes[reagent] += volume
+
+    def delay(self, seconds: float):
+        self.delay_seconds += seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        run_time = self.delay_seconds + sum(
+            OPERATION_SECONDS.get(name, MODULE_SECONDS.get(name, 0)) * count
+            for name, count in self.operations.items())
+        return {
+            'script': self.script,
+            'run_time_s': round(run_time, 1),
+            'tips': dict(self.tips),
+            'tip_racks': {rack: math.ceil(tips / TIPS_PER_RACK)
+                          for rack, tips in self.tips.items()},
+            'reagent_volumes': {name: round(vol, 2) for name, vol
+                                in self.reagent_volumes.items()},
+            'operations': dict(self.operations),
+        }
+
+
+def _thermocycle(tally: _Tally, profile: List[Tuple[float, int]]):
+    # profile: (hold time in seconds, repetitions) for each step
+    tally.op('thermocycler_lid', 2)
+    for hold_time, repetitions in profile:
+        tally.op('thermocycler_step_ramp', repetitions)
+        tally.delay(repetitions * hold_time)
+
+
+def estimate_thermocycle() -> Dict[str, Any]:
+    """Estimates the optional DNA-BOT thermocycle script run after the
+    CLIP reactions.
+
+    Returns:
+        Dict[str, Any]: Estimate, see estimate_clip.
+    """
+    tally = _Tally('thermocycle')
+    _thermocycle(tally, [(120, 20), (60, 20), (300, 1), (1200, 1)])
+    return tally.to_dict()
+
+
+def estimate_clip(
+    clips_dict: Dict[str, List],
+    transfer_plan: List[Dict] = None
+) -> Dict[str, Any]:
+    """Estimates the DNA-BOT linker ligation (CLIP) script.
+
+    Args:
+        clips_dict (Dict[str, List]): clips_dict injected into the clip
+            template.
+        transfer_plan (List[Dict]): Transfer plan executed by the clip
+            template. Without one, every water, linker and part transfer is
+            estimated with a new tip, as with the 'always' tip policy.
+
+    Returns:
+        Dict[str, Any]: Estimate with run_time_s, tips, tip_racks,
+            reagent_volumes and operations.
+    """
+    tally = _Tally('clip')
+    clip_number = len(clips_dict['parts_wells'])
+    master_mix_vol = 20
+
+    tally.tip()
+    tally.transfer(master_mix_vol, count=clip_number)
+    tally.op('touch_tip', clip_number)
+    tally.op('blow_out', clip_number)
+    tally.use('clip_master_mix', master_mix_vol * clip_number)
+
+    if transfer_plan is None:
+        transfer_plan = [
+            {'action': 'transfer', 'plate': 'tube_rack', 'well': 'A2',
+             'dests': [None], 'volumes': [water_vol], 'mix': 0}
+            for water_vol in clips_dict['water_vols']]
+        for prefix in ('prefixes', 'suffixes', 'parts'):
+            wells = clips_dict[prefix + '_wells']
+            plates = clips_dict[prefix + '_plates']
+            vols = clips_dict['parts_vols'] if prefix == 'parts' \
+                else [1] * len(wells)
+            transfer_plan += [
+                {'action': 'transfer', 'plate': plate, 'well': well,
+                 'dests': [None], 'volumes': [vol], 'mix': 1}
+                for well, plate, vol in zip(wells, plates, vols)]
+
+    for step in transfer_plan:
+        if step['action'] == 'mix':
+            tally.tip(count=len(step['dests']))
+            tally.mix(4, len(step['dests']))
+            continue
+        if step['plate'] == 'tube_rack':
+            reagent = 'water'
+        else:
+            reagent = 'plate {} {}'.format(step['plate'], step['well'])
+        tally.use(reagent, sum(step['volumes']))
+        if step['action'] == 'transfer':
+            for vol in step['volumes']:
+                tally.tip()
+                tally.transfer(vol)
+                tally.op('slow_move', 2)
+                tally.op('touch_tip')
+                if step['mix']:
+                    tally.mix(4)
+        else:
+            tally.tip()
+            tally.op('aspirate')
+            tally.op('slow_move')
+            tally.op('dispense', len(step['volumes']))
+            tally.op('touch_tip', len(step['volumes']))
+    return tally.to_dict()
+
+
+def estimate_final_assembly(
+    final_assembly_dict: Dict[str, List[str]]
+) -> Dict[str, Any]:
+    """Estimates the DNA-BOT final assembly script.
+
+    Args:
+        final_assembly_dict (Dict[str, List[str]]): Construct wells mapped to
+            the purified CLIP wells they are assembled from.
+
+    Returns:
+        Dict[str, Any]: Estimate, see estimate_clip.
+    """
+    tally = _Tally('final_assembly')
+    total_vol = 15
+    part_vol = 1.5
+
+    tally.op('temperature_module_set')
+    lens = Counter(len(clips) for clips in final_assembly_dict.values())
+    for part_number, assemblies in lens.items():
+        mm_vol = total_vol - part_number * part_vol
+        tally.tip()
+        tally.transfer(mm_vol, count=assemblies)
+        tally.use('assembly_master_mix_{}_parts'.format(part_number),
+                  mm_vol * assemblies)
+
+    for clips in final_assembly_dict.values():
+        tally.tip(count=len(clips))
+        tally.transfer(part_vol, count=len(clips))
+        tally.op('slow_move', 2 * len(clips))
+        tally.op('touch_tip', len(clips))
+        tally.mix(4)
+    return tally.to_dict()
+
+
+def estimate_purification(
+    sample_number: int,
+    multi: bool = True
+) -> Dict[str, Any]:
+    """Estimates the DNA-BOT magnetic bead purification script.
+
+    Args:
+        sample_number (int): Number of CLIP reactions purified.
+        multi (bool): Whether an 8-channel p300 handles a column of samples
+            at a time.
+
+    Returns:
+        Dict[str, Any]: Estimate, see estimate_clip.
+    """
+    tally = _Tally('purification')
+    sample_vol = 30
+    bead_vol = sample_vol * 1.8
+    total_vol = bead_vol + sample_vol + 5
+    ethanol_vol = 150
+    ethanol_dead_vol = 50
+    elution_vol = 40
+    channels = 8 if multi else 1
+    units = math.ceil(sample_number / 8) if multi else sample_number
+
+    def p300(count=units, volume=0, **ops):
+        tally.tip(P300_TIPRACK, count, channels)
+        if volume:
+            tally.transfer(volume, P300_MAX_VOL, count)
+        for name, number in ops.items():
+            tally.op(name, number * count)
+
+    # beads and samples mixed on the mixing plate, then back to the magdeck
+    p300(volume=bead_vol, aspirate=1, dispense=1, slow_move=2,
+         mix_cycle=10, touch_tip=1, blow_out=1)
+    tally.use('beads', bead_vol * units * channels)
+    tally.delay(5 * 60)
+    p300(volume=total_vol, blow_out=1)
+    tally.delay(2 * 60)
+    # supernatant, then two ethanol washes
+    p300(volume=total_vol, blow_out=1)
+    for _ in range(2):
+        p300(volume=ethanol_vol)
+        tally.delay(0.5 * 60)
+        p300(volume=ethanol_vol + ethanol_dead_vol)
+    tally.use('ethanol', 2 * ethanol_vol * units * channels)
+    tally.delay(5 * 60)
+    # elution and transfer of the clean product
+    p300(volume=elution_vol, mix_cycle=20)
+    tally.use('elution_buffer', elution_vol * units * channels)
+    tally.delay(3 * 60)
+    p300(aspirate=1, dispense=1, slow_move=2, touch_tip=1)
+    return tally.to_dict()
+
+
+def estimate_transformation(
+    spotting_tuples: List[Tuple],
+    p10_multi: bool = False
+) -> Dict[str, Any]:
+    """Estimates the DNA-BOT transformation and spotting script.
+
+    Args:
+        spotting_tuples (List[Tuple]): Spotting reactions in the form
+            ((source wells), (target wells), (spotting volumes)).
+        p10_multi (bool): Whether a multi-channel p10 transfers and spots
+            a whole column at a time.
+
+    Returns:
+        Dict[str, Any]: Estimate, see estimate_clip.
+    """
+    tally = _Tally('transformation')
+    assembly_vol = 5
+    soc_vol = 125
+    max_spot_vol = 5
+    dead_vol = 2
+
+    source_wells = [well for spotting_tuple in spotting_tuples
+                    for well in spotting_tuple[0]]
+    cols = {well[1:] for well in source_wells}
+
+    p10_channels = 8 if p10_multi else 1
+
+    # agar plate calibration transfer
+    tally.tip(channels=p10_channels)
+    tally.transfer(1)
+
+    # transformation setup
+    tally.op('temperature_module_set')
+    unique_wells = cols if p10_multi else set(source_wells)
+    tally.tip(count=len(unique_wells), channels=p10_channels)
+    tally.transfer(assembly_vol, count=len(unique_wells))
+    tally.mix(4, count=len(unique_wells))
+    tally.delay(20 * 60)
+
+    # outgrowth, SOC is added a column at a time by the 8 channel p300
+    tally.tip(P300_TIPRACK, count=len(cols), channels=8)
+    tally.transfer(soc_vol, P300_MAX_VOL, count=len(cols))
+    tally.mix(4, count=len(cols))
+    tally.use('soc', soc_vol * len(cols) * 8)
+    tally.op('temperature_module_set')
+    tally.delay(60 * 60)
+
+    # spotting, each column is resuspended once per spotting tuple
+    for spotting_tuple in spotting_tuples:
+        tuple_cols = {well[1:] for well in spotting_tuple[0]}
+        tally.tip(P300_TIPRACK, count=len(tuple_cols), channels=8)
+        tally.mix(4, count=len(tuple_cols))
+        spot_vols = spotting_tuple[2]
+        if p10_multi:
+            spot_vols = [max(spot_vols)] * len(tuple_cols)
+        for spot_vol in spot_vols:
+            spots = math.ceil(spot_vol / max_spot_vol)
+            tally.tip(count=spots, channels=p10_channels)
+            tally.op('aspirate', spots)
+            tally.op('dispense', 2 * spots)
+            tally.op('spot', spots)
+            tally.op('blow_out', spots)
+            tally.use('transformation_reactions',
+                      (spot_vol + spots * dead_vol)
+                      * (8 if p10_multi else 1))
+    return tally.to_dict()
+
+
+def estimate_moclo_assembly(
+    reagent_to_mm: Dict[str, List],
+    combinations_to_make: List[Dict],
+    master_mix_dicts: List[Dict] = None,
+    thermocycle: bool = True,
+    assembly_plan: List[Dict] = None
+) -> Dict[str, Any]:
+    """Estimates the MoClo assembly script.
+
+    Args:
+        reagent_to_mm (Dict[str, List]): Reagent wells mapped to lists of
+            (plate, master mix well, volume) transfers.
+        combinations_to_make (List[Dict]): Combinations with 'name' and
+            'parts'.
+        master_mix_dicts (List[Dict]): Master mix wells with
+            'vol_per_assembly' and 'no_assemblies'; mixing and distribution
+            of master mix are left out of the estimate if not given.
+        thermocycle (bool): Whether the thermocycler module runs the
+            assembly.
+        assembly_plan (List[Dict]): Transfer plan executed by the assembly
+            template. Without one, transfers are estimated from
+            reagent_to_mm and the combinations, with one tip per source and
+            two washes between aspirations of five parts.
+
+    Returns:
+        Dict[str, Any]: Estimate, see estimate_clip.
+    """
+    tally = _Tally('moclo_assembly')
+    part_vol = 2
+    max_dispenses = 5
+
+    tally.op('temperature_module_set')
+    if assembly_plan is not None:
+        for step in assembly_plan:
+            dispenses = len(step['dests'])
+            if step['action'] == 'mix':
+                tally.tip(count=dispenses)
+                tally.mix(2, dispenses)
+                tally.op('blow_out', dispenses)
+                continue
+            if step['new_tip']:
+                tally.tip()
+            if step['wash']:
+                tally.mix(2, count=2)
+                tally.op('blow_out', 2)
+            tally.op('aspirate')
+            tally.op('dispense', dispenses)
+            # master mixes are made in the reaction plate
+            if step['plate'] != 'reaction_plate':
+                tally.use('{} {}'.format(step['plate'], step['well']),
+                          sum(step['volumes']))
+    else:
+        for well, transfers in reagent_to_mm.items():
+            tally.tip()
+            for plate, _, vol in transfers:
+                tally.transfer(float(vol))
+                tally.use('{} {}'.format(plate, well), float(vol))
+            tally.op('blow_out')
+
+        for mm_dict in master_mix_dicts or []:
+            tally.tip(count=2)
+            tally.mix(2)
+            tally.op('blow_out', 1 + mm_dict['no_assemblies'])
+            tally.transfer(mm_dict['vol_per_assembly'],
+                           count=mm_dict['no_assemblies'])
+
+        uses = Counter(part for combination in combinations_to_make
+                       for part in combination['parts'])
+        for part, count in uses.items():
+            chunks = math.ceil(count / max_dispenses)
+            tally.tip()
+            tally.op('aspirate', chunks)
+            tally.op('dispense', count)
+            # two wash troughs between chunks
+            tally.mix(2, count=2 * (chunks - 1))
+            tally.op('blow_out', 2 * (chunks - 1))
+            tally.use(part, part_vol * count)
+
+    if thermocycle:
+        _thermocycle(tally, [(90, 35), (180, 35), (300, 1), (600, 1)])
+    return tally.to_dict()
+
+
+def estimate_moclo_transformation(
+    reactions: int,
+    multi: bool = False,
+    replicates: int = 1
+) -> Dict[str, Any]:
+    """Estimates the MoClo transformation and plating script.
+
+    Args:
+        reactions (int): Number of assemblies transformed.
+        multi (bool): Whether an 8-channel p300 adds SOC, dilutes and
+            plates a column at a time.
+        replicates (int): Agar plate spots of each reaction.
+
+    Returns:
+        Dict[str, Any]: Estimate, see estimate_clip.
+    """
+    tally = _Tally('moclo_transformation')
+    plate_wells = 96
+    soc_vol = 150
+    dilution_soc_vol = 45
+    channels = 8 if multi else 1
+
+    # DNA into the competent cells with one washed p10 tip
+    tally.tip()
+    tally.transfer(2, count=reactions)
+    tally.mix(4 + 2 + 2, count=reactions)
+    tally.op('blow_out', 3 * reactions)
+    tally.use('moclo_reactions', 2 * reactions)
+
+    # cold incubation, heat shock and recovery
+    tally.op('temperature_module_set', 4)
+    tally.delay((30 + 1 + 5) * 60)
+
+    # SOC and dilution go to every well of the plate, as in the template
+    dests = plate_wells // channels
+    tally.tip(P300_TIPRACK, channels=channels)
+    tally.transfer(soc_vol, P300_MAX_VOL, count=dests)
+    tally.mix(2 + 2 + 2, count=dests)
+    tally.op('blow_out', 3 * dests)
+    tally.use('soc', (soc_vol + dilution_soc_vol) * plate_wells)
+    tally.op('temperature_module_set')
+    tally.delay(60 * 60)
+
+    tally.tip(P300_TIPRACK, channels=channels)
+    tally.transfer(157, P300_MAX_VOL, count=dests)
+    tally.transfer(dilution_soc_vol, P300_MAX_VOL, count=dests)
+    tally.mix(2 + 2 + 2 + 2 + 2, count=dests)
+    tally.op('blow_out', 6 * dests)
+
+    # plating
+    sources = math.ceil(reactions / 8) if multi else reactions
+    tally.tip(P300_TIPRACK, channels=channels)
+    tally.transfer(10, P300_MAX_VOL, count=sources * replicates)
+    return tally.to_dict()
+
+
+def estimate_biobricks_assembly(
+    source_to_digest: Dict[str, Dict[str, List]],
+    digest_to_construct: Dict[str, List],
+    reagent_to_digest: Dict[str, List] = None,
+    reagent_to_construct: Dict[str, List] = None,
+    reagents_dict: Dict[str, str] = None,
+    thermocycle: bool = True
+) -> Dict[str, Any]:
+    """Estimates the BioBricks digest and ligation script.
+
+    Args:
+        source_to_digest (Dict[str, Dict[str, List]]): Source plate slots
+            mapped to part wells mapped to lists of (digest well, volume)
+            transfers.
+        digest_to_construct (Dict[str, List]): Digest wells mapped to lists
+            of (construct well, volume) transfers.
+        reagent_to_digest (Dict[str, List]): Reagent wells mapped to
+            (digest well, volume) transfers.
+        reagent_to_construct (Dict[str, List]): Reagent wells mapped to
+            (construct well, volume) transfers.
+        reagents_dict (Dict[str, str]): Reagent names mapped to wells. Water
+            is dispensed with a single tip, T4 ligase and buffer take a new
+            tip per construct.
+        thermocycle (bool): Whether the thermocycler module runs the digest
+            and ligation.
+
+    Returns:
+        Dict[str, Any]: Estimate, see estimate_clip.
+    """
+    tally = _Tally('biobricks_assembly')
+    for well, transfers in (reagent_to_digest or {}).items():
+        tally.tip()
+        for _, vol in transfers:
+            tally.transfer(vol)
+            tally.use('reagent ' + well, vol)
+
+    for plate, plate_to_digest in source_to_digest.items():
+        for well, transfers in plate_to_digest.items():
+            vol = transfers[0][1]
+            if vol < P10_MAX_VOL:
+                tally.tip()
+            else:
+                tally.tip(count=len(transfers))
+            tally.transfer(vol, count=len(transfers))
+            tally.op('slow_move', 2 * len(transfers))
+            tally.op('touch_tip', len(transfers))
+            tally.op('blow_out', len(transfers))
+            tally.use('part {} {}'.format(plate, well), vol * len(transfers))
+
+    if thermocycle:
+        _thermocycle(tally, [(600, 1), (1200, 1)])
+
+    water_well = (reagents_dict or {}).get('water')
+    for well, transfers in (reagent_to_construct or {}).items():
+        if well == water_well:
+            tally.tip()
+        else:
+            tally.tip(count=len(transfers))
+            tally.op('slow_move', 2 * len(transfers))
+            tally.op('touch_tip', len(transfers))
+            tally.op('blow_out', len(transfers))
+        for _, vol in transfers:
+            tally.transfer(vol)
+            tally.use('reagent ' + well, vol)
+
+    for well, transfers in digest_to_construct.items():
+        tally.tip()
+        tally.transfer(transfers[0][1], count=len(transfers))
+        tally.op('slow_move', 2 * len(transfers))
+        tally.op('touch_tip', len(transfers))
+        tally.op('blow_out', len(transfers))
+
+    if thermocycle:
+        _thermocycle(tally, [(600, 1), (1200, 1)])
+    return tally.to_dict()
+
+
+def estimate_biobricks_transformation(
+    competent_source_to_dest: Dict[str, List],
+    control_source_to_dest: Dict[str, List],
+    assembly_source_to_dest: Dict[str, List],
+    water_source_to_dest: Dict[str, List]
+) -> Dict[str, Any]:
+    """Estimates the BioBricks transformation script.
+
+    Args:
+        competent_source_to_dest (Dict[str, List]): Competent cell wells
+            mapped to lists of (transformation well, volume) transfers.
+        control_source_to_dest (Dict[str, List]): Control DNA wells, as
+            above.
+        assembly_source_to_dest (Dict[str, List]): Assembly wells, as above.
+        water_source_to_dest (Dict[str, List]): Water wells, as above.
+
+    Returns:
+        Dict[str, Any]: Estimate, see estimate_clip.
+    """
+    tally = _Tally('biobricks_transformation')
+    soc_vol = 200
+
+    tally.op('temperature_module_set')
+    for source_to_dest, reagent, mix in (
+            (competent_source_to_dest, 'competent_cells', 0),
+            (control_source_to_dest, 'control_dna', 0),
+            (assembly_source_to_dest, 'assembly', 4),
+            (water_source_to_dest, 'water', 4)):
+        # one tip per source well
+        for transfers in source_to_dest.values():
+            vol = transfers[0][1]
+            tally.tip()
+            tally.transfer(vol, count=len(transfers))
+            tally.mix(mix, count=len(transfers))
+            tally.use(reagent, vol * len(transfers))
+    tally.delay((30 + 5) * 60)
+
+    # the template adds SOC to the wells of the last competent cell and
+    # control sources only
+    soc_wells = sum(len(list(source_to_dest.values())[-1])
+                    for source_to_dest in (competent_source_to_dest,
+                                           control_source_to_dest)
+                    if source_to_dest)
+    tally.tip(P300_TIPRACK, count=soc_wells)
+    tally.transfer(soc_vol, P300_MAX_VOL, count=soc_wells)
+    tally.mix(4, count=soc_wells)
+    tally.use('soc', soc_vol * soc_wells)
+    tally.op('temperature_module_set')
+    tally.delay(60 * 60)
+    return tally.to_dict()
+
+
+def summarise(estimates: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combines per script estimates into a run estimate.
+
+    Args:
+        estimates (List[Dict[str, Any]]): Per script estimates.
+
+    Returns:
+        Dict[str, Any]: 'scripts' (the per script estimates) with the
+            total run time, tips and tip racks over all scripts.
+    """
+    tips = Counter()
+    tip_racks = Counter()
+    for estimate in estimates:
+        tips.update(estimate['tips'])
+        tip_racks.update(estimate['tip_racks'])
+    return {
+        'scripts': estimates,
+        'total_run_time_s': round(
+            sum(estimate['run_time_s'] for estimate in estimates), 1),
+        'tips': dict(tips),
+        'tip_racks': dict(tip_racks),
+    }
+
+
+def save_estimate(estimate: Dict[str, Any], output_folder: str) -> str:
+    """Writes a run estimate next to the generated scripts.
+
+    Returns:
+        str: Path of the estimate file.
+    """
+    path = os.path.join(output_folder, ESTIMATE_FNAME)
+    with open(path, 'w') as f:
+        json.dump(estimate, f, indent=1)
+    return path
+
+
+def load_estimate(output_paths: List[str]) -> Dict[str, Any]:
+    """Reads the run estimate from the paths returned by a generator.
+
+    Returns:
+        Dict[str, Any]: The estimate, None if the generator did not write
+            one (e.g. because generation failed).
+    """
+    for path in output_paths:
+        if os.path.basename(path) == ESTIMATE_FNAME:
+            with open(path) as f:
+                return json.load(f)
+    return None
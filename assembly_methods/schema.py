@@ -1,9 +1,40 @@
 import graphene
-from .mutations import Mutation
+from . import result_cache
+from .models import AssemblyBatch, AssemblyJob
+from .mutations import AssemblyBatchType, AssemblyJobType, Mutation
+
+
+class ResultCacheStats(graphene.ObjectType):
+    hits = graphene.Int()
+    misses = graphene.Int()
+    hit_rate = graphene.Float()
+    entries = graphene.Int()
+    size_bytes = graphene.Float()
 
 
 class Query(graphene.ObjectType):
     hello_biobricks = graphene.String(default_value="Hi From Bio Bricks Assembly")
+    job = graphene.Field(AssemblyJobType, id=graphene.ID(required=True))
+    jobs = graphene.List(AssemblyJobType, status=graphene.String(),
+                         limit=graphene.Int(default_value=20))
+    batch = graphene.Field(AssemblyBatchType, id=graphene.ID(required=True))
+    result_cache = graphene.Field(ResultCacheStats)
+
+    def resolve_job(self, info, id):
+        return AssemblyJob.objects.filter(pk=id).first()
+
+    # Newest jobs first
+    def resolve_jobs(self, info, status=None, limit=20):
+        queryset = AssemblyJob.objects.order_by('-created', '-pk')
+        if status:
+            queryset = queryset.filter(status=status)
+        return queryset[:limit]
+
+    def resolve_batch(self, info, id):
+        return AssemblyBatch.objects.filter(pk=id).first()
+
+    def resolve_result_cache(self, info):
+        return ResultCacheStats(**result_cache.stats())
 
 
 schema = graphene.Schema(query=Query, mutation=Mutation)
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import tempfile
 from django.core.management.utils import get_random_secret_key
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -97,6 +98,8 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # the job workers write to the same database as the web server
+        'OPTIONS': {'timeout': 20},
     }
 }
 
@@ -150,3 +153,73 @@ if DEBUG:
     MEDIA_URL = "http://localhost:8000/media/output/"
 else:
     MEDIA_URL = "http://app.soaplab.io/media/output/"
+
+# Background jobs for the FinalSpec mutation, see assembly_methods/jobs.py
+# ASSEMBLY_JOBS_SYNC runs each job inside the request instead of the pool
+# ASSEMBLY_JOB_WORKERS is the pool of each host, started by the gunicorn master
+ASSEMBLY_JOBS_SYNC = os.getenv("ASSEMBLY_JOBS_SYNC", "FALSE") == "TRUE"
+ASSEMBLY_JOB_WORKERS = int(os.getenv("ASSEMBLY_JOB_WORKERS", "2"))
+ASSEMBLY_JOB_POLL_INTERVAL = float(
+    os.getenv("ASSEMBLY_JOB_POLL_INTERVAL", "1"))
+ASSEMBLY_JOB_REQUEUE_INTERVAL = float(
+    os.getenv("ASSEMBLY_JOB_REQUEUE_INTERVAL", "60"))
+
+# Identical submissions reuse earlier outputs, see assembly_methods/result_cache.py
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "TRUE") == "TRUE"
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "200"))
+RESULT_CACHE_MAX_BYTES = int(
+    os.getenv("RESULT_CACHE_MAX_BYTES", str(1024 ** 3)))
+# Folders used more recently are not evicted, they may be downloading
+RESULT_CACHE_EVICT_GRACE_S = float(
+    os.getenv("RESULT_CACHE_EVICT_GRACE_S", "300"))
+# Seed of the construct sampling, part of the cache key
+SBOL_SAMPLING_SEED = int(os.getenv("SBOL_SAMPLING_SEED", "0"))
+
+# Limits on the designs and clients of FinalSpec and LinkerList, see
+# assembly_methods/admission.py
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "TRUE") == "TRUE"
+ADMISSION_MAX_CONSTRUCTS = int(os.getenv("ADMISSION_MAX_CONSTRUCTS", "100000"))
+ADMISSION_MAX_COST_S = float(os.getenv("ADMISSION_MAX_COST_S", "1800"))
+ADMISSION_DEFER_COST_S = float(os.getenv("ADMISSION_DEFER_COST_S", "60"))
+ADMISSION_MAX_DEFERRED_RUNNING = int(
+    os.getenv("ADMISSION_MAX_DEFERRED_RUNNING", "1"))
+ADMISSION_MAX_CLIENT_JOBS = int(os.getenv("ADMISSION_MAX_CLIENT_JOBS", "4"))
+ADMISSION_MAX_CLIENT_REQUESTS = int(
+    os.getenv("ADMISSION_MAX_CLIENT_REQUESTS", "2"))
+ADMISSION_MAX_BATCH_DESIGNS = int(
+    os.getenv("ADMISSION_MAX_BATCH_DESIGNS", "50"))
+# How clients are told apart, see admission.client_id: a header set by an
+# authenticating proxy, or the number of reverse proxies adding
+# X-Forwarded-For in front of the app (0 for the remote address)
+ADMISSION_CLIENT_HEADER = os.getenv("ADMISSION_CLIENT_HEADER", "")
+ADMISSION_TRUSTED_PROXIES = int(os.getenv("ADMISSION_TRUSTED_PROXIES", "0"))
+
+# Snapshots of the metrics of each process, served together by /metrics,
+# see assembly_methods/metrics.py (empty to only serve this process's)
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(
+    tempfile.gettempdir(), "assembly_methods_metrics"))
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "10"))
+
+# SBOL files uploaded to /uploads/sbol, see assembly_methods/uploads.py
+SBOL_UPLOAD_ROOT = os.path.join(BASE_DIR, "media/uploads/")
+SBOL_UPLOAD_MAX_BYTES = int(
+    os.getenv("SBOL_UPLOAD_MAX_BYTES", str(256 * 1024 * 1024)))
+# Total size of the uploads kept for each client (0 for no quota)
+SBOL_UPLOAD_MAX_CLIENT_BYTES = int(
+    os.getenv("SBOL_UPLOAD_MAX_CLIENT_BYTES", str(1024 ** 3)))
+# Uploads unused for this long are removed by the retention sweep
+SBOL_UPLOAD_MAX_AGE_DAYS = float(os.getenv("SBOL_UPLOAD_MAX_AGE_DAYS", "7"))
+
+# Removal of old output folders, see assembly_methods/retention.py
+# (a limit of 0 turns that policy off)
+OUTPUT_RETENTION_ENABLED = os.getenv(
+    "OUTPUT_RETENTION_ENABLED", "TRUE") == "TRUE"
+OUTPUT_RETENTION_MAX_AGE_DAYS = float(
+    os.getenv("OUTPUT_RETENTION_MAX_AGE_DAYS", "30"))
+OUTPUT_RETENTION_MAX_BYTES = int(
+    os.getenv("OUTPUT_RETENTION_MAX_BYTES", str(10 * 1024 ** 3)))
+OUTPUT_RETENTION_SWEEP_INTERVAL = float(
+    os.getenv("OUTPUT_RETENTION_SWEEP_INTERVAL", "600"))
+# Folders of MocloView.create (a relative path is resolved against BASE_DIR)
+MOCLO_OUTPUT_ROOT = os.path.join(
+    BASE_DIR, os.getenv("MOCLO_OUTPUT_ROOT", "Moclo_files/output"))
@@ -0,0 +1,84 @@
+"""Construct and part inputs of the assembly generators.
+
+The generators read their inputs as csv rows. An input is either the path
+of a csv file or a table built by the SBOL parser (see
+ParserSBOL.generate_tables), which is converted to the rows it would have
+been written as, so FinalSpec hands the parser's tables straight to the
+generators without writing and re-reading temporary csvs.
+"""
+import csv
+import os
+from typing import Dict, List, Tuple, Union
+
+import pandas as pd
+
+# A csv path or a parser table
+Source = Union[str, pd.DataFrame]
+
+
+def table_rows(table: pd.DataFrame, header: bool = True) -> List[List[str]]:
+    """Returns the rows csv.reader reads from table.to_csv(index=False).
+
+    Args:
+        table (pd.DataFrame): Construct or part table.
+        header (bool): Whether the column names are the first row.
+
+    Returns:
+        List[List[str]]: The rows, with missing values as empty strings.
+    """
+    rows = [[str(column) for column in table.columns]] if header else []
+    for values in table.itertuples(index=False, name=None):
+        rows.append(['' if pd.isna(value) else str(value)
+                     for value in values])
+    return rows
+
+
+def read_rows(
+    source: Source,
+    header: bool = True,
+    encoding: str = None
+) -> List[List[str]]:
+    """Returns the csv rows of a csv path or parser table.
+
+    Args:
+        source (Source): Path of a csv file or a table.
+        header (bool): Whether the column names of a table are the first
+            row, as when the table would have been written with a header.
+        encoding (str): Encoding of a csv file.
+
+    Returns:
+        List[List[str]]: The rows.
+    """
+    if isinstance(source, pd.DataFrame):
+        return table_rows(source, header)
+    with open(source, 'r', encoding=encoding) as csvfile:
+        return list(csv.reader(csvfile, dialect='excel'))
+
+
+def source_name(source: Source, table_name: str) -> str:
+    """Returns the file name of a csv path without extension, or table_name
+    for a table."""
+    if isinstance(source, pd.DataFrame):
+        return table_name
+    return os.path.splitext(os.path.basename(source))[0]
+
+
+def named_sources(
+    sources: Union[Source, List[Source], Dict[str, Source]]
+) -> List[Tuple[str, Source]]:
+    """Pairs each part input with its name.
+
+    Args:
+        sources: A csv path, a list of csv paths or a dictionary of tables
+            by name (e.g. {'parts_1': table}).
+
+    Returns:
+        List[Tuple[str, Source]]: (name, source) in order, the name of a csv
+        path is its file name without extension.
+    """
+    if isinstance(sources, dict):
+        return list(sources.items())
+    if not isinstance(sources, list):
+        sources = [sources]
+    return [(source_name(source, str(index + 1)), source)
+            for index, source in enumerate(sources)]
@@ -0,0 +1,122 @@
+import base64
+import os
+from unittest.mock import patch
+
+from django.test import RequestFactory, TestCase, override_settings
+
+from assembly_methods import admission, jobs
+from assembly_methods.models import AssemblyJob
+from assembly_methods.schema import schema
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+EXAMPLES = os.path.join(BASE_DIR, 'sbol_parser_api', 'tests', 'examples')
+
+LINKER_LIST = '''
+mutation LinkerList($sbol: String) {
+    linkerList(sbolFileString: $sbol) {
+        linkerList
+    }
+}
+'''
+
+
+class TestAdmission(TestCase):
+
+    def setUp(self):
+        path = os.path.join(EXAMPLES, 'combinatorial_nested1_one.xml')
+        self.outline = admission.scan_design(path)
+        with open(path, 'rb') as sbol_file:
+            self.sbol_string = base64.b64encode(sbol_file.read()).decode()
+
+    def test_estimate_design(self):
+        estimate = admission.estimate_design(self.outline)
+        self.assertEqual(estimate['constructs'], 2)
+        self.assertEqual(estimate['definitions'], 4)
+        self.assertEqual(estimate['nesting_depth'], 1)
+        self.assertLess(estimate['cost_s'], 1)
+        self.assertDictEqual(admission.estimate_design(admission.scan_design(
+            base64.b64decode(self.sbol_string))), estimate)
+
+    def test_estimate_large_design(self):
+        # 1512 constructs and 1838 definitions enumerated by ParserSBOL
+        estimate = admission.estimate_design(admission.scan_design(
+            os.path.join(BASE_DIR, 'examples', 'sbol', 'iGEM2020',
+                         'Trp_Optimization.xml')))
+        self.assertEqual(estimate['constructs'], 1512)
+        self.assertEqual(estimate['derivations'], 5)
+        self.assertEqual(estimate['nesting_depth'], 1)
+        self.assertAlmostEqual(estimate['definitions'], 1838, delta=20)
+        with self.assertRaises(ValueError):
+            admission.scan_design(b'<rdf:RDF')
+
+    @patch('sbol2.Document')
+    def test_no_document_in_request(self, mock_document):
+        with override_settings(ASSEMBLY_JOBS_SYNC=False):
+            job = jobs.submit_job('moclo', self.sbol_string, [], {})
+        self.assertEqual(job.design_estimate['constructs'], 2)
+        mock_document.assert_not_called()
+
+    @override_settings(ADMISSION_TRUSTED_PROXIES=1)
+    def test_client_id(self):
+        factory = RequestFactory()
+        request = factory.post('/graphql', REMOTE_ADDR='10.0.0.9',
+                               HTTP_X_FORWARDED_FOR='1.2.3.4, 5.6.7.8')
+        self.assertEqual(admission.client_id(request), '5.6.7.8')
+        with override_settings(ADMISSION_TRUSTED_PROXIES=5):
+            self.assertEqual(admission.client_id(request), '1.2.3.4')
+        with override_settings(ADMISSION_TRUSTED_PROXIES=0):
+            self.assertEqual(admission.client_id(request), '10.0.0.9')
+        with override_settings(ADMISSION_CLIENT_HEADER='X-Client-Id'):
+            self.assertEqual(admission.client_id(factory.post(
+                '/graphql', HTTP_X_CLIENT_ID='lab-7')), 'lab-7')
+            self.assertEqual(admission.client_id(request), '5.6.7.8')
+        self.assertEqual(admission.client_id(factory.post('/graphql')),
+                         '127.0.0.1')
+
+    @override_settings(ADMISSION_MAX_CONSTRUCTS=1)
+    def test_reject_design(self):
+        result = schema.execute(LINKER_LIST,
+                                variables={'sbol': self.sbol_string})
+        error = result.errors[0]
+        self.assertEqual(error.extensions['code'],
+                         admission.DESIGN_TOO_LARGE)
+        self.assertEqual(error.extensions['estimate']['constructs'], 2)
+        self.assertDictEqual(error.extensions['limit'],
+                             {'ADMISSION_MAX_CONSTRUCTS': 1})
+
+    @override_settings(ADMISSION_DEFER_COST_S=0, ASSEMBLY_JOBS_SYNC=False)
+    def test_defer_job(self):
+        deferred = jobs.submit_job(
+            'moclo', self.sbol_string, [], {}, client='10.0.0.1')
+        self.assertTrue(deferred.deferred)
+        self.assertEqual(deferred.design_estimate['constructs'], 2)
+        queued = AssemblyJob.objects.create(assembly_type='moclo',
+                                            arguments={})
+        self.assertEqual(jobs.claim_next_job(), queued.pk)
+        self.assertEqual(jobs.claim_next_job(), deferred.pk)
+
+    def test_max_deferred_running(self):
+        AssemblyJob.objects.create(assembly_type='moclo', arguments={},
+                                   status=AssemblyJob.RUNNING, deferred=True)
+        AssemblyJob.objects.create(assembly_type='moclo', arguments={},
+                                   deferred=True)
+        self.assertIsNone(jobs.claim_next_job())
+
+    @override_settings(ADMISSION_MAX_CLIENT_JOBS=1)
+    def test_client_jobs(self):
+        AssemblyJob.objects.create(assembly_type='moclo', arguments={},
+                                   client='10.0.0.1')
+        with self.assertRaises(admission.AdmissionError) as context:
+            admission.admit_job(self.outline, '10.0.0.1')
+        self.assertEqual(context.exception.code, admission.TOO_MANY_JOBS)
+        admission.admit_job(self.outline, '10.0.0.2')
+
+    @override_settings(ADMISSION_MAX_CLIENT_REQUESTS=1)
+    def test_client_slot(self):
+        with admission.client_slot('10.0.0.1'):
+            with self.assertRaises(admission.AdmissionError):
+                with admission.client_slot('10.0.0.1'):
+                    pass
+        with admission.client_slot('10.0.0.1'):
+            pass
@@ -0,0 +1,262 @@
+import base64
+import json
+import os
+import shutil
+import tempfile
+from unittest.mock import Mock, patch
+
+from django.test import TestCase, override_settings
+
+from assembly_methods import admission, jobs, workers
+from assembly_methods.models import AssemblyJob
+from assembly_methods.schema import schema
+
+FINAL_SPEC = '''
+mutation {
+    finalSpec(assemblyType: "moclo", sbolFileString: "",
+              linkerTypes: [{linkerId: "A", concentration: "25.5",
+                             plateNumber: 1, well: "A1"}],
+              specificationsMoClo: {thermocycle: true}) {
+        jobId
+        outputLinks
+        job { status runSeconds }
+    }
+}
+'''
+
+
+BATCH_FINAL_SPEC = '''
+mutation BatchFinalSpec($designs: [BatchDesignInput]!) {
+    batchFinalSpec(assemblyType: "moclo", designs: $designs,
+                   linkerTypes: [{linkerId: "A", concentration: "25.5",
+                                  plateNumber: 1, well: "A1"}],
+                   specificationsMoClo: {thermocycle: true}) {
+        batchId
+        batch {
+            status
+            designs { name job { status designName } error errorExtensions }
+            manifest
+        }
+    }
+}
+'''
+
+NESTED_EXAMPLE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
+        __file__)))), 'sbol_parser_api', 'tests', 'examples',
+    'combinatorial_nested1_one.xml')
+
+
+class TestJobs(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.media_root)
+
+    def create_job(self, **kwargs):
+        return AssemblyJob.objects.create(
+            assembly_type='moclo', arguments={
+                'sbol_file_string': '', 'linker_types': [],
+                'specifications': {}},
+            output_folder=os.path.join(self.media_root, 'out'), **kwargs)
+
+    def test_claim_job_once(self):
+        job = self.create_job()
+        self.assertTrue(jobs.claim_job(job.pk, 'host:1'))
+        self.assertFalse(jobs.claim_job(job.pk, 'host:2'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, AssemblyJob.RUNNING)
+        self.assertEqual(job.worker, 'host:1')
+        self.assertIsNotNone(job.started)
+
+    def test_claim_next_job(self):
+        first = self.create_job()
+        second = self.create_job()
+        self.create_job(status=AssemblyJob.SUCCEEDED)
+        self.assertEqual(jobs.claim_next_job(), first.pk)
+        self.assertEqual(jobs.claim_next_job(), second.pk)
+        self.assertIsNone(jobs.claim_next_job())
+
+    @patch('assembly_methods.jobs.run_pipeline',
+           return_value=(['script.py'], {'total_run_time_s': 1}))
+    @patch('assembly_methods.retention.maybe_sweep')
+    def test_run_job(self, mock_sweep, mock_pipeline):
+        job = self.create_job()
+        workers.work(poll_interval=0, max_jobs=1)
+        mock_sweep.assert_called_once()
+        job.refresh_from_db()
+        self.assertEqual(job.status, AssemblyJob.SUCCEEDED)
+        self.assertListEqual(job.output_links, ['script.py'])
+        self.assertDictEqual(job.run_estimate, {'total_run_time_s': 1})
+        self.assertGreaterEqual(job.run_seconds, 0)
+        self.assertTrue(os.path.isdir(job.output_folder))
+
+    @patch('assembly_methods.jobs.run_pipeline',
+           side_effect=ValueError('bad sbol'))
+    def test_run_job_failed(self, mock_pipeline):
+        job = self.create_job()
+        jobs.claim_job(job.pk)
+        job = jobs.run_job(job.pk)
+        self.assertEqual(job.status, AssemblyJob.FAILED)
+        self.assertIn('ValueError: bad sbol', job.error)
+
+    def test_run_job_generator_error(self):
+        def moclo_function_from_tables(output_folder, **kwargs):
+            error_path = os.path.join(output_folder, 'MoClo_error.txt')
+            with open(error_path, 'w') as error_file:
+                error_file.write('Failed to generate MoClo scripts: disk\n')
+            return [error_path]
+
+        with open(NESTED_EXAMPLE, 'rb') as sbol_file:
+            sbol = base64.b64encode(sbol_file.read()).decode()
+        labware = {'common_labware': {
+            'p10_mount': 'right', 'p300_mount': 'left', 'p10_type': '',
+            'p300_type': '', 'well_plate': ''}, 'trough': '',
+            'reagent_plate': '', 'agar_plate': ''}
+        job = AssemblyJob.objects.create(
+            assembly_type='moclo', arguments={
+                'sbol_file_string': sbol, 'linker_types': [],
+                'specifications': {'specifications_mo_clo': {
+                    'labware_dict': labware, 'thermocycle': True,
+                    'replicates': 1}}},
+            output_folder=os.path.join(self.media_root, 'job'))
+        jobs.claim_job(job.pk)
+        with patch('sbol_parser_api.sbol_parser_api.ParserSBOL.'
+                   'generate_tables',
+                   return_value={'construct': [None], 'part': {}}), \
+                patch('moclo_assembly.moclo_transformation.'
+                      'moclo_transform_generator.moclo_function_from_tables',
+                      side_effect=moclo_function_from_tables):
+            job = jobs.run_job(job.pk)
+        self.assertEqual(job.status, AssemblyJob.FAILED)
+        self.assertEqual(job.error,
+                         'Failed to generate MoClo scripts: disk')
+        self.assertEqual(len(job.output_links), 1)
+        self.assertIsNone(job.run_estimate)
+
+    def test_requeue_orphaned_jobs(self):
+        host = jobs.worker_name().rpartition(':')[0]
+        dead = self.create_job(status=AssemblyJob.RUNNING,
+                               worker='{}:{}'.format(host, 2**22 + 1))
+        alive = self.create_job(status=AssemblyJob.RUNNING,
+                                worker=jobs.worker_name())
+        self.assertEqual(jobs.requeue_orphaned_jobs(), 1)
+        dead.refresh_from_db()
+        alive.refresh_from_db()
+        self.assertEqual(dead.status, AssemblyJob.QUEUED)
+        self.assertEqual(alive.status, AssemblyJob.RUNNING)
+
+    @patch('assembly_methods.jobs.run_pipeline',
+           return_value=(['script.py'], None))
+    def test_final_spec_sync(self, mock_pipeline):
+        with override_settings(ASSEMBLY_JOBS_SYNC=True,
+                               MEDIA_ROOT=self.media_root):
+            result = schema.execute(FINAL_SPEC)
+        self.assertIsNone(result.errors)
+        final_spec = result.data['finalSpec']
+        self.assertListEqual(final_spec['outputLinks'], ['script.py'])
+        self.assertEqual(final_spec['job']['status'], AssemblyJob.SUCCEEDED)
+        # the pipeline gets the arguments as plain JSON values
+        linker_types = mock_pipeline.call_args[0][2]
+        self.assertEqual(linker_types[0]['concentration'], '25.5')
+        specifications = mock_pipeline.call_args[0][3]
+        self.assertTrue(
+            specifications['specifications_mo_clo']['thermocycle'])
+
+        result = schema.execute(
+            '{ job(id: %s) { status outputLinks } '
+            'jobs(status: "succeeded") { id } }' % final_spec['jobId'])
+        self.assertIsNone(result.errors)
+        self.assertListEqual(result.data['job']['outputLinks'],
+                             ['script.py'])
+        self.assertListEqual(result.data['jobs'],
+                             [{'id': final_spec['jobId']}])
+
+    @patch('assembly_methods.jobs.run_job')
+    def test_final_spec_queued(self, mock_run_job):
+        with override_settings(ASSEMBLY_JOBS_SYNC=False,
+                               MEDIA_ROOT=self.media_root):
+            result = schema.execute(FINAL_SPEC)
+        self.assertIsNone(result.errors)
+        self.assertEqual(result.data['finalSpec']['job']['status'],
+                         AssemblyJob.QUEUED)
+        self.assertIsNone(result.data['finalSpec']['job']['runSeconds'])
+        mock_run_job.assert_not_called()
+
+    @patch('assembly_methods.retention.maybe_sweep')
+    @patch('assembly_methods.workers.time.sleep')
+    @patch('assembly_methods.workers.stop_workers')
+    @patch('assembly_methods.workers.start_workers')
+    @patch('assembly_methods.jobs.requeue_orphaned_jobs')
+    def test_supervise(self, mock_requeue, mock_start, mock_stop,
+                       mock_sleep, mock_sweep):
+        alive = Mock(**{'is_alive.return_value': True})
+        dead = Mock(**{'is_alive.return_value': False})
+        mock_start.side_effect = [[alive, dead], [alive]]
+        workers.supervise(2, poll_interval=0, requeue_interval=3600,
+                          cycles=3)
+        # the dead worker is replaced once, orphans are looked for once
+        self.assertListEqual([call[0][0] for call in
+                              mock_start.call_args_list], [2, 1])
+        mock_requeue.assert_called_once()
+        mock_stop.assert_called_once_with([alive, alive])
+        self.assertEqual(mock_sweep.call_count, 3)
+        workers.supervise(0, poll_interval=0, requeue_interval=0, cycles=2)
+        self.assertEqual(mock_requeue.call_count, 3)
+
+    @override_settings(ADMISSION_MAX_CONSTRUCTS=1)
+    def test_batch_final_spec(self):
+        with open(NESTED_EXAMPLE, 'rb') as sbol_file:
+            nested = base64.b64encode(sbol_file.read()).decode()
+        designs = [{'name': 'first', 'sbolFileString': ''},
+                   {'sbolFileString': 'IA=='},
+                   {'name': 'nested', 'sbolFileString': nested}]
+
+        def run_pipeline(assembly_type, sbol_file_string, *args, **kwargs):
+            if sbol_file_string == 'IA==':
+                raise ValueError('bad sbol')
+            return ['script.py'], {'total_run_time_s': 10}
+
+        with patch('assembly_methods.jobs.run_pipeline',
+                   side_effect=run_pipeline) as mock_pipeline:
+            with override_settings(ASSEMBLY_JOBS_SYNC=True,
+                                   MEDIA_ROOT=self.media_root):
+                result = schema.execute(BATCH_FINAL_SPEC,
+                                        variables={'designs': designs})
+        self.assertIsNone(result.errors)
+        batch = result.data['batchFinalSpec']['batch']
+        self.assertEqual(batch['status'], 'partial')
+        self.assertListEqual(
+            [(design['name'], design['job'] and design['job']['status'])
+             for design in batch['designs']],
+            [('first', AssemblyJob.SUCCEEDED),
+             ('design_2', AssemblyJob.FAILED), ('nested', None)])
+        self.assertEqual(
+            json.loads(batch['designs'][2]['errorExtensions'])['code'],
+            admission.DESIGN_TOO_LARGE)
+        # the shared linker types reach every pipeline
+        self.assertEqual(mock_pipeline.call_count, 2)
+        for call in mock_pipeline.call_args_list:
+            self.assertEqual(call[0][2][0]['concentration'], '25.5')
+            self.assertDictEqual(call[0][8], jobs.convert_part_info(
+                call[0][2]))
+
+        manifest = json.loads(batch['manifest'])
+        self.assertEqual(manifest['total_run_time_s'], 10)
+        self.assertListEqual(
+            [design['status'] for design in manifest['designs']],
+            [AssemblyJob.SUCCEEDED, AssemblyJob.FAILED, 'rejected'])
+        self.assertIsNotNone(manifest['designs'][0]['download_path'])
+
+    def test_batch_names(self):
+        with self.assertRaises(ValueError):
+            jobs.submit_batch('moclo', [{'name': 'a', 'sbol_file_string': ''},
+                                        {'name': 'a', 'sbol_file_string': ''}],
+                              [], {})
+        with override_settings(ADMISSION_MAX_BATCH_DESIGNS=1):
+            with self.assertRaises(admission.AdmissionError):
+                jobs.submit_batch('moclo', [{'sbol_file_string': ''},
+                                            {'sbol_file_string': 'IA=='}],
+                                  [], {})
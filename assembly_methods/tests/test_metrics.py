@@ -0,0 +1,123 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from sbol2 import Document
+
+from assembly_methods import metrics
+from assembly_methods.models import AssemblyJob
+from assembly_methods.schema import schema
+from sbol_parser_api.sbol_parser_api import ParserSBOL
+
+NESTED_EXAMPLE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
+        __file__)))), 'sbol_parser_api', 'tests', 'examples',
+    'combinatorial_nested1_one.xml')
+
+
+def sample(text, line_start):
+    """Returns the value of the exposition line starting with line_start."""
+    for line in text.splitlines():
+        if line.startswith(line_start + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return 0.0
+
+
+class TestMetrics(TestCase):
+
+    def setUp(self):
+        self.metrics_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.metrics_dir)
+
+    def test_exposition(self):
+        registry = metrics.Registry()
+        counter = registry.register(metrics.Counter(
+            'requests_total', 'Requests.', ('mutation',)))
+        histogram = registry.register(metrics.Histogram(
+            'request_seconds', 'Latency.', ('mutation',), buckets=(1, 10)))
+        counter.inc(mutation='final_spec')
+        counter.inc(2, mutation='final_spec')
+        histogram.observe(0.5, mutation='a"b')
+        histogram.observe(20, mutation='a"b')
+        self.assertEqual(
+            registry.exposition(registry.snapshot()),
+            '# HELP requests_total Requests.\n'
+            '# TYPE requests_total counter\n'
+            'requests_total{mutation="final_spec"} 3.0\n'
+            '# HELP request_seconds Latency.\n'
+            '# TYPE request_seconds histogram\n'
+            'request_seconds_bucket{mutation="a\\"b",le="1.0"} 1.0\n'
+            'request_seconds_bucket{mutation="a\\"b",le="10.0"} 1.0\n'
+            'request_seconds_bucket{mutation="a\\"b",le="+Inf"} 2.0\n'
+            'request_seconds_sum{mutation="a\\"b"} 20.5\n'
+            'request_seconds_count{mutation="a\\"b"} 2.0\n')
+        with self.assertRaises(ValueError):
+            counter.inc(assembly_type='moclo')
+
+    def test_collect_other_processes(self):
+        key = json.dumps(['moclo'])
+        before = metrics.collect()['assembly_output_bytes_total'].get(key, 0)
+        with open(os.path.join(self.metrics_dir, 'worker_1.json'), 'w') as f:
+            json.dump({'assembly_output_bytes_total': {key: 100},
+                       'unknown_total': {'[]': 1}}, f)
+        with override_settings(METRICS_DIR=self.metrics_dir):
+            metrics.flush()
+            collected = metrics.collect()
+        self.assertEqual(collected['assembly_output_bytes_total'][key],
+                         before + 100)
+        self.assertNotIn('unknown_total', collected)
+
+    def test_parser_and_generator(self):
+        parser = ParserSBOL(sbol_document=Document(NESTED_EXAMPLE))
+        before = metrics.REGISTRY.snapshot()
+        plates = parser.get_construct_plates('moclo', seed=1)
+        self.assertEqual(len(plates), 1)
+
+        @metrics.instrument_generator('moclo')
+        def generator(output_folder):
+            path = os.path.join(output_folder, 'protocol.py')
+            with open(path, 'w') as out:
+                out.write('x' * 10)
+            return [path]
+
+        generator(self.metrics_dir)
+        after = metrics.REGISTRY.snapshot()
+
+        def delta(name, *labels):
+            key = json.dumps(list(labels))
+            value = after[name].get(key, 0)
+            previous = before[name].get(key, 0)
+            if isinstance(value, list):
+                return value[-1] - (previous[-1] if previous else 0)
+            return value - previous
+
+        self.assertEqual(
+            delta('assembly_constructs_enumerated_total', 'moclo'), 2)
+        self.assertEqual(delta('assembly_constructs_plated_total', 'moclo'), 2)
+        for stage in ('enumerate', 'filter', 'plate', 'scripts'):
+            self.assertEqual(
+                delta('assembly_stage_seconds', 'moclo', stage), 1, stage)
+        self.assertEqual(delta('assembly_output_bytes_total', 'moclo'), 10)
+
+    @override_settings(ALLOWED_HOSTS=['testserver'])
+    def test_metrics_endpoint(self):
+        AssemblyJob.objects.create(assembly_type='moclo', arguments={})
+        with override_settings(METRICS_DIR=self.metrics_dir):
+            before = self.client.get(reverse('metrics')).content.decode()
+            result = schema.execute(
+                'mutation { linkerList(sbolFileString: "") { linkerList } }')
+            response = self.client.get(reverse('metrics'))
+        self.assertIsNotNone(result.errors)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        text = response.content.decode()
+        line = ('assembly_requests_total{mutation="linker_list",'
+                'assembly_type="",outcome="error"}')
+        self.assertEqual(sample(text, line), sample(before, line) + 1)
+        self.assertEqual(sample(text, 'assembly_jobs{status="queued"}'), 1)
+        self.assertIn('assembly_result_cache_hit_ratio 0.0', text)
@@ -0,0 +1,75 @@
+import ast
+import os
+import tempfile
+import time
+
+import numpy as np
+from django.test import SimpleTestCase
+from assembly_methods import ot2_templates
+
+TEMPLATE = '''from opentrons import protocol_api
+
+metadata = {'apiLevel': '2.2'}
+
+
+def run(protocol: protocol_api.ProtocolContext):
+    return wells
+'''
+
+
+class TestOT2Templates(SimpleTestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.template_path = os.path.join(self.temp_dir.name, 'template.py')
+        with open(self.template_path, 'w') as f:
+            f.write(TEMPLATE)
+        ot2_templates.clear_template_cache()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_serialize(self):
+        self.assertEqual(ot2_templates.serialize('A1'), "'A1'")
+        self.assertEqual(ot2_templates.serialize(True), 'True')
+        self.assertEqual(ot2_templates.serialize({'A1': ('B1', 2)}),
+                         "{'A1': ('B1', 2)}")
+        value = {1: [True, None, ('A1', 2.5)], 'n': np.int64(3),
+                 's': {'B1', 'A1'}}
+        self.assertEqual(
+            ast.literal_eval(ot2_templates.serialize(value)),
+            {1: [True, None, ('A1', 2.5)], 'n': 3, 's': ['A1', 'B1']})
+        with self.assertRaises(TypeError):
+            ot2_templates.serialize(object())
+
+    def test_render_before_first_def(self):
+        script = ot2_templates.render(
+            self.template_path, {'wells': ['A1']},
+            ot2_templates.BEFORE_FIRST_DEF)
+        header, body = script.split("wells = ['A1']\n")
+        self.assertTrue(header.endswith("metadata = {'apiLevel': '2.2'}\n\n\n"))
+        self.assertTrue(body.lstrip('\n').startswith('def run('))
+        compile(script, 'script', 'exec')
+
+    def test_render_prepend(self):
+        script = ot2_templates.render(self.template_path, {'multi': False})
+        self.assertTrue(script.startswith('multi = False\n'))
+        self.assertTrue(script.endswith(TEMPLATE))
+
+    def test_template_reloaded_when_modified(self):
+        ot2_templates.load_template(self.template_path)
+        with open(self.template_path, 'w') as f:
+            f.write('def run(protocol):\n    pass\n')
+        later = time.time() + 10
+        os.utime(self.template_path, (later, later))
+        header, body = ot2_templates.load_template(
+            self.template_path, ot2_templates.BEFORE_FIRST_DEF)
+        self.assertEqual(header, '')
+        self.assertEqual(body, 'def run(protocol):\n    pass\n')
+
+    def test_write_script(self):
+        output_path = os.path.join(self.temp_dir.name, 'out.py')
+        ot2_templates.write_script(
+            output_path, self.template_path, {'wells': []})
+        with open(output_path) as f:
+            self.assertTrue(f.read().startswith('wells = []\n'))
@@ -0,0 +1,152 @@
+import base64
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from assembly_methods import jobs, result_cache
+from assembly_methods.models import AssemblyJob, CachedResult, OutputFolder
+
+
+def fake_pipeline(assembly_type, sbol_file_string, linker_types,
+                  specifications, output_folder, progress=None,
+                  sampling_seed=None, sbol_upload_id=None,
+                  part_info=None):
+    script_path = os.path.join(output_folder, 'script.py')
+    with open(script_path, 'w') as script_file:
+        script_file.write('x' * 10)
+    return [script_path], {'total_run_time_s': 1}
+
+
+class TestResultCache(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.sbol = base64.b64encode(b'<sbol/>').decode()
+        self.arguments = {
+            'sbol_file_string': self.sbol,
+            'linker_types': [
+                {'linker_id': 'B', 'concentration': '50', 'plate_number': 1,
+                 'well': 'A2'},
+                {'linker_id': 'A', 'concentration': '25.5',
+                 'plate_number': 1, 'well': 'A1'}],
+            'specifications': {'specifications_mo_clo': {'thermocycle': True},
+                               'specifications_basic': None},
+            'sampling_seed': 0}
+
+    def tearDown(self):
+        shutil.rmtree(self.media_root)
+
+    def test_cache_key(self):
+        key = result_cache.cache_key('moclo', self.arguments)
+        same = dict(
+            self.arguments,
+            sbol_file_string=base64.encodebytes(b'<sbol/>').decode(),
+            linker_types=[
+                dict(self.arguments['linker_types'][1]),
+                dict(self.arguments['linker_types'][0],
+                     concentration='50.0')],
+            specifications={'specifications_mo_clo': {'thermocycle': True},
+                            'specifications_basic': {'layout': 'column'}})
+        self.assertEqual(result_cache.cache_key('moclo', same), key)
+        self.assertNotEqual(result_cache.cache_key('basic', self.arguments),
+                            key)
+        self.assertNotEqual(result_cache.cache_key(
+            'moclo', dict(self.arguments, sampling_seed=1)), key)
+
+    @patch('assembly_methods.jobs.run_pipeline', side_effect=fake_pipeline)
+    def test_submit_job_hit(self, mock_pipeline):
+        with override_settings(ASSEMBLY_JOBS_SYNC=True,
+                               MEDIA_ROOT=self.media_root):
+            first = jobs.submit_job(
+                'moclo', self.sbol, self.arguments['linker_types'],
+                self.arguments['specifications'])
+            second = jobs.submit_job(
+                'moclo', self.sbol, self.arguments['linker_types'][::-1],
+                self.arguments['specifications'])
+        self.assertEqual(mock_pipeline.call_count, 1)
+        self.assertEqual(mock_pipeline.call_args[0][6], 0)
+        self.assertFalse(first.cache_hit)
+        self.assertTrue(second.cache_hit)
+        self.assertEqual(second.status, first.status)
+        self.assertListEqual(second.output_links, first.output_links)
+        self.assertDictEqual(second.run_estimate, first.run_estimate)
+        self.assertEqual(CachedResult.objects.get().hits, 1)
+        stats = result_cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hit_rate'], 0.5)
+        self.assertEqual(stats['size_bytes'], 10)
+
+    def test_lookup_removed_folder(self):
+        CachedResult.objects.create(
+            key='a', output_folder=os.path.join(self.media_root, 'gone'),
+            last_used=timezone.now())
+        self.assertIsNone(result_cache.lookup('a'))
+        self.assertFalse(CachedResult.objects.exists())
+
+    def test_evict(self):
+        now = timezone.now()
+        folders = []
+        for index, age in enumerate([1, 3, 2]):
+            folder = os.path.join(self.media_root, str(index))
+            os.makedirs(folder)
+            folders.append(folder)
+            CachedResult.objects.create(
+                key=str(index), output_folder=folder, size_bytes=100,
+                last_used=now - timedelta(hours=age))
+        # least recently used first
+        self.assertListEqual(result_cache.evict(max_entries=2,
+                                                max_bytes=1000),
+                             [folders[1]])
+        self.assertFalse(os.path.exists(folders[1]))
+        self.assertListEqual(result_cache.evict(max_entries=2,
+                                                max_bytes=150),
+                             [folders[2]])
+        self.assertListEqual(
+            list(CachedResult.objects.values_list('key', flat=True)), ['0'])
+
+    def test_evict_in_use(self):
+        now = timezone.now()
+        folders = []
+        for index in range(3):
+            folder = os.path.join(self.media_root, str(index))
+            os.makedirs(folder)
+            folders.append(folder)
+            CachedResult.objects.create(
+                key=str(index), output_folder=folder, size_bytes=100,
+                last_used=now - timedelta(hours=3 - index))
+        # used a minute ago, by a download and by a just finished job
+        CachedResult.objects.filter(key='2').update(
+            last_used=now - timedelta(minutes=1))
+        OutputFolder.objects.create(path=folders[0], kind=OutputFolder.JOB,
+                                    last_accessed=now)
+        AssemblyJob.objects.create(assembly_type='moclo', arguments={},
+                                   output_folder=folders[1], finished=now)
+        self.assertListEqual(result_cache.evict(max_entries=0, max_bytes=0),
+                             [])
+        with override_settings(RESULT_CACHE_EVICT_GRACE_S=0):
+            self.assertEqual(
+                len(result_cache.evict(max_entries=0, max_bytes=0)), 3)
+
+    @patch('assembly_methods.jobs.run_pipeline')
+    def test_generator_error_not_cached(self, mock_pipeline):
+        mock_pipeline.side_effect = jobs.GeneratorError(
+            'Failed to generate MoClo scripts: disk full', ['MoClo_error.txt'])
+        with override_settings(ASSEMBLY_JOBS_SYNC=True,
+                               MEDIA_ROOT=self.media_root):
+            failed = jobs.submit_job(
+                'moclo', self.sbol, self.arguments['linker_types'],
+                self.arguments['specifications'])
+            mock_pipeline.side_effect = fake_pipeline
+            retried = jobs.submit_job(
+                'moclo', self.sbol, self.arguments['linker_types'],
+                self.arguments['specifications'])
+        self.assertEqual(failed.status, AssemblyJob.FAILED)
+        self.assertEqual(retried.status, AssemblyJob.SUCCEEDED)
+        self.assertFalse(retried.cache_hit)
+        self.assertEqual(mock_pipeline.call_count, 2)
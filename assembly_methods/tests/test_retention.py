@@ -0,0 +1,180 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from assembly_methods import jobs, metrics, result_cache, retention
+from assembly_methods.models import (AssemblyJob, CachedResult, OutputFolder,
+                                     SbolUpload)
+
+
+def fake_pipeline(assembly_type, sbol_file_string, linker_types,
+                  specifications, output_folder, progress=None,
+                  sampling_seed=None, sbol_upload_id=None,
+                  part_info=None):
+    script_path = os.path.join(output_folder, 'script.py')
+    with open(script_path, 'w') as script_file:
+        script_file.write('x' * 10)
+    return [script_path], None
+
+
+class TestRetention(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.moclo_root = tempfile.mkdtemp()
+        self.settings = override_settings(
+            MEDIA_ROOT=self.media_root, MOCLO_OUTPUT_ROOT=self.moclo_root)
+        self.settings.enable()
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.media_root)
+        shutil.rmtree(self.moclo_root)
+
+    def make_folder(self, name, size=10, days_ago=0, root=None):
+        path = os.path.join(root or self.media_root, name)
+        os.makedirs(path)
+        with open(os.path.join(path, 'script.py'), 'w') as script_file:
+            script_file.write('x' * size)
+        folder = retention.track(path, OutputFolder.JOB)
+        OutputFolder.objects.filter(pk=folder.pk).update(
+            last_accessed=timezone.now() - timedelta(days=days_ago))
+        return path
+
+    def reclaimed(self, kind, reason):
+        key = json.dumps([kind, reason])
+        return metrics.REGISTRY.snapshot()[
+            'assembly_retention_bytes_reclaimed_total'].get(key, 0)
+
+    def test_sweep_age(self):
+        old = self.make_folder('old', days_ago=40)
+        new = self.make_folder('new', days_ago=1)
+        CachedResult.objects.create(key='a', output_folder=old,
+                                    last_used=timezone.now())
+        before = self.reclaimed(OutputFolder.JOB, retention.REASON_AGE)
+        removed = retention.sweep(max_age_days=30, max_bytes=0)
+        self.assertEqual(
+            [(folder.path, reason) for folder, reason in removed],
+            [(old, retention.REASON_AGE)])
+        self.assertFalse(os.path.exists(old))
+        self.assertTrue(os.path.isdir(new))
+        self.assertFalse(CachedResult.objects.exists())
+        self.assertEqual(
+            self.reclaimed(OutputFolder.JOB, retention.REASON_AGE),
+            before + 10)
+
+    def test_sweep_size(self):
+        first = self.make_folder('first', days_ago=3)
+        second = self.make_folder('second', days_ago=2)
+        running = self.make_folder('running', days_ago=4)
+        third = self.make_folder('third', days_ago=1)
+        AssemblyJob.objects.create(
+            assembly_type='moclo', arguments={}, output_folder=running,
+            status=AssemblyJob.RUNNING)
+        retention.touch(first)
+        removed = retention.sweep(max_age_days=0, max_bytes=30, dry_run=True)
+        self.assertEqual([folder.path for folder, _ in removed], [second])
+        self.assertTrue(os.path.isdir(second))
+
+        removed = retention.sweep(max_age_days=0, max_bytes=20)
+        self.assertEqual([folder.path for folder, _ in removed],
+                         [second, third])
+        self.assertListEqual(
+            sorted(OutputFolder.objects.values_list('path', flat=True)),
+            sorted([first, running]))
+
+    def test_expire_uploads(self):
+        def make_upload(name, days_ago):
+            path = os.path.join(self.media_root, name)
+            with open(path, 'w') as upload_file:
+                upload_file.write('x' * 5)
+            return SbolUpload.objects.create(
+                path=path, size_bytes=5, sha256=name,
+                last_used=timezone.now() - timedelta(days=days_ago))
+
+        old = make_upload('old.xml', 10)
+        used = make_upload('used.xml', 10)
+        new = make_upload('new.xml', 1)
+        AssemblyJob.objects.create(
+            assembly_type='moclo', status=AssemblyJob.QUEUED,
+            arguments={'sbol_upload_id': str(used.handle)})
+        before = self.reclaimed(retention.UPLOAD, retention.REASON_AGE)
+        removed = retention.sweep(max_age_days=0, max_bytes=0,
+                                  upload_max_age_days=7)
+        self.assertEqual(removed, [(old, retention.REASON_AGE)])
+        self.assertFalse(os.path.exists(old.path))
+        self.assertListEqual(
+            list(SbolUpload.objects.order_by('pk')), [used, new])
+        self.assertEqual(
+            self.reclaimed(retention.UPLOAD, retention.REASON_AGE),
+            before + 5)
+
+    def test_discover(self):
+        tracked = self.make_folder('tracked')
+        shutil.rmtree(tracked)
+        os.makedirs(os.path.join(self.media_root, 'untracked'))
+        moclo = os.path.join(self.moclo_root, 'abcdef')
+        os.makedirs(moclo)
+        old = (timezone.now() - timedelta(days=60)).timestamp()
+        os.utime(moclo, (old, old))
+        self.assertEqual(retention.discover(), 2)
+        self.assertEqual(OutputFolder.objects.get(path=moclo).kind,
+                         OutputFolder.MOCLO)
+        self.assertFalse(OutputFolder.objects.filter(path=tracked).exists())
+        # dated by the modification time of the folder
+        removed = retention.sweep(max_age_days=30, max_bytes=0)
+        self.assertEqual([folder.path for folder, _ in removed], [moclo])
+
+    @patch('assembly_methods.jobs.run_pipeline', side_effect=fake_pipeline)
+    def test_run_job(self, mock_pipeline):
+        arguments = {'sbol_file_string': '', 'linker_types': [],
+                     'specifications': {}}
+        with override_settings(ASSEMBLY_JOBS_SYNC=True):
+            job = jobs.submit_job('moclo', '', [], {})
+            folder = OutputFolder.objects.get()
+            self.assertEqual(folder.path, os.path.abspath(job.output_folder))
+            self.assertEqual(folder.size_bytes, 10)
+            OutputFolder.objects.update(
+                last_accessed=timezone.now() - timedelta(days=1))
+            self.assertTrue(result_cache.lookup(
+                result_cache.cache_key('moclo', dict(
+                    arguments, sampling_seed=0))))
+        self.assertGreater(OutputFolder.objects.get().last_accessed,
+                           timezone.now() - timedelta(hours=1))
+
+    @patch('assembly_methods.retention.sweep', return_value=[])
+    def test_maybe_sweep(self, mock_sweep):
+        retention._last_sweep = None
+        with override_settings(OUTPUT_RETENTION_SWEEP_INTERVAL=3600):
+            retention.maybe_sweep()
+            retention.maybe_sweep()
+        self.assertEqual(mock_sweep.call_count, 1)
+        with override_settings(OUTPUT_RETENTION_SWEEP_INTERVAL=0):
+            retention.maybe_sweep()
+        self.assertEqual(mock_sweep.call_count, 2)
+        with override_settings(OUTPUT_RETENTION_ENABLED=False,
+                               OUTPUT_RETENTION_SWEEP_INTERVAL=0):
+            retention.maybe_sweep()
+        self.assertEqual(mock_sweep.call_count, 2)
+
+    def test_command(self):
+        old = self.make_folder('old', days_ago=40)
+        out = StringIO()
+        call_command('sweep_outputs', '--dry-run', '--max-bytes', '0',
+                     stdout=out)
+        self.assertIn('Would remove {}'.format(old), out.getvalue())
+        self.assertTrue(os.path.isdir(old))
+        out = StringIO()
+        with override_settings(METRICS_DIR=''):
+            call_command('sweep_outputs', '--max-age-days', '30', stdout=out)
+        self.assertIn('1 folders and uploads, 10 bytes reclaimed',
+                      out.getvalue())
+        self.assertFalse(os.path.exists(old))
@@ -0,0 +1,167 @@
+import os
+import tempfile
+from django.test import SimpleTestCase
+from assembly_methods import run_estimator
+
+
+class TestRunEstimator(SimpleTestCase):
+
+    def setUp(self):
+        self.clips_dict = {
+            'prefixes_wells': ['A10', 'A8'], 'prefixes_plates': ['2', '2'],
+            'suffixes_wells': ['A9', 'A3'], 'suffixes_plates': ['2', '2'],
+            'parts_wells': ['B3', 'A12'], 'parts_plates': ['2', '2'],
+            'parts_vols': [1, 1.5], 'water_vols': [7.0, 6.5]}
+        self.final_assembly_dict = {'A1': ['A7', 'B7'], 'B1': ['A7']}
+        self.spotting_tuples = [(('A1', 'B1'), ('A1', 'B1'), (5, 5))]
+
+    def test_estimate_clip(self):
+        estimate = run_estimator.estimate_clip(self.clips_dict)
+        # master mix tip, one water tip and three linker/part tips per clip
+        self.assertEqual(estimate['tips'],
+                         {run_estimator.P10_TIPRACK: 1 + 2 + 3 * 2})
+        self.assertEqual(estimate['tip_racks'], {run_estimator.P10_TIPRACK: 1})
+        self.assertEqual(estimate['reagent_volumes']['clip_master_mix'], 40)
+        self.assertEqual(estimate['reagent_volumes']['water'], 13.5)
+        self.assertEqual(estimate['reagent_volumes']['plate 2 A12'], 1.5)
+        # 20 uL of master mix takes two p10 shots per clip
+        self.assertEqual(estimate['operations']['aspirate'], 4 + 2 + 6)
+        self.assertGreater(estimate['run_time_s'], 0)
+
+    def test_estimate_clip_transfer_plan(self):
+        plan = [
+            {'action': 'distribute', 'plate': '2', 'well': 'A10',
+             'dests': ['A1', 'B1'], 'volumes': [1, 1], 'mix': 0},
+            {'action': 'mix', 'plate': '', 'well': '',
+             'dests': ['A1', 'B1'], 'volumes': [], 'mix': 1}]
+        estimate = run_estimator.estimate_clip(self.clips_dict, plan)
+        # master mix tip, one distribute tip and one mixing tip per clip
+        self.assertEqual(estimate['tips'], {run_estimator.P10_TIPRACK: 4})
+        self.assertEqual(estimate['reagent_volumes']['plate 2 A10'], 2)
+        self.assertEqual(estimate['operations']['dispense'], 4 + 2)
+
+    def test_estimate_final_assembly(self):
+        estimate = run_estimator.estimate_final_assembly(
+            self.final_assembly_dict)
+        self.assertEqual(estimate['tips'], {run_estimator.P10_TIPRACK: 2 + 3})
+        self.assertEqual(
+            estimate['reagent_volumes'],
+            {'assembly_master_mix_2_parts': 12, 'assembly_master_mix_1_parts': 13.5})
+
+    def test_estimate_transformation(self):
+        estimate = run_estimator.estimate_transformation(self.spotting_tuples)
+        # the 8-channel p300 takes a column of tips each time
+        self.assertEqual(estimate['tips'], {run_estimator.P10_TIPRACK: 1 + 2 + 2,
+                                            run_estimator.P300_TIPRACK: 2 * 8})
+        # 20 minute incubation and 1 hour outgrowth dominate the run
+        self.assertGreater(estimate['run_time_s'], 80 * 60)
+
+    def test_estimate_transformation_multi(self):
+        estimate = run_estimator.estimate_transformation(
+            self.spotting_tuples, p10_multi=True)
+        # A1 and B1 share a column, so one transfer and one spot each
+        self.assertEqual(estimate['tips'],
+                         {run_estimator.P10_TIPRACK: (1 + 1 + 1) * 8,
+                          run_estimator.P300_TIPRACK: 2 * 8})
+        self.assertEqual(estimate['operations']['pick_up_tip'], 3 + 2)
+
+    def test_estimate_thermocycle(self):
+        estimate = run_estimator.estimate_thermocycle()
+        self.assertEqual(estimate['tips'], {})
+        self.assertGreater(estimate['run_time_s'], 20 * 180 + 1500)
+
+    def test_estimate_purification(self):
+        single = run_estimator.estimate_purification(10, multi=False)
+        multi = run_estimator.estimate_purification(10, multi=True)
+        # nine tips per sample, or per column of samples with the multi
+        self.assertEqual(single['tips'], {run_estimator.P300_TIPRACK: 90})
+        self.assertEqual(multi['tips'], {run_estimator.P300_TIPRACK: 144})
+        self.assertEqual(multi['tip_racks'], {run_estimator.P300_TIPRACK: 2})
+        self.assertEqual(single['reagent_volumes']['ethanol'], 3000)
+        self.assertLess(multi['run_time_s'], single['run_time_s'])
+
+    def test_estimate_moclo_transformation(self):
+        single = run_estimator.estimate_moclo_transformation(10)
+        multi = run_estimator.estimate_moclo_transformation(
+            10, multi=True, replicates=2)
+        self.assertEqual(single['tips'], {run_estimator.P10_TIPRACK: 1,
+                                          run_estimator.P300_TIPRACK: 3})
+        self.assertEqual(multi['tips'], {run_estimator.P10_TIPRACK: 1,
+                                         run_estimator.P300_TIPRACK: 24})
+        self.assertEqual(single['reagent_volumes']['moclo_reactions'], 20)
+        # 10 single spots, or 2 columns spotted twice
+        self.assertEqual(single['operations']['aspirate'],
+                         10 + 96 * 3 + 10)
+        self.assertEqual(multi['operations']['aspirate'],
+                         10 + 12 * 3 + 4)
+
+    def test_estimate_biobricks_transformation(self):
+        estimate = run_estimator.estimate_biobricks_transformation(
+            {'A1': [['A1', 10], ['B1', 10]]}, {'A2': [['C1', 2]]},
+            {'A3': [['A1', 2]], 'A4': [['B1', 2]]}, {'A1': [['C1', 2]]})
+        self.assertEqual(estimate['tips'], {run_estimator.P10_TIPRACK: 5,
+                                            run_estimator.P300_TIPRACK: 3})
+        self.assertEqual(estimate['reagent_volumes']['soc'], 600)
+        self.assertEqual(estimate['reagent_volumes']['competent_cells'], 20)
+
+    def test_estimate_moclo_assembly(self):
+        combinations = [{'name': 'c1', 'parts': ['p1', 'p2']},
+                        {'name': 'c2', 'parts': ['p1', 'p3']}]
+        reagent_to_mm = {'H12': [['reagents_plate', 'H1', '1.5']]}
+        estimate = run_estimator.estimate_moclo_assembly(
+            reagent_to_mm, combinations, thermocycle=False)
+        self.assertEqual(estimate['tips'], {run_estimator.P10_TIPRACK: 4})
+        self.assertEqual(estimate['reagent_volumes'],
+                         {'reagents_plate H12': 1.5, 'p1': 4, 'p2': 2, 'p3': 2})
+        with_thermocycler = run_estimator.estimate_moclo_assembly(
+            reagent_to_mm, combinations, thermocycle=True)
+        self.assertGreater(with_thermocycler['run_time_s'],
+                           estimate['run_time_s'] + 35 * 270)
+
+    def test_estimate_moclo_assembly_plan(self):
+        combinations = [{'name': 'c1', 'parts': ['p1']}]
+        plan = [
+            {'stage': 'parts', 'action': 'distribute', 'plate': 'dna',
+             'well': 'A1', 'dests': ['A1', 'B1'], 'volumes': [2, 2],
+             'new_tip': 1, 'wash': 0},
+            {'stage': 'parts', 'action': 'distribute', 'plate': 'dna',
+             'well': 'A1', 'dests': ['C1'], 'volumes': [2], 'new_tip': 0,
+             'wash': 1},
+            {'stage': 'reagents', 'action': 'mix', 'plate': '', 'well': '',
+             'dests': ['H12', 'G12'], 'volumes': [], 'new_tip': 1,
+             'wash': 0}]
+        estimate = run_estimator.estimate_moclo_assembly(
+            {}, combinations, thermocycle=False, assembly_plan=plan)
+        # one tip for the part well and one per mixed master mix
+        self.assertEqual(estimate['tips'], {run_estimator.P10_TIPRACK: 3})
+        self.assertEqual(estimate['reagent_volumes'], {'dna A1': 6})
+        self.assertEqual(estimate['operations']['aspirate'], 2)
+        self.assertEqual(estimate['operations']['dispense'], 3)
+        # two wash wells and two mixed master mixes
+        self.assertEqual(estimate['operations']['mix_cycle'], 8)
+
+    def test_estimate_biobricks_assembly(self):
+        estimate = run_estimator.estimate_biobricks_assembly(
+            {'2': {'A1': [['A1', 2], ['B1', 2]]}}, {'A1': [['A1', 2]]},
+            {'A2': [['A1', 5]]}, {'A1': [['A1', 11]], 'A4': [['A1', 1]]},
+            {'water': 'A1', 'T4Ligase': 'A4'}, thermocycle=False)
+        self.assertEqual(estimate['tips'], {run_estimator.P10_TIPRACK: 5})
+        self.assertEqual(estimate['reagent_volumes']['reagent A1'], 11)
+        self.assertEqual(estimate['reagent_volumes']['part 2 A1'], 4)
+
+    def test_summarise_save_and_load(self):
+        estimates = [run_estimator.estimate_clip(self.clips_dict),
+                     run_estimator.estimate_final_assembly(
+                         self.final_assembly_dict)]
+        summary = run_estimator.summarise(estimates)
+        self.assertEqual(summary['tips'], {run_estimator.P10_TIPRACK: 14})
+        self.assertEqual(summary['tip_racks'], {run_estimator.P10_TIPRACK: 2})
+        self.assertAlmostEqual(
+            summary['total_run_time_s'],
+            estimates[0]['run_time_s'] + estimates[1]['run_time_s'])
+        with tempfile.TemporaryDirectory() as output_folder:
+            path = run_estimator.save_estimate(summary, output_folder)
+            self.assertEqual(
+                run_estimator.load_estimate([os.path.join(output_folder, 'x.py'), path]),
+                summary)
+        self.assertIsNone(run_estimator.load_estimate([]))
@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from assembly_methods import preload
+from sbol_parser_api.sbol_parser_api import ParserSBOL, standard_linkers
+
+
+def import_times(*modules):
+    """Returns the cumulative import time in microseconds of every module
+    imported by a fresh interpreter setting up Django and importing
+    modules in order, from python -X importtime."""
+    code = 'import django; django.setup(); import {}'.format(
+        ', '.join(modules))
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='assembly_methods.settings',
+               PYTHONPATH=str(settings.BASE_DIR))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=str(settings.BASE_DIR), env=env, stderr=subprocess.PIPE,
+        universal_newlines=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestStartup(SimpleTestCase):
+
+    def test_startup_imports(self):
+        # what a web worker imports before serving its first request
+        startup = ('assembly_methods.urls', 'assembly_methods.schema')
+        startup_times = import_times(*startup)
+        for name in preload.HEAVY_MODULES:
+            self.assertNotIn(name, startup_times)
+        # each heavy module's time excludes the modules imported before it
+        times = import_times(*startup, *preload.HEAVY_MODULES)
+        startup_us = sum(times[name] for name in startup)
+        heavy_us = sum(times[name] for name in preload.HEAVY_MODULES)
+        # measured 0.13 s against 0.9 s, allow for noisy machines
+        self.assertLess(startup_us * 2, heavy_us)
+
+    def test_standard_linkers(self):
+        self.assertIs(ParserSBOL(None).linker_file, standard_linkers())
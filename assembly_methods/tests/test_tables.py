@@ -0,0 +1,42 @@
+import csv
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+from django.test import TestCase
+
+from assembly_methods import tables
+
+
+class TestTables(TestCase):
+
+    def setUp(self):
+        self.table = pd.DataFrame({
+            'Part/linker': ['BASIC_sfGFP_ORF1', 'LMP-P'],
+            'Well': ['A1', 'A2'],
+            'Part concentration (ng/uL)': [293.5, np.nan]})
+
+    def test_table_rows(self):
+        # the same rows as reading back the csv written by to_csv
+        with tempfile.TemporaryDirectory() as output_dir:
+            path = os.path.join(output_dir, 'part_linker_1.csv')
+            self.table.to_csv(path, index=False)
+            with open(path) as csvfile:
+                written = list(csv.reader(csvfile))
+            self.assertListEqual(tables.read_rows(path), written)
+        self.assertListEqual(tables.table_rows(self.table), written)
+        self.assertListEqual(tables.read_rows(self.table, header=False),
+                             written[1:])
+
+    def test_named_sources(self):
+        self.assertListEqual(
+            tables.named_sources(['/tmp/parts_1.csv', '/tmp/parts_2.csv']),
+            [('parts_1', '/tmp/parts_1.csv'), ('parts_2', '/tmp/parts_2.csv')])
+        self.assertListEqual(tables.named_sources('/tmp/parts_1.csv'),
+                             [('parts_1', '/tmp/parts_1.csv')])
+        named = tables.named_sources({'parts_1': self.table})
+        self.assertEqual(named[0][0], 'parts_1')
+        self.assertIs(named[0][1], self.table)
+        self.assertEqual(tables.source_name(self.table, 'construct'),
+                         'construct')
@@ -0,0 +1,128 @@
+import base64
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from assembly_methods import jobs, uploads
+from assembly_methods.models import AssemblyJob, SbolUpload
+from assembly_methods.schema import schema
+
+NESTED_EXAMPLE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
+        __file__)))), 'sbol_parser_api', 'tests', 'examples',
+    'combinatorial_nested1_one.xml')
+
+LINKER_LIST = '''
+mutation LinkerList($sbolFileString: String, $sbolUploadId: ID) {
+    linkerList(sbolFileString: $sbolFileString, sbolUploadId: $sbolUploadId) {
+        linkerList
+    }
+}
+'''
+
+FINAL_SPEC = '''
+mutation FinalSpec($sbolUploadId: ID) {
+    finalSpec(assemblyType: "moclo", sbolUploadId: $sbolUploadId,
+              linkerTypes: [{linkerId: "A", concentration: "25.5",
+                             plateNumber: 1, well: "A1"}],
+              specificationsMoClo: {thermocycle: true}) {
+        outputLinks
+        job { status }
+    }
+}
+'''
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class TestUploads(TestCase):
+
+    def setUp(self):
+        self.upload_root = tempfile.mkdtemp()
+        self.media_root = tempfile.mkdtemp()
+        self.settings = override_settings(SBOL_UPLOAD_ROOT=self.upload_root)
+        self.settings.enable()
+        with open(NESTED_EXAMPLE, 'rb') as sbol_file:
+            self.sbol = sbol_file.read()
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.upload_root)
+        shutil.rmtree(self.media_root)
+
+    def upload(self, content=None):
+        return self.client.post(reverse('sbol-upload'), {
+            'file': SimpleUploadedFile('design.xml', content or self.sbol)})
+
+    def test_upload(self):
+        response = self.upload()
+        self.assertEqual(response.status_code, 201)
+        upload_id = response.json()['upload_id']
+        self.assertEqual(response.json()['size_bytes'], len(self.sbol))
+        upload = uploads.get_upload(upload_id)
+        self.assertTrue(upload.path.startswith(self.upload_root))
+        with open(upload.path, 'rb') as stored:
+            self.assertEqual(stored.read(), self.sbol)
+        # the same file again is not stored twice
+        self.assertEqual(self.upload().json()['upload_id'], upload_id)
+        self.assertEqual(SbolUpload.objects.count(), 1)
+        self.assertEqual(len(os.listdir(self.upload_root)), 1)
+
+    def test_upload_rejected(self):
+        response = self.client.post(reverse('sbol-upload'), {})
+        self.assertEqual(response.status_code, 400)
+        with override_settings(SBOL_UPLOAD_MAX_BYTES=10):
+            self.assertEqual(self.upload().status_code, 413)
+        self.assertEqual(
+            self.client.get(reverse('sbol-upload')).status_code, 405)
+        self.assertFalse(SbolUpload.objects.exists())
+
+    def test_client_quota(self):
+        with override_settings(SBOL_UPLOAD_MAX_CLIENT_BYTES=len(self.sbol)):
+            self.assertEqual(self.upload().status_code, 201)
+            # the same file is not counted twice
+            self.assertEqual(self.upload().status_code, 201)
+            response = self.upload(self.sbol + b' ')
+        self.assertEqual(response.status_code, 413)
+        self.assertIn('client', response.content.decode())
+        self.assertEqual(SbolUpload.objects.count(), 1)
+
+    def test_linker_list(self):
+        upload_id = self.upload().json()['upload_id']
+        by_upload = schema.execute(
+            LINKER_LIST, variables={'sbolUploadId': upload_id})
+        by_string = schema.execute(LINKER_LIST, variables={
+            'sbolFileString': base64.b64encode(self.sbol).decode()})
+        self.assertIsNone(by_upload.errors)
+        self.assertIsNone(by_string.errors)
+        self.assertTrue(by_upload.data['linkerList']['linkerList'])
+        self.assertListEqual(by_upload.data['linkerList']['linkerList'],
+                             by_string.data['linkerList']['linkerList'])
+
+        result = schema.execute(LINKER_LIST, variables={
+            'sbolUploadId': upload_id, 'sbolFileString': 'eA=='})
+        self.assertIn('not both', str(result.errors[0]))
+        result = schema.execute(
+            LINKER_LIST, variables={'sbolUploadId': 'missing'})
+        self.assertIn('upload the file again', str(result.errors[0]))
+
+    @patch('assembly_methods.jobs.run_pipeline',
+           return_value=(['script.py'], None))
+    def test_final_spec(self, mock_pipeline):
+        upload_id = self.upload().json()['upload_id']
+        with override_settings(ASSEMBLY_JOBS_SYNC=True,
+                               MEDIA_ROOT=self.media_root):
+            result = schema.execute(
+                FINAL_SPEC, variables={'sbolUploadId': upload_id})
+        self.assertIsNone(result.errors)
+        self.assertEqual(result.data['finalSpec']['job']['status'],
+                         AssemblyJob.SUCCEEDED)
+        self.assertEqual(mock_pipeline.call_args[0][7], upload_id)
+
+        os.remove(uploads.get_upload(upload_id).path)
+        with self.assertRaises(ValueError):
+            jobs.check_sbol_source('', upload_id)
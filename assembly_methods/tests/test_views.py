@@ -0,0 +1,73 @@
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from assembly_methods.models import AssemblyJob
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class TestDownloadJob(TestCase):
+
+    def setUp(self):
+        self.output_folder = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.output_folder, 'run_1'))
+        self.files = {
+            'metainformation.csv': b'construct,part\n' * 1000,
+            'run_1/protocol.py': b'# protocol\n',
+        }
+        for name, content in self.files.items():
+            with open(os.path.join(self.output_folder, name), 'wb') as out:
+                out.write(content)
+        self.job = AssemblyJob.objects.create(
+            assembly_type='moclo', arguments={},
+            status=AssemblyJob.SUCCEEDED, output_folder=self.output_folder,
+            output_links=[os.path.join(self.output_folder, name)
+                          for name in self.files])
+        self.url = reverse('job-download', args=[self.job.pk])
+
+    def tearDown(self):
+        shutil.rmtree(self.output_folder, ignore_errors=True)
+
+    def test_download(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        archive = zipfile.ZipFile(
+            io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(archive.testzip())
+        self.assertDictEqual(
+            {name: archive.read(name) for name in archive.namelist()},
+            self.files)
+        self.job.refresh_from_db()
+        self.assertEqual(response['ETag'],
+                         '"{}"'.format(self.job.content_hash))
+        self.assertEqual(response['Cache-Control'], 'public, no-cache')
+
+    def test_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with open(os.path.join(self.output_folder, 'run_1/protocol.py'),
+                  'ab') as out:
+            out.write(b'# changed\n')
+        AssemblyJob.objects.filter(pk=self.job.pk).update(content_hash='')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_unavailable(self):
+        AssemblyJob.objects.filter(pk=self.job.pk).update(
+            status=AssemblyJob.RUNNING)
+        self.assertEqual(self.client.get(self.url).status_code, 409)
+        AssemblyJob.objects.filter(pk=self.job.pk).update(
+            status=AssemblyJob.SUCCEEDED)
+        shutil.rmtree(self.output_folder)
+        self.assertEqual(self.client.get(self.url).status_code, 410)
+        self.assertEqual(self.client.get(
+            reverse('job-download', args=[self.job.pk + 1])).status_code, 404)
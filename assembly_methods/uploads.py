@@ -0,0 +1,118 @@
+"""SBOL files uploaded once and referenced by handle.
+
+Sending a document as a base64 string in the GraphQL payload makes it a
+third larger, holds the string, the decoded bytes and the parsed document
+in memory together and runs into request body limits. POST /uploads/sbol
+instead streams a multipart file to a temporary file on disk, which is moved
+to SBOL_UPLOAD_ROOT, and returns a handle. LinkerList, FinalSpec and
+BatchFinalSpec take the handle as sbolUploadId and parse the document from
+disk, so the same design can be used again without uploading it again.
+
+The uploads of a client are limited to SBOL_UPLOAD_MAX_CLIENT_BYTES in total,
+and the retention sweep removes the ones not used for SBOL_UPLOAD_MAX_AGE_DAYS
+(see assembly_methods.retention).
+"""
+import hashlib
+import os
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.move import file_move_safe
+from django.db.models import Sum
+from django.utils import timezone
+
+from assembly_methods.models import SbolUpload
+
+if TYPE_CHECKING:
+    from sbol2 import Document
+
+CHUNK_SIZE = 64 * 1024
+
+
+def store_upload(uploaded_file, client: str = '') -> SbolUpload:
+    """Stores an uploaded SBOL file, or returns the upload of the same file.
+
+    Args:
+        uploaded_file (UploadedFile): The file of the request, on disk when
+            read with TemporaryFileUploadHandler.
+        client (str): Uploading client, see admission.client_id.
+
+    Returns:
+        SbolUpload: The upload.
+
+    Raises:
+        ValueError: If a new file would take the uploads of the client over
+            SBOL_UPLOAD_MAX_CLIENT_BYTES.
+    """
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks(CHUNK_SIZE):
+        digest.update(chunk)
+    sha256 = digest.hexdigest()
+    for upload in SbolUpload.objects.filter(sha256=sha256):
+        if os.path.isfile(upload.path):
+            SbolUpload.objects.filter(pk=upload.pk).update(
+                last_used=timezone.now())
+            return upload
+        upload.delete()
+
+    if settings.SBOL_UPLOAD_MAX_CLIENT_BYTES:
+        used = SbolUpload.objects.filter(client=client).aggregate(
+            total=Sum('size_bytes'))['total'] or 0
+        if used + uploaded_file.size > settings.SBOL_UPLOAD_MAX_CLIENT_BYTES:
+            raise ValueError(
+                'The uploads of this client take {} bytes, {} are accepted. '
+                'Uploads unused for {:g} days are removed'.format(
+                    used, settings.SBOL_UPLOAD_MAX_CLIENT_BYTES,
+                    settings.SBOL_UPLOAD_MAX_AGE_DAYS))
+
+    upload = SbolUpload(size_bytes=uploaded_file.size, sha256=sha256,
+                        client=client, last_used=timezone.now())
+    os.makedirs(settings.SBOL_UPLOAD_ROOT, exist_ok=True)
+    upload.path = os.path.join(settings.SBOL_UPLOAD_ROOT,
+                               '{}.xml'.format(upload.handle))
+    if hasattr(uploaded_file, 'temporary_file_path'):
+        file_move_safe(uploaded_file.temporary_file_path(), upload.path)
+    else:
+        with open(upload.path, 'wb') as out:
+            for chunk in uploaded_file.chunks(CHUNK_SIZE):
+                out.write(chunk)
+    upload.save()
+    return upload
+
+
+def get_upload(handle: str) -> SbolUpload:
+    """Returns the upload of a handle and marks it as used.
+
+    Args:
+        handle (str): SbolUpload.handle.
+
+    Returns:
+        SbolUpload: The upload.
+
+    Raises:
+        ValueError: If there is no upload with this handle or its file has
+            been removed.
+    """
+    try:
+        upload = SbolUpload.objects.filter(handle=handle).first()
+    except ValidationError:
+        upload = None
+    if upload is None or not os.path.isfile(upload.path):
+        raise ValueError('No SBOL upload {}, upload the file again'.format(
+            handle))
+    SbolUpload.objects.filter(pk=upload.pk).update(last_used=timezone.now())
+    return upload
+
+
+def read_document(handle: str) -> 'Document':
+    """Parses the document of an upload from disk.
+
+    Raises:
+        ValueError: See get_upload.
+    """
+    from sbol2 import Document
+
+    document = Document()
+    document.read(get_upload(handle).path)
+    return document
@@ -19,6 +19,7 @@ from django.urls import include, path
 from django.views.decorators.csrf import csrf_exempt
 from graphene_django.views import GraphQLView
 from rest_framework import routers
+from assembly_methods.views import download_job, serve_metrics, upload_sbol
 from basic_assembly import views
 from moclo_assembly import views
 
@@ -26,5 +27,9 @@ urlpatterns = [
     path('', include('basic_assembly.urls')),
     path('Moclo/', include('moclo_assembly.urls')),
     path('admin/', admin.site.urls),
+    path('jobs/<int:job_id>/download.zip', download_job,
+         name='job-download'),
+    path('metrics', serve_metrics, name='metrics'),
+    path('uploads/sbol', csrf_exempt(upload_sbol), name='sbol-upload'),
     path("graphql", csrf_exempt(GraphQLView.as_view(graphiql=True))),
 ]
\ No newline at end of file
@@ -0,0 +1,119 @@
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db.models import Count, Sum
+from django.http import (Http404, HttpResponse, HttpResponseBadRequest,
+                         HttpResponseGone, JsonResponse,
+                         StreamingHttpResponse)
+from django.views.decorators.http import condition, require_POST, require_safe
+
+from assembly_methods import (admission, downloads, metrics, result_cache,
+                              retention, uploads)
+from assembly_methods.models import AssemblyJob, OutputFolder
+
+
+def _job_files(job_id):
+    job = AssemblyJob.objects.filter(pk=job_id).first()
+    if job is None:
+        raise Http404('No job {}'.format(job_id))
+    if job.status != AssemblyJob.SUCCEEDED:
+        return job, None
+    return job, downloads.bundle_files(job.output_folder, job.output_links)
+
+
+def _job_etag(request, job_id):
+    job, files = _job_files(job_id)
+    if not files:
+        return None
+    # Jobs finished before content hashes were recorded, and cache hits,
+    # are hashed on their first download
+    if not job.content_hash:
+        job.content_hash = downloads.content_hash(files)
+        AssemblyJob.objects.filter(pk=job.pk).update(
+            content_hash=job.content_hash)
+    return job.content_hash
+
+
+@require_safe
+@condition(etag_func=_job_etag)
+def download_job(request, job_id):
+    """Streams a zip of the files generated by a succeeded job."""
+    job, files = _job_files(job_id)
+    if files is None:
+        return HttpResponse('Job {} is {}'.format(job_id, job.status),
+                            status=409, content_type='text/plain')
+    if not files:
+        return HttpResponseGone('The files of job {} have been removed'
+                                .format(job_id), content_type='text/plain')
+    retention.touch(job.output_folder)
+    response = StreamingHttpResponse(downloads.iter_zip(files),
+                                     content_type='application/zip')
+    response['Content-Disposition'] = 'attachment; filename="job_{}.zip"'\
+        .format(job.pk)
+    # The ETag is a hash of the contents, so shared caches may keep the zip
+    # as long as they revalidate it
+    response['Cache-Control'] = 'public, no-cache'
+    return response
+
+
+@require_POST
+def upload_sbol(request):
+    """Stores the SBOL document of a multipart "file" field and returns its
+    handle, the sbolUploadId of LinkerList, FinalSpec and BatchFinalSpec."""
+    too_large = HttpResponse(
+        'SBOL uploads are limited to {} bytes'.format(
+            settings.SBOL_UPLOAD_MAX_BYTES),
+        status=413, content_type='text/plain')
+    if int(request.META.get('CONTENT_LENGTH') or 0) > \
+            settings.SBOL_UPLOAD_MAX_BYTES:
+        return too_large
+    # Streams the file to disk instead of holding small ones in memory
+    request.upload_handlers = [TemporaryFileUploadHandler(request)]
+    uploaded_file = request.FILES.get('file')
+    if uploaded_file is None:
+        return HttpResponseBadRequest('Send the SBOL document as "file"',
+                                      content_type='text/plain')
+    if uploaded_file.size > settings.SBOL_UPLOAD_MAX_BYTES:
+        return too_large
+    try:
+        upload = uploads.store_upload(uploaded_file,
+                                      admission.client_id(request))
+    except ValueError as error:
+        return HttpResponse(str(error), status=413, content_type='text/plain')
+    return JsonResponse({'upload_id': str(upload.handle),
+                         'size_bytes': upload.size_bytes,
+                         'sha256': upload.sha256}, status=201)
+
+
+@require_safe
+def serve_metrics(request):
+    """Serves the metrics of every process in the Prometheus text format,
+    with the job queue, result cache and output folders read from the
+    database."""
+    body = metrics.REGISTRY.exposition(metrics.collect())
+    counts = {status: 0 for status, _ in AssemblyJob.STATUS_CHOICES}
+    counts.update(AssemblyJob.objects.order_by().values_list('status')
+                  .annotate(count=Count('pk')))
+    body += metrics.gauge(
+        'assembly_jobs', 'Jobs in the database by status.',
+        [({'status': status}, count) for status, count in counts.items()])
+    stats = result_cache.stats()
+    body += metrics.gauge(
+        'assembly_result_cache_hit_ratio',
+        'Share of the cacheable submissions served from the cache.',
+        [({}, stats['hit_rate'])])
+    body += metrics.gauge('assembly_result_cache_entries',
+                          'Results in the cache.', [({}, stats['entries'])])
+    body += metrics.gauge('assembly_result_cache_size_bytes',
+                          'Size of the cached output folders.',
+                          [({}, stats['size_bytes'])])
+    folders = OutputFolder.objects.values('kind').annotate(
+        count=Count('pk'), size=Sum('size_bytes')).order_by('kind')
+    body += metrics.gauge(
+        'assembly_output_folders', 'Output folders kept by retention.',
+        [({'kind': row['kind']}, row['count']) for row in folders])
+    body += metrics.gauge(
+        'assembly_output_folders_size_bytes',
+        'Size of the output folders kept by retention.',
+        [({'kind': row['kind']}, row['size'] or 0) for row in folders])
+    return HttpResponse(body,
+                        content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,149 @@
+"""Worker processes running the queued AssemblyJobs.
+
+Each host runs one pool: the gunicorn master starts a supervisor process
+(see gunicorn.conf.py), or `manage.py run_assembly_workers` runs one in the
+foreground. The web processes only queue jobs, so the pool neither grows with
+the number of gunicorn workers nor dies when one of them is recycled.
+
+The workers are started with the spawn method, so they do not inherit the
+web server's database connections. This module imports nothing from Django
+at module level: a spawned worker imports it before Django is set up.
+"""
+import multiprocessing
+import signal
+import sys
+import time
+from typing import List
+
+
+def work(poll_interval: float, max_jobs: int = None):
+    """Claims and runs queued jobs until max_jobs have been run.
+
+    Args:
+        poll_interval (float): Seconds to wait when the queue is empty.
+        max_jobs (int): Number of jobs to run before returning, None to run
+            forever.
+    """
+    # Imported here so that the module is importable before django.setup
+    from assembly_methods import jobs, metrics, retention
+
+    done = 0
+    while max_jobs is None or done < max_jobs:
+        job_id = jobs.claim_next_job()
+        if job_id is None:
+            time.sleep(poll_interval)
+            continue
+        jobs.run_job(job_id)
+        retention.maybe_sweep()
+        metrics.flush()
+        done += 1
+
+
+def _worker_main(poll_interval: float):
+    import django
+    django.setup()
+    work(poll_interval)
+
+
+def start_workers(count: int, poll_interval: float) -> List:
+    """Starts worker processes polling the job table.
+
+    Args:
+        count (int): Number of processes.
+        poll_interval (float): Seconds a worker waits when the queue is
+            empty.
+
+    Returns:
+        List: The started processes.
+    """
+    context = multiprocessing.get_context('spawn')
+    processes = []
+    for _ in range(count):
+        process = context.Process(target=_worker_main, args=(poll_interval,),
+                                  daemon=True)
+        process.start()
+        processes.append(process)
+    return processes
+
+
+def stop_workers(processes: List):
+    """Terminates worker processes and waits for them to exit."""
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join(timeout=5)
+
+
+def supervise(
+    count: int,
+    poll_interval: float,
+    requeue_interval: float,
+    cycles: int = None
+):
+    """Keeps count workers running on this host, replacing the ones that
+    have died and queueing again the jobs they left running.
+
+    Args:
+        count (int): Number of worker processes.
+        poll_interval (float): Seconds a worker waits when the queue is
+            empty, and between checks of the pool.
+        requeue_interval (float): Seconds between searches for the running
+            jobs of dead workers, see jobs.requeue_orphaned_jobs.
+        cycles (int): Number of checks before returning, None to run until
+            terminated.
+    """
+    from assembly_methods import jobs, retention
+
+    pool = []
+    last_requeue = None
+    done = 0
+    try:
+        while cycles is None or done < cycles:
+            now = time.monotonic()
+            if last_requeue is None or now - last_requeue >= requeue_interval:
+                jobs.requeue_orphaned_jobs()
+                last_requeue = now
+            pool[:] = [process for process in pool if process.is_alive()]
+            if len(pool) < count:
+                pool.extend(start_workers(count - len(pool), poll_interval))
+            # Also covers the MocloView folders when no job runs
+            retention.maybe_sweep()
+            done += 1
+            time.sleep(poll_interval)
+    finally:
+        stop_workers(pool)
+
+
+def _supervisor_main():
+    import django
+    django.setup()
+    from django.conf import settings
+
+    if settings.ASSEMBLY_JOBS_SYNC or settings.ASSEMBLY_JOB_WORKERS <= 0:
+        return
+    # Stop the workers when the gunicorn master terminates the supervisor
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    supervise(settings.ASSEMBLY_JOB_WORKERS,
+              settings.ASSEMBLY_JOB_POLL_INTERVAL,
+              settings.ASSEMBLY_JOB_REQUEUE_INTERVAL)
+
+
+def start_pool():
+    """Starts the supervisor of the worker pool of this host, sized by the
+    ASSEMBLY_JOB_WORKERS setting. Called once by the gunicorn master (see
+    gunicorn.conf.py), so the pool outlives the web workers it recycles.
+
+    Returns:
+        The supervisor process, to be passed to stop_pool.
+    """
+    context = multiprocessing.get_context('spawn')
+    # Not a daemon, daemonic processes cannot start the workers
+    process = context.Process(target=_supervisor_main)
+    process.start()
+    return process
+
+
+def stop_pool(process):
+    """Terminates the supervisor started by start_pool and its workers."""
+    process.terminate()
+    process.join(timeout=10)
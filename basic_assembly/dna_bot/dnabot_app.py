@@ -2,9 +2,9 @@ import pandas as pd
 import os
 import csv
 import numpy as np
-import json
 import sys
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Union
+from assembly_methods import metrics, ot2_templates, run_estimator, tables
 
 """
 Created on Thu Apr 11 14:26:07 2019
@@ -15,6 +15,10 @@ Created on Thu Apr 11 14:26:07 2019
 
 # Constant str
 TEMPLATE_DIR_NAME = 'template_ot2_scripts'
+# Templates are resolved relative to this module rather than the working
+# directory so that concurrent jobs in one process never depend on cwd
+TEMPLATE_DIR_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), TEMPLATE_DIR_NAME)
 CLIP_TEMP_FNAME = 'clip_template.py'
 MAGBEAD_TEMP_FNAME = 'purification_template.py'
 F_ASSEMBLY_TEMP_FNAME = 'assembly_template.py'
@@ -52,6 +56,22 @@ SPOTTING_VOLS_DICT = {2: 5, 3: 5, 4: 5, 5: 5, 6: 5, 7: 5}
 # Constant lists
 # These are positions that the dna source plate can take
 SOURCE_DECK_POS = ['2', '5', '8', '7', '10', '11']
+# Well layouts: 'input' assigns wells in construct csv order, 'column'
+# arranges CLIPs and final assemblies so repeated transfers fill whole
+# 8-row columns (for multi-channel pipettes)
+LAYOUTS = ['input', 'column']
+# Tip reuse policies of the CLIP script: 'always' takes a new tip for every
+# transfer and mixes after each addition, 'per_source' reuses one tip per
+# source well, dispensing above the liquid so the tip never touches a CLIP
+# reaction, and mixes each CLIP once all additions are made. Drops smaller
+# than DISTRIBUTE_MIN_VOL stay on the tip when dispensed above the liquid,
+# so those transfers still take a new tip each
+TIP_POLICIES = ['always', 'per_source']
+P10_MAX_VOL = 10
+DISTRIBUTE_DISPOSAL_VOL = 1
+DISTRIBUTE_MIN_VOL = 2
+# Tube rack well of the CLIP water, which the transfer plan adds
+CLIP_WATER_WELL = 'A2'
 
 # labware dictionary - filled in by front end
 labware_dict = {'p10_mount': 'right', 'p300_mount': 'left',
@@ -67,6 +87,7 @@ labware_dict = {'p10_mount': 'right', 'p300_mount': 'left',
                 'agar_plate': 'thermofisher_96_wellplate_180ul'}
 
 
+@metrics.instrument_generator('basic')
 def dnabot(
     output_folder: str, ethanol_well_for_stage_2: str,
     deep_well_plate_stage_4: str, input_construct_path: List[str],
@@ -82,7 +103,9 @@ def dnabot(
     aluminum_block: str = 'opentrons_96_aluminumblock_biorad_wellplate_200ul',
     bead_container: str = 'usascientific_96_wellplate_2.4ml_deep',
     soc_plate: str = 'usascientific_96_wellplate_2.4ml_deep',
-    agar_plate: str = 'thermofisher_96_wellplate_180ul'
+    agar_plate: str = 'thermofisher_96_wellplate_180ul',
+    layout: str = 'input',
+    tip_policy: str = 'always'
 ) -> List[str]:
 
     '''
@@ -98,6 +121,14 @@ def dnabot(
             construct_path: a one element list with the full path of the
             construct csv
             part_path: a list of full paths to part csv(s) (one or more)
+            layout: 'input' (wells in construct csv order) or 'column'
+            (CLIPs grouped by linkers, final assemblies grouped into whole
+            columns by number of parts, see generate_construct_wells). A
+            multi-channel p10 spots whole columns, so it needs the 'column'
+            layout. Only the transformation script uses a multi-channel
+            p10, the CLIP and final assembly scripts use a p10_single
+            tip_policy: 'always' or 'per_source', tip reuse in the CLIP
+            script (see generate_clip_transfer_plan)
             see labware_dict for rest of arguments
 
         Returns:
@@ -106,23 +137,9 @@ def dnabot(
             only one element = the error path
             Otherwise the list of output paths will contain:
             OT-2 script paths (clip, thermocycle, purification, assembly,
-            transformation), metainformation (clip run info, final assembly
-            dict, wells - ethanol well and soc well)
+            transformation), run estimate, metainformation (clip run info,
+            final assembly dict, wells - ethanol well and soc well)
     '''
-    # Parent directories
-    generator_dir = os.getcwd()
-    '''
-        Ensure that template directories are correct.
-        Important for running this script through the front end.
-    '''
-    if os.path.split(generator_dir)[1] == 'dna_bot':
-        template_dir_path = os.path.join(generator_dir, TEMPLATE_DIR_NAME)
-    elif os.path.split(generator_dir)[1] == 'basic_assembly':
-        template_dir_path = os.path.join(generator_dir, 'dna_bot',
-                                         TEMPLATE_DIR_NAME)
-    else:
-        template_dir_path = os.path.join(
-            generator_dir, 'basic_assembly/dna_bot', TEMPLATE_DIR_NAME)
     full_output_path = output_folder
 
     '''In case construct path is list: can only have one path
@@ -133,27 +150,34 @@ def dnabot(
     if type(input_construct_path) == list:
         input_construct_path = input_construct_path[0]
 
-    construct_base = os.path.basename(input_construct_path)
-    construct_base = os.path.splitext(construct_base)[0]
+    construct_base = tables.source_name(input_construct_path, 'construct')
 
     all_my_output_paths = []
 
     try:
+        if 'multi' in p10_type.lower() and layout != 'column':
+            raise ValueError(
+                "A multi-channel p10 needs layout='column', the input layout "
+                "does not give each column a single spotting volume")
+
         constructs_list = generate_constructs_list(input_construct_path)
-        clips_df = generate_clips_df(constructs_list)
+        construct_wells = generate_construct_wells(constructs_list, layout)
+        clips_df = generate_clips_df(constructs_list, layout)
         sources_dict, parts_df = generate_sources_dict(output_sources_paths)
         parts_df_temp = fill_parts_df(clips_df, parts_df)
         parts_df = parts_df_temp.copy()
 
         # calculate OT2 script variables
         clips_dict = generate_clips_dict(clips_df, sources_dict, parts_df)
+        clip_transfer_plan = generate_clip_transfer_plan(
+            clips_dict, tip_policy)
         magbead_sample_number = clips_df['number'].sum()
         final_assembly_dict, clips_df, parts_df = generate_final_assembly_dict(
-            constructs_list, clips_df, parts_df)
+            constructs_list, clips_df, parts_df, construct_wells)
         final_assembly_tipracks = calculate_final_assembly_tipracks(
             final_assembly_dict)
-        spotting_tuples = generate_spotting_tuples(constructs_list,
-                                                   SPOTTING_VOLS_DICT)
+        spotting_tuples = generate_spotting_tuples(
+            constructs_list, SPOTTING_VOLS_DICT, construct_wells)
 
         # check if p300_single (1 channel) or p300_multi (8 channel)
         if 'multi' in p300_type.lower():
@@ -161,17 +185,24 @@ def dnabot(
         else:
             multi = False
 
+        # the CLIP and final assembly scripts transfer single tubes of the
+        # tube rack, so a multi-channel p10 only spots the transformations
+        if 'multi' in p10_type.lower():
+            single_p10_type = 'p10_single'
+        else:
+            single_p10_type = p10_type
+
         # Write OT2 scripts
         out_full_path_1 = generate_ot2_script(
             full_output_path, CLIP_FNAME,
-            os.path.join(template_dir_path, CLIP_TEMP_FNAME),
-            clips_dict=clips_dict,
-            p10_mount=p10_mount, p10_type=p10_type, well_plate_type=well_plate,
-            tube_rack_type=tube_rack)
+            os.path.join(TEMPLATE_DIR_PATH, CLIP_TEMP_FNAME),
+            clips_dict=clips_dict, transfer_plan=clip_transfer_plan,
+            p10_mount=p10_mount, p10_type=single_p10_type,
+            well_plate_type=well_plate, tube_rack_type=tube_rack)
 
         out_full_path_2 = generate_ot2_script(
             full_output_path, MAGBEAD_FNAME,
-            os.path.join(template_dir_path, MAGBEAD_TEMP_FNAME),
+            os.path.join(TEMPLATE_DIR_PATH, MAGBEAD_TEMP_FNAME),
             p300_mount=p300_mount,
             p300_type=p300_type, well_plate_type=well_plate,
             reagent_plate_type=reagent_plate,
@@ -181,15 +212,16 @@ def dnabot(
 
         out_full_path_3 = generate_ot2_script(
             full_output_path, F_ASSEMBLY_FNAME,
-            os.path.join(template_dir_path, F_ASSEMBLY_TEMP_FNAME),
+            os.path.join(TEMPLATE_DIR_PATH, F_ASSEMBLY_TEMP_FNAME),
             final_assembly_dict=final_assembly_dict,
             tiprack_num=final_assembly_tipracks,
-            p10_mount=p10_mount, p10_type=p10_type, mag_plate_type=mag_plate,
+            p10_mount=p10_mount, p10_type=single_p10_type,
+            mag_plate_type=mag_plate,
             tube_rack_type=tube_rack, aluminum_block_type=aluminum_block)
 
         out_full_path_4 = generate_ot2_script(
             full_output_path, TRANS_SPOT_FNAME,
-            os.path.join(template_dir_path, TRANS_SPOT_TEMP_FNAME),
+            os.path.join(TEMPLATE_DIR_PATH, TRANS_SPOT_TEMP_FNAME),
             spotting_tuples=spotting_tuples, soc_well=deep_well_plate_stage_4,
             p10_mount=p10_mount,
             p300_mount=p300_mount, p10_type=p10_type, p300_type=p300_type,
@@ -201,7 +233,7 @@ def dnabot(
         # requires the thermocycler module
         out_full_path_5 = generate_ot2_script(
             full_output_path, THERMOCYCLE_FNAME, 
-            os.path.join(template_dir_path, THERMOCYCLE_TEMP_NAME),
+            os.path.join(TEMPLATE_DIR_PATH, THERMOCYCLE_TEMP_NAME),
             well_plate_type=well_plate)
 
         all_my_output_paths.append(out_full_path_1)
@@ -210,14 +242,21 @@ def dnabot(
         all_my_output_paths.append(out_full_path_4)
         all_my_output_paths.append(out_full_path_5)
 
-        # Write non-OT2 scripts - metainformation
-        os.chdir(generator_dir)
+        # Estimate run time and consumables of the OT-2 scripts
+        estimate = run_estimator.summarise([
+            run_estimator.estimate_clip(clips_dict, clip_transfer_plan),
+            run_estimator.estimate_thermocycle(),
+            run_estimator.estimate_purification(
+                magbead_sample_number, multi),
+            run_estimator.estimate_final_assembly(final_assembly_dict),
+            run_estimator.estimate_transformation(
+                spotting_tuples, 'multi' in p10_type.lower())])
+        all_my_output_paths.append(
+            run_estimator.save_estimate(estimate, full_output_path))
 
+        # Write non-OT2 scripts - metainformation
         my_meta_dir = os.path.join(full_output_path, 'metainformation')
-        if not os.path.exists(my_meta_dir):
-            os.chdir(full_output_path)
-            os.makedirs(my_meta_dir)
-        os.chdir(my_meta_dir)
+        os.makedirs(my_meta_dir, exist_ok=True)
 
         # create master mix dataframe so that users know proportions
         master_mix_df = generate_master_mix_df(clips_df['number'].sum())
@@ -232,34 +271,35 @@ def dnabot(
                   'definition': list(labware_dict.values())})
 
         # save dfs as csv
-        dfs_to_csv(construct_base + '_' + CLIPS_INFO_FNAME, index=False,
+        clips_info_path = os.path.join(
+            my_meta_dir, construct_base + '_' + CLIPS_INFO_FNAME)
+        dfs_to_csv(clips_info_path, index=False,
                    MASTER_MIX=master_mix_df, SOURCE_PLATES=sources_paths_df,
                    CLIP_REACTIONS=clips_df, PART_INFO=parts_df,
                    LABWARE=labwareDf)
-        output_sources_paths.append(os.path.join(
-            my_meta_dir, construct_base + '_' + CLIPS_INFO_FNAME))
+        all_my_output_paths.append(clips_info_path)
         # final assembly dictionary - from original dnabot
-        with open(construct_base + '_' + FINAL_ASSEMBLIES_INFO_FNAME,
-                  'w', newline='') as csvfile:
+        final_assemblies_info_path = os.path.join(
+            my_meta_dir, construct_base + '_' + FINAL_ASSEMBLIES_INFO_FNAME)
+        with open(final_assemblies_info_path, 'w', newline='') as csvfile:
             csvwriter = csv.writer(csvfile)
             for final_assembly_well, construct_clips in final_assembly_dict.items():
                 csvwriter.writerow([final_assembly_well, construct_clips])
-        output_sources_paths.append(os.path.join(
-            my_meta_dir, construct_base + '_' + FINAL_ASSEMBLIES_INFO_FNAME))
+        all_my_output_paths.append(final_assemblies_info_path)
 
         # additional well info - from original dnabot
-        with open(construct_base + '_' + WELL_OUTPUT_FNAME, 'w') as f:
+        wells_info_path = os.path.join(
+            my_meta_dir, construct_base + '_' + WELL_OUTPUT_FNAME)
+        with open(wells_info_path, 'w') as f:
             f.write('Magbead ethanol well: {}'.format(ethanol_well_for_stage_2))
             f.write('\n')
             f.write('SOC column: {}'.format(deep_well_plate_stage_4))
-        output_sources_paths.append(os.path.join(
-            my_meta_dir, construct_base + '_' + WELL_OUTPUT_FNAME))
-        os.chdir(generator_dir)
+        all_my_output_paths.append(wells_info_path)
 
     except Exception as e:
         # write error to file in case of failure
         error_path = os.path.join(full_output_path, 'BASIC_error.txt')
-        with open(error_path) as f:
+        with open(error_path, 'w') as f:
             f.write("Failed to generate BASIC scripts: {}\n".format(str(e)))
         all_my_output_paths.append(error_path)
 
@@ -270,13 +310,37 @@ def dnabot(
         return output_paths
 
 
+def dnabot_from_tables(
+    output_folder: str, ethanol_well_for_stage_2: str,
+    deep_well_plate_stage_4: str, construct_table: pd.DataFrame,
+    part_tables: Dict[str, pd.DataFrame], **kwargs
+) -> List[str]:
+    '''
+        Creates scripts and metainformation from the construct and part
+        tables of the SBOL parser (see ParserSBOL.generate_tables), without
+        reading csvs
+        Args:
+            construct_table: table of constructs, laid out as the construct
+            csv
+            part_tables: part/linker tables by source plate name, laid out as
+            the part csvs
+            see dnabot for rest of arguments
+        Returns:
+            List of output paths, see dnabot
+    '''
+    return dnabot(output_folder, ethanol_well_for_stage_2,
+                  deep_well_plate_stage_4, construct_table, part_tables,
+                  **kwargs)
+
+
 def generate_constructs_list(
-    path: str
+    path: tables.Source
 ) -> List[pd.DataFrame]:
     """
         Generates a list of dataframes corresponding to each construct. Each
         dataframe lists components of the CLIP reactions required.
-        Args: path = the absolute path of the constructs file
+        Args: path = the absolute path of the constructs file, or the
+        construct table
         Returns: List of dataframes, in which each dataframe = construct
     """
 
@@ -316,15 +380,13 @@ def generate_constructs_list(
     constructs_list = []
     # myworkingd = os.getcwd()
     # print('my working directory {}'.format(myworkingd))
-    with open(path, 'r') as csvfile:
-        csv_reader = csv.reader(csvfile)
-        for index, construct in enumerate(csv_reader):
-            if index != 0:  # Checks if row is header.
-                construct = list(filter(None, construct))
-                if not construct[1:]:
-                    break
-                else:
-                    constructs_list.append(process_construct(construct[1:]))
+    for index, construct in enumerate(tables.read_rows(path)):
+        if index != 0:  # Checks if row is header.
+            construct = list(filter(None, construct))
+            if not construct[1:]:
+                break
+            else:
+                constructs_list.append(process_construct(construct[1:]))
 
     # Errors
     if len(constructs_list) > MAX_CONSTRUCTS:
@@ -335,16 +397,22 @@ def generate_constructs_list(
 
 
 def generate_clips_df(
-    constructs_list: List[pd.DataFrame]
+    constructs_list: List[pd.DataFrame],
+    layout: str = 'input'
 ) -> pd.DataFrame:
     """
         Generates a dataframe containing information about all the unique clip
         reactions required to synthesise the constructs in constructs_list.
-        Args: list of constructs stored as dataframes
+        Args: list of constructs stored as dataframes, layout ('column' sorts
+        the CLIPs by prefix then suffix linker so that CLIPs taking the same
+        linker occupy neighbouring wells down each column)
         Returns: dataframe of all constructs
     """
     merged_construct_dfs = pd.concat(constructs_list, ignore_index=True)
     unique_clips_df = merged_construct_dfs.drop_duplicates()
+    if layout == 'column':
+        unique_clips_df = unique_clips_df.sort_values(
+            ['prefixes', 'suffixes'], kind='mergesort')
     unique_clips_df = unique_clips_df.reset_index(drop=True)
     clips_df = unique_clips_df.copy()
 
@@ -391,7 +459,7 @@ def generate_clips_df(
 
 
 def generate_sources_dict(
-    paths: List[str]
+    paths: Union[List[str], Dict[str, pd.DataFrame]]
 ) -> Tuple[Dict[str, Tuple], pd.DataFrame]:
     """Imports csvs files containing a series of parts/linkers with
     corresponding information into a dictionary where the key corresponds with
@@ -399,7 +467,7 @@ def generate_sources_dict(
 
     Args:
         paths (list): list of strings each corresponding to a path for a
-                      sources csv file.
+                      sources csv file, or dictionary of part tables.
     Returns:
         sources_dict: a dictionary with keys = part names, values = tuple of
         values - either well, concentration, plate or well, plate depending on
@@ -412,45 +480,43 @@ def generate_sources_dict(
     part_dict = {}
     part_dict_list = []
     # print('my paths: {}'.format(paths))
-    for deck_index, path in enumerate(paths):
+    for deck_index, (_, path) in enumerate(tables.named_sources(paths)):
         # print('my path: {}'.format(path))
-        with open(path, 'r') as csvfile:
-            csv_reader = csv.reader(csvfile)
-            for index, source in enumerate(csv_reader):
-                if index != 0:
-                    if len(source) > 2:
-                        if source[2]:
-                            csv_values = source[1:]
-                            part_dict['concentration'] = [str(source[2])]
-                        else:
-                            csv_values = [source[1]]
-                            part_dict['concentration'] = [PART_PER_CLIP]
+        for index, source in enumerate(tables.read_rows(path)):
+            if index != 0:
+                if len(source) > 2:
+                    if source[2]:
+                        csv_values = source[1:]
+                        part_dict['concentration'] = [str(source[2])]
                     else:
                         csv_values = [source[1]]
                         part_dict['concentration'] = [PART_PER_CLIP]
-                    csv_values.append(SOURCE_DECK_POS[deck_index])
-                    name = str(source[0])
-                    if name.find('_Prefix') > 0:
-                        index = name.index('Prefix')
-                        if name[index-1] == '-':
-                            name = name.replace('Prefix', 'P')
-                        elif name[index-1] == '_':
-                            name = name.replace('_Prefix', '-P')
-                        else:
-                            name = name.replace('Prefix', '-P')
-                    elif 'Suffix' in name:
-                        index = name.index('Suffix')
-                        if name[index-1] == '-':
-                            name = name.replace('Suffix', 'S')
-                        elif name[index-1] == '_':
-                            name = name.replace('_Suffix', '-S')
-                        else:
-                            name = name.replace('Suffix', '-S')
-                    sources_dict[name] = tuple(csv_values)
-                    part_dict['name'] = [name]
-                    part_dict['well'] = [str(source[1])]
-                    part_dict['plate'] = [SOURCE_DECK_POS[deck_index]]
-                    part_dict_list.append(pd.DataFrame.from_dict(part_dict))
+                else:
+                    csv_values = [source[1]]
+                    part_dict['concentration'] = [PART_PER_CLIP]
+                csv_values.append(SOURCE_DECK_POS[deck_index])
+                name = str(source[0])
+                if name.find('_Prefix') > 0:
+                    index = name.index('Prefix')
+                    if name[index-1] == '-':
+                        name = name.replace('Prefix', 'P')
+                    elif name[index-1] == '_':
+                        name = name.replace('_Prefix', '-P')
+                    else:
+                        name = name.replace('Prefix', '-P')
+                elif 'Suffix' in name:
+                    index = name.index('Suffix')
+                    if name[index-1] == '-':
+                        name = name.replace('Suffix', 'S')
+                    elif name[index-1] == '_':
+                        name = name.replace('_Suffix', '-S')
+                    else:
+                        name = name.replace('Suffix', '-S')
+                sources_dict[name] = tuple(csv_values)
+                part_dict['name'] = [name]
+                part_dict['well'] = [str(source[1])]
+                part_dict['plate'] = [SOURCE_DECK_POS[deck_index]]
+                part_dict_list.append(pd.DataFrame.from_dict(part_dict))
     parts_df = pd.concat(part_dict_list, ignore_index=True)
     # print('essential: {}'.format(sources_dict))
     return sources_dict, parts_df
@@ -632,10 +698,84 @@ def generate_clips_dict(
     return clips_dict
 
 
+def generate_clip_transfer_plan(
+    clips_dict: Dict[str, List],
+    tip_policy: str = 'always'
+) -> List[Dict]:
+    """
+        Plans the water, linker and part transfers of the CLIP script (the
+        master mix is added first, with a single tip, by the template).
+        With the 'always' policy every transfer takes a new tip and is mixed
+        into the CLIP reaction, as in the original DNA-BOT protocol. With the
+        'per_source' policy transfers of at least DISTRIBUTE_MIN_VOL are
+        grouped by source well and dispensed above the liquid with one tip
+        per aspiration of at most P10_MAX_VOL less a disposal volume, smaller
+        ones are dispensed into the reaction with a new tip each; each CLIP
+        is then mixed once.
+        Args:
+            clips_dict: dictionary from generate_clips_dict
+            tip_policy: 'always' or 'per_source'
+        Returns:
+            list of steps executed in order by the clip template, each a dict
+            with 'action' ('transfer', 'distribute' or 'mix'), 'plate'
+            ('tube_rack' or a source plate), 'well', 'dests' (CLIP wells),
+            'volumes' (one per destination) and 'mix' (1 to mix each
+            destination after a transfer)
+        Raises:
+            ValueError if tip_policy is unknown
+    """
+    if tip_policy not in TIP_POLICIES:
+        raise ValueError('Tip policy must be one of {}'.format(TIP_POLICIES))
+    clip_wells = [final_well(x + 1)
+                  for x in range(len(clips_dict['parts_wells']))]
+    # (plate, well, CLIP well, volume, mix) in the original order
+    transfers = [('tube_rack', CLIP_WATER_WELL, clip_well, vol, 0)
+                 for clip_well, vol in zip(clip_wells,
+                                           clips_dict['water_vols'])]
+    for index, clip_well in enumerate(clip_wells):
+        transfers += [
+            (clips_dict['prefixes_plates'][index],
+             clips_dict['prefixes_wells'][index], clip_well, 1, 1),
+            (clips_dict['suffixes_plates'][index],
+             clips_dict['suffixes_wells'][index], clip_well, 1, 1),
+            (clips_dict['parts_plates'][index],
+             clips_dict['parts_wells'][index], clip_well,
+             clips_dict['parts_vols'][index], 1)]
+    transfers = [transfer for transfer in transfers if transfer[3] > 0]
+
+    if tip_policy == 'always':
+        return [{'action': 'transfer', 'plate': plate, 'well': well,
+                 'dests': [clip_well], 'volumes': [vol], 'mix': mix}
+                for plate, well, clip_well, vol, mix in transfers]
+
+    sources = {}
+    plan = []
+    for plate, well, clip_well, vol, _ in transfers:
+        if vol < DISTRIBUTE_MIN_VOL:
+            plan.append({'action': 'transfer', 'plate': plate, 'well': well,
+                         'dests': [clip_well], 'volumes': [vol], 'mix': 0})
+        else:
+            sources.setdefault((plate, well), []).append((clip_well, vol))
+    max_aspirate = P10_MAX_VOL - DISTRIBUTE_DISPOSAL_VOL
+    for (plate, well), dispenses in sources.items():
+        step = None
+        for clip_well, vol in dispenses:
+            if step is None or sum(step['volumes']) + vol > max_aspirate:
+                step = {'action': 'distribute', 'plate': plate,
+                        'well': well, 'dests': [], 'volumes': [], 'mix': 0}
+                plan.append(step)
+            step['dests'].append(clip_well)
+            step['volumes'].append(vol)
+    plan.append({'action': 'mix', 'plate': '', 'well': '',
+                 'dests': clip_wells, 'volumes': [], 'mix': 1})
+    return plan
+
+
 def generate_final_assembly_dict(
     constructs_list: pd.DataFrame,
     clips_df: pd.DataFrame,
-    parts_df: pd.DataFrame
+    parts_df: pd.DataFrame,
+    construct_wells: List[str] = None
 ) -> Tuple[Dict[str, List[str]], pd.DataFrame, pd.DataFrame]:
     """
         Using constructs_list and clips_df, returns a dictionary of final
@@ -645,11 +785,15 @@ def generate_final_assembly_dict(
             constructs_list: list of constructs, constructs = dataframes
             clips_df: dataframe of clip reactions
             parts_df: dataframe of parts
+            construct_wells: final assembly well of each construct, see
+            generate_construct_wells (defaults to the 'input' layout)
         Returns:
             dictionary of final assemblies with keys = destination plate,
             values = list of clip wells
             clips_df and parts_df updated with construct well column
     """
+    if construct_wells is None:
+        construct_wells = generate_construct_wells(constructs_list)
     final_assembly_dict = {}
     clips_count = np.zeros(len(clips_df.index))
     parts_df['construct_well'] = pd.Series(['0'] * len(parts_df.index),
@@ -657,6 +801,7 @@ def generate_final_assembly_dict(
     clips_df['construct_well'] = pd.Series(['0'] * len(clips_df.index),
                                            index=clips_df.index)
     for construct_index, construct_df in enumerate(constructs_list):
+        construct_well = construct_wells[construct_index]
         construct_well_list = []
         for _, clip in construct_df.iterrows():
             clip_info = clips_df[(clips_df['prefixes'] == clip['prefixes']) &
@@ -669,11 +814,9 @@ def generate_final_assembly_dict(
             clips_count[clip_num] = clips_count[clip_num] + 1
             construct_well_list.append(clip_well)
             if clips_df.at[clip_num, 'construct_well'] == '0':
-                clips_df.at[clip_num, 'construct_well'] = [str(
-                    final_well(construct_index + 1))]
+                clips_df.at[clip_num, 'construct_well'] = [construct_well]
             else:
-                clips_df.at[clip_num, 'construct_well'].append(str(
-                    final_well(construct_index + 1)))
+                clips_df.at[clip_num, 'construct_well'].append(construct_well)
             prefix_index = parts_df[
                 parts_df['name'] == clip['prefixes']].index.values[0]
             part_index = parts_df[
@@ -682,26 +825,19 @@ def generate_final_assembly_dict(
                 parts_df['name'] == clip['suffixes']].index.values[0]
 
             if parts_df.at[prefix_index, 'construct_well'] == '0':
-                parts_df.at[prefix_index, 'construct_well'] = [str(
-                    final_well(construct_index + 1))]
+                parts_df.at[prefix_index, 'construct_well'] = [construct_well]
             else:
-                parts_df.at[prefix_index, 'construct_well'].append(str(
-                    final_well(construct_index + 1)))
+                parts_df.at[prefix_index, 'construct_well'].append(construct_well)
             if parts_df.at[part_index, 'construct_well'] == '0':
-                parts_df.at[part_index, 'construct_well'] = [str(
-                    final_well(construct_index + 1))]
+                parts_df.at[part_index, 'construct_well'] = [construct_well]
             else:
-                parts_df.at[part_index, 'construct_well'].append(str(
-                    final_well(construct_index + 1)))
+                parts_df.at[part_index, 'construct_well'].append(construct_well)
             if parts_df.at[suffix_index, 'construct_well'] == '0':
-                parts_df.at[suffix_index, 'construct_well'] = [str(
-                    final_well(construct_index + 1))]
+                parts_df.at[suffix_index, 'construct_well'] = [construct_well]
             else:
-                parts_df.at[suffix_index, 'construct_well'].append(str(
-                    final_well(construct_index + 1)))
+                parts_df.at[suffix_index, 'construct_well'].append(construct_well)
 
-        final_assembly_dict[final_well(
-            construct_index + 1)] = construct_well_list
+        final_assembly_dict[construct_well] = construct_well_list
 
     return final_assembly_dict, clips_df, parts_df
 
@@ -735,45 +871,92 @@ def calculate_final_assembly_tipracks(
 
 def generate_spotting_tuples(
     constructs_list: List[pd.DataFrame],
-    spotting_vols_dict: Dict[int, int]
+    spotting_vols_dict: Dict[int, int],
+    construct_wells: List[str] = None
 ) -> List[Tuple]:
     """Using constructs_list, generates a spotting tuple
-    (Refer to 'transformation_spotting_template.py') for every column of 
-    constructs, assuming the 1st construct is located in well A1 and wells
-    increase linearly. Target wells locations are equivalent to construct well
+    (Refer to 'transformation_spotting_template.py') for every column of
+    constructs. Target wells locations are equivalent to construct well
     locations and spotting volumes are defined by spotting_vols_dict.
 
     Args:
         spotting_vols_dict (dict): Part number defined by keys, spotting
             volumes defined by corresponding value.
+        construct_wells (list): final assembly well of each construct, see
+            generate_construct_wells (defaults to the 'input' layout, 1st
+            construct in well A1 and wells increasing linearly)
     Returns:
         List of three tuples as instructions for transformation script
     """
     # Calculate wells and volumes
-    wells = [final_well(x + 1) for x in range(len(constructs_list))]
+    if construct_wells is None:
+        construct_wells = generate_construct_wells(constructs_list)
     vols = [SPOTTING_VOLS_DICT[len(construct_df.index)]
             for construct_df in constructs_list]
 
-    # Package spotting tuples
-    spotting_tuple_num = len(constructs_list)//8 + (1
-                                                    if len(constructs_list) % 8 > 0 else 0)
+    # Package spotting tuples, one per column of constructs
+    columns = {}
+    for well, vol in sorted(zip(construct_wells, vols),
+                            key=lambda well_vol: well_index(well_vol[0])):
+        columns.setdefault(well[1:], []).append((well, vol))
     spotting_tuples = []
-    for x in range(spotting_tuple_num):
-        if x == spotting_tuple_num - 1:
-            tuple_wells = tuple(wells[8*x:])
-            tuple_vols = tuple(vols[8*x:])
-        else:
-            tuple_wells = tuple(wells[8*x:8*x + 8])
-            tuple_vols = tuple(vols[8*x:8*x + 8])
+    for column in columns.values():
+        tuple_wells = tuple(well for well, _ in column)
+        tuple_vols = tuple(vol for _, vol in column)
         spotting_tuples.append((tuple_wells, tuple_wells, tuple_vols))
     return spotting_tuples
 
 
+def generate_construct_wells(
+    constructs_list: List[pd.DataFrame],
+    layout: str = 'input'
+) -> List[str]:
+    """Assigns a final assembly well to each construct.
+
+    'input' fills wells down columns in construct csv order. 'column' groups
+    constructs by number of parts and starts each group at the top of a new
+    column, so every column of final assemblies takes the same master mix
+    volume and spotting volume and can be handled by a multi-channel pipette
+    as one transfer.
+
+    Args:
+        constructs_list: list of constructs stored as dataframes
+        layout: 'input' or 'column'
+    Returns:
+        list of wells, one per construct in constructs_list
+    Raises:
+        ValueError if the layout is unknown or needs more than
+        MAX_CONSTRUCTS wells
+    """
+    if layout == 'input':
+        return [final_well(x + 1) for x in range(len(constructs_list))]
+    elif layout != 'column':
+        raise ValueError('Layout must be one of {}'.format(LAYOUTS))
+
+    groups = {}
+    for index, construct_df in enumerate(constructs_list):
+        groups.setdefault(len(construct_df.index), []).append(index)
+    construct_wells = [''] * len(constructs_list)
+    sample_number = 0
+    for part_number in sorted(groups):
+        # start each group at the top of a column
+        sample_number += -sample_number % 8
+        for index in groups[part_number]:
+            sample_number += 1
+            construct_wells[index] = final_well(sample_number)
+    if sample_number > MAX_CONSTRUCTS:
+        raise ValueError(
+            'Column layout needs {} final assembly wells, more than {}. Reduce number of constructs in construct.csv or use the input layout.'.format(
+                sample_number, MAX_CONSTRUCTS))
+    return construct_wells
+
+
 def generate_ot2_script(parent_dir, ot2_script_path, template_path, **kwargs):
     """Generates an ot2 script named 'ot2_script_path', where kwargs are
-    written as global variables at the top of the script. For each kwarg, the
-    keyword defines the variable name while the value defines the name of the
-    variable. The remainder of template file is subsequently written below.
+    written as global variables above the first function of the template.
+    For each kwarg, the keyword defines the variable name while the value
+    defines the value of the variable. Rendering is delegated to the shared
+    ot2_templates renderer, which caches the split template in memory.
     Args:
         parent_dir (str): output folder dir
         ot2_script_path (str): where the script should be saved, relative to
@@ -782,38 +965,10 @@ def generate_ot2_script(parent_dir, ot2_script_path, template_path, **kwargs):
     Returns:
         absolute path of script (str)
     """
-    working_directory = os.getcwd()
-
-    os.chdir(parent_dir)
     full_file_path = os.path.join(parent_dir, ot2_script_path)
-
-    this_object_output_path = os.path.realpath(full_file_path)
-
-    with open(ot2_script_path, 'w') as wf:
-        with open(template_path, 'r') as rf:
-            for index, line in enumerate(rf):
-                if line[:3] == 'def':
-                    function_start = index
-                    break
-                else:
-                    wf.write(line)
-            for key, value in kwargs.items():
-                wf.write('{}='.format(key))
-                if type(value) == dict:
-                    wf.write(json.dumps(value))
-                elif type(value) == str:
-                    wf.write("'{}'".format(value))
-                else:
-                    wf.write(str(value))
-                wf.write('\n')
-            wf.write('\n')
-        with open(template_path, 'r') as rf:
-            for index, line in enumerate(rf):
-                if index >= function_start - 1:
-                    wf.write(line)
-
-    os.chdir(working_directory)
-    return this_object_output_path
+    ot2_templates.write_script(full_file_path, template_path, kwargs,
+                               placement=ot2_templates.BEFORE_FIRST_DEF)
+    return os.path.realpath(full_file_path)
 
 
 def generate_master_mix_df(
@@ -839,12 +994,14 @@ def generate_master_mix_df(
 
 
 def generate_sources_paths_df(
-    paths: List[str], deck_positions: List[str]
+    paths: Union[List[str], Dict[str, pd.DataFrame]],
+    deck_positions: List[str]
 ) -> pd.DataFrame:
     """Generates a dataframe detailing source plate information.
 
     Args:
-        paths (list): list of strings specifying paths to source plates.
+        paths (list): list of strings specifying paths to source plates, or
+        dictionary of part tables (which have no path).
         deck_positions (list): list of strings specifying candidate deck
         positions.
     Returns:
@@ -852,10 +1009,14 @@ def generate_sources_paths_df(
 
     """
     source_plates_dict = {'Deck position': [], 'Source plate': [], 'Path': []}
-    for index, path in enumerate(paths):
+    for index, (name, path) in enumerate(tables.named_sources(paths)):
         source_plates_dict['Deck position'].append(SOURCE_DECK_POS[index])
-        source_plates_dict['Source plate'].append(os.path.basename(path))
-        source_plates_dict['Path'].append(path)
+        if isinstance(path, pd.DataFrame):
+            source_plates_dict['Source plate'].append(name)
+            source_plates_dict['Path'].append('')
+        else:
+            source_plates_dict['Source plate'].append(os.path.basename(path))
+            source_plates_dict['Path'].append(path)
     return pd.DataFrame(source_plates_dict)
 
 
@@ -912,6 +1073,16 @@ def final_well(
     return final_well_row + str(final_well_column)
 
 
+def well_index(
+    well: str
+) -> int:
+    """Inverse of final_well.
+        Args: well in string form, e.g. 'B1'
+        Returns: sample number of the well, e.g. 2 if well = 'B1'
+    """
+    return (int(well[1:]) - 1) * 8 + ord(well[0]) - ord('A') + 1
+
+
 '''
 Below is an example of how this would be run through the command line:
 To use this, replace the output_folder name, construct_path, and part_paths.
@@ -16,6 +16,7 @@ def run(protocol: protocol_api.ProtocolContext):
         parts_plates,
         parts_vols,
         water_vols,
+        transfer_plan,
         tiprack_type='opentrons_96_tiprack_10ul',
         p10_mount='right',
         p10_type='p10_single',
@@ -39,14 +40,16 @@ def run(protocol: protocol_api.ProtocolContext):
         TUBE_RACK_TYPE = tube_rack_type
         TUBE_RACK_POSITION = '4'
         MASTER_MIX_WELL = 'A1'
-        WATER_WELL = 'A2'
         INITIAL_DESTINATION_WELL = 'A1'
         MASTER_MIX_VOLUME = 20
         LINKER_MIX_SETTINGS = (4, 10)
         PART_MIX_SETTINGS = (4, 10)
+        DISPOSAL_VOLUME = 1
 
         # Tiprack slots
-        total_tips = 4 * len(parts_wells)
+        total_tips = 1 + sum(
+            1 if step['action'] == 'distribute' else len(step['dests'])
+            for step in transfer_plan)
         letter_dict = {'A': 0, 'B': 1, 'C': 2,
                        'D': 3, 'E': 4, 'F': 5, 'G': 6, 'H': 7}
 
@@ -81,7 +84,6 @@ def run(protocol: protocol_api.ProtocolContext):
             DESTINATION_PLATE_TYPE, DESTINATION_PLATE_POSITION)
         tube_rack = protocol.load_labware(TUBE_RACK_TYPE, TUBE_RACK_POSITION)
         master_mix = tube_rack.wells_by_name()[MASTER_MIX_WELL]
-        water = tube_rack.wells_by_name()[WATER_WELL]
         #destination_wells = destination_plate.wells(
             #INITIAL_DESTINATION_WELL, length=int(len(parts_wells)))
         destination_wells = destination_plate.wells()[
@@ -95,57 +97,48 @@ def run(protocol: protocol_api.ProtocolContext):
                          destination_wells, new_tip='never', touch_tip=True,
                          blow_out=True)
         pipette.drop_tip()
-        pipette.transfer(water_vols, water,
-                         destination_wells, touch_tip=True,
-                         new_tip='always')
-        for clip_num in range(len(parts_wells)):
-            prefix_wells = [prefix_well.bottom() for prefix_well in
-                            source_plates[prefixes_plates[clip_num]].wells(
-                prefixes_wells[clip_num])]
-            for prefix_well in prefix_wells:
+        for step in transfer_plan:
+            if step['action'] == 'mix':
+                for dest in step['dests']:
+                    pipette.pick_up_tip()
+                    pipette.mix(PART_MIX_SETTINGS[0], PART_MIX_SETTINGS[1],
+                                destination_plate.wells_by_name()[dest])
+                    pipette.drop_tip()
+                continue
+            if step['plate'] == 'tube_rack':
+                source = tube_rack.wells_by_name()[step['well']].bottom()
+            else:
+                source = source_plates[step['plate']].wells_by_name()[
+                    step['well']].bottom()
+            dests = [destination_plate.wells_by_name()[dest]
+                     for dest in step['dests']]
+            if step['action'] == 'transfer':
+                # New tip per transfer, dispensed into the reaction and mixed
+                for dest, vol in zip(dests, step['volumes']):
+                    pipette.pick_up_tip()
+                    pipette.move_to(source)
+                    protocol.max_speeds['Z'] = 10
+                    pipette.aspirate(vol, source)
+                    pipette.move_to(dest.top())
+                    protocol.max_speeds['Z'] = None
+                    pipette.dispense(vol, dest)
+                    pipette.touch_tip(dest)
+                    if step['mix']:
+                        pipette.mix(LINKER_MIX_SETTINGS[0],
+                                    LINKER_MIX_SETTINGS[1], dest)
+                    pipette.drop_tip()
+            else:
+                # One tip per source aspiration, dispensed above the liquid;
+                # the disposal volume is discarded with the tip
                 pipette.pick_up_tip()
-                pipette.move_to(prefix_well)
+                pipette.move_to(source)
                 protocol.max_speeds['Z'] = 10
-                pipette.aspirate(1, prefix_well)
-                pipette.move_to(destination_wells[clip_num].top())
+                pipette.aspirate(sum(step['volumes']) + DISPOSAL_VOLUME,
+                                 source)
                 protocol.max_speeds['Z'] = None
-                pipette.dispense(1, destination_wells[clip_num])
-                pipette.touch_tip(destination_wells[clip_num])
-                pipette.mix(LINKER_MIX_SETTINGS[0], LINKER_MIX_SETTINGS[1],
-                            destination_wells[clip_num])
+                for dest, vol in zip(dests, step['volumes']):
+                    pipette.dispense(vol, dest.top())
+                    pipette.touch_tip(dest)
                 pipette.drop_tip()
 
-            suffix_wells = [suffix_well.bottom() for suffix_well in
-                            source_plates[suffixes_plates[clip_num]].wells(
-                suffixes_wells[clip_num])]
-            for suffix_well in suffix_wells:
-                pipette.pick_up_tip()
-                pipette.move_to(suffix_well)
-                protocol.max_speeds['Z'] = 10
-                pipette.aspirate(1, suffix_well)
-                pipette.move_to(destination_wells[clip_num].top())
-                protocol.max_speeds['Z'] = None
-                pipette.dispense(1, destination_wells[clip_num])
-                pipette.touch_tip(destination_wells[clip_num])
-                pipette.mix(LINKER_MIX_SETTINGS[0], LINKER_MIX_SETTINGS[1],
-                            destination_wells[clip_num])
-                pipette.drop_tip()
-
-            part_wells = [part_well.bottom() for part_well in
-                          source_plates[parts_plates[clip_num]].wells(
-                                 parts_wells[clip_num])]
-            for part_well in part_wells:
-                pipette.pick_up_tip()
-                pipette.move_to(part_well)
-                protocol.max_speeds['Z'] = 10
-                pipette.aspirate(parts_vols[clip_num], part_well)
-                pipette.move_to(destination_wells[clip_num].top())
-                protocol.max_speeds['Z'] = None
-                pipette.dispense(parts_vols[clip_num],
-                                 destination_wells[clip_num])
-                pipette.touch_tip(destination_wells[clip_num])
-                pipette.mix(PART_MIX_SETTINGS[0], PART_MIX_SETTINGS[1],
-                            destination_wells[clip_num])
-                pipette.drop_tip()
-
-    clip(**clips_dict, p10_mount=p10_mount, p10_type=p10_type, well_plate_type=well_plate_type, tube_rack_type=tube_rack_type)
+    clip(**clips_dict, transfer_plan=transfer_plan, p10_mount=p10_mount, p10_type=p10_type, well_plate_type=well_plate_type, tube_rack_type=tube_rack_type)
@@ -26,8 +26,25 @@ def run(protocol: protocol_api.ProtocolContext):
             wells) if wells.index(well) == i]
         return transformation_wells
 
+    def column_top_wells(wells):
+        """Returns the row A well of each column used by wells, in order.
+        A multi-channel p10 addressing a row A well serves the whole column.
+
+        Args:
+        wells (list of str): well names, e.g. ['A1', 'B1', 'A2'].
+
+        """
+        top_wells = []
+        for well in wells:
+            top_well = 'A' + well[1:]
+            if top_well not in top_wells:
+                top_wells.append(top_well)
+        return top_wells
+
     def tiprack_slots(spotting_tuples, max_spot_vol=5):
         """Calculates p10 and p300 tiprack slots required.
+        A multi-channel p10 picks up a column of 8 tips for each column of
+        reactions.
 
         Args:
         spotting_tuples (list): Sets of spotting reactions are given 
@@ -37,16 +54,22 @@ def run(protocol: protocol_api.ProtocolContext):
 
         """
         # Reactions' number
-        transformation_reactions = len(
-            generate_transformation_wells(spotting_tuples))
+        transformation_wells = generate_transformation_wells(spotting_tuples)
+        transformation_reactions = len(transformation_wells)
         spotting_reactions = 0
         for spotting_tuple in spotting_tuples:
-            spots = np.array(spotting_tuple[2])/max_spot_vol
-            np.ceil(spots)
+            spots = np.ceil(np.array(spotting_tuple[2])/max_spot_vol)
             spotting_reactions = spotting_reactions + int(np.sum(spots))
 
         # p10 tiprack slots
-        p10_tips = transformation_reactions + spotting_reactions
+        if P10_MULTI:
+            p10_pickups = len(column_top_wells(transformation_wells))
+            for spotting_tuple in spotting_tuples:
+                p10_pickups += len(column_top_wells(spotting_tuple[0])) * \
+                    int(np.ceil(max(spotting_tuple[2])/max_spot_vol))
+            p10_tips = 8 * p10_pickups
+        else:
+            p10_tips = transformation_reactions + spotting_reactions
         p10_tiprack_slots = p10_tips // 96 + 1 if p10_tips % 96 > 0 \
             else p10_tips / 96
 
@@ -70,6 +93,9 @@ def run(protocol: protocol_api.ProtocolContext):
         MIX_SETTINGS = (4, 5)  # Mix after setting during final assembly transfers.
         INCUBATION_TIME = 20  # Cells and final assembly incubation time.
 
+        if P10_MULTI:
+            transformation_wells = column_top_wells(transformation_wells)
+
         # Set temperature deck to 4 °C and load competent cells
         tempdeck.set_temperature(TEMP)
         protocol.pause()
@@ -216,9 +242,13 @@ def run(protocol: protocol_api.ProtocolContext):
                 protocol.max_speeds[key] = DEFAULT_HEAD_SPEED[key]
             p10_pipette.move_to(target.top(SAFE_HEIGHT))
 
-            # Dispose of dead volume and tip
-            p10_pipette.dispense(dead_vol, spotting_waste)
-            p10_pipette.blow_out()
+            # Dispose of dead volume and tip, the 8 channels of a multi
+            # p10 do not fit the spotting waste tube
+            if P10_MULTI:
+                p10_pipette.blow_out(protocol.fixed_trash['A1'])
+            else:
+                p10_pipette.dispense(dead_vol, spotting_waste)
+                p10_pipette.blow_out()
             p10_pipette.drop_tip()
 
         def spot_tuple(spotting_tuple):
@@ -233,6 +263,17 @@ def run(protocol: protocol_api.ProtocolContext):
             source_wells = spotting_tuple[0]
             target_wells = spotting_tuple[1]
             spot_vols = list(spotting_tuple[2])
+            if P10_MULTI:
+                # Spotting tuples hold one column each; the column layout
+                # (required by dnabot for a multi p10) gives every well of a
+                # column the same spot volume
+                if len(set(spot_vols)) > 1:
+                    raise ValueError(
+                        'A multi-channel p10 spots whole columns, the wells '
+                        'of a column need the same spotting volume')
+                source_wells = column_top_wells(source_wells)
+                target_wells = column_top_wells(target_wells)
+                spot_vols = [max(spot_vols)] * len(source_wells)
             while max(spot_vols) > 0:
                 for index, spot_vol in enumerate(spot_vols):
                     if spot_vol == 0:
@@ -276,6 +317,7 @@ def run(protocol: protocol_api.ProtocolContext):
     P300_TIPRACK_TYPE = 'opentrons_96_tiprack_300ul'
     # P10_MOUNT = 'right'
     P10_MOUNT = p10_mount
+    P10_MULTI = 'multi' in p10_type
     # P300_MOUNT = 'left'
     P300_MOUNT = p300_mount
     # ASSEMBLY_PLATE_TYPE = 'biorad_96_wellplate_200ul_pcr'
@@ -324,9 +366,11 @@ def run(protocol: protocol_api.ProtocolContext):
     spotting_waste = tube_rack.wells_by_name()[SPOTTING_WASTE_WELL]
     agar_plate = protocol.load_labware(AGAR_PLATE_TYPE, AGAR_PLATE_SLOT)
 
-    # Register agar_plate for calibration
+    # Register agar_plate for calibration, row A addresses a whole column
+    # with a multi p10
     p10_pipette.transfer(1, agar_plate.wells_by_name()[
-        'A1'], agar_plate.wells_by_name()['H12'], trash=False)
+        'A1'], agar_plate.wells_by_name()['A12' if P10_MULTI else 'H12'],
+        trash=False)
 
     # Run functions
     transformation_setup(generate_transformation_wells(spotting_tuples))
@@ -3,6 +3,7 @@ import unittest
 from unittest.mock import patch
 import sys
 import os
+import tempfile
 TEST_DIR = "/home/runner/work/DJANGO-Assembly-Methods/DJANGO-Assembly-Methods/basic_assembly/tests/"
 sys.path.append("/home/runner/work/DJANGO-Assembly-Methods/DJANGO-Assembly-Methods/basic_assembly/dna_bot/")
 import dnabot_app
@@ -68,6 +69,40 @@ class DNABotAppTestCase(unittest.TestCase):
             self.clips_df_1, self.sources_dict, self.parts_df_2)
         self.assertDictEqual(clips, self.clips_dict)
 
+    def test_generate_clip_transfer_plan(self):
+        plan = dnabot_app.generate_clip_transfer_plan(self.clips_dict)
+        # water then prefix, suffix and part of each clip, one tip each
+        self.assertEqual(len(plan), 5 + 3 * 5)
+        self.assertDictEqual(plan[0], {
+            'action': 'transfer', 'plate': 'tube_rack', 'well': 'A2',
+            'dests': ['A1'], 'volumes': [7.0], 'mix': 0})
+        self.assertDictEqual(plan[5], {
+            'action': 'transfer', 'plate': '2', 'well': 'A10',
+            'dests': ['A1'], 'volumes': [1], 'mix': 1})
+        clips_dict = dict(self.clips_dict, prefixes_wells=['A10'] * 5,
+                          parts_wells=['B3'] * 5, parts_vols=[2] * 5)
+        plan = dnabot_app.generate_clip_transfer_plan(
+            clips_dict, 'per_source')
+        part_steps = [step for step in plan if step['well'] == 'B3']
+        # 4 x 2 uL fit one aspiration with the disposal volume
+        self.assertListEqual([step['dests'] for step in part_steps],
+                             [['A1', 'B1', 'C1', 'D1'], ['E1']])
+        self.assertEqual(part_steps[0]['action'], 'distribute')
+        # 1 uL linkers are not dispensed above the liquid
+        linker_steps = [step for step in plan if step['well'] == 'A10']
+        self.assertEqual(len(linker_steps), 5)
+        self.assertSetEqual({step['action'] for step in linker_steps},
+                            {'transfer'})
+        # 7 uL of water per clip, so one aspiration per clip
+        water_steps = [step for step in plan if step['well'] == 'A2']
+        self.assertEqual(len(water_steps), 5)
+        self.assertDictEqual(plan[-1], {
+            'action': 'mix', 'plate': '', 'well': '',
+            'dests': ['A1', 'B1', 'C1', 'D1', 'E1'], 'volumes': [],
+            'mix': 1})
+        with self.assertRaises(ValueError):
+            dnabot_app.generate_clip_transfer_plan(clips_dict, 'never')
+
     def test_generate_final_assembly_dict(self):
         final_assembly_dict, clips_df, parts_df = \
             dnabot_app.generate_final_assembly_dict(
@@ -91,6 +126,104 @@ class DNABotAppTestCase(unittest.TestCase):
             self.constructs_lists, SPOTTING_VOLS_DICT)
         self.assertListEqual(spotting_tuples, self.spotting_tuples)
 
+    def test_generate_construct_wells(self):
+        three_part = self.constructs_lists[0].iloc[:3]
+        constructs = [self.constructs_lists[0], three_part,
+                      self.constructs_lists[0]]
+        self.assertListEqual(
+            dnabot_app.generate_construct_wells(constructs),
+            ['A1', 'B1', 'C1'])
+        construct_wells = dnabot_app.generate_construct_wells(
+            constructs, 'column')
+        self.assertListEqual(construct_wells, ['A2', 'A1', 'B2'])
+        spotting_tuples = dnabot_app.generate_spotting_tuples(
+            constructs, dnabot_app.SPOTTING_VOLS_DICT, construct_wells)
+        self.assertListEqual(spotting_tuples, [
+            (('A1',), ('A1',), (5,)), (('A2', 'B2'), ('A2', 'B2'), (5, 5))])
+        with self.assertRaises(ValueError):
+            dnabot_app.generate_construct_wells(constructs, 'diagonal')
+        with self.assertRaises(ValueError):
+            # 88 constructs, but padding columns needs 13 columns
+            dnabot_app.generate_construct_wells(
+                [self.constructs_lists[0].iloc[:2]] * 9
+                + [self.constructs_lists[0].iloc[:3]] * 9
+                + [self.constructs_lists[0]] * 70, 'column')
+
+    def test_generate_clips_df_column_layout(self):
+        constructs = [self.constructs_lists[0].iloc[::-1]]
+        clips = dnabot_app.generate_clips_df(constructs, 'column')
+        self.assertListEqual(clips['prefixes'].to_list(),
+                             ['L1-P', 'L2-P', 'L3-P', 'LMP-P', 'LMS-P'])
+        self.assertListEqual(clips['clip_well'].to_list(),
+                             [('A1',), ('B1',), ('C1',), ('D1',), ('E1',)])
+
+    def test_generate_ot2_script(self):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as output_dir:
+            script_path = dnabot_app.generate_ot2_script(
+                output_dir, dnabot_app.CLIP_FNAME,
+                os.path.join(dnabot_app.TEMPLATE_DIR_PATH,
+                             dnabot_app.CLIP_TEMP_FNAME),
+                clips_dict=self.clips_dict,
+                transfer_plan=dnabot_app.generate_clip_transfer_plan(
+                    self.clips_dict),
+                p10_mount='right')
+            self.assertEqual(os.getcwd(), cwd)
+            self.assertEqual(
+                script_path, os.path.realpath(
+                    os.path.join(output_dir, dnabot_app.CLIP_FNAME)))
+            with open(script_path) as f:
+                script = f.read()
+            self.assertIn("p10_mount='right'", script)
+            compile(script, script_path, 'exec')
+
+    def test_dnabot_from_tables(self):
+        construct_path = os.path.join(
+            TEST_DIR, 'testfiles/basic_constructs.csv')
+        part_path = os.path.join(
+            TEST_DIR, 'testfiles/basic_parts_linkers.csv')
+        construct_table = pd.read_csv(construct_path, dtype=str,
+                                      keep_default_na=False)
+        part_table = pd.read_csv(part_path, dtype=str, keep_default_na=False)
+        with tempfile.TemporaryDirectory() as csv_dir, \
+                tempfile.TemporaryDirectory() as table_dir:
+            csv_paths = dnabot_app.dnabot(
+                csv_dir, 'A11', 'A1', [construct_path], [part_path])
+            table_paths = dnabot_app.dnabot_from_tables(
+                table_dir, 'A11', 'A1', construct_table,
+                {'basic_parts_linkers': part_table})
+            self.assertEqual(len(csv_paths), len(table_paths))
+            for csv_path, table_path in zip(csv_paths, table_paths):
+                if csv_path.endswith('.py'):
+                    with open(csv_path) as f, open(table_path) as g:
+                        self.assertEqual(f.read(), g.read())
+
+    def test_dnabot_multi_p10_layout(self):
+        construct_path = os.path.join(
+            TEST_DIR, 'testfiles/basic_constructs.csv')
+        part_path = os.path.join(
+            TEST_DIR, 'testfiles/basic_parts_linkers.csv')
+        with tempfile.TemporaryDirectory() as output_dir:
+            output_paths = dnabot_app.dnabot(
+                output_dir, 'A11', 'A1', [construct_path], [part_path],
+                p10_type='p10_multi')
+            self.assertEqual(output_paths,
+                             [os.path.join(output_dir, 'BASIC_error.txt')])
+            with open(output_paths[0]) as f:
+                self.assertIn("layout='column'", f.read())
+        with tempfile.TemporaryDirectory() as output_dir:
+            dnabot_app.dnabot(output_dir, 'A11', 'A1', [construct_path],
+                              [part_path], p10_type='p10_multi',
+                              layout='column')
+            # only the transformation script loads the multi-channel p10
+            for fname, p10_type in [
+                    (dnabot_app.CLIP_FNAME, 'p10_single'),
+                    (dnabot_app.F_ASSEMBLY_FNAME, 'p10_single'),
+                    (dnabot_app.TRANS_SPOT_FNAME, 'p10_multi')]:
+                with open(os.path.join(output_dir, fname)) as f:
+                    self.assertIn("p10_type = '{}'".format(p10_type),
+                                  f.read())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -6,8 +6,6 @@ from .serializers import BasicSerializer
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from .dna_bot.dnabot_app import dnabot
-
 from .models import BasicModel
 
 import os
@@ -20,6 +18,9 @@ class BasicView(viewsets.ModelViewSet):
     serializer_class = BasicSerializer
 
     def create(self, request, *args, **kwargs):
+        # Imported on first use, see assembly_methods.preload
+        from .dna_bot.dnabot_app import dnabot
+
         input_data = request.data
         new_input = BasicModel.objects.create(
             ethanol_stage2=input_data["ethanol_stage2"],
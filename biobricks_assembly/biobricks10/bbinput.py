@@ -1,9 +1,9 @@
 import os
 import csv
-import json
 import math
 import pandas as pd
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Union
+from assembly_methods import metrics, ot2_templates, run_estimator, tables
 
 # labware dictionary - filled in by front end
 labware_dict = {'p10_mount': 'left', 'p300_mount': 'right',
@@ -14,6 +14,9 @@ labware_dict = {'p10_mount': 'left', 'p300_mount': 'right',
                 'transformation_plate': 'corning_96_wellplate_360ul_flat'}
 
 TEMPLATE_DIR_NAME = 'template'
+# Resolved from this file so callers need not run from a particular cwd
+TEMPLATE_DIR_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), TEMPLATE_DIR_NAME)
 OUTPUT_DIR_NAME = 'output'
 
 # Integer constants
@@ -31,7 +34,21 @@ DNA_TRANS_VOL = 1
 CELL_TRANS_VOL = 50
 COMPETENT_WELL_MAX_VOL = 200
 
+# Construct columns naming the parts, in the order used by part occurences
+CONSTRUCT_ROLES = ['upstream', 'downstream', 'plasmid']
 
+# Rows and columns of the labware wells are allocated in
+PLATE_96 = (8, 12)
+TUBE_RACK_24 = (4, 6)
+
+# Deck slots of the source plates, one per part csv. Only 2 and 5 are free
+# with every option of the assembly template: the water_trough option uses
+# slot 6 and use_p300 slot 9, so the template refuses those options when a
+# third or fourth plate is loaded
+SOURCE_PLATE_SLOTS = ['2', '5', '6', '9']
+
+
+@metrics.instrument_generator('bio_bricks')
 def biobricks(
     output_folder: str, construct_path: List[str],
     part_path: List[str], thermocycle: bool = True,
@@ -50,7 +67,8 @@ def biobricks(
             for files generated
             construct_path: a one element list with the full path of the
             construct csv
-            part_path: a list of full paths to part csv(s) (one or more)
+            part_path: a list of full paths to part csv(s) (one or more),
+            each csv is one source plate (see SOURCE_PLATE_SLOTS)
             thermocyle: True or False, indicating whether the user has
             and would like to use the Opentrons Thermocycler
             see labware_dict for rest of arguments
@@ -59,8 +77,12 @@ def biobricks(
             If there is an exception, the list of output paths will contain
             only one element = the error path
             Otherwise the list of output paths will contain:
-            OT-2 script paths (assembly, transformation),
-            metainformation
+            OT-2 script paths (assembly, transformation) of each run,
+            metainformation, run estimate
+            Constructs that do not fit on one set of plates are split into
+            runs (see split_constructs), the scripts of each run are saved
+            in a run_<n> subfolder of output_folder and the metainformation
+            of all runs is saved in one csv with a run column
     '''
 
     full_output_path = output_folder
@@ -69,84 +91,118 @@ def biobricks(
     if type(construct_path) == list:
         construct_path = construct_path[0]
 
-    generator_dir = os.getcwd()
-    '''
-        Ensure that template directories are correct.
-        Important for running this script through the front end.
-    '''
-    if os.path.split(generator_dir)[1] == 'biobricks10':
-        template_dir_path = os.path.join(generator_dir, TEMPLATE_DIR_NAME)
-    elif os.path.split(generator_dir)[1] == 'biobricks_assembly':
-        template_dir_path = os.path.join(
-            generator_dir, 'biobricks10', TEMPLATE_DIR_NAME)
-    else:
-        template_dir_path = os.path.join(
-            generator_dir, 'biobricks_assembly/biobricks10', TEMPLATE_DIR_NAME)
-    assembly_template_path = os.path.join(template_dir_path,
+    assembly_template_path = os.path.join(TEMPLATE_DIR_PATH,
                                           'bbassembly10template.py')
-    transformation_template_path = os.path.join(template_dir_path,
+    transformation_template_path = os.path.join(TEMPLATE_DIR_PATH,
                                                 'bbtransformationtemplate.py')
     try:
-        # Creates constructs, parts, reagents, and digest dataframes
         constructs, dest_well_list = get_constructs(construct_path)
-        parts = get_parts(part_path, constructs)
-        reagents, reagents_well_list, mm_df = get_reagents_wells(
-            constructs, parts)
-        digest_loc, parts_df = get_digests(
-            constructs, parts, reagents)
-
-        # Creates assembly dictionaries to be used in assembly protocol
-        source_to_digest, reagent_to_digest, \
-            digest_to_construct, reagent_to_construct, \
-            reagents_dict = create_assembly_dicts(constructs, parts,
-                                                  digest_loc, reagents)
-
-        # Creates and saves assembly protocol
-        assembly_path = create_assembly_protocol(
-            assembly_template_path, full_output_path, source_to_digest,
-            reagent_to_digest, digest_to_construct,
-            reagent_to_construct, reagents_dict, p10_mount=p10_mount,
-            p10_type=p10_type, well_plate_type=well_plate,
-            tube_rack_type=tube_rack, thermocycle=thermocycle)
+        runs = split_constructs(constructs, controls_per_cons=False)
         output_paths = []
-        output_paths.append(assembly_path)
-
-        # Creates transformation dictionaries to be used in transformation
-        # protocol
-        competent_source_to_dest, control_source_to_dest, \
-            assembly_source_to_dest, water_source_to_dest, transform_df \
-            = create_tranformation_dicts(constructs, water_well='A1',
-                                         controls_per_cons=False)
-
-        # Creates and saves transformation protocol
-        transform_path = create_transformation_protocol(
-            transformation_template_path, full_output_path,
-            competent_source_to_dest,
-            control_source_to_dest, assembly_source_to_dest,
-            water_source_to_dest,
-            p10_mount=p10_mount, p300_mount=p300_mount, p10_type=p10_type,
-            p300_type=p300_type, well_plate_type=well_plate,
-            transformation_plate_type=transformation_plate,
-            tube_rack_type=tube_rack, soc_plate_type=soc_plate)
-        output_paths.append(transform_path)
+        meta_tables = {}
+        estimates = []
+        for run_index, run in enumerate(runs):
+            # Each run has its own digest, construct and transformation
+            # plates, so parts, reagents and wells are planned per run
+            if len(runs) > 1:
+                run_output_path = os.path.join(
+                    full_output_path, 'run_{}'.format(run_index + 1))
+                os.makedirs(run_output_path, exist_ok=True)
+            else:
+                run_output_path = full_output_path
+            run_constructs = constructs.loc[run].reset_index(drop=True)
+
+            # Creates parts, reagents, and digest dataframes
+            parts = get_parts(part_path, run_constructs)
+            reagents, reagents_well_list, mm_df = get_reagents_wells(
+                run_constructs, parts)
+            digest_loc, parts_df = get_digests(
+                run_constructs, parts, reagents)
+
+            # Creates assembly dictionaries to be used in assembly protocol
+            source_to_digest, reagent_to_digest, \
+                digest_to_construct, reagent_to_construct, \
+                reagents_dict = create_assembly_dicts(
+                    run_constructs, parts, digest_loc, reagents)
+
+            # Creates and saves assembly protocol
+            assembly_path = create_assembly_protocol(
+                assembly_template_path, run_output_path, source_to_digest,
+                reagent_to_digest, digest_to_construct,
+                reagent_to_construct, reagents_dict, p10_mount=p10_mount,
+                p10_type=p10_type, well_plate_type=well_plate,
+                tube_rack_type=tube_rack, thermocycle=thermocycle)
+            output_paths.append(assembly_path)
+
+            # Creates transformation dictionaries to be used in
+            # transformation protocol
+            competent_source_to_dest, control_source_to_dest, \
+                assembly_source_to_dest, water_source_to_dest, transform_df \
+                = create_tranformation_dicts(run_constructs, water_well='A1',
+                                             controls_per_cons=False)
+
+            # Creates and saves transformation protocol
+            transform_path = create_transformation_protocol(
+                transformation_template_path, run_output_path,
+                competent_source_to_dest,
+                control_source_to_dest, assembly_source_to_dest,
+                water_source_to_dest,
+                p10_mount=p10_mount, p300_mount=p300_mount,
+                p10_type=p10_type, p300_type=p300_type,
+                well_plate_type=well_plate,
+                transformation_plate_type=transformation_plate,
+                tube_rack_type=tube_rack, soc_plate_type=soc_plate)
+            output_paths.append(transform_path)
+
+            run_tables = {'PARTS_INFO': parts_df, 'REAGENTS': reagents,
+                          'MASTER_MIX': mm_df, 'DIGESTS': digest_loc,
+                          'CONSTRUCTS': run_constructs,
+                          'TRANSFORMS': transform_df}
+            for key, value in run_tables.items():
+                if len(runs) > 1:
+                    value = value.copy()
+                    value.insert(0, 'run', run_index + 1)
+                meta_tables.setdefault(key, []).append(value)
+
+            # Estimates run time and consumables of the assembly and
+            # transformation protocols
+            run_estimates = [
+                run_estimator.estimate_biobricks_assembly(
+                    source_to_digest, digest_to_construct, reagent_to_digest,
+                    reagent_to_construct, reagents_dict, thermocycle),
+                run_estimator.estimate_biobricks_transformation(
+                    competent_source_to_dest, control_source_to_dest,
+                    assembly_source_to_dest, water_source_to_dest)]
+            for estimate in run_estimates:
+                if len(runs) > 1:
+                    estimate['script'] += ' run_{}'.format(run_index + 1)
+                estimates.append(estimate)
+
         labwareDf = pd.DataFrame(
             data={'name': list(labware_dict.keys()),
                   'definition': list(labware_dict.values())})
+        meta_dfs = {key: pd.concat(value, ignore_index=True)
+                    for key, value in meta_tables.items()}
 
-        # Saves dataframes in metainformation csv
+        # Saves dataframes of all runs in one metainformation csv
         dfs_to_csv(
             os.path.join(full_output_path, 'bb_metainformation.csv'),
-            index=False, PARTS_INFO=parts_df, REAGENTS=reagents,
-            MASTER_MIX=mm_df, DIGESTS=digest_loc, CONSTRUCTS=constructs,
-            LABWARE=labwareDf, TRANSFORMS=transform_df)
+            index=False, PARTS_INFO=meta_dfs['PARTS_INFO'],
+            REAGENTS=meta_dfs['REAGENTS'], MASTER_MIX=meta_dfs['MASTER_MIX'],
+            DIGESTS=meta_dfs['DIGESTS'], CONSTRUCTS=meta_dfs['CONSTRUCTS'],
+            LABWARE=labwareDf, TRANSFORMS=meta_dfs['TRANSFORMS'])
         output_paths.append(
             os.path.join(full_output_path, 'bb_metainformation.csv'))
 
+        # Sums the estimates of all runs
+        output_paths.append(run_estimator.save_estimate(
+            run_estimator.summarise(estimates), full_output_path))
+
     except Exception as e:
         # Handles error and writes to file
         output_paths = []
         error_path = os.path.join(full_output_path, 'BioBricks_error.txt')
-        with open(error_path) as f:
+        with open(error_path, 'w') as f:
             f.write(
                 "Failed to generate BioBricks scripts: {}\n".format(str(e)))
         output_paths.append(error_path)
@@ -154,30 +210,48 @@ def biobricks(
         return output_paths
 
 
+def biobricks_from_tables(
+    output_folder: str, construct_table: pd.DataFrame,
+    part_tables: Dict[str, pd.DataFrame], **kwargs
+) -> List[str]:
+    '''
+        Creates scripts and metainformation from the construct and part
+        tables of the SBOL parser (see ParserSBOL.generate_tables), without
+        reading csvs
+        Args:
+            construct_table: table of constructs, laid out as the construct
+            csv
+            part_tables: part tables by source plate name, laid out as the
+            part csvs, each table is one source plate
+            see biobricks for rest of arguments
+        Returns:
+            List of output paths, see biobricks
+    '''
+    return biobricks(output_folder, construct_table, part_tables, **kwargs)
+
+
 def get_constructs(
-    path: str
+    path: tables.Source
 ) -> Tuple[pd.DataFrame, List[str]]:
     '''
         Returns construct dataframe from constructs csv
-        Args: path = path of construct csv
+        Args: path = path of construct csv, or construct table
         Returns:
             merged_constructs_list: dataframe of constructs
             dest_well_list: list of wells in construct plate that are used
     '''
     constructs_list = []
     dest_well_list = []
-    with open(path, 'r') as csvfile:
-        csv_reader = csv.reader(csvfile)
-        for index, construct in enumerate(csv_reader):
-            if index != 0:  # Checks if row is header.
-                construct = list(filter(None, construct))
-                if not construct[2:]:
-                    break
-                else:
-                    construct_dict = process_construct(construct)
-                    construct_df = pd.DataFrame.from_dict(construct_dict)
-                    constructs_list.append(construct_df)
-                    dest_well_list.append(construct_dict['well'][0])
+    for index, construct in enumerate(tables.read_rows(path)):
+        if index != 0:  # Checks if row is header.
+            construct = list(filter(None, construct))
+            if not construct[2:]:
+                break
+            else:
+                construct_dict = process_construct(construct)
+                construct_df = pd.DataFrame.from_dict(construct_dict)
+                constructs_list.append(construct_df)
+                dest_well_list.append(construct_dict['well'][0])
     merged_constructs_list = pd.concat(constructs_list, ignore_index=True)
     return merged_constructs_list, dest_well_list
 
@@ -199,55 +273,125 @@ def process_construct(
     return construct_dict
 
 
+def count_run_wells(
+    constructs: pd.DataFrame,
+    controls_per_cons: bool = False
+) -> Dict[str, int]:
+    '''
+        Counts the wells a run of constructs needs on each of its plates.
+        A part used as a plasmid is only digested as a plasmid, otherwise
+        it is digested once per role (see process_part).
+        Args:
+            constructs: dataframe of the constructs in the run
+            controls_per_cons: see create_tranformation_dicts
+        Returns: dictionary with key = plate name, value = number of wells
+        needed on the digest, construct and transformation plates
+    '''
+    no_digests = 0
+    for constructs_in in index_construct_parts(constructs).values():
+        if constructs_in[2]:
+            no_digests += 1
+        else:
+            no_digests += bool(constructs_in[0]) + bool(constructs_in[1])
+    no_transforms = len(constructs.index)*4
+    if controls_per_cons:
+        no_controls = len(constructs.index)*3
+    else:
+        no_controls = 3
+    no_cells = max(1, math.ceil(no_transforms/3)) + \
+        max(1, math.ceil(no_controls/3))
+    return {'digest plate': no_digests,
+            'construct plate': len(constructs.index) + no_cells,
+            'transformation plate': no_transforms + no_controls}
+
+
+def split_constructs(
+    constructs: pd.DataFrame,
+    controls_per_cons: bool = False
+) -> List[List[int]]:
+    '''
+        Splits the constructs into runs that each fit on one digest plate,
+        one construct plate and one transformation plate. Constructs are
+        added to a run in order until a plate would overflow or the
+        construct well is already used in the run.
+        Args:
+            constructs: dataframe of constructs
+            controls_per_cons: see create_tranformation_dicts
+        Returns: list of runs, each a list of construct indices
+    '''
+    plate_wells = PLATE_96[0]*PLATE_96[1]
+    runs = []
+    for index in constructs.index:
+        if runs:
+            run_constructs = constructs.loc[runs[-1] + [index]]
+            wells_needed = count_run_wells(run_constructs, controls_per_cons)
+            if run_constructs['well'].is_unique and all(
+                    needed <= plate_wells for needed in wells_needed.values()):
+                runs[-1].append(index)
+                continue
+        runs.append([index])
+    return runs
+
+
 def get_parts(
-    paths: List[str],
+    paths: Union[List[str], Dict[str, pd.DataFrame]],
     constructs_list: pd.DataFrame
 ) -> pd.DataFrame:
     '''
         Returns a dataframe of parts from part csv file.
         Uses constructs_list to record the number of times the part is used
         in the constructs and the roles it plays.
+        Each part csv is one source plate, loaded in the deck slots of
+        SOURCE_PLATE_SLOTS in order.
         Args:
-            paths: list of paths to part csvs
+            paths: list of paths to part csvs, or dictionary of part
+            tables
             constructs_list: dataframe of constructs
         Returns:
             merged_parts_list: dataframe of parts
+        Raises:
+            ValueError if there are more part csvs than source plate slots
     '''
 
-    parts_list = []
-    source_plate_pos = ['2', '5']
-    if len(paths) > 2:
-        paths = paths[0:2]
-    for index, path in enumerate(paths):
-        plate = source_plate_pos[index]
-        with open(path, 'r') as csvfile:
-            csv_reader = csv.reader(csvfile)
-            for index, part in enumerate(csv_reader):
-                if index != 0:
-                    part = list(filter(None, part))
-                    parts_list.append(
-                        process_part(part, constructs_list, plate))
-    merged_parts_list = pd.concat(parts_list, ignore_index=True)
+    if len(paths) > len(SOURCE_PLATE_SLOTS):
+        raise ValueError(
+            'Too many part csvs ({0}), at most {1} source plates fit on '
+            'the deck'.format(len(paths), len(SOURCE_PLATE_SLOTS)))
+    parts_dict = {}
+    part_index = index_construct_parts(constructs_list)
+    for index, (_, path) in enumerate(tables.named_sources(paths)):
+        plate = SOURCE_PLATE_SLOTS[index]
+        for index, part in enumerate(tables.read_rows(path)):
+            if index != 0:
+                part = list(filter(None, part))
+                part_dict = process_part(part, constructs_list, plate,
+                                         part_index=part_index)
+                for key, value in part_dict.items():
+                    parts_dict.setdefault(key, []).extend(value)
+    merged_parts_list = pd.DataFrame(parts_dict)
     return merged_parts_list
 
 
 def process_part(
     part: List,
     constructs_list: pd.DataFrame,
-    plate: str
+    plate: str,
+    part_index: Dict[str, List[List[int]]] = None
 ) -> Dict[str, List]:
     '''
-        Returns a part dataframe with detailed information.
+        Returns a part dictionary with detailed information.
         Used in get_parts()
         Args:
             part: row of part csv file
             constructs_list: constructs dataframe
             plate: source plate of part
+            part_index: index of constructs_list from
+            index_construct_parts, built if not given
         Returns:
-            Dataframe of individual part
+            Dictionary of part info, each value a one element list
     '''
     part_dict = {'name': [part[0]], 'well': [part[1]]}
-    occ, cons_in = count_part_occurences(constructs_list, part)
+    occ, cons_in = count_part_occurences(constructs_list, part, part_index)
     part_dict['occurences'] = occ
 
     # part_dict['occurences'][2] = number of time part is actually plasmid
@@ -288,8 +432,7 @@ def process_part(
     part_dict['occurences'] = [part_dict['occurences']]
     part_dict['constructs_in'] = [cons_in]
     part_dict['plate'] = [plate]
-    part_df = pd.DataFrame.from_dict(part_dict)
-    return part_df
+    return part_dict
 
 
 def get_reagents_wells(
@@ -305,9 +448,9 @@ def get_reagents_wells(
             as the reagent well and the volume of the reagent required.
             List of wells used for reagents in reagents tube rack
             Master mix dataframe giving volumes of each reagent
-
+        Raises:
+            PlateFullError if the reagents do not fit in the tube rack
     '''
-    reagents_well_list = []
     ''' mm_upstream = digest master mix for upstream dna digests
         * 1 uL EcoRI-HF
         * 1 uL SpeI
@@ -344,12 +487,12 @@ def get_reagents_wells(
                      no_cons*T4_LIGASE_VOL_10X + 10,
                      no_cons*T4_LIGASE_VOL + 10,
                      ]
+    reagents_well_list = WellAllocator(
+        TUBE_RACK_24, 'reagents tube rack').allocate(len(reagents))
     for i in range(len(reagents)):
         reagents_dict = {}
         reagents_dict['name'] = [reagents[i]]
-        new_well = next_well_reagent(reagents_well_list)
-        reagents_well_list.append(new_well)
-        reagents_dict['well'] = [new_well]
+        reagents_dict['well'] = [reagents_well_list[i]]
         reagents_dict['total_vol'] = [total_volumes[i]]
         reagents_list.append(pd.DataFrame.from_dict(reagents_dict))
 
@@ -394,9 +537,12 @@ def get_digests(
         Returns:
             dataframe of digests
             updated parts dataframe with digest well column
+        Raises:
+            PlateFullError if the digests do not fit in a 96 well plate
     '''
     digests = []
-    dest_wells_used = []
+    digest_wells = iter(WellAllocator(PLATE_96, 'digest plate').allocate(
+        int(parts['digests'].sum())))
     parts_df = parts.copy()
     parts_df['digest_wells'] = pd.Series([] * len(parts_df.index))
     dest_wells_list = []
@@ -408,10 +554,10 @@ def get_digests(
             digest['name'] = [row['name'] + '-' + role]
             digest['role'] = [role]
             digest['part'] = [row['name']]
+            digest['source_plate'] = [row['plate']]
             digest['source_well'] = [row['well']]
-            dest_well = next_well(dest_wells_used)
+            dest_well = next(digest_wells)
             digest['dest_well'] = [dest_well]
-            dest_wells_used.append(dest_well)
             if role == 'upstream':
                 digest_to_construct = row['constructs_in'][0]
             elif role == 'downstream':
@@ -431,6 +577,84 @@ def get_digests(
     return pd.concat(digests, ignore_index=True), parts_df
 
 
+class PlateFullError(ValueError):
+    '''
+        Raised when a labware has fewer empty wells than are needed.
+        Attributes:
+            needed: number of wells that were needed
+            available: number of empty wells that were left
+    '''
+
+    def __init__(self, needed: int, available: int, name: str = 'plate'):
+        self.needed = needed
+        self.available = available
+        super().__init__(
+            'No empty wells: {0} needed in the {1}, {2} left'.format(
+                needed, name, available))
+
+
+class WellAllocator:
+    '''
+        Hands out the wells of one labware in row major order (A1, A2, ...).
+        The well order is computed once and used wells are tracked in a
+        bitset (bit i set = i-th well used), so finding the next empty well
+        does not depend on how many wells are already used.
+        Args:
+            geometry: number of rows and columns, e.g. PLATE_96
+            name: name of the labware, used in errors
+    '''
+
+    def __init__(self, geometry: Tuple[int, int], name: str = 'plate'):
+        rows, columns = geometry
+        self.name = name
+        self.wells = [chr(ord('A') + row) + str(column + 1)
+                      for row in range(rows) for column in range(columns)]
+        self.well_indices = {well: i for i, well in enumerate(self.wells)}
+        self.full = (1 << len(self.wells)) - 1
+        self.used = 0
+
+    def reserve(self, wells: List[str]):
+        '''
+            Marks wells as used, e.g. wells already filled by the user.
+            Names that are not wells of this labware are ignored.
+            Args: wells = well names
+        '''
+        for well in wells:
+            if well in self.well_indices:
+                self.used |= 1 << self.well_indices[well]
+
+    def available(self) -> int:
+        '''
+            Returns: number of empty wells
+        '''
+        return bin(self.full & ~self.used).count('1')
+
+    def next_well(self) -> str:
+        '''
+            Takes the first empty well
+            Returns: the well name
+            Raises: PlateFullError if there are no empty wells
+        '''
+        free = self.full & ~self.used
+        if not free:
+            raise PlateFullError(1, 0, self.name)
+        lowest = free & -free
+        self.used |= lowest
+        return self.wells[lowest.bit_length() - 1]
+
+    def allocate(self, number: int) -> List[str]:
+        '''
+            Takes the first number empty wells, or none if they do not fit
+            Args: number = number of wells needed
+            Returns: list of well names in row major order
+            Raises: PlateFullError if there are fewer empty wells than needed
+        '''
+        available = self.available()
+        if number > available:
+            raise PlateFullError(number, available, self.name)
+        return [self.next_well() for _ in range(number)]
+
+
 def next_well(
     wells_used: List[str]
 ) -> str:
@@ -441,22 +665,12 @@ def next_well(
             List of wells used in 96 well plate
         Returns:
             Next unused well in 96 well plate
+        Raises:
+            PlateFullError if all wells are used
     '''
-    letter = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H']
-    well_avail = None
-    for i in range(96):
-        rowindex = i // 12
-        row = letter[rowindex]
-        col = (i % 12) + 1
-        well = row + str(col)
-        if well in wells_used:
-            continue
-        else:
-            well_avail = well
-            break
-    if not well_avail:
-        raise ValueError('No empty wells')
-    return well_avail
+    allocator = WellAllocator(PLATE_96)
+    allocator.reserve(wells_used)
+    return allocator.next_well()
 
 
 def next_well_reagent(
@@ -469,27 +683,44 @@ def next_well_reagent(
             List of wells used in 24 well plate/tube rack
         Returns:
             Next unused well in 24 well plate/tube rack
+        Raises:
+            PlateFullError if all wells are used
     '''
-    letter = ['A', 'B', 'C', 'D']
-    well_avail = None
-    for i in range(24):
-        rowindex = i // 6
-        row = letter[rowindex]
-        col = (i % 6) + 1
-        well = row + str(col)
-        if well in wells_used:
-            continue
-        else:
-            well_avail = well
-            break
-    if not well_avail:
-        raise ValueError('No empty wells')
-    return well_avail
+    allocator = WellAllocator(TUBE_RACK_24, 'tube rack')
+    allocator.reserve(wells_used)
+    return allocator.next_well()
+
+
+def index_construct_parts(
+    constructs_list: pd.DataFrame
+) -> Dict[str, List[List[int]]]:
+    '''
+        Maps each part named in the constructs to the constructs using it,
+        so the constructs are only read once for all parts.
+        Part names are matched exactly.
+        Args: constructs_list = dataframe of constructs
+        Returns: dictionary with key = part name, value = list of the
+        indices of constructs using the part as upstream part, as
+        downstream part and as plasmid
+    '''
+    part_index = {}
+    for construct_index, *names in zip(
+            constructs_list.index,
+            *[constructs_list[role] for role in CONSTRUCT_ROLES]):
+        for role_index, name in enumerate(names):
+            # a downstream part is not counted again as the plasmid
+            if CONSTRUCT_ROLES[role_index] == 'plasmid' and \
+                    name == names[1]:
+                continue
+            part_index.setdefault(name, [[], [], []])[role_index].append(
+                construct_index)
+    return part_index
 
 
 def count_part_occurences(
     constructs_list: pd.DataFrame,
-    part: List
+    part: List,
+    part_index: Dict[str, List[List[int]]] = None
 ) -> Tuple[List[int], List[List[int]]]:
     '''
         Counts the number of times a part is used in the constructs.
@@ -498,6 +729,8 @@ def count_part_occurences(
         Args:
             constructs_list: dataframe of constructs
             part: row in part csv file as list
+            part_index: index of constructs_list from
+            index_construct_parts, built if not given
         Returns:
             counts: list where 0th element = upstream counts,
             1st element = downstream counts, 2nd element =
@@ -509,24 +742,12 @@ def count_part_occurences(
             constructs_in_plasmid: index of constructs a part appears
             in as the plasmid part
     '''
-    # upstream_counts, downstream_counts, plasmid_counts = 0
-    counts = [0, 0, 0]
-    constructs_in_upstream = []
-    constructs_in_downstream = []
-    constructs_in_plasmid = []
-    # roles = ['upstream', 'downstream', 'plasmid']
-    for index, row in constructs_list.iterrows():
-        if part[0] in row['upstream']:
-            counts[0] += 1
-            constructs_in_upstream.append(index)
-        if part[0] in row['downstream']:
-            counts[1] += 1
-            constructs_in_downstream.append(index)
-        elif part[0] in row['plasmid']:
-            counts[2] += 1
-            constructs_in_plasmid.append(index)
-    return counts, [constructs_in_upstream, constructs_in_downstream,
-                    constructs_in_plasmid]
+    if part_index is None:
+        part_index = index_construct_parts(constructs_list)
+    constructs_in = [list(indices) for indices
+                     in part_index.get(part[0], [[], [], []])]
+    counts = [len(indices) for indices in constructs_in]
+    return counts, constructs_in
 
 
 def create_assembly_dicts(
@@ -542,8 +763,9 @@ def create_assembly_dicts(
             digests: dataframe of digests
             reagents: dataframe of reagents
         Returns:
-            source_to_digest: dictionary with key = source (part) well,
-            key = list of tuples in format (digest well, volume to transfer)
+            source_to_digest: dictionary with key = source plate slot,
+            value = dictionary with key = source (part) well, value = list of
+            tuples in format (digest well, volume to transfer)
             reagent_to_digest: dictionary with key = reagent well,
             key = list of tuples in format (digest well, volume to transfer)
             digest_to_construct: dictionary with key = digest well,
@@ -587,11 +809,13 @@ def create_assembly_dicts(
         part_idx = parts[parts['name'] == digest['part']].index.values
         if len(part_idx) > 0:
             idx = part_idx[0]
-            if str(digest['source_well']) not in source_to_digest.keys():
-                source_to_digest[str(digest['source_well'])] = [
+            plate_to_digest = source_to_digest.setdefault(
+                str(digest['source_plate']), {})
+            if str(digest['source_well']) not in plate_to_digest.keys():
+                plate_to_digest[str(digest['source_well'])] = [
                     (digest['dest_well'], int(parts['part_vol'][idx]))]
             else:
-                source_to_digest[str(digest['source_well'])].append((
+                plate_to_digest[str(digest['source_well'])].append((
                         digest['dest_well'], int(parts['part_vol'][idx])))
 
             reagent_to_digest[water_well].append(
@@ -662,21 +886,33 @@ def create_tranformation_dicts(
             water_source_to_dest: dictionary with key = water
             well, value = tuple of destination well + transfer vol
             transform_df: dataframe of transformation reactions
+        Raises:
+            PlateFullError if the cells or transformations do not fit in
+            their 96 well plates
     '''
 
     competent_source_to_dest = {}
     control_source_to_dest = {}
     assembly_source_to_dest = {}
     water_source_to_dest = {}
-    construct_wells = [construct['well'] for index, construct in
-                       constructs.iterrows()]
-    full_source_wells = construct_wells
-    full_dest_wells = []
-    competent_source_wells = []
-    competent_source_wells.append(next_well(full_source_wells))
-    last_competent = competent_source_wells[0]
+    if controls_per_cons:
+        no_controls = len(constructs.index)*3
+    else:
+        no_controls = 3
+    # each competent or control cell well serves 3 transformations
+    no_transforms = len(constructs.index)*4
+    source_plate = WellAllocator(PLATE_96, 'construct plate')
+    source_plate.reserve(constructs['well'].to_list())
+    competent_source_wells = source_plate.allocate(
+        max(1, math.ceil(no_transforms/3)))
+    control_source_wells = source_plate.allocate(
+        max(1, math.ceil(no_controls/3)))
+    dest_wells = iter(WellAllocator(
+        PLATE_96, 'transformation plate').allocate(
+            no_transforms + no_controls))
+    competent_wells = iter(competent_source_wells)
+    last_competent = next(competent_wells)
     competent_source_to_dest[last_competent] = []
-    full_source_wells.append(last_competent)
     entry_dicts = []
 
     for index, row in constructs.iterrows():
@@ -689,17 +925,14 @@ def create_tranformation_dicts(
             entry_dict['cell_type'] = ['competent']
             entry_dict['construct'] = row['name']
             entry_dict['construct_well'] = [row['well']]
-            dest_well = next_well(full_dest_wells)
-            full_dest_wells.append(dest_well)
+            dest_well = next(dest_wells)
             assembly_source_to_dest[construct_well].append((dest_well,
                                                             DNA_TRANS_VOL))
 
             # max volume of source well = 200 uL, use 150 uL for safety
             # -> only 3 transfers of 50 uL, then get new source well
             if len(competent_source_to_dest[last_competent]) > 2:
-                last_competent = next_well(full_source_wells)
-                competent_source_wells.append(last_competent)
-                full_source_wells.append(last_competent)
+                last_competent = next(competent_wells)
                 competent_source_to_dest[last_competent] = []
             competent_source_to_dest[last_competent].append((dest_well,
                                                              CELL_TRANS_VOL))
@@ -708,18 +941,10 @@ def create_tranformation_dicts(
             entry_dict['reagent_well'] = [None]
             entry_dicts.append(pd.DataFrame.from_dict(entry_dict))
 
-    control_source_wells = []
-    control_source_wells.append(next_well(full_source_wells))
-    last_control = control_source_wells[0]
-    full_source_wells.append(last_control)
+    control_wells = iter(control_source_wells)
+    last_control = next(control_wells)
     control_source_to_dest[last_control] = []
 
-    if controls_per_cons:
-        no_constructs = len(constructs['well'].to_list())
-        no_controls = no_constructs*3
-    else:
-        no_controls = 3
-
     water_source_to_dest[water_well] = []
     for i in range(no_controls):
         entry_dict['name'] = ['control' + '-' + str(i)]
@@ -727,13 +952,10 @@ def create_tranformation_dicts(
         entry_dict['cell_type'] = ['control']
         entry_dict['construct'] = [None]
         entry_dict['construct_well'] = [None]
-        dest_well = next_well(full_dest_wells)
-        full_dest_wells.append(dest_well)
+        dest_well = next(dest_wells)
         water_source_to_dest[water_well].append((dest_well, DNA_TRANS_VOL))
         if len(control_source_to_dest[last_control]) > 2:
-            last_control = next_well(full_source_wells)
-            control_source_wells.append(last_control)
-            full_source_wells.append(last_control)
+            last_control = next(control_wells)
             control_source_to_dest[last_control] = []
         control_source_to_dest[last_control].append((dest_well,
                                                      CELL_TRANS_VOL))
@@ -750,7 +972,7 @@ def create_tranformation_dicts(
 
 def create_assembly_protocol(
     template_path: str, output_path: str,
-    source_to_digest: Dict[str, List[Tuple[str, int]]],
+    source_to_digest: Dict[str, Dict[str, List[Tuple[str, int]]]],
     reagent_to_digest: Dict[str, List[Tuple[str, int]]],
     digest_to_construct: Dict[str, List[Tuple[str, int]]],
     reagent_to_construct: Dict[str, List[Tuple[str, int]]],
@@ -765,22 +987,27 @@ def create_assembly_protocol(
             template_path: absolute path of the Opentrons script template
             output_path: absolute path of the output folder to save protocol in
             source_to_digest: dictionary of form
-            Dict[str, List[Tuple(str, int)]], dictionary key (string) gives
+            Dict[str, Dict[str, List[Tuple(str, int)]]], the outer key gives
+            the deck slot of the source plate, the inner key (string) gives
             source (part) well to transfer from, the 0th element of each tuple
             gives well to transfer to (digest well in this case), with the 1st
             element of the tuple giving the volume to transfer.
-            reagent_to_digest: dictionary of same form as source_to_digest
-            (Dict[str, List[Tuple(str, int)]]), instructing transfers from
+            reagent_to_digest: dictionary of form
+            Dict[str, List[Tuple(str, int)]] (as each source plate of
+            source_to_digest), instructing transfers from
             reagent wells to digest wells
-            digest_to_storage: dictionary of same form as source_to_digest
-            (Dict[str, List[Tuple(str, int)]]), instructing transfers from
+            digest_to_storage: dictionary of form
+            Dict[str, List[Tuple(str, int)]] (as each source plate of
+            source_to_digest), instructing transfers from
             digest wells to storage wells (wells where digest not used in
             construct is stored after assembly)
-            digest_to_construct: dictionary of same form as source_to_digest
-            (Dict[str, List[Tuple(str, int)]]), instructing transfers from
+            digest_to_construct: dictionary of form
+            Dict[str, List[Tuple(str, int)]] (as each source plate of
+            source_to_digest), instructing transfers from
             digest wells to construct wells
-            reagent_to_construct: dictionary of same form as source_to_digest
-            (Dict[str, List[Tuple(str, int)]]), instructing transfers from
+            reagent_to_construct: dictionary of form
+            Dict[str, List[Tuple(str, int)]] (as each source plate of
+            source_to_digest), instructing transfers from
             reagent wells to construct wells
             p10_mount: "left" or "right", the Opentrons pipette mount options
             p10_type: the name of the p10 pipette, e.g. "p10_single"
@@ -793,29 +1020,19 @@ def create_assembly_protocol(
         Returns:
             path of assembly protocol script
     '''
-    with open(template_path) as template_file:
-        template_string = template_file.read()
     assembly_path = os.path.join(output_path, 'bb_assembly_protocol.py')
-    with open(assembly_path, "w+") as protocol_file:
-        # Paste in plate maps at top of file.
-        protocol_file.write('source_to_digest = ' +
-                            json.dumps(source_to_digest) + '\n\n')
-        protocol_file.write('reagent_to_digest = '
-                            + json.dumps(reagent_to_digest) + '\n\n')
-        protocol_file.write('reagents_dict = '
-                            + json.dumps(reagents_dict) + '\n\n')
-        protocol_file.write('digest_to_construct = '
-                            + json.dumps(digest_to_construct) + '\n\n')
-        protocol_file.write('reagent_to_construct = '
-                            + json.dumps(reagent_to_construct) + '\n\n')
-        protocol_file.write('p10_mount = "' + p10_mount + '"\n\n')
-        protocol_file.write('p10_type = "' + p10_type + '"\n\n')
-        protocol_file.write('well_plate_type = "' + well_plate_type + '"\n\n')
-        protocol_file.write('tube_rack_type = "' + tube_rack_type + '"\n\n')
-        protocol_file.write('thermocycle = ' + str(thermocycle) + '\n\n')
-
-        # Paste the rest of the protocol.
-        protocol_file.write(template_string)
+    # Paste in plate maps at top of the cached template body.
+    ot2_templates.write_script(assembly_path, template_path, {
+        'source_to_digest': source_to_digest,
+        'reagent_to_digest': reagent_to_digest,
+        'reagents_dict': reagents_dict,
+        'digest_to_construct': digest_to_construct,
+        'reagent_to_construct': reagent_to_construct,
+        'p10_mount': p10_mount,
+        'p10_type': p10_type,
+        'well_plate_type': well_plate_type,
+        'tube_rack_type': tube_rack_type,
+        'thermocycle': thermocycle})
 
     return assembly_path
 
@@ -863,31 +1080,21 @@ def create_transformation_protocol(
         Returns:
             path of transform protocol script
     '''
-    with open(template_path) as template_file:
-        template_string = template_file.read()
     transform_path = os.path.join(output_path, 'bb_transformation_protocol.py')
-    with open(transform_path, "w+") as protocol_file:
-        # Paste in plate maps at top of file.
-        protocol_file.write('competent_source_to_dest = ' +
-                            json.dumps(competent_source_to_dest) + '\n\n')
-        protocol_file.write('control_source_to_dest = '
-                            + json.dumps(control_source_to_dest) + '\n\n')
-        protocol_file.write('assembly_source_to_dest = '
-                            + json.dumps(assembly_source_to_dest) + '\n\n')
-        protocol_file.write('water_to_dest = '
-                            + json.dumps(water_source_to_dest) + '\n\n')
-        protocol_file.write('p10_mount = "' + p10_mount + '"\n\n')
-        protocol_file.write('p300_mount = "' + p300_mount + '"\n\n')
-        protocol_file.write('p10_type = "' + p10_type + '"\n\n')
-        protocol_file.write('p300_type = "' + p300_type + '"\n\n')
-        protocol_file.write('well_plate_type = "' + well_plate_type + '"\n\n')
-        protocol_file.write('transformation_plate_type = "' +
-                            transformation_plate_type + '"\n\n')
-        protocol_file.write('tube_rack_type = "' + tube_rack_type + '"\n\n')
-        protocol_file.write('soc_plate_type = "' + soc_plate_type + '"\n\n')
-
-        # Paste the rest of the protocol.
-        protocol_file.write(template_string)
+    # Paste in plate maps at top of the cached template body.
+    ot2_templates.write_script(transform_path, template_path, {
+        'competent_source_to_dest': competent_source_to_dest,
+        'control_source_to_dest': control_source_to_dest,
+        'assembly_source_to_dest': assembly_source_to_dest,
+        'water_to_dest': water_source_to_dest,
+        'p10_mount': p10_mount,
+        'p300_mount': p300_mount,
+        'p10_type': p10_type,
+        'p300_type': p300_type,
+        'well_plate_type': well_plate_type,
+        'transformation_plate_type': transformation_plate_type,
+        'tube_rack_type': tube_rack_type,
+        'soc_plate_type': soc_plate_type})
 
     return transform_path
 
@@ -919,4 +1126,4 @@ part_path = [
 biobricks(output_folder, construct_path, part_path, thermocycle=True,
           **labware_dict)
 
-'''
\ No newline at end of file
+'''
\ No newline at end of file
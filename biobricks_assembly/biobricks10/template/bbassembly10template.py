@@ -8,8 +8,9 @@ metadata = {'apiLevel': '2.2',
 
 '''
     Input to bbassemble:
-        source_to_digest = dictionary of keys as source wells, values = list
-        of tuples of destination wells and volumes to be transferred
+        source_to_digest = dictionary of keys as source plate deck slots,
+        values = dictionary of keys as source wells, values = list of tuples
+        of destination wells and volumes to be transferred
         digest_to_storage = dictionary of keys as digest destination wells,
         values = list of tuples of reagent wells and volumes
         digest_to_construct: keys = digest destination wells, values =
@@ -20,11 +21,13 @@ metadata = {'apiLevel': '2.2',
 '''
     Parameters for extra customisation:
     use_p300: if selected, uses a p300 single pipette in the mount that the p10
-    pipette is not using
+    pipette is not using, with its tip rack in slot 9 (at most three part
+    plates)
     transfer_t4_manually: transfer the t4 ligase and t4 ligase buffer manually
     so that you don't any on dead volume
     water_trough: True or False -> makes water in trough and other reagents in
-    extra well_plate (other reagents includes digest storage)
+    extra well_plate (other reagents includes digest storage), with the
+    trough in slot 6 (at most two part plates)
 '''
 
 
@@ -42,19 +45,33 @@ def run(protocol: protocol_api.ProtocolContext):
         PIPETTE_TYPE = p10_type
         PIPETTE_MOUNT = p10_mount
         SOURCE_PLATE_TYPE = well_plate_type
-        SOURCE_PLATE_POSITION = '2'
         DESTINATION_PLATE_TYPE = well_plate_type
         TUBE_RACK_TYPE = tube_rack_type
         TUBE_RACK_POSITION = '4'
+        WATER_TROUGH_POSITION = '6'
+        P300_TIPRACK_POSITION = '9'
 
-        # load labware
-        source_plate = protocol.load_labware(SOURCE_PLATE_TYPE,
-                                             SOURCE_PLATE_POSITION)
+        # The third and fourth source plates take the trough and p300 slots
+        if water_trough and WATER_TROUGH_POSITION in source_to_digest:
+            raise ValueError(
+                'water_trough needs slot {}, which holds a source plate: use '
+                'at most two part plates'.format(WATER_TROUGH_POSITION))
+        if use_p300 and P300_TIPRACK_POSITION in source_to_digest:
+            raise ValueError(
+                'use_p300 needs slot {} for its tip rack, which holds a '
+                'source plate: use at most three part plates'.format(
+                    P300_TIPRACK_POSITION))
+
+        # load labware, one source plate per part csv
+        source_plates = {}
+        for source_plate_position in source_to_digest.keys():
+            source_plates[source_plate_position] = protocol.load_labware(
+                SOURCE_PLATE_TYPE, source_plate_position)
         if water_trough:
             reagents_plate = protocol.load_labware(SOURCE_PLATE_TYPE,
                                                    TUBE_RACK_POSITION)
             trough = protocol.load_labware('usascientific_12_reservoir_22ml',
-                                           '6')
+                                           WATER_TROUGH_POSITION)
             water_well = trough.wells()[0]
         else:
             tube_rack = protocol.load_labware(
@@ -81,7 +98,7 @@ def run(protocol: protocol_api.ProtocolContext):
             else:
                 p300_mount = 'left'
             p300_tiprack = protocol.load_labware(
-                'opentrons_96_tiprack_300ul', '9')
+                'opentrons_96_tiprack_300ul', P300_TIPRACK_POSITION)
             p300_pipette = protocol.load_instrument(
                 'p300_single', p300_mount, tip_racks=[p300_tiprack])
         # transferring reagents
@@ -118,9 +135,11 @@ def run(protocol: protocol_api.ProtocolContext):
         digest_wells = [digest_plate.wells_by_name()[key] for key in
                         digest_to_construct.keys()]
         # Part transfers to digest tubes
-        for source_well in source_to_digest.keys():
-            source_plate_well = source_plate.wells_by_name()[source_well]
-            val = source_to_digest[source_well]
+        source_to_digest_wells = [
+            (source_plates[position].wells_by_name()[source_well], val)
+            for position, plate_to_digest in source_to_digest.items()
+            for source_well, val in plate_to_digest.items()]
+        for source_plate_well, val in source_to_digest_wells:
             digest_wells = []
             # vols = []
             for i in range(len(val)):
@@ -294,4 +313,4 @@ def run(protocol: protocol_api.ProtocolContext):
     bbassemble(source_to_digest, digest_to_construct, reagent_to_digest,
                reagent_to_construct, reagents_dict, p10_mount=p10_mount,
                p10_type=p10_type, well_plate_type=well_plate_type,
-               tube_rack_type=tube_rack_type, thermocycle=thermocycle)
\ No newline at end of file
+               tube_rack_type=tube_rack_type, thermocycle=thermocycle)
\ No newline at end of file
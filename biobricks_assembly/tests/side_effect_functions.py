@@ -75,15 +75,15 @@ def process_cons(construct):
         return bbinput.process_construct(construct)
 
 
-def process_part(part, constructs_df, plate):
+def process_part(part, constructs_df, plate, part_index=None):
     success_mock = 0
     for i in range(len(part_dfs)):
         if part == parts_list[i + 1]:
             success_mock = 1
-            return part_dfs[i]
+            return part_dfs[i].to_dict('list')
             break
     if success_mock == 0:
         print('Unable to mock. Using actual function')
-        return bbinput.process_part(part, constructs_df, plate)
+        return bbinput.process_part(part, constructs_df, plate, part_index)
 
         
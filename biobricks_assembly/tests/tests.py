@@ -5,6 +5,7 @@ from unittest.mock import patch
 import csv
 import sys
 import os
+import tempfile
 TEST_DIR = "/home/runner/work/DJANGO-Assembly-Methods/DJANGO-Assembly-Methods/biobricks_assembly/tests/"
 sys.path.append("/home/runner/work/DJANGO-Assembly-Methods/DJANGO-Assembly-Methods/biobricks_assembly/biobricks10/")
 sys.path.append("C:/Users/gabri/Documents/Uni/iGEM/DJANGO-Assembly-Methods/biobricks_assembly/biobricks10")
@@ -153,43 +154,56 @@ class BioBricksInputTestCase(unittest.TestCase):
 
         self.digest_dfs = [pd.DataFrame(data={'name': ['BBa_B0034-upstream'],
                                               'role': ['upstream'], 'part':
-                                              ['BBa_B0034'], 'source_well':
+                                              ['BBa_B0034'],
+                                              'source_plate': ['2'],
+                                              'source_well':
                                               ['A1'], 'dest_well': ['A1'],
                                               'construct_wells':
                                               [['A1', 'A2']]}),
                            pd.DataFrame(data={'name': ['BBa_C0040-downstream'],
                                               'role': ['downstream'], 'part':
-                                              ['BBa_C0040'], 'source_well':
+                                              ['BBa_C0040'],
+                                              'source_plate': ['2'],
+                                              'source_well':
                                               ['A2'], 'dest_well': ['A2'],
                                               'construct_wells': [['A1']]}),
                            pd.DataFrame(data={'name': ['BBa_pSB1AK3-plasmid'],
                                               'role': ['plasmid'], 'part':
-                                              ['BBa_pSB1AK3'], 'source_well':
+                                              ['BBa_pSB1AK3'],
+                                              'source_plate': ['2'],
+                                              'source_well':
                                               ['A3'], 'dest_well': ['A3'],
                                               'construct_wells':
                                               [['A1', 'A2', 'A3']]}),
                            pd.DataFrame(data={'name': ['BBa_C0012-upstream'],
                                               'role': ['upstream'], 'part':
-                                              ['BBa_C0012'], 'source_well':
+                                              ['BBa_C0012'],
+                                              'source_plate': ['2'],
+                                              'source_well':
                                               ['A4'], 'dest_well': ['A4'],
                                               'storage_well': ['B4'],
                                               'construct_wells': [['A3']]}),
                            pd.DataFrame(data={'name': ['BBa_C0012-downstream'],
                                               'role': ['downstream'], 'part':
-                                              ['BBa_C0012'], 'source_well':
+                                              ['BBa_C0012'],
+                                              'source_plate': ['2'],
+                                              'source_well':
                                               ['A4'], 'dest_well': ['A5'],
                                               'construct_wells': [['A2']]}),
                            pd.DataFrame(data={'name': ['BBa_B0015-downstream'],
                                               'role': ['downstream'], 'part':
-                                              ['BBa_B0015'], 'source_well':
+                                              ['BBa_B0015'],
+                                              'source_plate': ['2'],
+                                              'source_well':
                                               ['A5'], 'dest_well': ['A6'],
                                               'construct_wells': [['A3']]})]
 
         self.digests_df = pd.concat(self.digest_dfs, ignore_index=True)
 
-        self.source_to_digest = {'A1': [('A1', 1)], 'A2': [('A2', 1)], 'A3':
-                                 [('A3', 1)], 'A4': [('A4', 1), ('A5', 1)],
-                                 'A5': [('A6', 1)]}
+        self.source_to_digest = {'2': {'A1': [('A1', 1)], 'A2': [('A2', 1)],
+                                       'A3': [('A3', 1)],
+                                       'A4': [('A4', 1), ('A5', 1)],
+                                       'A5': [('A6', 1)]}}
 
         self.reagent_to_digest = {"A1": [("A1", 42), ("A2", 42), ("A3", 42),
                                          ("A4", 42), ("A5", 42), ("A6", 42)],
@@ -333,13 +347,36 @@ class BioBricksInputTestCase(unittest.TestCase):
                             self.constructs_df, part)[1], self.cons_in[index-1]
                                      )
 
+    def test_index_construct_parts(self):
+        constructs_df = pd.DataFrame({
+            'upstream': ['BBa_B0015', 'BBa_B0015a'],
+            'downstream': ['BBa_C0040', 'BBa_B0015'],
+            'plasmid': ['BBa_pSB1AK3', 'BBa_pSB1AK3']})
+        part_index = bbinput.index_construct_parts(constructs_df)
+        # names are matched exactly, BBa_B0015 is not in BBa_B0015a
+        self.assertListEqual(part_index['BBa_B0015'], [[0], [1], []])
+        self.assertListEqual(part_index['BBa_B0015a'], [[1], [], []])
+        self.assertListEqual(part_index['BBa_pSB1AK3'], [[], [], [0, 1]])
+        self.assertEqual(bbinput.count_part_occurences(
+            constructs_df, ['BBa_B0015', 'A1'], part_index)[0], [1, 1, 0])
+        self.assertEqual(bbinput.count_part_occurences(
+            constructs_df, ['BBa_B0034', 'A1'])[0], [0, 0, 0])
+        # a part both downstream part and plasmid of a construct is only
+        # indexed as the downstream part
+        part_index = bbinput.index_construct_parts(pd.DataFrame({
+            'upstream': ['BBa_B0015'], 'downstream': ['BBa_pSB1AK3'],
+            'plasmid': ['BBa_pSB1AK3']}))
+        self.assertListEqual(part_index['BBa_pSB1AK3'], [[], [0], []])
+
     def test_process_part(self):
         for index, part in enumerate(self.parts_list):
             if index != 0:
-                df = bbinput.process_part(part, self.constructs_df, '2')
+                part_dict = bbinput.process_part(
+                    part, self.constructs_df, '2')
                 part_df = self.part_dfs[index - 1]
-                for col in df.columns:
-                    self.assertListEqual(df[col].to_list(),
+                self.assertListEqual(list(part_dict), list(part_df.columns))
+                for col in part_df.columns:
+                    self.assertListEqual(part_dict[col],
                                          part_df[col].to_list())
 
     @patch('bbinput.process_part',
@@ -371,6 +408,51 @@ class BioBricksInputTestCase(unittest.TestCase):
         with self.assertRaises(ValueError):
             bbinput.next_well_reagent(self.all_wells_reagent)
 
+    def test_well_allocator(self):
+        allocator = bbinput.WellAllocator(bbinput.TUBE_RACK_24)
+        allocator.reserve(['A1', 'A3', 'Z9'])
+        self.assertEqual(allocator.next_well(), 'A2')
+        self.assertListEqual(allocator.allocate(5), ['A4', 'A5', 'A6', 'B1',
+                                                     'B2'])
+        self.assertEqual(allocator.available(), 16)
+        with self.assertRaises(bbinput.PlateFullError) as context:
+            allocator.allocate(17)
+        self.assertEqual(context.exception.needed, 17)
+        self.assertEqual(context.exception.available, 16)
+        # nothing is taken when the wells do not fit
+        self.assertEqual(allocator.available(), 16)
+
+    def test_create_tranformation_dicts_plate_full(self):
+        constructs = pd.DataFrame({
+            'name': ['construct{}'.format(i) for i in range(24)],
+            'well': bbinput.WellAllocator(bbinput.PLATE_96).allocate(24)})
+        with self.assertRaises(bbinput.PlateFullError) as context:
+            bbinput.create_tranformation_dicts(constructs)
+        self.assertEqual(context.exception.needed, 24*4 + 3)
+
+    def test_split_constructs(self):
+        wells = bbinput.WellAllocator(bbinput.PLATE_96).allocate(48)
+        constructs = pd.DataFrame({
+            'name': ['construct{}'.format(i) for i in range(50)],
+            'well': (wells*2)[:50],
+            'upstream': ['BBa_B0034']*50, 'downstream': ['BBa_C0040']*50,
+            'plasmid': ['BBa_pSB1AK3']*50})
+        self.assertDictEqual(
+            bbinput.count_run_wells(constructs.loc[:22]),
+            {'digest plate': 3, 'construct plate': 23 + 31 + 1,
+             'transformation plate': 23*4 + 3})
+        # 23 transformations fill the transformation plate
+        runs = bbinput.split_constructs(constructs)
+        self.assertListEqual([len(run) for run in runs], [23, 23, 4])
+        self.assertListEqual(runs[2], [46, 47, 48, 49])
+        # a construct well is only used once per run
+        runs = bbinput.split_constructs(constructs.loc[[0, 1, 48]])
+        self.assertListEqual(runs, [[0, 1], [48]])
+
+    def test_get_parts_too_many_plates(self):
+        with self.assertRaises(ValueError):
+            bbinput.get_parts(['parts.csv']*5, self.constructs_df)
+
     def test_get_digests(self):
         digests, parts = bbinput.get_digests(self.constructs_df, self.parts_df,
                                              self.reagents_df)
@@ -403,5 +485,24 @@ class BioBricksInputTestCase(unittest.TestCase):
             self.assertListEqual(df[col].to_list(),
                                  self.transform_df[col].to_list())
 
+    def test_biobricks_from_tables(self):
+        construct_path = os.path.join(TEST_DIR, 'testfiles/constructs.csv')
+        part_path = os.path.join(TEST_DIR, 'testfiles/parts.csv')
+        construct_table = pd.read_csv(construct_path, dtype=str,
+                                      keep_default_na=False)
+        part_table = pd.read_csv(part_path, dtype=str, keep_default_na=False)
+        with tempfile.TemporaryDirectory() as csv_dir, \
+                tempfile.TemporaryDirectory() as table_dir:
+            csv_paths = bbinput.biobricks(
+                csv_dir, [construct_path], [part_path])
+            table_paths = bbinput.biobricks_from_tables(
+                table_dir, construct_table, {'parts': part_table})
+            self.assertListEqual(
+                [os.path.relpath(path, csv_dir) for path in csv_paths],
+                [os.path.relpath(path, table_dir) for path in table_paths])
+            for csv_path, table_path in zip(csv_paths, table_paths):
+                with open(csv_path) as f, open(table_path) as g:
+                    self.assertEqual(f.read(), g.read())
+
 if __name__ == "__main__":
     unittest.main()
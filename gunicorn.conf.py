@@ -0,0 +1,31 @@
+"""gunicorn settings, read from the working directory by
+
+    gunicorn assembly_methods.wsgi
+
+With GUNICORN_PRELOAD (default TRUE) the master loads the app and the heavy
+modules of assembly_methods.preload once before forking the web workers,
+which then share those pages copy-on-write and start serving immediately.
+
+The master also starts the AssemblyJob worker pool of the host (see
+assembly_methods/workers.py), so recycling a web worker leaves it running.
+"""
+import os
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "TRUE") == "TRUE"
+
+
+def when_ready(server):
+    # Runs in the master after the app is loaded, before the workers fork
+    if preload_app:
+        from assembly_methods import preload
+        preload.preload()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'assembly_methods.settings')
+    from assembly_methods import workers
+    server.assembly_pool = workers.start_pool()
+
+
+def on_exit(server):
+    pool = getattr(server, 'assembly_pool', None)
+    if pool is not None:
+        from assembly_methods import workers
+        workers.stop_pool(pool)
@@ -8,66 +8,55 @@ metadata = {'apiLevel': '2.2',
 
 def run(protocol: protocol_api.ProtocolContext):
 
-    def create_master_mix(reagent_to_mm_dict, master_mix_dicts, pipette,
-                          reaction_plate, reagents_plate, trough):
-
-        for key, value in reagent_to_mm_dict.items():
-            pipette.pick_up_tip()
-            for index, mm_dest in enumerate(value):
-                if index == 0:
-                    # only need to find source once
-                    if mm_dest[0] == 'reagents_plate':
-                        source = reagents_plate.wells_by_name()[key]
-                    else:
-                        if key == 'A1':
-                            source = trough.wells()[0]
-                        else:
-                            source = trough.wells_by_name()[key]
-                dest = reaction_plate.wells_by_name()[mm_dest[1]]
-                vol = float(mm_dest[2])
-                pipette.transfer(vol, source, dest, new_tip='never')
-            pipette.blow_out()
+    MIX_SETTINGS = (2, 10)
+    STAGE_COMMENTS = {
+        'reagents': 'Creating master mix',
+        'master_mix': 'Transferring master mix to reaction wells',
+        'parts': 'Transferring parts to reaction wells'}
+
+    def execute_plan(assembly_plan, pipette, source_wells, reaction_wells,
+                     wash_wells):
+        # One tip serves every step from a source until a step asks for a
+        # new tip
+        stage = None
+        has_tip = False
+        for step in assembly_plan:
+            if step['stage'] != stage:
+                stage = step['stage']
+                protocol.comment("--------------------------------------------")
+                protocol.comment(STAGE_COMMENTS[stage])
+                protocol.comment("--------------------------------------------")
+            if step['new_tip'] and has_tip:
+                pipette.drop_tip()
+                has_tip = False
+            if step['action'] == 'mix':
+                for dest in step['dests']:
+                    pipette.pick_up_tip()
+                    pipette.mix(MIX_SETTINGS[0], MIX_SETTINGS[1],
+                                reaction_wells[dest])
+                    pipette.blow_out()
+                    pipette.drop_tip()
+                continue
+            if step['new_tip']:
+                pipette.pick_up_tip()
+                has_tip = True
+            if step['wash']:
+                # Two washing steps are added to allow recycling of the tips
+                for wash_well in wash_wells:
+                    pipette.mix(MIX_SETTINGS[0], MIX_SETTINGS[1],
+                                wash_well.bottom(0.5))
+                    pipette.blow_out()
+            source = source_wells[step['plate']][step['well']]
+            pipette.aspirate(sum(step['volumes']), source.bottom(0.5))
+            for dest, vol in zip(step['dests'], step['volumes']):
+                pipette.dispense(vol, reaction_wells[dest].bottom(0.5))
+        if has_tip:
             pipette.drop_tip()
 
-        for mm_dict in master_mix_dicts:
-            mm_well = reaction_plate.wells_by_name()[mm_dict['well']]
-            pipette.pick_up_tip()
-            pipette.mix(2, 10, mm_well)
-            pipette.blow_out()
-            pipette.drop_tip()
+    # assembly_plan (every reagent, master mix and part transfer, grouped by
+    # source well) and tiprack_slots are precomputed by the generator
 
-    def get_combination_well_no_parts(combinations_to_make):
-        combination_well_dict = {}
-        for i, combination in enumerate(combinations_to_make):
-            key = str(len(combination['parts']))
-            if key not in combination_well_dict.keys():
-                combination_well_dict[key] = [i]
-            else:
-                combination_well_dict[key].append(i)
-        return combination_well_dict
-
-    def find_dna(name, dna_plate_map_dict, dna_plate_dict):
-        """Return a well containing the named DNA."""
-        for plate_name, plate_map in dna_plate_map_dict.items():
-            for i, row in enumerate(plate_map):
-                for j, dna_name in enumerate(row):
-                    if dna_name == name:
-                        well_num = 8 * j + i
-                        return(dna_plate_dict[plate_name].wells()[well_num])
-        raise ValueError("Could not find dna piece named \"{0}\"".format(name))
-
-    # This function checks if the DNA parts exist in the DNA plates and
-    # returns for well locaion of output DNA combinations
-
-    def find_combination(name, combinations_to_make, reaction_plate):
-        """Return a well containing the named combination."""
-        for i, combination in enumerate(combinations_to_make):
-            if combination["name"] == name:
-                return reaction_plate.wells()[i]
-        raise ValueError("Could not find combination \"{0}\".".format(name))
-
-    def moclo_protocol(dna_plate_map_dict, combinations_to_make,
-                       thermocycle=False,
+    def moclo_protocol(assembly_plan, tiprack_slots, thermocycle=False,
                        reaction_plate_type='biorad_96_wellplate_200ul_pcr',
                        reagent_plate_type='biorad_96_wellplate_200ul_pcr',
                        trough_type='usascientific_12_reservoir_22ml'):
@@ -84,9 +73,9 @@ def run(protocol: protocol_api.ProtocolContext):
             reaction_plate = temp_deck.load_labware(reaction_plate_type)
             temp_deck.set_temperature(10)
 
-        # Load in 2 10ul tipracks and 2 300ul tipracks
-        tr_10 = [protocol.load_labware('opentrons_96_tiprack_10ul', '3'),
-                 protocol.load_labware('opentrons_96_tiprack_10ul', '6')]
+        # Load in as many 10ul tipracks as the plan needs
+        tr_10 = [protocol.load_labware('opentrons_96_tiprack_10ul', slot)
+                 for slot in tiprack_slots]
 
         # Load in pipettes
         p10_single = protocol.load_instrument(p10_type,
@@ -118,96 +107,17 @@ def run(protocol: protocol_api.ProtocolContext):
         # 1 input plate
         # input_dna_plate = labware.load('biorad_96_wellplate_200ul_pcr', '1',
         # 'Input DNA Plate')
-        dna_plate_dict = {}
-        for plate_name in dna_plate_map_dict.keys():
-            dna_plate_dict[plate_name] = protocol.load_labware(
-                reaction_plate_type, '1', 'Input DNA Plate')
-
-        no_assemblies_dict = {}
-        for combinations in combinations_to_make:
-            no_parts = len(combinations['parts'])
-            if str(no_parts) in no_assemblies_dict.keys():
-                no_assemblies_dict[str(no_parts)] += 1
-            else:
-                no_assemblies_dict[str(no_parts)] = 1
-        print('combinations_to_make', combinations_to_make)
-
-        wells_assembly = get_combination_well_no_parts(combinations_to_make)
-        protocol.comment("--------------------------------------------")
-        protocol.comment("Creating master mix")
-        protocol.comment("--------------------------------------------")
-        create_master_mix(reagent_to_mm, master_mix_dicts, p10_single,
-                          reaction_plate, reagents_plate, trough)
-
-        for no_parts, no_assemblies in no_assemblies_dict.items():
-            n_part_mm_dicts = [mm_dict for mm_dict in master_mix_dicts
-                               if mm_dict['no_parts'] == int(no_parts)]
-            wells_open_assembly = wells_assembly[no_parts]
-            protocol.comment("--------------------------------------------")
-            protocol.comment(
-                "Transferring mm for {0}-part assembly.".format(no_parts))
-            protocol.comment("--------------------------------------------")
-            for i, entries in enumerate(n_part_mm_dicts):
-                mm_vol_per_assembly = entries['vol_per_assembly']
-                p10_single.pick_up_tip()
-                mm_well = reaction_plate.wells_by_name()[entries['well']]
-                no_assemblies_mm = entries['no_assemblies']
-                if i == len(entries) - 1:
-                    dest_wells = wells_open_assembly
-                else:
-                    dest_wells = wells_open_assembly[0:no_assemblies_mm]
-                wells_new = [well for well in wells_open_assembly
-                             if (well not in dest_wells)]
-                wells_open_assembly = wells_new
-                dest_wells_plate = [reaction_plate.wells()[well].bottom(0.3)
-                                    for well in dest_wells]
-
-                p10_single.transfer(mm_vol_per_assembly, mm_well,
-                                    dest_wells_plate, blow_out=True,
-                                    new_tip='never')
-                p10_single.drop_tip()
-
-        # gives dictionary with keys = parts,
-        # values = names of combinations that parts are in
-        combinations_by_part = {}
-        for i in combinations_to_make:
-            name = i["name"]
-            for j in i["parts"]:
-                if j in combinations_by_part.keys():
-                    combinations_by_part[j].append(name)
-                else:
-                    combinations_by_part[j] = [name]
-
-        # This section of the code combines and mix the DNA parts according to
-        # the combination list
-        protocol.comment("--------------------------------------------")
-        protocol.comment("Transferring parts to reaction plates.")
-        protocol.comment("--------------------------------------------")
-        for part, combinations in combinations_by_part.items():
-            # find dna -> returns source well where part is
-            part_well = find_dna(part, dna_plate_map_dict, dna_plate_dict)
-            combination_wells = [find_combination(x, combinations_to_make,
-                                                  reaction_plate)
-                                 for x in combinations]
-            p10_single.pick_up_tip()
-            while combination_wells:
-                if len(combination_wells) > 5:
-                    current_wells = combination_wells[0:5]
-                    combination_wells = combination_wells[5:]
-                else:
-                    current_wells = combination_wells
-                    combination_wells = []
-                p10_single.aspirate(2 * len(current_wells),
-                                    part_well.bottom(0.5))
-                for i in current_wells:
-                    p10_single.dispense(2, i.bottom(0.5))
-                if combination_wells:
-                    p10_single.mix(2, 10, wash_0.bottom(0.5))
-                    p10_single.blow_out()
-                    p10_single.mix(2, 10, wash_1.bottom(0.5))
-                    p10_single.blow_out()
-            # Two washing steps are added to allow recycling of the tips
-            p10_single.drop_tip()
+        source_wells = {'reagents_plate': reagents_plate.wells_by_name(),
+                        'trough': trough.wells_by_name(),
+                        'reaction_plate': reaction_plate.wells_by_name()}
+        for plate_name in dict.fromkeys(
+                step['plate'] for step in assembly_plan
+                if step['stage'] == 'parts' and step['action'] != 'mix'):
+            source_wells[plate_name] = protocol.load_labware(
+                reaction_plate_type, '1', 'Input DNA Plate').wells_by_name()
+
+        execute_plan(assembly_plan, p10_single, source_wells,
+                     reaction_plate.wells_by_name(), [wash_0, wash_1])
 
         if thermocycle:
             protocol.comment("--------------------------------------------")
@@ -248,5 +158,5 @@ def run(protocol: protocol_api.ProtocolContext):
         protocol.comment(
             'Insert the reaction plate into deck positon 7')
 
-    moclo_protocol(dna_plate_map_dict, combinations_to_make, thermocycle,
+    moclo_protocol(assembly_plan, tiprack_slots, thermocycle,
                    reaction_plate_type, reagent_plate_type, trough_type)
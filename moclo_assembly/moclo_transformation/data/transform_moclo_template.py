@@ -58,51 +58,33 @@ def run(protocol: protocol_api.ProtocolContext):
         # Two washing steps are added to allow recycling of the tips
         pipette.drop_tip()
 
-    def plating(reaction_plate, agar_plate, pipette, multi, triplicate):
-        num_cols = len(reaction_plate.columns())
+    def plating(reaction_plate, agar_plate, pipette, multi, replicates,
+                num_rxns):
+        # Replicates of reaction plate column c are spotted on agar plate
+        # columns c * replicates to c * replicates + replicates - 1
+        num_cols = -(-num_rxns // 8)
         if multi:
             dest_wells = [reaction_plate.columns()[i][0]
                           for i in range(num_cols)]
-            agar_wells = [agar_plate.columns()[i][0]
+            agar_wells = [[agar_plate.columns()[i*replicates + j][0]
+                           for j in range(replicates)]
                           for i in range(num_cols)]
         else:
-            dest_wells = reaction_plate.wells()
-            agar_wells = agar_plate.wells()
+            dest_wells = reaction_plate.wells()[:num_rxns]
+            agar_wells = [[agar_plate.columns()[(i // 8)*replicates + j][i % 8]
+                           for j in range(replicates)]
+                          for i in range(num_rxns)]
         pipette.pick_up_tip()
         for i in range(len(dest_wells)):
-            pipette.transfer(
-                10, dest_wells[i].bottom(0.5),
-                agar_wells[i].bottom(0.3),
-                new_tip='never')
-        if triplicate:
-            count2 = 0
-            for i in range(len(dest_wells)):
-                pipette.transfer(1, dest_wells[i].bottom(0.5),
-                                 agar_wells[i].bottom(-1), new_tip='never')
-                pipette.transfer(9, dest_wells[i].bottom(0.5),
-                                 agar_wells[i+count2].bottom(0.8),
-                                 new_tip='never')
-                pipette.transfer(1, dest_wells[i].bottom(0.5),
-                                 agar_wells[i+count2].bottom(-1),
-                                 new_tip='never')
-                pipette.transfer(9, dest_wells[i].bottom(0.5),
-                                 agar_wells[i+count2+1].bottom(0.8),
-                                 new_tip='never')
-                pipette.transfer(1, dest_wells[i].bottom(0.5),
-                                 agar_wells[i+count2+1].bottom(-1),
-                                 new_tip='never')
-                pipette.transfer(9, dest_wells[i].bottom(0.5),
-                                 agar_wells[i+count2+2].bottom(0.8),
-                                 new_tip='never')
-                pipette.transfer(1, dest_wells[i].bottom(0.5),
-                                 agar_wells[i+count2+2].bottom(-1),
-                                 new_tip='never')
-                count2 += 2
-
-            pipette.drop_tip()
+            for agar_well in agar_wells[i]:
+                pipette.transfer(
+                    10, dest_wells[i].bottom(0.5),
+                    agar_well.bottom(0.3),
+                    new_tip='never')
+        pipette.drop_tip()
 
     def transform_protocol(combinations_to_make, multi=False,
-                           triplicate=False,
+                           replicates=1,
                            reaction_plate_type='biorad_96_wellplate_200ul_pcr',
                            trough_type='usascientific_12_reservoir_22ml',
                            agar_plate_type='thermofisher_96_wellplate_180ul'):
@@ -219,7 +201,8 @@ def run(protocol: protocol_api.ProtocolContext):
         dilution(reaction_plate, pipette300, soc, multi, [wash_0, wash_1],
                  liquid_waste)
 
-        plating(reaction_plate, agar_plate, pipette300, multi, triplicate)
+        plating(reaction_plate, agar_plate, pipette300, multi, replicates,
+                num_rxns)
 
-    transform_protocol(combinations_to_make, multi, triplicate,
+    transform_protocol(combinations_to_make, multi, replicates,
                        reaction_plate_type, trough_type, agar_plate_type)
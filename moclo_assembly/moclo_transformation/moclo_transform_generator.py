@@ -1,8 +1,9 @@
 import os
 import csv
-import json
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Union
+from assembly_methods import metrics, ot2_templates, run_estimator, tables
 
 # labware dictionary - filled in by front end
 labware_dict = {'p10_mount': 'right', 'p300_mount': 'left',
@@ -12,7 +13,47 @@ labware_dict = {'p10_mount': 'right', 'p300_mount': 'left',
                 'reagent_plate': 'biorad_96_wellplate_200ul_pcr',
                 'agar_plate': 'thermofisher_96_wellplate_180ul'}
 
-
+# Templates are resolved relative to this module rather than the working
+# directory, so output generation never depends on (or changes) the cwd
+DATA_DIR_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'data')
+ASSEMBLY_TEMPLATE_PATH = os.path.join(
+    DATA_DIR_PATH, 'moclo_assembly_template.py')
+TRANSFORM_TEMPLATE_PATH = os.path.join(
+    DATA_DIR_PATH, 'transform_moclo_template.py')
+
+# Maximum number of constructs per reaction plate (run), the wells after the
+# constructs hold the master mixes
+MAX_COMBINATIONS = 88
+REACTION_PLATE_WELLS = 96
+# Named numbers of replicates of each construct on the agar plate
+COMBINATIONS_LIMITS = {'single': 1, 'triplicate': 3}
+# Each replicate spots 10 uL of the ~50 uL diluted transformation
+MAX_REPLICATES = 4
+
+# Reagents (name, master mix dataframe volume column) held in the reagents
+# plate, and the usable volume of a well of each reagent labware
+MM_REAGENTS = [('ligase', 'ligase_vol'), ('restriction_enzyme', 'enzyme_vol'),
+               ('buffer', 'buffer_vol')]
+REAGENT_WELL_CAPACITY = {'reagents_plate': 180, 'trough': 15000}
+
+# Volume of each part in an assembly, and the most the p10 aspirates for
+# the assembly transfers
+PART_VOL = 2
+P10_MAX_VOL = 10
+# Volumes of an assembly and of its master mix reagents, and the volume of a
+# master mix well
+TOT_VOL_PER_ASSEMBLY = 20
+BUFFER_VOL_PER_ASSEMBLY = 2
+LIGASE_VOL_PER_ASSEMBLY = 0.5
+ENZYME_VOL_PER_ASSEMBLY = 1
+MM_WELL_VOL = 180
+# Deck slots left free for p10 tip racks by the assembly protocol
+P10_TIPRACK_SLOTS = ['3', '6', '9', '2']
+TIPS_PER_RACK = 96
+
+
+@metrics.instrument_generator('moclo')
 def moclo_function(
     output_folder: str, construct_path: List[str], part_path: List[str],
     thermocycle: bool = True, p10_mount: str = 'right',
@@ -21,7 +62,8 @@ def moclo_function(
     well_plate: str = 'biorad_96_wellplate_200ul_pcr',
     trough: str = 'usascientific_12_reservoir_22ml',
     reagent_plate: str = 'biorad_96_wellplate_200ul_pcr',
-    agar_plate: str = 'thermofisher_96_wellplate_180ul'
+    agar_plate: str = 'thermofisher_96_wellplate_180ul',
+    replicates: int = 1
 ) -> List[str]:
     '''
         Main function, creates scripts and metainformation
@@ -34,6 +76,8 @@ def moclo_function(
             part_path: a list of full paths to part csv(s) (one or more)
             thermocyle: True or False, indicating whether the user has
             and would like to use the Opentrons Thermocycler
+            replicates: number of agar plate spots of each construct (1 to
+            MAX_REPLICATES), see generate_and_save_output_plate_maps
             see labware_dict for rest of arguments
         Returns:
             List of output paths
@@ -41,7 +85,11 @@ def moclo_function(
             only one element = the error path
             Otherwise the list of output paths will contain:
             OT-2 script paths (assembly, transformation),
-            metainformation (assembly, transformation, agar plate)
+            metainformation (assembly, transformation, agar plate),
+            run estimate
+            If there are more constructs than fit on one reaction plate, they
+            are split into runs and the scripts and metainformation of each
+            run are saved in a run_<n> subfolder of output_folder
     '''
 
     output_paths = []
@@ -51,42 +99,13 @@ def moclo_function(
     if type(construct_path) == list:
         construct_path = construct_path[0]
 
-    current_dir = os.getcwd()
-
-    '''
-        Ensure that template directories are correct.
-        Important for running this script through the front end.
-    '''
-    if os.path.split(current_dir)[1] == 'moclo_transformation':
-        assembly_path = os.path.join(
-            current_dir, 'data', 'moclo_assembly_template.py')
-        transform_path = os.path.join(
-            current_dir, 'data', 'transform_moclo_template.py')
-    elif os.path.split(current_dir)[1] == 'moclo_assembly':
-        assembly_path = os.path.join(
-            current_dir, 'moclo_assembly', 'moclo_transformation', 'data',
-            'moclo_assembly_template.py')
-        transform_path = os.path.join(
-            current_dir, 'moclo_assembly', 'moclo_transformation', 'data',
-            'transform_moclo_template.py')
-    else:
-        assembly_path = os.path.join(
-            current_dir, 'moclo_assembly', 'moclo_transformation', 'data',
-            'moclo_assembly_template.py')
-        transform_path = os.path.join(
-            current_dir, 'moclo_assembly', 'moclo_transformation', 'data',
-            'transform_moclo_template.py')
-
     # sets paths to be used by script gen
     config = {
         'output_folder_path': full_output_path,
-        'assembly_template_path': assembly_path,
-        'transform_template_path': transform_path
+        'assembly_template_path': ASSEMBLY_TEMPLATE_PATH,
+        'transform_template_path': TRANSFORM_TEMPLATE_PATH
     }
 
-    # for now only do single (other option = triplicate)
-    combinations_limit = 'single'
-
     if 'multi' in p300_type.lower():
         multi = True
     else:
@@ -96,57 +115,84 @@ def moclo_function(
         # Load in CSV files as a dict containing lists of lists.
         # Loop through all part_path's and merge dicts
         dna_plate_map_dict = {}
-        if type(part_path) == list:
-            for path in part_path:
-                dna_plate_map_dict_local = generate_plate_maps(path)
-                dna_plate_map_dict.update(dna_plate_map_dict_local)
-        else:
-            dna_plate_map_dict = generate_plate_maps(part_path)
+        for plate_name, path in tables.named_sources(part_path):
+            dna_plate_map_dict_local = generate_plate_maps(path, plate_name)
+            dna_plate_map_dict.update(dna_plate_map_dict_local)
 
         combinations_to_make = []
         combinations_to_make = generate_combinations(construct_path)
 
-        check_number_of_combinations(combinations_limit, combinations_to_make)
-
-        # Generate and save output plate maps.
-        triplicate, agar_path = generate_and_save_output_plate_maps(
-            combinations_to_make, combinations_limit,
-            config['output_folder_path'])
-
-        # Define assembly metainformation path
-        assembly_metainformation_path = os.path.join(
-            config['output_folder_path'], 'assembly_metainformation.csv')
-
-        # Create and save assembly metainformation
-        parts, comb, mm, reagents = create_metainformation(
-            assembly_metainformation_path,
-            dna_plate_map_dict, combinations_to_make, labware_dict,
-            thermocycle, triplicate)
-
-        # create master mix dictionary to use in assembly protocol
-        reagent_to_mm_dict, mm_dict = get_mm_dicts(mm, reagents)
-
-        transform_metainformation_path = os.path.join(
-            config['output_folder_path'], 'transform_metainformation.csv')
-        create_transform_metainformation(
-            transform_metainformation_path,
-            labware_dict, triplicate, multi)
-
-        # Create a protocol file and hard code the plate maps into it.
-        assembly_path, transform_path = create_protocol(
-            dna_plate_map_dict, combinations_to_make, reagent_to_mm_dict,
-            mm_dict, config['assembly_template_path'],
-            config['transform_template_path'], config['output_folder_path'],
-            thermocycle, triplicate, multi, p10Mount=p10_mount,
-            p300Mount=p300_mount, p10_type=p10_type, p300_type=p300_type,
-            reaction_plate_type=well_plate, reagent_plate_type=reagent_plate,
-            trough_type=trough, agar_plate_type=agar_plate)
-
-        output_paths.append(assembly_path)
-        output_paths.append(transform_path)
-        output_paths.append(assembly_metainformation_path)
-        output_paths.append(transform_metainformation_path)
-        output_paths.append(agar_path)
+        runs = split_combinations(replicates, combinations_to_make)
+        estimates = []
+        for run_index, run_combinations in enumerate(runs):
+            # Each run has its own reaction plate, so master mix wells,
+            # reagent volumes and the agar plate map are planned per run
+            if len(runs) > 1:
+                run_folder = os.path.join(config['output_folder_path'],
+                                          'run_{}'.format(run_index + 1))
+                os.makedirs(run_folder, exist_ok=True)
+            else:
+                run_folder = config['output_folder_path']
+
+            check_number_of_combinations(replicates, run_combinations)
+
+            # Generate and save output plate maps.
+            replicates, agar_path = generate_and_save_output_plate_maps(
+                run_combinations, replicates, run_folder)
+
+            # Define assembly metainformation path
+            assembly_metainformation_path = os.path.join(
+                run_folder, 'assembly_metainformation.csv')
+
+            # Create and save assembly metainformation
+            parts, comb, mm, reagents = create_metainformation(
+                assembly_metainformation_path,
+                dna_plate_map_dict, run_combinations, labware_dict,
+                thermocycle, replicates)
+
+            # create master mix dictionary and plan the assembly transfers
+            reagent_to_mm_dict, mm_dict = get_mm_dicts(mm, reagents)
+            assembly_plan = generate_assembly_plan(
+                dna_plate_map_dict, run_combinations, reagent_to_mm_dict,
+                mm_dict)
+
+            transform_metainformation_path = os.path.join(
+                run_folder, 'transform_metainformation.csv')
+            create_transform_metainformation(
+                transform_metainformation_path,
+                labware_dict, replicates, multi)
+
+            # Create a protocol file and hard code the plate maps into it.
+            assembly_path, transform_path = create_protocol(
+                assembly_plan, run_combinations,
+                config['assembly_template_path'],
+                config['transform_template_path'], run_folder,
+                thermocycle, replicates, multi, p10Mount=p10_mount,
+                p300Mount=p300_mount, p10_type=p10_type,
+                p300_type=p300_type, reaction_plate_type=well_plate,
+                reagent_plate_type=reagent_plate, trough_type=trough,
+                agar_plate_type=agar_plate)
+
+            output_paths.append(assembly_path)
+            output_paths.append(transform_path)
+            output_paths.append(assembly_metainformation_path)
+            output_paths.append(transform_metainformation_path)
+            output_paths.append(agar_path)
+
+            run_estimates = [
+                run_estimator.estimate_moclo_assembly(
+                    reagent_to_mm_dict, run_combinations, mm_dict,
+                    thermocycle, assembly_plan),
+                run_estimator.estimate_moclo_transformation(
+                    len(run_combinations), multi, replicates)]
+            for estimate in run_estimates:
+                if len(runs) > 1:
+                    estimate['script'] += ' run_{}'.format(run_index + 1)
+                estimates.append(estimate)
+
+        output_paths.append(run_estimator.save_estimate(
+            run_estimator.summarise(estimates),
+            config['output_folder_path']))
 
     except Exception as e:
         error_path = os.path.join(full_output_path, 'MoClo_error.txt')
@@ -157,81 +203,189 @@ def moclo_function(
     finally:
         return output_paths
 
+
+def moclo_function_from_tables(
+    output_folder: str, construct_table: pd.DataFrame,
+    part_tables: Dict[str, pd.DataFrame], **kwargs
+) -> List[str]:
+    '''
+        Creates scripts and metainformation from the construct and part
+        tables of the SBOL parser (see ParserSBOL.generate_tables), without
+        reading csvs
+        Args:
+            construct_table: table of constructs, laid out as the construct
+            csv (the column names are not a row)
+            part_tables: plate maps by source plate name, laid out as the
+            part csvs
+            see moclo_function for rest of arguments
+        Returns:
+            List of output paths, see moclo_function
+    '''
+    return moclo_function(output_folder, construct_table, part_tables,
+                          **kwargs)
+
 ###############################################################################
 # Functions for getting user input
 ###############################################################################
 
 
 def generate_plate_maps(
-    filename: str
+    filename: tables.Source,
+    plate_name: str = None
 ) -> Dict[str, List[List]]:
     '''
         Generates dictionaries for the part csvs
-        Args: filename = absolute path to part csv
+        Args: filename = absolute path to part csv, or plate map table
+        (without header)
+        plate_name = key of the plate map, by default the name of the part
+        csv
         Returns: dictionary of plate maps with key = name of part csv,
         value = list of rows (= list of lists)
     '''
     plate_maps = {}
     plate_map = []
-    with open(filename, 'r', encoding='utf-8-sig') as file:
-        for row in csv.reader(file, dialect='excel'):
-            if len(row) == 0:
-                continue
-            if row[0]:
-                plate_map.append(row)
-    plate_name = os.path.splitext(os.path.basename(filename))[0]
+    for row in tables.read_rows(filename, header=False,
+                                encoding='utf-8-sig'):
+        if len(row) == 0:
+            continue
+        if row[0]:
+            plate_map.append(row)
+    if plate_name is None:
+        plate_name = tables.source_name(filename, 'parts')
     plate_maps[plate_name] = plate_map
 
     return plate_maps
 
 
 def generate_combinations(
-    combinations_filename: str
+    combinations_filename: tables.Source
 ) -> List[Dict]:
     '''
         Generates a list of dictionaries of constructs to be made
-        Args: combinations_filename = absolute path to construct csv file
+        Args: combinations_filename = absolute path to construct csv file, or
+        construct table (without header)
         Returns: List of construct dictionaries with keys "name" and "parts"
     '''
     combinations_to_make = []
-    with open(combinations_filename, 'r', encoding='utf-8-sig') as f:
-        for row in csv.reader(f, dialect='excel'):
-            if len(row) == 0:
-                continue
-            if row[0]:
-                combinations_to_make.append({
-                                            "name": row[0],
-                                            "parts": [x for x in row[1:] if x]
-                                            })
+    for row in tables.read_rows(combinations_filename, header=False,
+                                encoding='utf-8-sig'):
+        if len(row) == 0:
+            continue
+        if row[0]:
+            combinations_to_make.append({
+                                        "name": row[0],
+                                        "parts": [x for x in row[1:] if x]
+                                        })
     return combinations_to_make
 
 
+def get_replicates(
+    combinations_limit: Union[str, int]
+) -> int:
+    '''
+        Returns the number of replicates of each construct
+        Args:
+            combinations_limit: "single" (1 replicate), "triplicate" (3) or
+            a number of replicates from 1 to MAX_REPLICATES
+        Raises: ValueError if combinations_limit is none of these
+    '''
+    if isinstance(combinations_limit, str):
+        if combinations_limit not in COMBINATIONS_LIMITS:
+            raise ValueError(
+                'Combinations limit must be single of triplicate')
+        return COMBINATIONS_LIMITS[combinations_limit]
+    if isinstance(combinations_limit, bool) or \
+            not isinstance(combinations_limit, int) or \
+            not 1 <= combinations_limit <= MAX_REPLICATES:
+        raise ValueError('Number of replicates must be between 1 and '
+                         '{0}'.format(MAX_REPLICATES))
+    return combinations_limit
+
+
+def replicates_label(
+    replicates: int
+) -> str:
+    '''
+        Describes the number of replicates in the metainformation
+        Args: replicates = number of replicates of each construct
+        Returns: 'Single', 'Triplicate' or e.g. '2 replicates'
+    '''
+    for label, number in COMBINATIONS_LIMITS.items():
+        if number == replicates:
+            return label.capitalize()
+    return '{0} replicates'.format(replicates)
+
+
+def max_combinations(
+    combinations_limit: Union[str, int]
+) -> int:
+    '''
+        Returns the maximum number of constructs of a run: the replicates of
+        each reaction plate column take up whole agar plate columns
+        Args: combinations_limit = see get_replicates
+        Returns: maximum number of constructs, e.g. 88 for single, 32 for
+        triplicate
+    '''
+    replicates = get_replicates(combinations_limit)
+    return min(MAX_COMBINATIONS, 8*(12 // replicates))
+
+
 def check_number_of_combinations(
-    combinations_limit: str,
+    combinations_limit: Union[str, int],
     combinations_to_make: List[Dict]
 ):
     '''
-        Ensures that the number of constructs does not exceed the maximum
+        Ensures that the number of constructs of a run (one reaction plate)
+        does not exceed the maximum, see split_combinations for larger lists
         Args:
-            combinations_limit: "single" or "triplicate" - if "single" can do
-            max 88 constructs, if "triplicate" does every construct 3 times -
-            max 24 constructs
+            combinations_limit: "single", "triplicate" or the number of
+            replicates - if "single" can do max 88 constructs, if
+            "triplicate" does every construct 3 times - max 32 constructs
+            (see max_combinations)
         Raises: ValueError if there are too many constructs or
-        combinations_limit is not "single" or "triplicate"
+        combinations_limit is not valid (see get_replicates)
     '''
     number_of_combinations = len(combinations_to_make)
-    if combinations_limit == 'single':
-        if number_of_combinations > 88:
-            raise ValueError('Too many combinations ({0}) requested.'
-                             'Max for single combinations is '
-                             ' 88.'.format(number_of_combinations))
-    elif combinations_limit == 'triplicate':
-        if number_of_combinations > 24:
-            raise ValueError('Too many combinations ({0}) requested.'
-                             'Max for triplicate combinations is '
-                             '24.'.format(number_of_combinations))
-    else:
-        raise ValueError('Combinations limit must be single of triplicate')
+    max_number = max_combinations(combinations_limit)
+    if number_of_combinations > max_number:
+        raise ValueError('Too many combinations ({0}) requested. '
+                         'Max for {1} replicate(s) is {2}.'.format(
+                             number_of_combinations,
+                             get_replicates(combinations_limit), max_number))
+
+
+def split_combinations(
+    combinations_limit: Union[str, int],
+    combinations_to_make: List[Dict]
+) -> List[List[Dict]]:
+    '''
+        Splits the constructs into runs that each fit on one reaction plate
+        together with their master mixes (see count_mm_wells)
+        Args:
+            combinations_limit: "single", "triplicate" or the number of
+            replicates, see get_replicates
+            combinations_to_make: list of construct dictionaries
+        Returns: list of runs, each a list of at most
+        max_combinations(combinations_limit) construct dictionaries in
+        their original order
+        Raises: ValueError if combinations_limit is not valid or constructs
+        have too many parts (see mm_well_capacity)
+    '''
+    max_number = max_combinations(combinations_limit)
+    runs = [[]]
+    run_no_parts = {}
+    for combination in combinations_to_make:
+        no_parts = dict(run_no_parts)
+        parts_key = len(combination['parts'])
+        no_parts[parts_key] = no_parts.get(parts_key, 0) + 1
+        no_combinations = len(runs[-1]) + 1
+        if no_combinations > max_number or no_combinations + \
+                count_mm_wells(no_parts) > REACTION_PLATE_WELLS:
+            runs.append([])
+            no_parts = {parts_key: 1}
+        runs[-1].append(combination)
+        run_no_parts = no_parts
+    return runs
 
 ###############################################################################
 # Functions for creating output files
@@ -240,80 +394,48 @@ def check_number_of_combinations(
 
 def generate_and_save_output_plate_maps(
     combinations_to_make: List[Dict],
-    combinations_limit: str,
+    combinations_limit: Union[str, int],
     output_folder_path: str
-) -> Tuple[str, str]:
+) -> Tuple[int, str]:
     '''
         Saves the mapping of the agar plate for use in transformation.
+        Constructs fill the reaction plate column by column, and the
+        replicates of reaction plate column c are spotted on agar plate
+        columns c * replicates to c * replicates + replicates - 1, so a
+        multi-channel pipette spots a whole column at a time.
         Args:
             combinations_to_make = list of construct dictionaries
-            combinations_limit = "single" or "triplicate"
+            combinations_limit = "single", "triplicate" or the number of
+            replicates, see get_replicates
             output_folder_path = where to save mapping
         Returns:
-            triplicate: whether 'single' (triplicate = False) or 'triplicate'
-            (triplicate = True) is selected
+            replicates: number of replicates of each construct
             output_filename: the absolute path to the agar plate csv
     '''
-    # Split combinations_to_make into 8x6 plate maps.
-    output_plate_map_flipped = []
-    for i, combo in enumerate(combinations_to_make):
-        name = combo['name']
-        # if i % 32 == 0:
-        #   # new plate
-        #   output_plate_maps_flipped.append([[name]])
-        if i % 8 == 0:
-            # new column
-            output_plate_map_flipped.append([name])
-        else:
-            output_plate_map_flipped[-1].append(name)
-
-    # Correct row/column flip.
-    output_plate_map = []
-    for i, row in enumerate(output_plate_map_flipped):
-        for j, element in enumerate(row):
-            if j >= len(output_plate_map):
-                output_plate_map.append([element])
-            else:
-                output_plate_map[j].append(element)
-
-    triplicate = False
-    # creating an output plate three copies of each column
-    if combinations_limit == 'triplicate':
-        combinedRow = []
-        splitRows = []
-        triplicate = True
-
-        for j in range(0, len(output_plate_map)):  # 8
-            # Tripling each item in the plate
-            for item in output_plate_map[j]:
-                combinedRow.append(item)
-                combinedRow.append(item)
-                combinedRow.append(item)
-
-        # Splitting up the rows into lists with number of elements (3, 6 or 9)
-        # depending on how many columns in the combinations file
-        how_to_split = 3*len(output_plate_map_flipped)
-        for index, item in enumerate(combinedRow):
-            if index % how_to_split == 0:
-                splitRows.append([])
-                splitRows[-1].append(item)
-            else:
-                splitRows[-1].append(item)
-
-        output_plate_map = splitRows
+    replicates = get_replicates(combinations_limit)
+    names = [combo['name'] for combo in combinations_to_make]
+    no_columns = -(-len(names) // 8)
+    # (rows, columns) of the reaction plate, then each column repeated
+    reaction_map = np.array(names + [''] * (no_columns*8 - len(names)),
+                            dtype=object).reshape(no_columns, 8).T
+    output_plate_map = np.repeat(reaction_map, replicates, axis=1)
 
     output_filename = os.path.join(output_folder_path, "Agar_plate.csv")
     with open(output_filename, 'w+', newline='') as f:
         writer = csv.writer(f)
-        for row in output_plate_map:
-            writer.writerow(row)
-    return triplicate, output_filename
+        for row in output_plate_map.tolist():
+            # the last reaction plate column may be partly filled
+            while row and not row[-1]:
+                row.pop()
+            if row:
+                writer.writerow(row)
+    return replicates, output_filename
 
 
 def create_metainformation(
     output_path: str, dna_plate_map_dict: Dict[str, List[List]],
     combinations_to_make: List[Dict],
-    labware_dict: Dict[str, str], thermocycle: bool, triplicate: str
+    labware_dict: Dict[str, str], thermocycle: bool, replicates: int
 ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
     '''
         Returns detailed metainformation and saves in a csv.
@@ -326,8 +448,7 @@ def create_metainformation(
             constructs
             labware_dict: the dictionary of labware chosen
             thermocyle: whether the thermocycler module is used
-            triplicate: whether 'single' (triplicate = False) or 'triplicate'
-            (triplicate = True) is selected
+            replicates: number of replicates of each construct
         Returns:
             parts_df: dataframe of parts
             combinations_df: dataframe of constructs
@@ -342,36 +463,27 @@ def create_metainformation(
     # Create parts dataframe
     parts_df = create_parts_df(dna_plate_map_dict)
 
-    # Creates combinations dataframe
-    combination_df_list = []
+    # Creates combinations dataframe, collecting the combinations each part
+    # is used in (keyed by part name) in the same pass
+    combination_rows = []
+    part_combinations = {}
     for comb_index, combination_dict in enumerate(combinations_to_make):
-        combination_df_dict = {}
         name = combination_dict['name']
-        combination_df_dict['name'] = [name]
-        combination_df_dict['parts'] = [combination_dict['parts']]
-        combination_df_dict['well'] = [index_to_well_name(comb_index)]
-        combination_df_dict['no_parts'] = [len(combination_dict['parts'])]
-        combination_df_dict['plate'] = ['reaction_plate']
-        combination_df_list.append(pd.DataFrame.from_dict(combination_df_dict))
+        combination_rows.append({
+            'name': name, 'parts': combination_dict['parts'],
+            'well': index_to_well_name(comb_index),
+            'no_parts': len(combination_dict['parts']),
+            'plate': 'reaction_plate'})
         for part in combination_dict['parts']:
-            part_indices = parts_df[parts_df['name'] == part].index.values
-            for part_index in part_indices:
-                if parts_df.at[part_index, 'combinations'] == '0':
-                    parts_df.at[part_index, 'combinations'] = [
-                        combination_dict['name']]
-                else:
-                    parts_df.at[part_index, 'combinations'].append(
-                        combination_dict['name'])
-    if combination_df_list:
-        combinations_df = pd.concat(combination_df_list, ignore_index=True)
-    else:
-        combination_df_dict['name'] = None
-        combination_df_dict['parts'] = None
-        combination_df_dict['well'] = None
-        combination_df_dict['no_parts'] = None
-        combination_df_dict['plate'] = None
-        combinations_df = pd.DataFrame(
-            combination_df_dict, index=len(combination_df_dict))
+            part_combinations.setdefault(part, []).append(name)
+    combinations_df = pd.DataFrame(
+        combination_rows,
+        columns=['name', 'parts', 'well', 'no_parts', 'plate'])
+
+    # Parts not used in any combination keep the dummy '0'
+    parts_df['combinations'] = [
+        list(part_combinations[name]) if name in part_combinations else '0'
+        for name in parts_df['name']]
 
     # Creates master mix dataframe
     mm_df = create_mm_df(combinations_df)
@@ -382,10 +494,7 @@ def create_metainformation(
     # saves as csv, adding extra info on run and labware
     with open(output_path, 'w', newline='') as csvfile:
         csvwriter = csv.writer(csvfile)
-        if triplicate:
-            csvwriter.writerow(['Triplicate'])
-        else:
-            csvwriter.writerow(['Single'])
+        csvwriter.writerow([replicates_label(replicates)])
         csvwriter.writerow('')
         if thermocycle:
             csvwriter.writerow(['Using thermocycler module'])
@@ -436,19 +545,16 @@ def create_parts_df(
     '''
     letter_dict = {'0': 'A', '1': 'B', '2': 'C', '3': 'D', '4': 'E', '5': 'F',
                    '6': 'G', '7': 'H'}
+    part_rows = []
     for plate, plate_wells in dna_plate_map_dict.items():
-        part_df_list = []
         for row_index, row in enumerate(plate_wells):
             row_letter = letter_dict[str(row_index)]
             for col_index, part in enumerate(row):
                 if len(part) > 0:
-                    part_dict = {}
                     well_name = row_letter + str(col_index + 1)
-                    part_dict['name'] = [part]
-                    part_dict['well'] = [well_name]
-                    part_dict['plate'] = [plate]
-                    part_df_list.append(pd.DataFrame.from_dict(part_dict))
-    parts_df = pd.concat(part_df_list, ignore_index=True)
+                    part_rows.append(
+                        {'name': part, 'well': well_name, 'plate': plate})
+    parts_df = pd.DataFrame(part_rows, columns=['name', 'well', 'plate'])
 
     # Empty column to be filled after combinations df is generated
     parts_df['combinations'] = pd.Series(['0'] * len(parts_df.index),
@@ -456,100 +562,78 @@ def create_parts_df(
     return parts_df
 
 
+def mm_well_capacity(
+    no_parts: int
+) -> int:
+    '''
+        Returns the number of assemblies one master mix well serves, for
+        constructs with no_parts parts, leaving room for the dead volume
+        Args: no_parts = number of parts per construct
+        Raises: ValueError if the parts leave no room for the master mix
+        reagents
+    '''
+    mm_vol_per_assembly = TOT_VOL_PER_ASSEMBLY - no_parts*PART_VOL
+    # the number of parts is only limited by the room left for reagents
+    reagent_vol_per_assembly = BUFFER_VOL_PER_ASSEMBLY + \
+        LIGASE_VOL_PER_ASSEMBLY + ENZYME_VOL_PER_ASSEMBLY
+    if mm_vol_per_assembly < reagent_vol_per_assembly:
+        raise ValueError(
+            'Constructs with {0} parts leave {1} uL for master mix, less '
+            'than the {2} uL of buffer, ligase and enzyme needed'.format(
+                no_parts, mm_vol_per_assembly, reagent_vol_per_assembly))
+    max_assemblies = MM_WELL_VOL // mm_vol_per_assembly
+    return max_assemblies - (2 if max_assemblies % 2 == 0 else 3)
+
+
+def count_mm_wells(
+    no_parts: Dict[int, int]
+) -> int:
+    '''
+        Returns the number of master mix wells create_mm_df assigns
+        Args: no_parts = number of constructs keyed by their number of parts
+        Raises: ValueError if constructs have too many parts, see
+        mm_well_capacity
+    '''
+    return sum(-(-number // mm_well_capacity(parts))
+               for parts, number in no_parts.items() if parts >= 2)
+
+
 def create_mm_df(
     combinations_df: pd.DataFrame
 ) -> pd.DataFrame:
     '''
         Creates a master mix dataframe and delegates wells.
         Different master mixes must be created depending on
-        the number of parts per construct.
+        the number of parts per construct, and each master mix well
+        serves a limited number of constructs.
         Args: combinations_df = dataframe of constructs
         Returns: dataframe of master mixes with wells and volumes
         of different reagents required
+        Raises: ValueError if constructs have too many parts to leave room
+        for the master mix reagents or there are not enough wells for the
+        master mixes
     '''
-    TOT_VOL_PER_ASSEMBLY = 20
-    BUFFER_VOL_PER_ASSEMBLY = 2
-    LIGASE_VOL_PER_ASSEMBLY = 0.5
-    ENZYME_VOL_PER_ASSEMBLY = 1
-    PART_VOL = 2
-    avail_mm_wells_no = list(range(95, len(combinations_df)-2, -1))
+    # master mixes take the wells after the constructs, from H12 backwards
+    avail_mm_wells_no = list(range(REACTION_PLATE_WELLS - 1,
+                                   len(combinations_df) - 1, -1))
     avail_mm_wells = [index_to_well_name(no) for no in avail_mm_wells_no]
-    mm_df_list = []
-
-    # minimum of 2 parts per construct; max of 8
-    for i in range(2, 9):
-        # count number of combinations with i parts
-        combinations_i = combinations_df[
-            combinations_df['no_parts'] == i].index.values
-        combinations = [combinations_df.loc[i] for i in combinations_i]
-        if len(combinations) > 0:
-            # create a new dictionary and fill
-            mm_dict = {}
-            well = avail_mm_wells.pop(0)
-            mm_dict['well'] = [well]
-            mm_dict['no_parts'] = [i]
-            parts_per_assembly = i
-            mm_vol_per_assembly = TOT_VOL_PER_ASSEMBLY - \
-                parts_per_assembly*PART_VOL
-            mm_dict['vol_per_assembly'] = [mm_vol_per_assembly]
-            # number of assemblies is limited and dead vol is
-            # accounted for
-            max_assemblies = 180 // mm_vol_per_assembly
-            mm_combinations = []
-            if max_assemblies % 2 == 0:
-                max_assemblies = max_assemblies - 2
-            else:
-                max_assemblies = max_assemblies - 3
-            tot_assemblies = len(combinations)
-            no_assemblies = 0
-            for comb_index, comb_row in enumerate(combinations):
-                if no_assemblies < max_assemblies:
-                    mm_combinations.append(comb_row['name'])
-                    no_assemblies += 1
-                    if comb_index == tot_assemblies-1:
-                        # no more assemblies for no of parts
-                        # save the dictionary after filling
-                        if no_assemblies % 2 == 0:
-                            no = no_assemblies + 2
-                        else:
-                            no = no_assemblies + 3
-                        mm_dict['combinations'] = [mm_combinations]
-                        mm_dict['no_assemblies'] = [no_assemblies]
-                        mm_dict['buffer_vol'] = [BUFFER_VOL_PER_ASSEMBLY*no]
-                        mm_dict['ligase_vol'] = [LIGASE_VOL_PER_ASSEMBLY*no]
-                        mm_dict['enzyme_vol'] = [ENZYME_VOL_PER_ASSEMBLY*no]
-                        water_vol = mm_vol_per_assembly*no - \
-                            mm_dict['buffer_vol'][0] - \
-                            mm_dict['ligase_vol'][0] - mm_dict['enzyme_vol'][0]
-                        mm_dict['water_vol'] = [water_vol]
-                        mm_dict['plate'] = ['reaction_plate']
-                        mm_df_list.append(pd.DataFrame.from_dict(mm_dict))
-                else:
-                    # run out of space for assemblies in mm well
-                    # save mm_dict before creating new one
-                    no = max_assemblies + 2
-                    mm_dict['combinations'] = [mm_combinations]
-                    mm_dict['no_assemblies'] = [no_assemblies]
-                    mm_dict['buffer_vol'] = [BUFFER_VOL_PER_ASSEMBLY*no]
-                    mm_dict['ligase_vol'] = [LIGASE_VOL_PER_ASSEMBLY*no]
-                    mm_dict['enzyme_vol'] = [ENZYME_VOL_PER_ASSEMBLY*no]
-                    water_vol = mm_vol_per_assembly*no - \
-                        mm_dict['buffer_vol'][0] - \
-                        mm_dict['ligase_vol'][0] - mm_dict['enzyme_vol'][0]
-                    mm_dict['water_vol'] = [water_vol]
-                    mm_dict['plate'] = ['reaction_plate']
-                    mm_df_list.append(pd.DataFrame.from_dict(mm_dict))
-                    mm_dict = {}
-                    well = avail_mm_wells.pop(0)
-                    mm_dict['well'] = [well]
-                    mm_combinations = [comb_row['name']]
-                    mm_dict['no_parts'] = [i]
-                    mm_dict['vol_per_assembly'] = [mm_vol_per_assembly]
-                    no_assemblies = 1
-    # turn into dataframe
-    if mm_df_list:
-        mm_df = pd.concat(mm_df_list, ignore_index=True)
-    else:  # If mm_df is empty, make default
+
+    # minimum of 2 parts per construct; constructs are split between master
+    # mix wells in order, each well holding at most max_assemblies
+    mm_combinations = []
+    mm_no_parts = []
+    assemblies = combinations_df[combinations_df['no_parts'] >= 2]
+    for no_parts, names in assemblies.groupby('no_parts')['name']:
+        # number of assemblies is limited and dead vol is accounted for
+        max_assemblies = mm_well_capacity(no_parts)
+        names = names.to_list()
+        no_wells = -(-len(names) // max_assemblies)
+        mm_combinations += [
+            names[n*max_assemblies:(n + 1)*max_assemblies]
+            for n in range(no_wells)]
+        mm_no_parts += [no_parts] * no_wells
+
+    if not mm_combinations:  # If mm_df is empty, make default
         mm_dict = {}
         mm_dict['well'] = None
         mm_dict['no_parts'] = None
@@ -561,7 +645,32 @@ def create_mm_df(
         mm_dict['enzyme_vol'] = None
         mm_dict['water_vol'] = None
         mm_dict['plate'] = None
-        mm_df = pd.DataFrame(mm_dict, index=range(len(mm_dict)))
+        return pd.DataFrame(mm_dict, index=range(len(mm_dict)))
+    if len(mm_combinations) > len(avail_mm_wells):
+        raise ValueError(
+            'Not enough wells in the reaction plate for {0} master '
+            'mixes'.format(len(mm_combinations)))
+
+    no_parts = np.array(mm_no_parts)
+    vol_per_assembly = TOT_VOL_PER_ASSEMBLY - no_parts*PART_VOL
+    no_assemblies = np.array([len(names) for names in mm_combinations])
+    # master mix for an even number of assemblies with at least 2 spare
+    no = no_assemblies + 2 + no_assemblies % 2
+    buffer_vol = BUFFER_VOL_PER_ASSEMBLY*no
+    ligase_vol = LIGASE_VOL_PER_ASSEMBLY*no
+    enzyme_vol = ENZYME_VOL_PER_ASSEMBLY*no
+    water_vol = vol_per_assembly*no - buffer_vol - ligase_vol - enzyme_vol
+    mm_df = pd.DataFrame({
+        'well': avail_mm_wells[:len(mm_combinations)],
+        'no_parts': no_parts,
+        'vol_per_assembly': vol_per_assembly,
+        'combinations': pd.Series(mm_combinations, dtype=object),
+        'no_assemblies': no_assemblies,
+        'buffer_vol': buffer_vol,
+        'ligase_vol': ligase_vol,
+        'enzyme_vol': enzyme_vol,
+        'water_vol': water_vol,
+        'plate': 'reaction_plate'})
     return mm_df
 
 
@@ -570,107 +679,101 @@ def create_reagents_df(
 ) -> pd.DataFrame:
     '''
         Creates a dataframe of reagents used to make master mixes.
-        More than one buffer well may be required, and water is
-        held on a separate plate.
+        Each reagent is spread over as many reagent plate wells as needed
+        (see pack_reagent_wells), wells are assigned from H12 backwards, and
+        water is held in the trough.
         Also indicates which master mix wells the reagent is
         transferred to.
         Args: master mix dataframe
         Returns: dataframe of reagents used in master mix + water
+        Raises: ValueError if the reagents do not fit in the reagents plate
+        or the water well
     '''
     water_vol = 15000
-    reagents_df_list = []
-    ligase_dict = {'name': ['ligase'], 'well': ['H12'], 'plate':
-                   ['reagents_plate']}
-    ligase_vol = mm_df.loc[0:len(mm_df)-1, 'ligase_vol'].sum()
-    ligase_dead_vol = 2*(ligase_vol // len(mm_df))
-    tot_ligase = ligase_vol + ligase_dead_vol
-
-    # round up to the nearest 10
-    if tot_ligase % 10 > 0:
-        tot_ligase = 10*((tot_ligase // 10) + 1)
-    ligase_dict['volume'] = [tot_ligase]
-    ligase_dict['mm_wells'] = [list(mm_df['well'])]
-
-    reagents_df_list.append(pd.DataFrame.from_dict(ligase_dict))
-
-    enzyme_dict = {'name': ['restriction_enzyme'], 'well': ['G12'], 'plate':
-                   ['reagents_plate']}
-
-    enzyme_vol = mm_df.loc[0:len(mm_df)-1, 'enzyme_vol'].sum()
-    enzyme_dead_vol = 2*(enzyme_vol // len(mm_df))
-    tot_enzyme = enzyme_vol + enzyme_dead_vol
-
-    # round up to the nearest 10
-    if tot_enzyme % 10 > 0:
-        tot_enzyme = 10*((tot_enzyme // 10) + 1)
-    enzyme_dict['volume'] = [tot_enzyme]
-    enzyme_dict['mm_wells'] = [list(mm_df['well'])]
+    reagent_rows = []
+    free_wells = [index_to_well_name(no) for no in range(95, -1, -1)]
+    mm_wells = list(mm_df['well'])
+    for name, vol_col in MM_REAGENTS:
+        transfer_vols = list(mm_df[vol_col])
+        packed = pack_reagent_wells(
+            name, transfer_vols, REAGENT_WELL_CAPACITY['reagents_plate'])
+        if len(packed) > len(free_wells):
+            raise ValueError(
+                'Not enough wells in the reagents plate for the master mix '
+                'reagents ({0} more needed)'.format(
+                    len(packed) - len(free_wells)))
+        for well_index, indices in enumerate(packed):
+            reagent_rows.append({
+                'name': name if len(packed) == 1 else '{0}-{1}'.format(
+                    name, well_index + 1),
+                'well': free_wells.pop(0), 'plate': 'reagents_plate',
+                'volume': reagent_well_volume(
+                    [transfer_vols[i] for i in indices]),
+                'mm_wells': [mm_wells[i] for i in indices]})
+
+    # all water comes from the first trough well, the others hold washes
+    packed = pack_reagent_wells(
+        'water', list(mm_df['water_vol']), REAGENT_WELL_CAPACITY['trough'])
+    if len(packed) > 1:
+        raise ValueError('Master mixes need more water than the {0} uL '
+                         'trough well'.format(REAGENT_WELL_CAPACITY['trough']))
+    reagent_rows.append({'name': 'water', 'well': 'A1', 'plate': 'trough',
+                         'volume': water_vol, 'mm_wells': mm_wells})
+
+    reagents_df = pd.DataFrame(reagent_rows)
 
-    reagents_df_list.append(pd.DataFrame.from_dict(enzyme_dict))
-
-    buffer_vol = mm_df.loc[0:len(mm_df)-1, 'buffer_vol'].sum()
-
-    buffer_dead_vol = 2*(buffer_vol // len(mm_df))
-
-    tot_buffer = buffer_vol + buffer_dead_vol
-
-    # round to the nearest 10
-    if tot_buffer % 10 > 0:
-        tot_buffer = 10*((tot_buffer // 10) + 1)
-
-    if tot_buffer > 180:
-        # need to create more than one well
-        for i in range(len(mm_df)-2, 0, -1):
-            buffer_vol1 = mm_df.loc[0:i, 'buffer_vol'].sum()
-            # buffer_dead_vol1 = 2*(buffer_vol1 // (i + 1))
-            tot_buffer1 = buffer_vol1 + buffer_dead_vol
+    return reagents_df
 
-            if tot_buffer1 % 10 > 0:
-                tot_buffer1 = 10*((tot_buffer1 // 10) + 1)
 
-            if tot_buffer1 <= 180:
-                # find configuration in which both buffer wells
-                # have max 180 uL
-                # there should never need to be more than 2 wells
-                wells1 = list(mm_df.loc[0:i, 'well'])
-                buffer_vol2 = mm_df.loc[i+1:len(mm_df)-1, 'buffer_vol'].sum()
-                # buffer_dead_vol2 = 2*(buffer_vol2 // (len(mm_df)-i-1))
-                tot_buffer2 = buffer_vol2 + buffer_dead_vol
+def reagent_well_volume(
+    transfer_vols: List[float]
+) -> float:
+    '''
+        Volume to load in a reagent well: the transfers out of the well plus
+        a dead volume of two average transfers, rounded up to the nearest 10
+        Args: transfer_vols = volumes transferred out of the well
+        Returns: volume of reagent to load in the well
+    '''
+    vol = sum(transfer_vols)
+    tot_vol = vol + 2*(vol // len(transfer_vols))
+    if tot_vol % 10 > 0:
+        tot_vol = 10*((tot_vol // 10) + 1)
+    return tot_vol
 
-                if tot_buffer2 % 10 > 0:
-                    tot_buffer2 = 10*((tot_buffer2 // 10) + 1)
 
-                wells2 = list(mm_df.loc[i+1:len(mm_df)-1, 'well'])
+def pack_reagent_wells(
+    name: str, transfer_vols: List[float], capacity: float
+) -> List[List[int]]:
+    '''
+        Packs the transfers of one reagent into as few source wells as
+        possible (first fit decreasing). Every master mix gets its reagent
+        from a single source well, so there is one transfer per master mix.
+        Args:
+            name: name of the reagent, used in error messages
+            transfer_vols: volume of the reagent for each master mix
+            capacity: maximum volume of a source well
+        Returns: list of source wells, each a list of indices into
+        transfer_vols in ascending order; the wells are ordered by their
+        first index
+        Raises: ValueError if a transfer does not fit in a source well
+    '''
+    order = sorted(range(len(transfer_vols)),
+                   key=lambda i: transfer_vols[i], reverse=True)
+    wells = []
+    for i in order:
+        if reagent_well_volume([transfer_vols[i]]) > capacity:
+            raise ValueError(
+                'Cannot fit {0} uL of {1} for one master mix in a {2} uL '
+                'well (including dead volume)'.format(
+                    transfer_vols[i], name, capacity))
+        for well in wells:
+            if reagent_well_volume([transfer_vols[j] for j in well]
+                                   + [transfer_vols[i]]) <= capacity:
+                well.append(i)
                 break
-
-        buffer_dict1 = {'name': ['buffer-1'], 'well': ['F12'], 'plate':
-                        ['reagents_plate']}
-        buffer_dict1['volume'] = [tot_buffer1]
-        buffer_dict1['mm_wells'] = [wells1]
-        reagents_df_list.append(pd.DataFrame.from_dict(buffer_dict1))
-
-        buffer_dict2 = {'name': ['buffer-2'], 'well': ['E12'], 'plate':
-                        ['reagents_plate']}
-        buffer_dict2['volume'] = [tot_buffer2]
-        buffer_dict2['mm_wells'] = [wells2]
-        reagents_df_list.append(pd.DataFrame.from_dict(buffer_dict2))
-
-    else:
-        buffer_dict = {'name': ['buffer'], 'well': ['F12'], 'plate':
-                       ['reagents_plate']}
-        buffer_dict['volume'] = [tot_buffer]
-        buffer_dict['mm_wells'] = [list(mm_df['well'])]
-        reagents_df_list.append(pd.DataFrame.from_dict(buffer_dict))
-
-    water_dict = {'name': ['water'], 'well': ['A1'], 'plate':
-                  ['trough'], 'volume': [water_vol]}
-    water_dict['mm_wells'] = [list(mm_df['well'])]
-
-    reagents_df_list.append(pd.DataFrame.from_dict(water_dict))
-
-    reagents_df = pd.concat(reagents_df_list, ignore_index=True, sort=False)
-
-    return reagents_df
+        else:
+            wells.append([i])
+    return sorted([sorted(well) for well in wells])
 
 
 def get_mm_dicts(
@@ -739,7 +842,7 @@ def index_to_well_name(
 
 def create_transform_metainformation(
     output_path: str, labware_dict: Dict[str, str],
-    triplicate: str, multi: bool
+    replicates: int, multi: bool
 ):
     '''
         Saves transform metainformation and labware informaiton.
@@ -751,8 +854,7 @@ def create_transform_metainformation(
         Args:
             output_path: absolute path to transformation metainformation file
             labware_dict: dictionary of labware to be used
-            triplicate: whether 'single' (triplicate = False) or 'triplicate'
-            (triplicate = True) is selected
+            replicates: number of replicates of each construct
             multi: whether an 8 channel (multi = True) or single channel
             (mutli = False) p300 pipette is being used
     '''
@@ -764,10 +866,7 @@ def create_transform_metainformation(
         csvwriter.writerow('')
         csvwriter.writerow(['SOC well index (in trough):', '3'])
         csvwriter.writerow('')
-        if triplicate:
-            csvwriter.writerow(['Triplicate'])
-        else:
-            csvwriter.writerow(['Single'])
+        csvwriter.writerow([replicates_label(replicates)])
         csvwriter.writerow('')
         if multi:
             csvwriter.writerow(['P300 pipette type:', 'p300 multi'])
@@ -791,12 +890,196 @@ def create_transform_metainformation(
         csvwriter.writerow('')
 
 
+def generate_dna_locations(
+    dna_plate_map_dict: Dict[str, List[List]]
+) -> Dict[str, Tuple[str, str]]:
+    '''
+        Maps each part to the plate and well it is taken from, so the
+        assembly protocol does not search the plate maps for every part.
+        If a part is in more than one well, the first well (by plate, row
+        then column) is used.
+        Args: dna_plate_map_dict = the dictionary of parts
+        Returns: dictionary with key = part name, value = tuple of plate
+        name and well name, e.g. ('input-dna-map', 'B1')
+    '''
+    dna_locations = {}
+    for plate_name, plate_map in dna_plate_map_dict.items():
+        for i, row in enumerate(plate_map):
+            for j, dna_name in enumerate(row):
+                if dna_name and dna_name not in dna_locations:
+                    dna_locations[dna_name] = (
+                        plate_name, chr(ord('A') + i) + str(j + 1))
+    return dna_locations
+
+
+def generate_combination_wells(
+    combinations_to_make: List[Dict]
+) -> Dict[str, str]:
+    '''
+        Maps each construct to its well in the reaction plate, constructs
+        fill the plate column by column in the order they are listed.
+        Args: combinations_to_make = list of construct dictionaries
+        Returns: dictionary with key = construct name, value = well name
+    '''
+    combination_wells = {}
+    for i, combination in enumerate(combinations_to_make):
+        combination_wells.setdefault(
+            combination['name'], chr(ord('A') + i % 8) + str(i // 8 + 1))
+    return combination_wells
+
+
+def well_travel_key(
+    well: str
+) -> Tuple[int, int]:
+    '''
+        Sort key putting reaction plate wells in travel order: column by
+        column, going down columns 1, 3, ... and up columns 2, 4, ..., so
+        the pipette moves on to a neighbouring well rather than back to row A
+        Args: well = well name, e.g. 'B2'
+        Returns: tuple of column index and signed row index, e.g. (1, -1)
+    '''
+    column = int(well[1:]) - 1
+    row = ord(well[0]) - ord('A')
+    return column, -row if column % 2 else row
+
+
+def plan_source_transfers(
+    stage: str, plate: str, well: str, dispenses: Dict[str, float],
+    wash: bool = False
+) -> List[Dict]:
+    '''
+        Plans the transfers out of one source well, all made with one tip.
+        Destinations are visited in travel order and share aspirations of
+        at most P10_MAX_VOL. A volume larger than P10_MAX_VOL is transferred
+        on its own, in equal shots.
+        Args:
+            stage: stage of the assembly plan the transfers belong to
+            plate: labware holding the source well
+            well: source well
+            dispenses: dictionary with key = destination well, value =
+            volume to transfer
+            wash: whether the tip is washed before going back to the source
+        Returns: list of steps, see generate_assembly_plan
+    '''
+    steps = []
+    step = None
+    for dest in sorted(dispenses, key=well_travel_key):
+        vol = dispenses[dest]
+        if vol > P10_MAX_VOL:
+            shots = int(-(-vol // P10_MAX_VOL))
+            steps += [{'dests': [dest], 'volumes': [vol / shots]}
+                      for _ in range(shots)]
+            step = None
+            continue
+        if step is None or sum(step['volumes']) + vol > P10_MAX_VOL:
+            step = {'dests': [], 'volumes': []}
+            steps.append(step)
+        step['dests'].append(dest)
+        step['volumes'].append(vol)
+    return [{'stage': stage, 'action': 'distribute', 'plate': plate,
+             'well': well, 'dests': step['dests'],
+             'volumes': step['volumes'], 'new_tip': int(index == 0),
+             'wash': int(wash and index > 0)}
+            for index, step in enumerate(steps)]
+
+
+def generate_assembly_plan(
+    dna_plate_map_dict: Dict[str, List[List]],
+    combinations_to_make: List[Dict],
+    reagent_to_mm_dict: Dict, mm_dict: List[Dict]
+) -> List[Dict]:
+    '''
+        Plans the liquid handling of the assembly protocol, grouping the
+        reagent, master mix and part transfers by source well across all
+        master mixes and constructs, so each source well is visited with a
+        single tip.
+        Reagents are added to the master mix wells (water first) and each
+        master mix is mixed, then the master mixes are added to the empty
+        construct wells and finally the parts. As the part tip goes into
+        the master mix, it is washed in both wash wells before it goes back
+        to a part well.
+        Args:
+            dna_plate_map_dict: the dictionary of parts
+            combinations_to_make: the list of dictionaries of constructs
+            reagent_to_mm_dict: dictionary directing where to transfer each
+            reagent to make master mixes, see get_mm_dicts
+            mm_dict: mm_df rows stored as dictionaries in list
+        Returns: list of steps executed in order by the assembly template,
+        each a dict with 'stage' ('reagents', 'master_mix' or 'parts'),
+        'action' ('distribute' or 'mix'), 'plate' (labware of the source
+        well: 'trough', 'reagents_plate', 'reaction_plate' or a DNA plate
+        name), 'well' (source well), 'dests' (reaction plate wells),
+        'volumes' (one per destination), 'new_tip' (1 if the step takes a
+        new tip) and 'wash' (1 if the tip is washed first). A distribute
+        is a single aspiration dispensed into each destination in turn; a
+        mix mixes each destination with a new tip
+        Raises: ValueError if a part of a construct is not in the plate maps
+    '''
+    dna_locations = generate_dna_locations(dna_plate_map_dict)
+    for combination in combinations_to_make:
+        for part in combination['parts']:
+            if part not in dna_locations:
+                raise ValueError(
+                    'Could not find dna piece named "{0}"'.format(part))
+    combination_wells = generate_combination_wells(combinations_to_make)
+    plan = []
+
+    mm_wells = []
+    for well in sorted(reagent_to_mm_dict, key=lambda well: not any(
+            transfer[0] == 'trough' for transfer in reagent_to_mm_dict[well])):
+        dispenses = {}
+        for plate, mm_well, vol in reagent_to_mm_dict[well]:
+            if mm_well and float(vol) > 0:
+                dispenses[mm_well] = float(vol)
+        if dispenses:
+            plan += plan_source_transfers('reagents', plate, well, dispenses)
+            mm_wells += [mm_well for mm_well in dispenses
+                         if mm_well not in mm_wells]
+    if mm_wells:
+        plan.append({'stage': 'reagents', 'action': 'mix', 'plate': '',
+                     'well': '', 'dests': sorted(mm_wells,
+                                                 key=well_travel_key),
+                     'volumes': [], 'new_tip': 1, 'wash': 0})
+
+    for mm in mm_dict:
+        if mm['well'] and mm['combinations']:
+            plan += plan_source_transfers(
+                'master_mix', 'reaction_plate', mm['well'],
+                {combination_wells[name]: mm['vol_per_assembly']
+                 for name in mm['combinations']})
+
+    # Parts are taken plate by plate, in travel order within each plate
+    part_dispenses = {}
+    for combination in combinations_to_make:
+        dest = combination_wells[combination['name']]
+        for part in combination['parts']:
+            dispenses = part_dispenses.setdefault(dna_locations[part], {})
+            dispenses[dest] = dispenses.get(dest, 0) + PART_VOL
+    dna_plates = list(dna_plate_map_dict)
+    for plate, well in sorted(part_dispenses, key=lambda source: (
+            dna_plates.index(source[0]), well_travel_key(source[1]))):
+        plan += plan_source_transfers(
+            'parts', plate, well, part_dispenses[(plate, well)], wash=True)
+    return plan
+
+
+def count_plan_tips(
+    assembly_plan: List[Dict]
+) -> int:
+    '''
+        Counts the p10 tips used by an assembly plan
+        Args: assembly_plan = list of steps, see generate_assembly_plan
+        Returns: number of tips
+    '''
+    return sum(len(step['dests']) if step['action'] == 'mix'
+               else step['new_tip'] for step in assembly_plan)
+
+
 def create_protocol(
-    dna_plate_map_dict: Dict[str, List],
+    assembly_plan: List[Dict],
     combinations_to_make: List[Dict],
-    reagent_to_mm_dict: Dict, mm_dict: Dict,
     assembly_template_path: str, transform_template_path: str,
-    output_folder_path: str, thermocycle: bool, triplicate: str, multi: bool,
+    output_folder_path: str, thermocycle: bool, replicates: int, multi: bool,
     p10Mount: str, p300Mount: str, p10_type: str, p300_type: str,
     reaction_plate_type: str, reagent_plate_type: str, trough_type: str,
     agar_plate_type: str
@@ -805,14 +1088,9 @@ def create_protocol(
         Generates the assembly and transformation protocols used by opentrons.
         Returns the paths of the assembly and transform scripts.
         Args:
-            dna_plate_map_dict: the dictionary of parts
+            assembly_plan: the assembly transfers, see generate_assembly_plan
             combinations_to_make: the list of dictionaries of
             constructs
-            reagent_to_mm_dict: dictionary directing where to transfer each
-            reagent to to make master mixes, key = reagent well, value =
-            list of tuples of reagent plate (different for water and other
-            reagents), master mix well, and volume to be transferred
-            mm_dict_list = mm_df rows stored as dictionaries in list
             assembly_template_path: the absolute path of the assembly template
             script
             transform_template_path: the absolute path of the transformation
@@ -821,8 +1099,7 @@ def create_protocol(
             will contain the assembly and transformation protocols
             thermocycle: whether or not the Opentrons thermocycler module
             is being used
-            triplicate: whether 'single' (triplicate = False) or 'triplicate'
-            (triplicate = True) is selected
+            replicates: number of replicates of each construct
             multi: whether an 8 channel (multi = True) or single channel
             (mutli = False) p300 pipette is being used
             p10_mount: "left" or "right", the Opentrons pipette mount options
@@ -835,58 +1112,42 @@ def create_protocol(
             reagent plate (for master mix and non-water reagents)
             trough_type: the name of the trough type used for water and soc
             agar_plate_type: the name of the agar plate type used
+        Raises: ValueError if the assembly needs more tip racks than fit
+        on the deck
     '''
-
-    # Get the contents of colony_pick_template.py, which contains the body of
-    # the protocol.
-    with open(assembly_template_path) as assembly_template_file:
-        assembly_template_string = assembly_template_file.read()
-    assembly_path = output_folder_path + '/' + 'moclo_assembly_protocol.py'
-    with open(assembly_path, "w+") as assembly_file:
-        # Paste in plate maps at top of file.
-        assembly_file.write('dna_plate_map_dict = ' +
-                            json.dumps(dna_plate_map_dict) + '\n\n')
-        assembly_file.write('combinations_to_make = '
-                            + json.dumps(combinations_to_make) + '\n\n')
-        assembly_file.write('reagent_to_mm = '
-                            + json.dumps(reagent_to_mm_dict) + '\n\n')
-        assembly_file.write('master_mix_dicts = '
-                            + json.dumps(mm_dict) + '\n\n')
-        assembly_file.write('thermocycle = ' + str(thermocycle) + '\n\n')
-        assembly_file.write('pipetteMount10 = "' + p10Mount + '"\n\n')
-        assembly_file.write('p10_type = "' + p10_type + '"\n\n')
-        assembly_file.write(
-            'reaction_plate_type = "' + reaction_plate_type + '"\n\n')
-        assembly_file.write(
-            'reagent_plate_type = "' + reagent_plate_type + '"\n\n')
-        assembly_file.write(
-            'trough_type = "' + trough_type + '"\n\n')
-
-        # Paste the rest of the protocol.
-        assembly_file.write(assembly_template_string)
-
-    with open(transform_template_path) as transform_template_file:
-        transform_template_string = transform_template_file.read()
-    transform_path = output_folder_path + '/' + 'transform_moclo_protocol.py'
-    with open(transform_path, "w+") as transform_file:
-        # Paste in plate maps at top of file.
-        transform_file.write('combinations_to_make = '
-                             + json.dumps(combinations_to_make) + '\n\n')
-        transform_file.write('multi = ' + str(multi) + '\n\n')
-        transform_file.write('triplicate = ' + str(triplicate) + '\n\n')
-        transform_file.write('pipetteMount10 = "' + p10Mount + '"\n\n')
-        transform_file.write('pipetteMount300 = "' + p300Mount + '"\n\n')
-        transform_file.write('p10_type = "' + p10_type + '"\n\n')
-        transform_file.write('p300_type = "' + p300_type + '"\n\n')
-        transform_file.write(
-            'reaction_plate_type = "' + reaction_plate_type + '"\n\n')
-        transform_file.write(
-            'agar_plate_type = "' + agar_plate_type + '"\n\n')
-        transform_file.write(
-            'trough_type = "' + trough_type + '"\n\n')
-
-        # Paste the rest of the protocol.
-        transform_file.write(transform_template_string)
+    tips = count_plan_tips(assembly_plan)
+    no_tipracks = max(1, -(-tips // TIPS_PER_RACK))
+    if no_tipracks > len(P10_TIPRACK_SLOTS):
+        raise ValueError(
+            'The assembly needs {0} p10 tips, more than the {1} tip racks '
+            'that fit on the deck'.format(tips, len(P10_TIPRACK_SLOTS)))
+
+    # Paste in the maps at top of the cached template bodies.
+    assembly_path = os.path.join(
+        output_folder_path, 'moclo_assembly_protocol.py')
+    ot2_templates.write_script(assembly_path, assembly_template_path, {
+        'assembly_plan': assembly_plan,
+        'tiprack_slots': P10_TIPRACK_SLOTS[:no_tipracks],
+        'thermocycle': thermocycle,
+        'pipetteMount10': p10Mount,
+        'p10_type': p10_type,
+        'reaction_plate_type': reaction_plate_type,
+        'reagent_plate_type': reagent_plate_type,
+        'trough_type': trough_type})
+
+    transform_path = os.path.join(
+        output_folder_path, 'transform_moclo_protocol.py')
+    ot2_templates.write_script(transform_path, transform_template_path, {
+        'combinations_to_make': combinations_to_make,
+        'multi': multi,
+        'replicates': replicates,
+        'pipetteMount10': p10Mount,
+        'pipetteMount300': p300Mount,
+        'p10_type': p10_type,
+        'p300_type': p300_type,
+        'reaction_plate_type': reaction_plate_type,
+        'agar_plate_type': agar_plate_type,
+        'trough_type': trough_type})
 
     return assembly_path, transform_path
 
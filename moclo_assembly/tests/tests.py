@@ -2,6 +2,8 @@ import unittest
 from unittest.mock import patch
 import sys
 import os
+import csv
+import tempfile
 import pandas as pd
 # sys.path.append("C:/Users/gabri/Documents/Uni/iGEM/OT2-MoClo-Transformation-Ecoli-master/moclo_transformation/final_version")
 sys.path.append("/home/runner/work/DJANGO-Assembly-Methods/DJANGO-Assembly-Methods/moclo_assembly/moclo_transformation/")
@@ -49,6 +51,241 @@ class MoCloInputTestCase(unittest.TestCase):
             moclo_transform_generator.check_number_of_combinations(
                 'triplicate', self.combinations_to_make)
 
+    def test_generate_dna_locations(self):
+        locations = moclo_transform_generator.generate_dna_locations(
+            self.dna_plate_map_dict)
+        self.assertEqual(locations['I13453_AB-1'], ('input-dna-map', 'A1'))
+        self.assertEqual(locations['J23100_AB-1'], ('input-dna-map', 'B1'))
+        self.assertEqual(locations['deGFP_CD-4'], ('input-dna-map', 'H7'))
+        self.assertNotIn('', locations)
+
+    def test_generate_combination_wells(self):
+        wells = moclo_transform_generator.generate_combination_wells(
+            self.combinations_to_make)
+        self.assertEqual(len(wells), len(self.combinations_to_make))
+        self.assertEqual(wells[self.combinations_to_make[0]['name']], 'A1')
+        self.assertEqual(wells[self.combinations_to_make[9]['name']], 'B2')
+
+    def test_create_metainformation(self):
+        dna_plate_map_dict = dict(self.dna_plate_map_dict,
+                                  **{'second-map': [['extra-part']]})
+        with tempfile.TemporaryDirectory() as output_dir:
+            parts, comb, mm, reagents = \
+                moclo_transform_generator.create_metainformation(
+                    os.path.join(output_dir, 'meta.csv'), dna_plate_map_dict,
+                    self.combinations_to_make,
+                    moclo_transform_generator.labware_dict, True, False)
+        self.assertEqual(len(parts), 73)
+        self.assertEqual(len(comb), len(self.combinations_to_make))
+        combinations = dict(zip(parts['name'], parts['combinations']))
+        self.assertEqual(combinations['extra-part'], '0')
+        self.assertListEqual(
+            combinations['DVK_CD-1'],
+            [c['name'] for c in self.combinations_to_make
+             if 'DVK_CD-1' in c['parts']])
+
+    def test_get_replicates(self):
+        self.assertEqual(
+            moclo_transform_generator.get_replicates('triplicate'), 3)
+        self.assertEqual(moclo_transform_generator.get_replicates(4), 4)
+        for limit in [0, 5, True, '2']:
+            with self.assertRaises(ValueError):
+                moclo_transform_generator.get_replicates(limit)
+
+    def test_generate_and_save_output_plate_maps(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            replicates, agar_path = \
+                moclo_transform_generator.generate_and_save_output_plate_maps(
+                    self.combinations_to_make[:10], 3, output_dir)
+            with open(agar_path, newline='') as f:
+                rows = list(csv.reader(f))
+        names = [c['name'] for c in self.combinations_to_make[:10]]
+        self.assertEqual(replicates, 3)
+        self.assertEqual(len(rows), 8)
+        # second reaction plate column is spotted on agar columns 4 to 6
+        self.assertListEqual(rows[0], [names[0]] * 3 + [names[8]] * 3)
+        self.assertListEqual(rows[2], [names[2]] * 3)
+
+    def test_split_combinations(self):
+        comb3 = self.combinations_to_make * 3
+        runs = moclo_transform_generator.split_combinations('single', comb3)
+        self.assertListEqual([len(run) for run in runs], [88, 88, 40])
+        self.assertListEqual([c for run in runs for c in run], comb3)
+        runs = moclo_transform_generator.split_combinations(
+            'triplicate', self.combinations_to_make)
+        self.assertListEqual([len(run) for run in runs], [32, 32, 8])
+        runs = moclo_transform_generator.split_combinations(
+            2, self.combinations_to_make)
+        self.assertListEqual([len(run) for run in runs], [48, 24])
+        with self.assertRaises(ValueError):
+            moclo_transform_generator.split_combinations('', comb3)
+
+    def test_split_combinations_master_mix_wells(self):
+        two_parts = [{'name': '2-{}'.format(i),
+                      'parts': ['E0040m_CD-1', 'DVK_CD-1']}
+                     for i in range(88)]
+        three_parts = [{'name': '3-{}'.format(i),
+                        'parts': ['J23106_AB-1', 'B0034m_BC-1', 'DVK_AE-1']}
+                       for i in range(88)]
+        for combinations, sizes in [(two_parts, [85, 3]),
+                                    (three_parts, [87, 1])]:
+            runs = moclo_transform_generator.split_combinations(
+                'single', combinations)
+            self.assertListEqual([len(run) for run in runs], sizes)
+            for run in runs:
+                _, comb, mm, _ = \
+                    moclo_transform_generator.create_metainformation(
+                        os.devnull, self.dna_plate_map_dict, run,
+                        moclo_transform_generator.labware_dict,
+                        True, 1)
+                self.assertFalse(set(mm['well']) & set(comb['well']))
+            with tempfile.TemporaryDirectory() as output_dir:
+                construct_path = os.path.join(output_dir, 'constructs.csv')
+                with open(construct_path, 'w', newline='') as f:
+                    writer = csv.writer(f)
+                    for comb in combinations:
+                        writer.writerow([comb['name']] + comb['parts'])
+                output_paths = moclo_transform_generator.moclo_function(
+                    output_dir, [construct_path],
+                    [os.path.join(TEST_DIR, 'testfiles/input-dna-map.csv')])
+                names = [os.path.basename(path) for path in output_paths]
+                self.assertNotIn('MoClo_error.txt', names)
+                self.assertEqual(names.count('moclo_assembly_protocol.py'),
+                                 len(sizes))
+
+    def test_moclo_function_multiple_runs(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            construct_path = os.path.join(output_dir, 'constructs.csv')
+            with open(construct_path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                for i, comb in enumerate(self.combinations_to_make * 3):
+                    writer.writerow(['{}-{}'.format(comb['name'], i)]
+                                    + comb['parts'])
+            output_paths = moclo_transform_generator.moclo_function(
+                output_dir, [construct_path],
+                [os.path.join(TEST_DIR, 'testfiles/input-dna-map.csv')])
+            names = [os.path.relpath(path, output_dir)
+                     for path in output_paths]
+            for run in ['run_1', 'run_2', 'run_3']:
+                self.assertIn(
+                    os.path.join(run, 'moclo_assembly_protocol.py'), names)
+                self.assertIn(os.path.join(run, 'Agar_plate.csv'), names)
+            self.assertEqual(len(names), 3 * 5 + 1)
+
+    def test_moclo_function_from_tables(self):
+        construct_path = os.path.join(
+            TEST_DIR, 'testfiles/combination-to-make-72.csv')
+        part_path = os.path.join(TEST_DIR, 'testfiles/input-dna-map.csv')
+        construct_table = pd.DataFrame(
+            [[comb['name']] + comb['parts']
+             for comb in self.combinations_to_make])
+        part_table = pd.read_csv(part_path, header=None, dtype=str,
+                                 keep_default_na=False)
+        with tempfile.TemporaryDirectory() as csv_dir, \
+                tempfile.TemporaryDirectory() as table_dir:
+            csv_paths = moclo_transform_generator.moclo_function(
+                csv_dir, [construct_path], [part_path])
+            table_paths = moclo_transform_generator.moclo_function_from_tables(
+                table_dir, construct_table, {'input-dna-map': part_table})
+            self.assertListEqual(
+                [os.path.relpath(path, csv_dir) for path in csv_paths],
+                [os.path.relpath(path, table_dir) for path in table_paths])
+            for csv_path, table_path in zip(csv_paths, table_paths):
+                with open(csv_path) as f, open(table_path) as g:
+                    self.assertEqual(f.read(), g.read())
+
+    def test_create_mm_df(self):
+        combinations_df = pd.DataFrame({
+            'name': ['c{}'.format(i) for i in range(12)],
+            'no_parts': [2] * 9 + [8] * 3})
+        mm = moclo_transform_generator.create_mm_df(combinations_df)
+        # at most 8 two-part assemblies per master mix well
+        self.assertListEqual(mm['well'].to_list(), ['H12', 'G12', 'F12'])
+        self.assertListEqual(mm['no_assemblies'].to_list(), [8, 1, 3])
+        self.assertListEqual(mm['combinations'][1], ['c8'])
+        self.assertListEqual(mm['buffer_vol'].to_list(), [20, 8, 12])
+        self.assertListEqual(mm['water_vol'].to_list(), [125.0, 50.0, 3.0])
+        with self.assertRaises(ValueError):
+            moclo_transform_generator.create_mm_df(pd.DataFrame({
+                'name': ['c0'], 'no_parts': [9]}))
+
+    def test_pack_reagent_wells(self):
+        # 20 uL per master mix + 40 uL dead volume: 7 master mixes per well
+        self.assertListEqual(
+            moclo_transform_generator.pack_reagent_wells(
+                'buffer', [20] * 6, 180), [list(range(6))])
+        self.assertListEqual(
+            moclo_transform_generator.pack_reagent_wells(
+                'buffer', [20] * 8, 180), [list(range(7)), [7]])
+        self.assertListEqual(
+            moclo_transform_generator.pack_reagent_wells(
+                'buffer', [20, 50, 20, 50], 180), [[0, 1, 2], [3]])
+        self.assertEqual(
+            moclo_transform_generator.reagent_well_volume([20, 50, 20]), 150)
+        with self.assertRaises(ValueError):
+            moclo_transform_generator.pack_reagent_wells('buffer', [100], 180)
+
+    def test_create_reagents_df(self):
+        mm_df = pd.DataFrame({
+            'well': ['H12', 'G12', 'F12', 'E12'], 'buffer_vol': [60] * 4,
+            'ligase_vol': [15.0] * 4, 'enzyme_vol': [40] * 4,
+            'water_vol': [100] * 4})
+        reagents = moclo_transform_generator.create_reagents_df(mm_df)
+        self.assertListEqual(
+            reagents['name'].to_list(),
+            ['ligase', 'restriction_enzyme-1', 'restriction_enzyme-2',
+             'buffer-1', 'buffer-2', 'buffer-3', 'buffer-4', 'water'])
+        self.assertListEqual(
+            reagents['well'].to_list(),
+            ['H12', 'G12', 'F12', 'E12', 'D12', 'C12', 'B12', 'A1'])
+        self.assertListEqual(reagents['mm_wells'][1], ['H12', 'G12'])
+
+
+    def test_well_travel_key(self):
+        self.assertListEqual(
+            sorted(['A1', 'B2', 'A2', 'B1', 'A3'],
+                   key=moclo_transform_generator.well_travel_key),
+            ['A1', 'B1', 'B2', 'A2', 'A3'])
+
+    def test_generate_assembly_plan(self):
+        plan = moclo_transform_generator.generate_assembly_plan(
+            self.dna_plate_map_dict, self.combinations_to_make,
+            self.reagent_to_mm, self.master_mix_dicts)
+        # water goes into the empty master mix wells first
+        self.assertEqual((plan[0]['plate'], plan[0]['well']), ('trough', 'A1'))
+        self.assertEqual(plan[0]['dests'], ['H12'])
+        # 4 uL of master mix per 8 part assembly, two assemblies per aspiration
+        c12_steps = [step for step in plan if step['stage'] == 'master_mix'
+                     and step['well'] == 'C12']
+        self.assertEqual(len(c12_steps), 12)
+        self.assertListEqual(c12_steps[0]['dests'], ['A7', 'B7'])
+        self.assertListEqual([step['new_tip'] for step in c12_steps],
+                             [1] + [0] * 11)
+        # one tip per part well, washed before going back to the part well
+        dvk_steps = [step for step in plan if step['stage'] == 'parts'
+                     and step['well'] == 'F8']
+        self.assertListEqual([len(step['dests']) for step in dvk_steps],
+                             [5, 3])
+        self.assertListEqual([step['wash'] for step in dvk_steps], [0, 1])
+        self.assertListEqual(dvk_steps[0]['dests'],
+                             ['A1', 'B1', 'C1', 'D1', 'E1'])
+        parts = {part for combination in self.combinations_to_make
+                 for part in combination['parts']}
+        self.assertEqual(
+            moclo_transform_generator.count_plan_tips(plan),
+            len(self.reagent_to_mm) + 2 * len(self.master_mix_dicts)
+            + len(parts))
+        # every construct gets 20 uL of master mix and parts
+        construct_vols = {}
+        for step in plan:
+            if step['stage'] != 'reagents':
+                for dest, vol in zip(step['dests'], step['volumes']):
+                    construct_vols[dest] = construct_vols.get(dest, 0) + vol
+        self.assertSetEqual(set(construct_vols.values()), {20})
+        with self.assertRaises(ValueError):
+            moclo_transform_generator.generate_assembly_plan(
+                self.dna_plate_map_dict, [{'name': 'c', 'parts': ['x']}],
+                self.reagent_to_mm, self.master_mix_dicts)
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.shortcuts import render
 from django.contrib.auth.models import User, Group
 from rest_framework import viewsets, generics
@@ -6,9 +7,9 @@ from .serializers import MocloSerializer
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from .moclo_transformation.moclo_transform_generator import moclo_function
-
 from .models import MocloModel
+from assembly_methods import retention
+from assembly_methods.models import OutputFolder
 
 import os
 import random
@@ -22,6 +23,9 @@ class MocloView(viewsets.ModelViewSet):
     serializer_class = MocloSerializer
     
     def create(self, request, *args, **kwargs):
+        # Imported on first use, see assembly_methods.preload
+        from .moclo_transformation.moclo_transform_generator import moclo_function
+
         input_data = request.data
         new_input = MocloModel.objects.create(
             single_triplicate=input_data["single_triplicate"],
@@ -43,13 +47,16 @@ class MocloView(viewsets.ModelViewSet):
 
         #full_parts_paths = []
         #full_parts_paths.append(full_parts_path)
-        output = 'Moclo_files/output'
+        output = settings.MOCLO_OUTPUT_ROOT
         random = get_random_string(20)
         file_output_path = os.path.join(output,random)
         agar_path = os.path.join(os.path.abspath(file_output_path), 'Agar_plate.csv')
         python_path = os.path.join(os.path.abspath(file_output_path), 'moclo_transform_protocol.py')
         moclo_function(file_output_path, single_triplicate_string, full_dna_path, full_combinations_path)
         #print(all_outputs)
+        if os.path.isdir(file_output_path):
+            # Swept by the worker pool and sweep_outputs, not in the request
+            retention.track(file_output_path, OutputFolder.MOCLO)
 
         Full_information_new_input = MocloModel.objects.create(
             single_triplicate=input_data["single_triplicate"],
@@ -9,22 +9,36 @@ from typing import List, Dict, Tuple, Union
 from rdflib import URIRef
 from sbol2 import *
 from collections import deque
-from random import sample
+from functools import lru_cache
+import random
 from plateo.exporters import plate_to_platemap_spreadsheet
+from assembly_methods import metrics
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
+@lru_cache(maxsize=None)
+def standard_linkers() -> Document:
+    """Returns the document of the standard BASIC linkers.
+
+    Read on first use rather than at import, and shared by every parser.
+    """
+    return Document(os.path.join(BASE_DIR, "sbol_parser_api",
+                                 "basic_linkers_standard_extra.xml"))
+
+
 class ParserSBOL:
     def __init__(
         self,
         sbol_document: Document,
         outdir: str = os.getcwd(),
-        linker_file: Document = Document(os.path.join(BASE_DIR, "sbol_parser_api", "basic_linkers_standard_extra.xml"))
+        linker_file: Document = None
     ):
         self.doc = sbol_document
         self.outdir = outdir
-        self.linker_file = linker_file
+        # None for the standard linkers, see standard_linkers
+        self.linker_file = (standard_linkers() if linker_file is None
+                            else linker_file)
         self.construct_csv_paths = []
         self.part_csv_paths = []
         self.assembly_types = ["basic", "moclo", "bio_bricks"]
@@ -35,7 +49,8 @@ class ParserSBOL:
             part_info: Dict[str, Dict[str, Union[str, int, float]]] = None,
             repeat: bool = False,
             max_construct_wells: int = 96,
-            num_runs: int = 1
+            num_runs: int = 1,
+            seed: int = None
     ) -> Dict[str, List[str]]:
         """Create construct and parts/linkers CSVs for DNABot input
         Args:
@@ -50,51 +65,115 @@ class ParserSBOL:
                 constructs plate. (default: 96)
             num_runs (int): Number of runs (i.e. construct plates) to be
                 created. (default: 1)
+            seed (int): Seed of the construct sampling, so that the same
+                document always gives the same plates. (default: None,
+                sampled differently on every call)
         Returns:
             Dict[str,List[str]]: Dictionary containing lists of paths to csvs
                 generated.
         Raises:
             ValueError: If `assembly` is invalid.
         """
+        construct_plates = self.get_construct_plates(
+            assembly, repeat, max_construct_wells, num_runs, seed)
+        with metrics.stage(metrics.STAGE_CSV, assembly):
+            for plate in construct_plates:
+                # Create construct CSV
+                self.get_construct_csv_from_plate(plate, assembly)
+                # Write parts/linkers csv
+                self.get_part_linker_csv_from_plate(
+                    plate,
+                    assembly,
+                    part_info
+                )
+        filepaths = {}
+        filepaths['construct_path'] = self.construct_csv_paths
+        filepaths['part_path'] = self.part_csv_paths
+        return filepaths
+
+    def generate_tables(
+            self,
+            assembly: str,
+            part_info: Dict[str, Dict[str, Union[str, int, float]]] = None,
+            repeat: bool = False,
+            max_construct_wells: int = 96,
+            num_runs: int = 1,
+            seed: int = None
+    ) -> Dict[str, Union[List[pd.DataFrame], Dict[str, pd.DataFrame]]]:
+        """Create the construct and parts/linkers tables that generate_csv
+        writes, without writing them. The assembly generators accept these
+        tables in place of the csv paths.
+        Args:
+            See generate_csv.
+        Returns:
+            Dict[str, Union[List[pd.DataFrame], Dict[str, pd.DataFrame]]]:
+                'construct': construct table of each construct plate,
+                'part': parts/linkers tables by the name of their csv without
+                extension (e.g. 'parts_1').
+        Raises:
+            ValueError: If `assembly` is invalid.
+        """
+        construct_plates = self.get_construct_plates(
+            assembly, repeat, max_construct_wells, num_runs, seed)
+        tables = {'construct': [], 'part': {}}
+        with metrics.stage(metrics.STAGE_CSV, assembly):
+            for plate in construct_plates:
+                tables['construct'].append(
+                    self.get_construct_df_from_plate(plate, assembly))
+                tables['part'].update(
+                    self.get_part_linker_tables_from_plate(
+                        plate, assembly, part_info))
+        return tables
+
+    def get_construct_plates(
+            self,
+            assembly: str,
+            repeat: bool = False,
+            max_construct_wells: int = 96,
+            num_runs: int = 1,
+            seed: int = None
+    ) -> List[plateo.Plate]:
+        """Sample the constructs of the document into construct plates.
+        Args:
+            See generate_csv.
+        Returns:
+            List[plateo.Plate]: Construct plates.
+        Raises:
+            ValueError: If `assembly` is invalid.
+        """
         if assembly not in self.assembly_types:
             raise ValueError("Invalid assembly type: %s" % assembly)
         num_samples = max_construct_wells * num_runs
         all_constructs = []
         print("Assembly Method: %s" % assembly)
         # Get list of constructs
-        all_constructs = self.get_constructs()
+        with metrics.stage(metrics.STAGE_ENUMERATE, assembly):
+            all_constructs = self.get_constructs()
+        metrics.CONSTRUCTS_ENUMERATED.inc(
+            len(all_constructs), assembly_type=assembly)
         # Remove constructs with repeated parts using a filter
         if not repeat:
-            all_constructs = self.filter_constructs(all_constructs)
-        # Sample constructs
-        if len(all_constructs) < num_samples:
-            num_samples = len(all_constructs)
-            print("All constructs will be assembled.")
-        sampled = sample(all_constructs, num_samples)
-        # Display number of Component Definitions to be constructed
-        num_designs = len(sampled)
-        print(num_designs, "construct(s) will be assembled.")
-        # Create plateo construct plates
-        construct_plates = self.fill_plates(
-            sampled,
-            "construct",
-            num_runs,
-            plateo.containers.Plate96,
-            max_construct_wells
-        )
-        for plate in construct_plates:
-            # Create construct CSV
-            self.get_construct_csv_from_plate(plate, assembly)
-            # Write parts/linkers csv
-            self.get_part_linker_csv_from_plate(
-                plate,
-                assembly,
-                part_info
+            with metrics.stage(metrics.STAGE_FILTER, assembly):
+                all_constructs = self.filter_constructs(all_constructs)
+        with metrics.stage(metrics.STAGE_PLATE, assembly):
+            # Sample constructs
+            if len(all_constructs) < num_samples:
+                num_samples = len(all_constructs)
+                print("All constructs will be assembled.")
+            sampled = random.Random(seed).sample(all_constructs, num_samples)
+            # Display number of Component Definitions to be constructed
+            num_designs = len(sampled)
+            print(num_designs, "construct(s) will be assembled.")
+            # Create plateo construct plates
+            construct_plates = self.fill_plates(
+                sampled,
+                "construct",
+                num_runs,
+                plateo.containers.Plate96,
+                max_construct_wells
             )
-        filepaths = {}
-        filepaths['construct_path'] = self.construct_csv_paths
-        filepaths['part_path'] = self.part_csv_paths
-        return filepaths
+        metrics.CONSTRUCTS_PLATED.inc(num_designs, assembly_type=assembly)
+        return construct_plates
 
     def get_root_compdefs(
             self,
@@ -1381,19 +1460,22 @@ class ParserSBOL:
         df = pd.DataFrame(data=sparr, columns=header)
         return df
 
-    def get_part_linker_csv_from_plate(
+    def get_part_linker_tables_from_plate(
         self,
         construct_plate: plateo.Plate,
         assembly: str,
         part_info: Dict[str, Dict[str, Union[str, int, float]]] = None
-    ):
-        """Get part/linker CSV from plate.
+    ) -> Dict[str, pd.DataFrame]:
+        """Get part/linker tables from plate, as written to the CSVs.
         Args:
             construct_plate (plateo.Plate): Construct plates from which
                 parts and linkers are derived.
             assembly (str): Type of assembly.
             part_info (Dict[str, Dict[str, Union[str, int, float]]]):
                 Dictionary of parts and associated information.
+        Returns:
+            Dict[str, pd.DataFrame]: Tables by CSV name without extension.
+                Moclo tables are platemaps, written without header.
         """
         def _get_part_name(well: plateo.Well) -> str:
             """Gets name of part contained in well. Used to generate platemap
@@ -1437,44 +1519,40 @@ class ParserSBOL:
             96,
             part_info
         )
-        for plate in part_plates:
+        part_tables = {}
+        for index, plate in enumerate(part_plates):
             if assembly == "basic":
-                # Create df
-                part_linker_df = self.get_part_linker_df_from_plate(plate)
-                filepath = \
-                    os.path.join(
-                        self.outdir,
-                        "part_linker_" + str(part_plates.index(plate) + 1) + ".csv"
-                    )
-                part_linker_df.to_csv(
-                    filepath,
-                    index=False
-                )
-                self.part_csv_paths.append(filepath)
+                part_tables["part_linker_" + str(index + 1)] = \
+                    self.get_part_linker_df_from_plate(plate)
             elif assembly == "moclo":
-                filepath = \
-                    os.path.join(
-                        self.outdir,
-                        "parts_" + str(part_plates.index(plate) + 1) + ".csv"
-                    )
                 # Generate platemap
-                plate_to_platemap_spreadsheet(
-                    plate,
-                    _get_part_name,
-                    filepath,
-                    headers=False
-                )
-                self.part_csv_paths.append(filepath)
+                part_tables["parts_" + str(index + 1)] = \
+                    plate_to_platemap_spreadsheet(plate, _get_part_name)
             elif assembly == "bio_bricks":
-                # Create df
-                part_linker_df = self.get_part_linker_df_from_plate(plate)
-                filepath = \
-                    os.path.join(
-                        self.outdir,
-                        "parts_" + str(part_plates.index(plate) + 1) + ".csv"
-                    )
-                part_linker_df.to_csv(
-                    filepath,
-                    index=False
-                )
-                self.part_csv_paths.append(filepath)
+                part_tables["parts_" + str(index + 1)] = \
+                    self.get_part_linker_df_from_plate(plate)
+        return part_tables
+
+    def get_part_linker_csv_from_plate(
+        self,
+        construct_plate: plateo.Plate,
+        assembly: str,
+        part_info: Dict[str, Dict[str, Union[str, int, float]]] = None
+    ):
+        """Get part/linker CSV from plate.
+        Args:
+            construct_plate (plateo.Plate): Construct plates from which
+                parts and linkers are derived.
+            assembly (str): Type of assembly.
+            part_info (Dict[str, Dict[str, Union[str, int, float]]]):
+                Dictionary of parts and associated information.
+        """
+        part_tables = self.get_part_linker_tables_from_plate(
+            construct_plate, assembly, part_info)
+        for name, part_linker_df in part_tables.items():
+            filepath = os.path.join(self.outdir, name + ".csv")
+            if assembly == "moclo":
+                part_linker_df.to_csv(filepath, header=False, index=False)
+            else:
+                part_linker_df.to_csv(filepath, index=False)
+            self.part_csv_paths.append(filepath)